@@ -1,64 +1,66 @@
-from fastapi import APIRouter  # v2 live_store
-from app.api.v1.endpoints import (
-    stores, 
-    auth, 
-    platform_users, 
-    subscription_plans, 
-    platform_stores, 
-    platform_payments,
-    razorpay as rzp_router,
-    dashboard,
-    platform_subscriptions,
-    platform_themes,
-    public,
-    merchant_dashboard,
-    onboarding,
-    upload,
-    domains,
-    products,
-    categories,
-    orders,
-    customers,
-    live_store,
-    reviews,
-    notices,
-    brands,
-    team
-)
+"""
+API v1 routes, in groups that can be served separately.
 
-api_router = APIRouter()
+Endpoint modules are imported only when their group is included, so a
+process serving a subset (API_ROUTER_GROUPS, e.g. storefront-only workers)
+does not import the admin, theme build or merchant modules at all. Routers
+are included straight into the app: going through an intermediate APIRouter
+would build every route twice at startup.
+"""
+import importlib
+from typing import Iterable, Optional
 
-# Include individual endpoint routers
-api_router.include_router(domains.router, prefix="/store", tags=["domains"])
-api_router.include_router(products.router, prefix="/store/products", tags=["products"])
-api_router.include_router(categories.router, prefix="/store/categories", tags=["categories"])
-api_router.include_router(orders.router, prefix="/store/orders", tags=["orders"])
-api_router.include_router(customers.router, prefix="/store/customers", tags=["customers"])
-api_router.include_router(reviews.router, prefix="/store/reviews", tags=["reviews"])
-api_router.include_router(notices.router, prefix="/notices", tags=["notices"])
-api_router.include_router(brands.router, prefix="/store/brands", tags=["brands"])
-api_router.include_router(team.router, prefix="/store/team", tags=["team"])
-api_router.include_router(stores.router, prefix="/store", tags=["stores"])
-
-api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
-api_router.include_router(platform_users.router, prefix="/platform", tags=["platform-users"])
-api_router.include_router(subscription_plans.router, prefix="/platform", tags=["subscription-plans"])
-api_router.include_router(platform_stores.router, prefix="/platform", tags=["platform-stores"])
-api_router.include_router(platform_payments.router, prefix="/platform", tags=["platform-payments"])
-api_router.include_router(platform_subscriptions.router, prefix="/platform", tags=["platform-subscriptions"])
-api_router.include_router(platform_themes.router, prefix="/platform", tags=["platform-themes"])
-api_router.include_router(rzp_router.router, prefix="/payments/razorpay", tags=["razorpay"])
-api_router.include_router(dashboard.router, prefix="/platform/dashboard", tags=["dashboard"])
-api_router.include_router(merchant_dashboard.router, prefix="/merchant/dashboard", tags=["merchant-dashboard"])
-api_router.include_router(onboarding.router, prefix="/onboarding", tags=["onboarding"])
-api_router.include_router(upload.router, prefix="/upload", tags=["upload"])
-
-# Public endpoints (no auth required)
-api_router.include_router(public.router, prefix="", tags=["public"])
-api_router.include_router(live_store.router, prefix="/s", tags=["live-store"])
+from app.core.config import settings
 
+GROUPS = ("merchant", "auth", "platform", "payments", "storefront", "checkout")
 
+# (group, "module[:router attribute]", prefix, tags), in inclusion order: earlier routes match first.
+# "storefront" is the public, read-only traffic app/storefront.py serves on its own.
+ROUTES = [
+    ("merchant", "domains", "/store", ["domains"]),
+    # Bulk routes first so /export and /import are not captured by /{product_id}
+    ("merchant", "product_bulk", "/store/products", ["products"]),
+    ("merchant", "products", "/store/products", ["products"]),
+    ("merchant", "categories", "/store/categories", ["categories"]),
+    ("merchant", "orders", "/store/orders", ["orders"]),
+    ("merchant", "customers", "/store/customers", ["customers"]),
+    ("merchant", "reviews", "/store/reviews", ["reviews"]),
+    ("merchant", "notices", "/notices", ["notices"]),
+    ("storefront", "notices:public_router", "/notices", ["notices"]),
+    ("merchant", "brands", "/store/brands", ["brands"]),
+    ("merchant", "team", "/store/team", ["team"]),
+    ("merchant", "stores", "/store", ["stores"]),
 
+    ("auth", "auth", "/auth", ["auth"]),
+    ("platform", "platform_users", "/platform", ["platform-users"]),
+    ("platform", "subscription_plans", "/platform", ["subscription-plans"]),
+    ("platform", "platform_stores", "/platform", ["platform-stores"]),
+    ("platform", "platform_payments", "/platform", ["platform-payments"]),
+    ("platform", "platform_subscriptions", "/platform", ["platform-subscriptions"]),
+    ("platform", "platform_themes", "/platform", ["platform-themes"]),
+    ("payments", "razorpay", "/payments/razorpay", ["razorpay"]),
+    ("platform", "dashboard", "/platform/dashboard", ["dashboard"]),
+    ("platform", "diagnostics", "/platform/diagnostics", ["diagnostics"]),
+    ("merchant", "merchant_dashboard", "/merchant/dashboard", ["merchant-dashboard"]),
+    ("merchant", "onboarding", "/onboarding", ["onboarding"]),
+    ("merchant", "upload", "/upload", ["upload"]),
 
+    # Public endpoints (no auth required)
+    ("storefront", "public", "", ["public"]),
+    ("storefront", "live_store", "/s", ["live-store"]),
+    ("checkout", "checkout", "/s", ["checkout"]),
+    ("storefront", "images", "/images", ["images"]),
+]
 
 
+def include_api(target, prefix: str = "/api/v1", groups: Optional[Iterable[str]] = None) -> None:
+    """Include the routers of `groups` (default: settings.API_ROUTER_GROUPS) into an app or router."""
+    enabled = set(settings.API_ROUTER_GROUPS if groups is None else groups)
+    unknown = enabled - set(GROUPS)
+    if unknown:
+        raise ValueError(f"Unknown API router groups {sorted(unknown)}; expected some of {list(GROUPS)}")
+    for group, name, route_prefix, tags in ROUTES:
+        if group in enabled:
+            module_name, _, attribute = name.partition(":")
+            module = importlib.import_module(f"app.api.v1.endpoints.{module_name}")
+            target.include_router(getattr(module, attribute or "router"), prefix=prefix + route_prefix, tags=tags)
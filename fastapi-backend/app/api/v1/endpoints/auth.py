@@ -2,24 +2,27 @@ from fastapi import APIRouter, HTTPException, Depends
 from app.schemas.auth import SendOTPRequest, VerifyOTPRequest, UserRegister, UserLogin, UserMe
 from app.core.supabase_client import supabase, supabase_admin
 from app.core.auth_utils import create_access_token, verify_token
-import random
+from app.core.otp import phone_otp, OTPRateLimited, OTP_OK, VERIFY_ERRORS
 
 router = APIRouter()
 
-# Temporary in-memory storage for OTPs (In production, use Redis or Database)
-otp_storage = {}
+
+def _rate_limited(e: OTPRateLimited) -> HTTPException:
+    return HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
 
 @router.post("/send-otp")
 async def send_otp(request: SendOTPRequest):
     """
     Simulates sending internal OTP. 
     In development mode, it returns the OTP in the response.
+    Codes expire and sending is rate limited per phone (see app/core/otp.py).
     """
     phone = request.phone
-    otp = str(random.randint(100000, 999999))
-    
-    # Store OTP with phone as key
-    otp_storage[phone] = otp
+    try:
+        otp = await phone_otp.send_async(phone)
+    except OTPRateLimited as e:
+        raise _rate_limited(e)
     
     # In real world: Call MSG91 here
     # For now: Just return it so user can see it on screen
@@ -38,15 +41,11 @@ async def verify_otp(request: VerifyOTPRequest):
     """
     Verifies the dummy OTP
     """
-    phone = request.phone
-    otp = request.otp
-    
-    if phone in otp_storage and otp_storage[phone] == otp:
-        # Remove OTP after verification
-        del otp_storage[phone]
+    outcome = await phone_otp.verify_async(request.phone, request.otp)
+    if outcome == OTP_OK:
         return {"success": True, "message": "OTP verified successfully"}
     
-    raise HTTPException(status_code=400, detail="Invalid or expired OTP")
+    raise HTTPException(status_code=400, detail=VERIFY_ERRORS[outcome])
 
 @router.post("/register")
 async def register_user(user: UserRegister):
@@ -94,8 +93,12 @@ async def register_user(user: UserRegister):
             # Don't fail registration if profile insert fails
         
         # 3. For development: Generate a dummy OTP and store it
-        otp = str(random.randint(100000, 999999))
-        otp_storage[user.phone] = otp
+        try:
+            # Sent without being asked for: an immediate /send-otp must not hit the resend interval
+            otp = await phone_otp.send_async(user.phone, grace_resend=True)
+        except OTPRateLimited:
+            # The account exists now; the user can request a fresh code via /send-otp
+            otp = None
         print(f"DEBUG: Registration OTP for {user.phone} is {otp}")
         
         return {
@@ -114,7 +117,7 @@ async def register_user(user: UserRegister):
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/login")
-async def login_user(user: UserLogin):
+def login_user(user: UserLogin):
     """
     Standard Email/Password login for Admin/Merchants
     """
@@ -219,7 +222,7 @@ async def login_user(user: UserLogin):
         raise HTTPException(status_code=400, detail=error_msg)
 
 @router.get("/me", response_model=UserMe)
-async def get_me(user_data: dict = Depends(verify_token)):
+def get_me(user_data: dict = Depends(verify_token)):
     """
     Returns current logged-in user details using JWT
     """
@@ -259,7 +262,7 @@ async def get_me(user_data: dict = Depends(verify_token)):
         }
 
 @router.get("/profile")
-async def get_profile(user_data: dict = Depends(verify_token)):
+def get_profile(user_data: dict = Depends(verify_token)):
     """
     Get current user profile - Returns data in format expected by frontend.
     """
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException, Depends
 from app.core.supabase_client import supabase_admin
 from app.core.auth_utils import verify_token
+from app.core import category_cache
 from typing import Optional, List, Dict, Any
 from pydantic import BaseModel
 
@@ -13,7 +14,7 @@ class CategoryCreate(BaseModel):
     storeId: str
 
 @router.get("/")
-async def list_categories(storeId: str, current_user: dict = Depends(verify_token)):
+def list_categories(storeId: str, current_user: dict = Depends(verify_token)):
     try:
         response = supabase_admin.table("categories").select("*").eq("store_id", storeId).execute()
         return {"success": True, "data": response.data or []}
@@ -21,7 +22,7 @@ async def list_categories(storeId: str, current_user: dict = Depends(verify_toke
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/")
-async def create_category(category: CategoryCreate, current_user: dict = Depends(verify_token)):
+def create_category(category: CategoryCreate, current_user: dict = Depends(verify_token)):
     try:
         new_category = {
             "name": category.name,
@@ -30,14 +31,17 @@ async def create_category(category: CategoryCreate, current_user: dict = Depends
             "store_id": category.storeId
         }
         response = supabase_admin.table("categories").insert(new_category).execute()
-        return {"success": True, "data": response.data[0]}
+        created = response.data[0]
+        category_cache.remember(category.storeId, created["name"], created["id"])
+        return {"success": True, "data": created}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.delete("/{category_id}")
-async def delete_category(category_id: str, storeId: str, current_user: dict = Depends(verify_token)):
+def delete_category(category_id: str, storeId: str, current_user: dict = Depends(verify_token)):
     try:
         supabase_admin.table("categories").delete().eq("id", category_id).eq("store_id", storeId).execute()
+        category_cache.invalidate_id(storeId, category_id)
         return {"success": True, "message": "Category deleted"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,156 @@
+"""
+Public storefront checkout.
+
+Stock is reserved and orders are placed by SQL functions
+(migrations/checkout_inventory.sql) so that each step is one transaction:
+the conditional inventory decrement, the reservation rows, the order and its
+order_items either all happen or none do, and concurrent buyers of the last
+unit cannot oversell it.
+
+Flow:
+  1. POST /s/live/{slug}/checkout/reserve   -> holds stock for CHECKOUT_RESERVATION_TTL seconds
+  2. POST /s/live/{slug}/checkout           -> places the order from the reservation
+     (or reserves + places in one call when `items` are sent instead)
+  3. DELETE /s/live/{slug}/checkout/reserve/{reservationId} -> gives the stock back
+Expired reservations are released by the background sweeper (app/core/inventory.py).
+
+Routes are plain `def` so FastAPI runs the blocking Supabase calls in its
+threadpool instead of on the event loop.
+"""
+import re
+from fastapi import APIRouter, HTTPException
+from app.core.config import settings
+from app.core.supabase_client import supabase_admin
+from app.api.v1.endpoints.live_store import get_active_store
+from typing import Optional, List
+from pydantic import BaseModel, Field, model_validator
+
+router = APIRouter()
+
+MAX_CART_LINES = 100
+
+
+class CartItem(BaseModel):
+    productId: str
+    quantity: int = Field(..., ge=1, le=1000)
+
+
+class ReserveRequest(BaseModel):
+    items: List[CartItem] = Field(..., min_length=1, max_length=MAX_CART_LINES)
+
+
+class CheckoutCustomer(BaseModel):
+    name: Optional[str] = None
+    email: Optional[str] = None
+    phone: Optional[str] = None
+
+
+class CheckoutRequest(BaseModel):
+    reservationId: Optional[str] = None
+    items: Optional[List[CartItem]] = Field(None, max_length=MAX_CART_LINES)
+    # No customerId: the caller is anonymous, so the customer is matched by email within the store
+    customer: Optional[CheckoutCustomer] = None
+    shippingAddress: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_cart(self):
+        if bool(self.reservationId) == bool(self.items):
+            raise ValueError("Provide either 'reservationId' or 'items'")
+        return self
+
+
+def _rpc_items(items: List[CartItem]) -> list:
+    return [{"product_id": i.productId, "quantity": i.quantity} for i in items]
+
+
+# Errors raised by the SQL functions -> (status code, message)
+_CHECKOUT_ERRORS = {
+    "INSUFFICIENT_STOCK": (409, "Insufficient stock for product {arg}"),
+    "INVALID_QUANTITY": (400, "Invalid quantity for product {arg}"),
+    "EMPTY_CART": (400, "Cart is empty"),
+    "RESERVATION_NOT_FOUND": (404, "Reservation not found"),
+    "RESERVATION_EXPIRED": (410, "Reservation expired, please try again"),
+}
+_ERROR_PATTERN = re.compile(r"(" + "|".join(_CHECKOUT_ERRORS) + r")(?::([0-9a-fA-F-]{36}))?")
+
+
+def _raise_checkout_error(e: Exception):
+    match = _ERROR_PATTERN.search(str(e))
+    if match:
+        status_code, message = _CHECKOUT_ERRORS[match.group(1)]
+        raise HTTPException(status_code=status_code, detail=message.format(arg=match.group(2)))
+    print(f"❌ Checkout error: {e}")
+    raise HTTPException(status_code=500, detail=str(e))
+
+
+def _map_line(line: dict) -> dict:
+    return {
+        "productId": line.get("product_id"),
+        "name": line.get("name"),
+        "quantity": line.get("quantity"),
+        "unitPrice": line.get("unit_price"),
+    }
+
+
+@router.post("/live/{store_slug}/checkout/reserve", status_code=201)
+def reserve_cart(store_slug: str, payload: ReserveRequest):
+    """Hold stock for a cart. All lines are reserved or none (409 if one is out of stock)."""
+    store = get_active_store(store_slug)
+    try:
+        res = supabase_admin.rpc("reserve_inventory", {
+            "p_store_id": store["id"],
+            "p_items": _rpc_items(payload.items),
+            "p_ttl_seconds": settings.CHECKOUT_RESERVATION_TTL,
+        }).execute()
+    except Exception as e:
+        _raise_checkout_error(e)
+
+    data = res.data or {}
+    return {
+        "success": True,
+        "data": {
+            "reservationId": data.get("reservation_id"),
+            "expiresAt": data.get("expires_at"),
+            "items": [_map_line(l) for l in data.get("items", [])],
+            "subtotal": data.get("subtotal"),
+        }
+    }
+
+
+@router.delete("/live/{store_slug}/checkout/reserve/{reservation_id}")
+def release_cart(store_slug: str, reservation_id: str):
+    store = get_active_store(store_slug)
+    try:
+        res = supabase_admin.rpc("release_reservation", {
+            "p_store_id": store["id"],
+            "p_reservation_id": reservation_id,
+        }).execute()
+    except Exception as e:
+        _raise_checkout_error(e)
+    return {"success": True, "released": res.data or 0}
+
+
+@router.post("/live/{store_slug}/checkout", status_code=201)
+def place_order(store_slug: str, payload: CheckoutRequest):
+    """Create the order and its items from a reservation (or from `items`, reserved on the spot)."""
+    store = get_active_store(store_slug)
+    try:
+        res = supabase_admin.rpc("place_order", {
+            "p_store_id": store["id"],
+            "p_reservation_id": payload.reservationId,
+            "p_items": _rpc_items(payload.items) if payload.items else None,
+            "p_customer": payload.customer.model_dump() if payload.customer else None,
+            "p_shipping_address": payload.shippingAddress,
+        }).execute()
+    except Exception as e:
+        _raise_checkout_error(e)
+
+    data = res.data or {}
+    order = data.get("order") or {}
+    return {
+        "success": True,
+        "data": {
+            **order,
+            "items": [_map_line(l) for l in data.get("items") or []],
+        }
+    }
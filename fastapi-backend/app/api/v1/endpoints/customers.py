@@ -1,15 +1,21 @@
 
 from fastapi import APIRouter, HTTPException, Depends, Body
-from app.core.supabase_client import supabase_admin
+from app.core.supabase_client import supabase_admin, supabase_bulk
 from app.core.auth_utils import verify_token
+from app.core.pagination import order_by, search_term
+from app.core.bulk import run_chunked, bulk_response
+from app.schemas.bulk import BulkSelection, BulkResponse
 from typing import Optional, List, Dict, Any
 from pydantic import BaseModel, EmailStr
-from passlib.context import CryptContext
+from functools import lru_cache
 import jwt
 import datetime
 
-# Using PBKDF2 for reliability
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+# Using PBKDF2 for reliability; passlib is imported on the first login/registration
+@lru_cache(maxsize=None)
+def _pwd_context():
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 
 router = APIRouter()
 
@@ -25,10 +31,10 @@ class CustomerLogin(BaseModel):
     store_id: str
 
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return _pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return _pwd_context().hash(password)
 
 def create_customer_token(customer_id: str, store_id: str):
     payload = {
@@ -40,7 +46,7 @@ def create_customer_token(customer_id: str, store_id: str):
     return jwt.encode(payload, "CUSTOMER_SECRET_KEY", algorithm="HS256")
 
 @router.post("/register")
-async def register_customer(customer: CustomerRegister):
+def register_customer(customer: CustomerRegister):
     try:
         # Check if email exists
         existing = supabase_admin.table("customers").select("id").eq("email", customer.email).eq("store_id", customer.store_id).execute()
@@ -75,7 +81,7 @@ async def register_customer(customer: CustomerRegister):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/login")
-async def login_customer(cred: CustomerLogin):
+def login_customer(cred: CustomerLogin):
     try:
         # 1. Attempt Customer Login (Legacy/Table-based)
         res = supabase_admin.table("customers").select("id, email, first_name, last_name, store_id").eq("email", cred.email).eq("store_id", cred.store_id).execute()
@@ -167,26 +173,40 @@ async def login_customer(cred: CustomerLogin):
         print(f"Unified Login Error: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+# `sort` values -> PostgREST order expression (each backed by an index from
+# migrations/customer_order_stats.sql). Customers without orders sort last by recency.
+CUSTOMER_SORTS = {
+    "newest": "created_at.desc",
+    "spent": "total_spent.desc",
+    "recent": "last_order_at.desc.nullslast",
+    "orders": "total_orders.desc",
+}
+
 @router.get("/")
 @router.get("")
-async def list_customers(
+def list_customers(
     storeId: str,
     page: int = 1,
     limit: int = 10,
     search: Optional[str] = None,
+    sort: str = "newest",
     current_user: dict = Depends(verify_token)
 ):
+    if sort not in CUSTOMER_SORTS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of {', '.join(CUSTOMER_SORTS)}")
     try:
-        query = supabase_admin.table("customers").select("*, orders:orders(count)", count="exact").eq("store_id", storeId)
+        # Order counters are maintained on the customer row by a trigger on orders
+        query = supabase_admin.table("customers").select("*", count="exact").eq("store_id", storeId)
         
+        search = search_term(search)
         if search:
-            # Search by name or email
+            # Search by name or email (trigram indexed, see migrations/storefront_search.sql)
             query = query.or_(f"first_name.ilike.%{search}%,email.ilike.%{search}%")
             
         # Pagination
         start = (page - 1) * limit
         end = start + limit - 1
-        query = query.range(start, end).order("created_at", desc=True)
+        query = order_by(query.range(start, end), CUSTOMER_SORTS[sort], "id.desc")
         
         res = query.execute()
         
@@ -201,7 +221,9 @@ async def list_customers(
                 "phone": c.get("phone"),
                 "status": "active", # Defaulting to active as status col might not exist
                 "createdAt": c.get("created_at"),
-                "totalOrders": c.get("orders", [{}])[0].get("count", 0) if c.get("orders") else 0
+                "totalOrders": c.get("total_orders") or 0,
+                "totalSpent": c.get("total_spent") or 0,
+                "lastOrderAt": c.get("last_order_at"),
             })
             
         return {
@@ -213,7 +235,7 @@ async def list_customers(
         return {"items": [], "total": 0}
 
 @router.get("/{customer_id}")
-async def get_customer(customer_id: str, storeId: str, current_user: dict = Depends(verify_token)):
+def get_customer(customer_id: str, storeId: str, current_user: dict = Depends(verify_token)):
     try:
         customer_res = supabase_admin.table("customers").select("id, email, first_name, created_at").eq("id", customer_id).eq("store_id", storeId).limit(1).execute()
         if not customer_res.data:
@@ -230,7 +252,7 @@ async def get_customer(customer_id: str, storeId: str, current_user: dict = Depe
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/")
-async def create_customer_manager(
+def create_customer_manager(
     customer: dict = Body(...),
     current_user: dict = Depends(verify_token)
 ):
@@ -274,7 +296,7 @@ async def create_customer_manager(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.put("/{id}")
-async def update_customer(
+def update_customer(
     id: str,
     customer: dict = Body(...),
     current_user: dict = Depends(verify_token)
@@ -296,8 +318,25 @@ async def update_customer(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/bulk-delete", response_model=BulkResponse)
+def bulk_delete_customers(
+    payload: BulkSelection,
+    current_user: dict = Depends(verify_token)
+):
+    """Delete many customers of a store, one DELETE statement per chunk of ids."""
+    if not payload.ids:
+        # Deleting customers by filter is too easy to get wrong; require explicit ids
+        raise HTTPException(status_code=400, detail="Customer bulk delete requires an explicit 'ids' list")
+    try:
+        def apply(chunk_ids):
+            return supabase_bulk.table("customers").delete().eq("store_id", payload.storeId).in_("id", chunk_ids).execute().data
+
+        return bulk_response(run_chunked(payload.ids, apply, "deleted"))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.delete("/{id}")
-async def delete_customer(
+def delete_customer(
     id: str,
     current_user: dict = Depends(verify_token)
 ):
@@ -1,11 +1,12 @@
 from fastapi import APIRouter, HTTPException
 from app.core.supabase_client import supabase_admin
+from app.core.upstream import UpstreamUnavailable
 from datetime import datetime, timedelta
 
 router = APIRouter()
 
 @router.get("/stats")
-async def get_dashboard_stats():
+def get_dashboard_stats():
     """Get all statistics for the Admin Dashboard overview."""
     try:
         # 1. Total Users
@@ -66,6 +67,8 @@ async def get_dashboard_stats():
             }
         }
         
+    except UpstreamUnavailable:
+        raise  # fast 503 instead of empty stats
     except Exception as e:
         print(f"❌ Dashboard stats error: {str(e)}")
         # Return empty stats instead of 400 to keep UI alive
@@ -86,7 +89,7 @@ async def get_dashboard_stats():
         }
 
 @router.get("/recent-activity")
-async def get_recent_activity():
+def get_recent_activity():
     """Get recent platform activity for dashboard feed."""
     try:
         activities = []
@@ -131,6 +134,8 @@ async def get_recent_activity():
             }
         }
         
+    except UpstreamUnavailable:
+        raise  # fast 503 instead of empty stats
     except Exception as e:
         print(f"❌ Recent activity error: {str(e)}")
         return {
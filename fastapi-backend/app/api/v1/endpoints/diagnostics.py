@@ -0,0 +1,103 @@
+"""
+Admin-only runtime diagnostics for the worker that answers the request:
+event loop stalls (app/core/loop_watchdog.py), an on-demand sampling
+profile (app/core/profiler.py) and startup timing, memory and running
+background jobs (app/core/lifecycle.py), rate limit decisions
+(app/core/rate_limit.py) and upstream circuit breakers (app/core/upstream.py).
+
+With several workers each call lands on one of them; repeat it (or profile
+under steady load) to see them all.
+"""
+import os
+import threading
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+
+from app.core import lifecycle, loop_watchdog, profiler, rate_limit, upstream
+from app.core.auth_utils import require_admin
+from app.core.config import settings
+
+router = APIRouter()
+
+
+@router.get("/loop")
+async def get_loop_stalls(current_user: dict = Depends(require_admin)):
+    """Watchdog state and the most recent event loop stalls with the blocking stack."""
+    return {
+        "success": True,
+        "data": {
+            "pid": os.getpid(),
+            "watchdog": loop_watchdog.LOOP_WATCHDOG,
+            "thresholdMs": settings.LOOP_STALL_THRESHOLD * 1000,
+            "stalls": loop_watchdog.recent_stalls(),
+        },
+    }
+
+
+@router.get("/startup")
+async def get_worker_lifecycle(current_user: dict = Depends(require_admin)):
+    """How long this worker took to start, its private memory and its running background jobs."""
+    memory = lifecycle.worker_memory_mb()
+    return {
+        "success": True,
+        "data": {
+            **lifecycle.startup_report(),
+            "memoryMb": round(memory, 1) if memory is not None else None,
+            "memoryLimitMb": settings.WORKER_MAX_MEMORY_MB or None,
+            "backgroundJobs": lifecycle.running_jobs(),
+        },
+    }
+
+
+@router.get("/rate-limits")
+async def get_rate_limits(current_user: dict = Depends(require_admin)):
+    """Budgets, backend and the clients/stores this worker has rate limited most recently."""
+    return {
+        "success": True,
+        "data": {
+            "pid": os.getpid(),
+            "enabled": settings.RATE_LIMIT_ENABLED,
+            "backend": rate_limit.get_rate_limit_backend().name,
+            "budgets": [vars(budget) for budget in rate_limit.budgets_from_settings().values()],
+            "stats": rate_limit.RATE_LIMIT_STATS,
+            "topLimited": rate_limit.top_limited(),
+        },
+    }
+
+
+@router.get("/upstreams")
+async def get_upstreams(current_user: dict = Depends(require_admin)):
+    """Timeout/retry policy and circuit breaker state of every upstream, as seen by this worker."""
+    return {
+        "success": True,
+        "data": {
+            "pid": os.getpid(),
+            "upstreams": {name: policy.snapshot() for name, policy in upstream.UPSTREAMS.items()},
+        },
+    }
+
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def profile_worker(
+    seconds: float = Query(10, gt=0),
+    interval: float = Query(0.005, ge=0.001, le=1),
+    loopOnly: bool = False,
+    includeIdle: bool = False,
+    current_user: dict = Depends(require_admin),
+):
+    """
+    Sample this worker's stacks for `seconds` and return them as collapsed
+    stacks (flamegraph.pl / speedscope input). `loopOnly` keeps just the
+    event loop thread.
+    """
+    if seconds > settings.PROFILER_MAX_SECONDS:
+        raise HTTPException(status_code=400, detail=f"seconds must be at most {settings.PROFILER_MAX_SECONDS}")
+    # This handler runs on the event loop thread
+    thread_name = threading.current_thread().name if loopOnly else None
+    try:
+        collapsed = await run_in_threadpool(profiler.sample, seconds, interval, thread_name, includeIdle)
+    except profiler.ProfilerBusy:
+        raise HTTPException(status_code=409, detail="A profile is already running on this worker")
+    return PlainTextResponse(collapsed, headers={"X-Profiled-Pid": str(os.getpid())})
@@ -4,6 +4,7 @@ Allows merchants to connect, verify, and manage custom domains for their stores.
 """
 from fastapi import APIRouter, HTTPException, Depends
 from app.core.supabase_client import supabase_admin
+from app.core import store_identity
 from app.core.auth_utils import verify_token
 from typing import Optional, List
 from pydantic import BaseModel
@@ -107,12 +108,11 @@ async def list_domains(storeId: str, current_user: dict = Depends(verify_token))
         user_id = current_user.get("sub")
         
         # Verify store ownership
-        store_resp = supabase_admin.table("stores").select("id, slug, owner_id").eq("id", storeId).single().execute()
+        store = store_identity.get_by_id(storeId)
         
-        if not store_resp.data:
+        if not store:
             raise HTTPException(status_code=404, detail="Store not found")
             
-        store = store_resp.data
         if store.get("owner_id") != user_id:
             raise HTTPException(status_code=403, detail="Not authorized to access this store")
         
@@ -177,12 +177,12 @@ async def connect_domain(payload: DomainConnect, current_user: dict = Depends(ve
             raise HTTPException(status_code=400, detail="Invalid domain format")
         
         # Verify store ownership
-        store_resp = supabase_admin.table("stores").select("id, owner_id").eq("id", store_id).single().execute()
+        store = store_identity.get_by_id(store_id)
         
-        if not store_resp.data:
+        if not store:
             raise HTTPException(status_code=404, detail="Store not found")
             
-        if store_resp.data.get("owner_id") != user_id:
+        if store.get("owner_id") != user_id:
             raise HTTPException(status_code=403, detail="Not authorized to modify this store")
         
         # Check if domain already exists for any store
@@ -250,12 +250,12 @@ async def verify_domain(payload: DomainVerify, current_user: dict = Depends(veri
         store_id = payload.storeId
         
         # Verify store ownership
-        store_resp = supabase_admin.table("stores").select("id, owner_id").eq("id", store_id).single().execute()
+        store = store_identity.get_by_id(store_id)
         
-        if not store_resp.data:
+        if not store:
             raise HTTPException(status_code=404, detail="Store not found")
             
-        if store_resp.data.get("owner_id") != user_id:
+        if store.get("owner_id") != user_id:
             raise HTTPException(status_code=403, detail="Not authorized to modify this store")
         
         # Get domain record
@@ -333,12 +333,12 @@ async def set_primary_domain(payload: DomainSetPrimary, current_user: dict = Dep
         store_id = payload.storeId
         
         # Verify store ownership
-        store_resp = supabase_admin.table("stores").select("id, owner_id").eq("id", store_id).single().execute()
+        store = store_identity.get_by_id(store_id)
         
-        if not store_resp.data:
+        if not store:
             raise HTTPException(status_code=404, detail="Store not found")
             
-        if store_resp.data.get("owner_id") != user_id:
+        if store.get("owner_id") != user_id:
             raise HTTPException(status_code=403, detail="Not authorized to modify this store")
         
         # Get domain record
@@ -498,12 +498,12 @@ async def initiate_domain_transfer(payload: DomainTransfer, current_user: dict =
             raise HTTPException(status_code=400, detail="Invalid authorization code")
         
         # Verify store ownership
-        store_resp = supabase_admin.table("stores").select("id, owner_id").eq("id", store_id).single().execute()
+        store = store_identity.get_by_id(store_id)
         
-        if not store_resp.data:
+        if not store:
             raise HTTPException(status_code=404, detail="Store not found")
             
-        if store_resp.data.get("owner_id") != user_id:
+        if store.get("owner_id") != user_id:
             raise HTTPException(status_code=403, detail="Not authorized to modify this store")
         
         # In production: This would integrate with a domain registrar API
@@ -0,0 +1,51 @@
+"""
+Image variants endpoint - resized WebP/AVIF/JPEG copies of uploaded images.
+No authentication required (variants are as public as their originals);
+only sources allowed by app/core/images.py are served or redirected to.
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse, RedirectResponse
+from starlette.concurrency import run_in_threadpool
+from app.core import images
+from app.core.auth_utils import require_admin
+
+router = APIRouter()
+
+# Variant names contain the source content hash, so they never change
+VARIANT_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+@router.get("/")
+async def get_image_variant(
+    request: Request,
+    src: str = Query(..., max_length=2048),
+    w: int = Query(640, ge=16, le=4096),
+    f: str = Query("auto", pattern="^(auto|webp|avif|jpeg|jpg|png)$"),
+):
+    """
+    Serve `src` resized to `w` (snapped to a fixed set of widths).
+    f=auto picks AVIF/WebP from the Accept header, falling back to JPEG.
+    """
+    if not images.is_allowed_source(src):
+        # Checked before the redirect below too, or this would be an open redirect
+        raise HTTPException(status_code=400, detail="Image source not allowed")
+    if not images.IMAGING_AVAILABLE:
+        # Resizing is an optimization: serve the original rather than failing
+        return RedirectResponse(src, status_code=307)
+    try:
+        fmt = images.negotiate_format(f, request.headers.get("accept", ""))
+        path, etag = await run_in_threadpool(images.get_variant, src, w, fmt)
+    except images.ImageError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+    headers = {"Cache-Control": VARIANT_CACHE_CONTROL, "ETag": f'"{etag}"'}
+    if f == "auto":
+        headers["Vary"] = "Accept"
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=images.CONTENT_TYPES[fmt], headers=headers)
+
+
+@router.get("/cache-stats")
+async def image_cache_stats(current_user: dict = Depends(require_admin)):
+    return {"success": True, "data": {**images.disk_cache.usage(), "formats": images.SUPPORTED_FORMATS}}
@@ -1,15 +1,30 @@
 """
 Public Live Store API - Serves store data for the public-facing storefront.
-Returns theme details, products, categories, and store info for live rendering.
+Returns theme details, products, categories, and store info for live rendering,
+plus ranked product search with facets (see migrations/storefront_search.sql).
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from app.core.supabase_client import supabase_admin
+from app.core import images
+from app.core import store_identity
+from app.core.responses import FastJSONResponse
+from typing import Optional
 
 router = APIRouter()
 
 
+def get_active_store(store_slug: str) -> dict:
+    """Resolve a storefront slug to `{id, status}`; 404/403 unless the store is live."""
+    store = store_identity.get_by_slug(store_slug)
+    if not store:
+        raise HTTPException(status_code=404, detail="Store not found")
+    if store.get("status") != "active":
+        raise HTTPException(status_code=403, detail="This store is not currently active")
+    return store
+
+
 @router.get("/live/{store_slug}")
-async def get_live_store(store_slug: str):
+def get_live_store(store_slug: str):
     """
     Get all data needed to render a live store page.
     No authentication required - this is the public storefront.
@@ -18,11 +33,10 @@ async def get_live_store(store_slug: str):
     """
     try:
         # 1. Get store by slug
-        store_res = supabase_admin.table("stores").select("*").eq("slug", store_slug).limit(1).execute()
-        if not store_res.data:
+        store = store_identity.get_by_slug(store_slug)
+        if not store:
             raise HTTPException(status_code=404, detail="Store not found")
         
-        store = store_res.data[0]
         config = store.get("config") or {}
         
         # Check if store is active
@@ -60,6 +74,7 @@ async def get_live_store(store_slug: str):
                     "price": p.get("price", 0),
                     "compareAtPrice": p.get("compare_at_price"),
                     "images": p.get("images", []),
+                    "imageVariants": images.responsive_images(p.get("images")),
                     "sku": p.get("sku"),
                     "inventoryQuantity": p.get("inventory_quantity", 0),
                     "categoryId": p.get("category_id"),
@@ -77,12 +92,13 @@ async def get_live_store(store_slug: str):
                     "name": c.get("name"),
                     "description": c.get("description", ""),
                     "image": c.get("image_url", ""),
+                    "imageVariants": images.responsive_image(c.get("image_url")),
                 })
         except Exception as e:
             print(f"Warning: Could not fetch categories: {e}")
         
-        # 5. Build response
-        return {
+        # 5. Build response (the whole catalog: skip the jsonable_encoder pass, see app/core/responses.py)
+        return FastJSONResponse({
             "success": True,
             "data": {
                 "store": {
@@ -90,6 +106,7 @@ async def get_live_store(store_slug: str):
                     "name": store.get("name"),
                     "slug": store.get("slug"),
                     "logoUrl": store.get("logo_url"),
+                    "logoVariants": images.responsive_image(store.get("logo_url")),
                     "status": store.get("status"),
                     "description": config.get("description", ""),
                     "tagline": config.get("tagline", ""),
@@ -105,10 +122,90 @@ async def get_live_store(store_slug: str):
                 "totalProducts": len(products),
                 "totalCategories": len(categories),
             }
-        }
+        })
     
     except HTTPException:
         raise
     except Exception as e:
         print(f"Error fetching live store: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+# Default price bands (store currency) used for the price facet
+SEARCH_PRICE_BANDS = [500, 1000, 2500, 5000, 10000]
+SEARCH_MAX_OFFSET = 1000
+
+
+@router.get("/live/{store_slug}/search")
+def search_live_store(
+    store_slug: str,
+    q: Optional[str] = Query(None, max_length=100),
+    categoryId: Optional[str] = None,
+    brand: Optional[str] = None,
+    minPrice: Optional[float] = Query(None, ge=0),
+    maxPrice: Optional[float] = Query(None, ge=0),
+    page: int = Query(1, ge=1),
+    limit: int = Query(24, ge=1, le=100),
+):
+    """
+    Storefront product search. No authentication required.
+
+    Terms are prefix-matched against name, SKU, brand and description, close
+    misspellings of the product name still match, and hits are ranked by
+    relevance. Facet counts (category, brand, price band) are returned with
+    the page so themes can render filters without downloading the catalog.
+    """
+    offset = (page - 1) * limit
+    if offset > SEARCH_MAX_OFFSET:
+        raise HTTPException(status_code=400, detail="Refine your search to see more results")
+    try:
+        store = get_active_store(store_slug)
+
+        res = supabase_admin.rpc("search_products", {
+            "p_store_id": store["id"],
+            "p_query": q,
+            "p_category_id": categoryId,
+            "p_brand": brand,
+            "p_min_price": minPrice,
+            "p_max_price": maxPrice,
+            "p_price_bands": SEARCH_PRICE_BANDS,
+            "p_limit": limit,
+            "p_offset": offset,
+        }).execute()
+        result = res.data or {}
+
+        hits = [{
+            "id": h.get("id"),
+            "name": h.get("name"),
+            "slug": h.get("slug"),
+            "price": h.get("price", 0),
+            "compareAtPrice": h.get("compare_at_price"),
+            "images": h.get("images", []),
+            "imageVariants": images.responsive_images(h.get("images")),
+            "inventoryQuantity": h.get("inventory_quantity", 0),
+            "categoryId": h.get("category_id"),
+            "brand": h.get("brand"),
+            "score": h.get("rank"),
+        } for h in result.get("hits", [])]
+
+        total = result.get("total", 0)
+        return FastJSONResponse({
+            "success": True,
+            "data": {
+                "hits": hits,
+                "total": total,
+                "page": page,
+                "limit": limit,
+                "hasMore": offset + len(hits) < total,
+                "facets": {
+                    "categories": result.get("categories", []),
+                    "brands": result.get("brands", []),
+                    "priceBands": result.get("price_bands", []),
+                },
+            }
+        })
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error searching live store: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
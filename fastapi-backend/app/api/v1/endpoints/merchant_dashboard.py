@@ -1,5 +1,7 @@
 from fastapi import APIRouter, HTTPException, Depends
 from app.core.supabase_client import supabase_admin
+from app.core import images, store_identity
+from app.core.upstream import UpstreamUnavailable
 from datetime import datetime, timedelta
 import random
 from typing import Optional
@@ -7,24 +9,14 @@ from typing import Optional
 router = APIRouter()
 
 @router.get("/stats/{store_id}")
-async def get_merchant_stats(store_id: str):
+def get_merchant_stats(store_id: str):
     """Get statistics for a specific store's dashboard."""
     try:
-        # Check if store_id is a UUID or a slug
-        import uuid
-        is_uuid = True
-        try:
-            uuid.UUID(store_id)
-        except ValueError:
-            is_uuid = False
-            
-        if not is_uuid:
-            # Resolve slug to ID
-            store_res = supabase_admin.table("stores").select("id").eq("slug", store_id).single().execute()
-            if store_res.data:
-                store_id = store_res.data["id"]
-            else:
-                raise HTTPException(status_code=404, detail="Store not found by slug")
+        # store_id may be a UUID or a slug
+        resolved_id = store_identity.resolve_id(store_id)
+        if not resolved_id:
+            raise HTTPException(status_code=404, detail="Store not found by slug")
+        store_id = resolved_id
 
         # 1. Total Orders
         orders_res = supabase_admin.table("orders").select("id", count="exact").eq("store_id", store_id).execute()
@@ -95,10 +87,12 @@ async def get_merchant_stats(store_id: str):
         latest_products = []
         for p in (latest_products_res.data or []):
             img = p.get("images")
+            image = img[0] if img and isinstance(img, list) and len(img) > 0 else ""
             latest_products.append({
                 "name": p["name"],
                 "price": f"₹{float(p['price']):,.2f}",
-                "image": img[0] if img and isinstance(img, list) and len(img) > 0 else ""
+                "image": image,
+                "imageVariants": images.responsive_image(image)
             })
 
         return {
@@ -129,6 +123,9 @@ async def get_merchant_stats(store_id: str):
             "sales_data": sales_by_day
         }
         
+    except UpstreamUnavailable:
+        # Database down or slow: a fast 503, not zeros the merchant would take for real numbers
+        raise
     except Exception as e:
         print(f"❌ Merchant dashboard stats error: {str(e)}")
         # If any error (like tables not existing), return dummy data
@@ -6,6 +6,8 @@ from app.core.auth_utils import verify_token as get_current_user
 import uuid
 
 router = APIRouter()
+# Storefront reads (no auth), served by the storefront group too (app/api/v1/api.py)
+public_router = APIRouter()
 
 @router.get("/")
 async def list_notices(
@@ -48,7 +50,7 @@ async def list_notices(
         print(f"Error listing notices: {e}")
         return {"items": [], "total": 0}
 
-@router.get("/active")
+@public_router.get("/active")
 async def get_active_notices(
     storeId: str = Query(..., description="Store ID")
 ):
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, HTTPException, Depends
 from app.core.supabase_client import supabase_admin
+from app.core import store_identity
 from app.core.auth_utils import verify_token
 from pydantic import BaseModel
 from typing import Optional
@@ -38,8 +39,7 @@ async def create_store(store_data: StoreCreate, current_user: dict = Depends(ver
         print(f"   Store name: {store_data.storeName}, Slug: {store_data.storeSlug}")
         
         # 1. Check if slug exists
-        existing = supabase_admin.table("stores").select("id").eq("slug", store_data.storeSlug).execute()
-        if existing.data:
+        if store_identity.get_by_slug(store_data.storeSlug):
             raise HTTPException(status_code=400, detail="Store slug already taken")
             
         # 2. Create the store - only use columns that exist in the stores table
@@ -58,6 +58,7 @@ async def create_store(store_data: StoreCreate, current_user: dict = Depends(ver
             raise HTTPException(status_code=400, detail="Failed to create store")
             
         store = response.data[0]
+        store_identity.remember(store)
         store_id = store.get("id")
         print(f"✅ Store created with ID: {store_id}")
         
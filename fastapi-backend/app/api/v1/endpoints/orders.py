@@ -1,38 +1,161 @@
-from fastapi import APIRouter, HTTPException, Depends
-from app.core.supabase_client import supabase_admin
+from fastapi import APIRouter, HTTPException, Depends, Query
+from app.core.supabase_client import supabase_admin, supabase_bulk
+from app.core import store_identity
 from app.core.auth_utils import verify_token
+from app.core.pagination import apply_keyset, paginate, search_term
+from app.core.responses import FastJSONResponse
+from app.core.bulk import run_chunked, rows_to_results, bulk_response
+from app.schemas.bulk import OrderStatusUpdate, BulkResponse
 from typing import Optional, List, Dict, Any
 from pydantic import BaseModel
+from datetime import datetime
 
 router = APIRouter()
 
+ORDER_LIST_COLUMNS = (
+    "id, store_id, customer_id, total_amount, status, payment_status, fulfillment_status, "
+    "items_count, created_at, updated_at, customers(first_name, last_name, email)"
+)
+
+# A search matches orders of at most this many customers (by name or email)
+ORDER_SEARCH_MAX_CUSTOMERS = 100
+
+def apply_order_filters(
+    query,
+    storeId: str,
+    status: Optional[str] = None,
+    paymentStatus: Optional[str] = None,
+    customerId: Optional[str] = None,
+    dateFrom: Optional[datetime] = None,
+    dateTo: Optional[datetime] = None,
+    search: Optional[str] = None,
+):
+    query = query.eq("store_id", storeId)
+    statuses = [s.strip() for s in (status or "").split(",") if s.strip()]
+    if len(statuses) == 1:
+        query = query.eq("status", statuses[0])
+    elif statuses:
+        query = query.in_("status", statuses)
+    if paymentStatus:
+        query = query.eq("payment_status", paymentStatus)
+    if customerId:
+        query = query.eq("customer_id", customerId)
+    if dateFrom:
+        query = query.gte("created_at", dateFrom.isoformat())
+    if dateTo:
+        query = query.lte("created_at", dateTo.isoformat())
+    term = search_term(search)
+    if term:
+        # Customers of the store by name or email (trigram indexed, see
+        # migrations/storefront_search.sql); a full order id matches that order
+        customers = (
+            supabase_admin.table("customers").select("id").eq("store_id", storeId)
+            .or_(f"first_name.ilike.%{term}%,email.ilike.%{term}%")
+            .limit(ORDER_SEARCH_MAX_CUSTOMERS).execute()
+        )
+        customer_ids = ",".join(c["id"] for c in customers.data or [])
+        clauses = [f"customer_id.in.({customer_ids})"]
+        if store_identity.is_uuid(term):
+            clauses.append(f"id.eq.{term}")
+        query = query.or_(",".join(clauses))
+    return query
+
 @router.get("/")
-async def list_orders(storeId: str, status: Optional[str] = None, current_user: dict = Depends(verify_token)):
+@router.get("")
+def list_orders(
+    storeId: str,
+    status: Optional[str] = None,
+    paymentStatus: Optional[str] = None,
+    customerId: Optional[str] = None,
+    dateFrom: Optional[datetime] = None,
+    dateTo: Optional[datetime] = None,
+    search: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(verify_token)
+):
+    """
+    Newest-first order list, keyset-paginated on (created_at, id).
+    `items_count` is maintained on the order by a trigger on order_items
+    (see migrations/order_list_keyset.sql), so no items are fetched here.
+    `status` may list several statuses separated by commas.
+    Pass `nextCursor` back as `cursor` to load the next page.
+    """
     try:
-        query = supabase_admin.table("orders").select("*, customers(first_name, last_name, email), order_items(id)").eq("store_id", storeId)
-        if status:
-            query = query.eq("status", status)
-        
-        response = query.order("created_at", desc=True).execute()
+        query = supabase_admin.table("orders").select(ORDER_LIST_COLUMNS)
+        query = apply_order_filters(query, storeId, status, paymentStatus, customerId, dateFrom, dateTo, search)
+
+        query = apply_keyset(query, "created_at", True, cursor)
+        response = query.limit(limit + 1).execute()
+        page, next_cursor = paginate(response.data or [], limit, "created_at")
         
         data = []
-        for o in (response.data or []):
+        for o in page:
             o_copy = o.copy()
-            cust = o.get("customers")
+            cust = o_copy.pop("customers", None)
             if cust:
-                o_copy["customer_name"] = f"{cust.get('first_name', '')} {cust.get('last_name', '')}".strip()
+                o_copy["customer_name"] = f"{cust.get('first_name') or ''} {cust.get('last_name') or ''}".strip()
                 o_copy["customer_email"] = cust.get("email")
-            
-            # Count items
-            o_copy["items_count"] = len(o.get("order_items", []))
+            o_copy["items_count"] = o.get("items_count") or 0
             data.append(o_copy)
             
-        return {"success": True, "data": data}
+        return FastJSONResponse({"success": True, "data": data, "nextCursor": next_cursor, "hasMore": next_cursor is not None})
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/count")
+def count_orders(
+    storeId: str,
+    status: Optional[str] = None,
+    paymentStatus: Optional[str] = None,
+    customerId: Optional[str] = None,
+    dateFrom: Optional[datetime] = None,
+    dateTo: Optional[datetime] = None,
+    search: Optional[str] = None,
+    current_user: dict = Depends(verify_token)
+):
+    """Count orders matching the same filters as the list endpoint."""
+    try:
+        query = supabase_admin.table("orders").select("id", count="exact")
+        query = apply_order_filters(query, storeId, status, paymentStatus, customerId, dateFrom, dateTo, search)
+        response = query.limit(1).execute()
+        return {"success": True, "data": {"total": response.count or 0}}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/bulk-status", response_model=BulkResponse)
+def bulk_update_order_status(payload: OrderStatusUpdate, current_user: dict = Depends(verify_token)):
+    """
+    Set the status of many orders at once (e.g. fulfilling a batch).
+    `filter` accepts `status`, `paymentStatus` and `customerId`.
+    """
+    try:
+        def scoped(query):
+            return query.eq("store_id", payload.storeId)
+
+        if payload.filter:
+            query = scoped(supabase_bulk.table("orders").update({"status": payload.status}))
+            flt = payload.filter
+            if flt.status and flt.status != "all":
+                query = query.eq("status", flt.status)
+            if flt.paymentStatus and flt.paymentStatus != "all":
+                query = query.eq("payment_status", flt.paymentStatus)
+            if flt.customerId:
+                query = query.eq("customer_id", flt.customerId)
+            return bulk_response(rows_to_results(query.execute().data, "updated"))
+
+        def apply(chunk_ids):
+            return scoped(supabase_bulk.table("orders").update({"status": payload.status})).in_("id", chunk_ids).execute().data
+
+        return bulk_response(run_chunked(payload.ids, apply, "updated"))
     except Exception as e:
+        print(f"❌ Bulk order status error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{order_id}")
-async def get_order(order_id: str, storeId: str, current_user: dict = Depends(verify_token)):
+def get_order(order_id: str, storeId: str, current_user: dict = Depends(verify_token)):
     try:
         response = supabase_admin.table("orders").select("*, order_items(*)").eq("id", order_id).eq("store_id", storeId).single().execute()
         if not response.data:
@@ -42,7 +165,7 @@ async def get_order(order_id: str, storeId: str, current_user: dict = Depends(ve
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.patch("/{order_id}/status")
-async def update_order_status(order_id: str, payload: Dict[str, Any], current_user: dict = Depends(verify_token)):
+def update_order_status(order_id: str, payload: Dict[str, Any], current_user: dict = Depends(verify_token)):
     try:
         status = payload.get("status")
         if not status:
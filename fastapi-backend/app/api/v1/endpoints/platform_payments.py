@@ -2,7 +2,10 @@ from fastapi import APIRouter, HTTPException, Query
 from typing import List, Optional
 from datetime import datetime
 from app.core.supabase_client import supabase_admin
+from app.core.responses import FastJSONResponse, model_fields
 from app.schemas.payment import PaymentResponse, PaymentListResponse
+from app.core.webhook_queue import get_webhook_queue, WEBHOOK_CONSUMER
+from starlette.concurrency import run_in_threadpool
 
 router = APIRouter()
 
@@ -40,7 +43,7 @@ def map_payment_response(payment: dict, extra_info: dict) -> dict:
     }
 
 @router.get("/payments", response_model=PaymentListResponse)
-async def list_payments(
+def list_payments(
     skip: int = 0,
     limit: int = 100,
     status: Optional[str] = None,
@@ -108,11 +111,12 @@ async def list_payments(
         # Pagination
         total = len(mapped_items)
         result = {
-            "items": mapped_items[skip : skip + limit],
+            "items": model_fields(mapped_items[skip : skip + limit], PaymentResponse),
             "total": total,
             "total_amount": total_amount
         }
-        return result
+        # Mapped by map_payment_response: skip re-validating every row against the model
+        return FastJSONResponse(result)
         
     except Exception as e:
         print(f"❌ Error fetching payments: {str(e)}")
@@ -121,7 +125,7 @@ async def list_payments(
 
 
 @router.get("/payments/{payment_id}", response_model=PaymentResponse)
-async def get_payment(payment_id: str):
+def get_payment(payment_id: str):
     """Get single payment details."""
     try:
         res = supabase_admin.table("payments").select("*").eq("id", payment_id).single().execute()
@@ -146,3 +150,23 @@ async def get_payment(payment_id: str):
         return map_payment_response(p, extra_info)
     except Exception:
         raise HTTPException(status_code=404, detail="Payment not found")
+
+
+@router.get("/webhook-events")
+async def list_webhook_events(
+    status: str = Query("dead", pattern="^(pending|processing|done|dead)$"),
+    limit: int = Query(50, ge=1, le=500)
+):
+    """Queued payment webhooks by status (default: dead letters), plus queue counts."""
+    queue = get_webhook_queue()
+    items = await run_in_threadpool(queue.list, status, limit)
+    counts = await run_in_threadpool(queue.counts)
+    return {"success": True, "data": {"items": items, "counts": counts, "consumer": WEBHOOK_CONSUMER}}
+
+
+@router.post("/webhook-events/{event_id}/retry")
+async def retry_webhook_event(event_id: int):
+    """Move a dead-lettered webhook back onto the queue."""
+    if not await run_in_threadpool(get_webhook_queue().requeue, event_id):
+        raise HTTPException(status_code=404, detail="Dead-lettered event not found")
+    return {"success": True, "message": "Event re-queued"}
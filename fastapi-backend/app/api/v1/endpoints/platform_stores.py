@@ -2,6 +2,8 @@ from fastapi import APIRouter, HTTPException
 from typing import Optional
 from datetime import datetime
 from app.core.supabase_client import supabase_admin
+from app.core import store_identity
+from app.core.responses import FastJSONResponse, model_fields
 from app.schemas.store import (
     StoreCreate,
     StoreUpdate,
@@ -52,7 +54,7 @@ def map_store_response(store: dict, owner_info: dict = None) -> dict:
     }
 
 @router.get("/stores", response_model=StoreListResponse)
-async def list_stores(
+def list_stores(
     skip: int = 0,
     limit: int = 100,
     search: Optional[str] = None
@@ -84,14 +86,15 @@ async def list_stores(
         total = len(mapped_stores)
         paginated_stores = mapped_stores[skip:skip + limit]
         
-        return {"items": paginated_stores, "total": total}
+        # Mapped by map_store_response: skip re-validating every row against the model
+        return FastJSONResponse({"items": model_fields(paginated_stores, StoreResponse), "total": total})
         
     except Exception as e:
         print(f"Error fetching stores: {e}")
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/stores/{store_id}", response_model=StoreResponse)
-async def get_store(store_id: str):
+def get_store(store_id: str):
     """Get a single store by ID."""
     try:
         # 1. Fetch Store Basic Info
@@ -131,7 +134,7 @@ async def get_store(store_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/stores", response_model=StoreResponse)
-async def create_store(store: StoreCreate):
+def create_store(store: StoreCreate):
     """Create a new store."""
     try:
         data = {
@@ -145,13 +148,14 @@ async def create_store(store: StoreCreate):
         response = supabase_admin.table("stores").insert(data).execute()
         if not response.data:
             raise HTTPException(status_code=400, detail="Failed to create store")
+        store_identity.remember(response.data[0])
         return map_store_response(response.data[0])
     except Exception as e:
         print(f"Error creating store: {e}")
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.put("/stores/{store_id}", response_model=StoreResponse)
-async def update_store(store_id: str, store: StoreUpdate):
+def update_store(store_id: str, store: StoreUpdate):
     """Update an existing store."""
     try:
         update_data = {}
@@ -167,6 +171,8 @@ async def update_store(store_id: str, store: StoreUpdate):
             update_data["setup_completed"] = store.setup_completed
             
         response = supabase_admin.table("stores").update(update_data).eq("id", store_id).execute()
+        # Also drops the old slug if it changed
+        store_identity.invalidate(store_id=store_id)
         if not response.data:
             raise HTTPException(status_code=404, detail="Store not found")
         return map_store_response(response.data[0])
@@ -174,10 +180,11 @@ async def update_store(store_id: str, store: StoreUpdate):
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.delete("/stores/{store_id}")
-async def delete_store(store_id: str):
+def delete_store(store_id: str):
     """Delete a store."""
     try:
         response = supabase_admin.table("stores").delete().eq("id", store_id).execute()
+        store_identity.invalidate(store_id=store_id)
         return {"success": True, "message": "Store deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
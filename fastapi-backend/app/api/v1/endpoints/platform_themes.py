@@ -1,7 +1,9 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form, BackgroundTasks
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, BackgroundTasks, Request
 from typing import Optional, List
 from datetime import datetime
 from app.core.supabase_client import supabase_admin
+from app.core import job_status, lifecycle, response_cache
+from app.core import store_identity
 from pydantic import BaseModel
 import os
 import uuid
@@ -31,24 +33,27 @@ class ApplyThemeRequest(BaseModel):
     store_slug: str
     theme_slug: str
 
-# Global deployment status tracker for real-time frontend feedback
-DEPLOYMENT_STATUS = {}
+# Deployment status for real-time frontend feedback, in the shared job status store
+# so a poll answered by another worker sees the deployment's progress
+DEPLOYMENT_KIND = "theme-deployment"
 
 def update_deployment(store_slug: str, progress: int, message: str, status: str = "processing"):
-    """Internal helper to update the global status tracker."""
-    DEPLOYMENT_STATUS[store_slug] = {
-        "progress": progress,
-        "message": message,
-        "status": status,
-        "timestamp": time.time(),
-        "logs": DEPLOYMENT_STATUS.get(store_slug, {}).get("logs", []) + [message]
-    }
+    """Internal helper to update the deployment status tracker."""
+    job_status.update(
+        DEPLOYMENT_KIND,
+        store_slug,
+        lambda entry: entry.update(logs=entry.get("logs", []) + [message]),
+        progress=progress,
+        message=message,
+        status=status,
+        timestamp=time.time(),
+    )
     print(f"📊 [{progress}%] {store_slug}: {message}")
 
 @router.get("/themes/deployment-status/{store_slug}")
-async def get_deployment_status(store_slug: str):
+def get_deployment_status(store_slug: str):
     """Endpoint for the frontend to poll theme activation progress."""
-    status = DEPLOYMENT_STATUS.get(store_slug)
+    status = job_status.get(DEPLOYMENT_KIND, store_slug)
     if not status:
         # Check if already active in DB if no live status
         return {"progress": 100, "message": "Ready", "status": "completed"}
@@ -94,19 +99,29 @@ def map_theme(theme: dict) -> dict:
     }
 
 @router.get("/themes", response_model=ThemeListResponse)
-async def list_themes(search: Optional[str] = None):
-    """List all uploaded themes."""
-    try:
+async def list_themes(request: Request, search: Optional[str] = None):
+    """
+    List all uploaded themes. The unfiltered list is cached (every theme write
+    below invalidates it); searches are built per request, so arbitrary search
+    strings cannot fill the cache.
+    """
+    def build():
         query = supabase_admin.table("themes").select("*").order("created_at", desc=True)
         response = query.execute()
         themes = response.data or []
         
         if search:
-            search = search.lower()
-            themes = [t for t in themes if search in t.get("name", "").lower() or search in t.get("slug", "").lower()]
+            term = search.lower()
+            themes = [t for t in themes if term in t.get("name", "").lower() or term in t.get("slug", "").lower()]
         
         mapped = [map_theme(t) for t in themes]
         return {"items": mapped, "total": len(mapped)}
+
+    try:
+        if search:
+            return build()
+        # Admin view: short TTL, kept out of shared caches, and browsers must revalidate (304 when unchanged)
+        return response_cache.cached_json(request, "themes", "admin-list", build, ttl=30, max_age=0, private=True)
     except Exception as e:
         print(f"❌ List themes error: {e}")
         raise HTTPException(status_code=400, detail=str(e))
@@ -323,7 +338,8 @@ def ai_repair_package_json(extract_dir: Path):
     except Exception as e:
         print(f"⚠️ package.json repair failed: {e}")
 
-async def process_theme_build(slug: str, zip_path: Path, extract_dir: Path):
+# Sync on purpose: BackgroundTasks runs it in the threadpool, so the npm build does not block the event loop
+def process_theme_build(slug: str, zip_path: Path, extract_dir: Path):
     """Background task to extract and build the theme with AI Auto-Repair automation."""
     log_file = extract_dir / "build_log.txt"
     
@@ -338,6 +354,7 @@ async def process_theme_build(slug: str, zip_path: Path, extract_dir: Path):
         supabase_admin.table("themes").update({
             "description": f"{step_msg} ({progress}%)"
         }).eq("slug", slug).execute()
+        response_cache.invalidate("themes")
 
     try:
         # 1. Extract ZIP
@@ -437,6 +454,7 @@ async def process_theme_build(slug: str, zip_path: Path, extract_dir: Path):
             "status": "active", 
             "description": f"AI Optimized & Live (Build Success: {datetime.now().strftime('%H:%M')})"
         }).eq("slug", slug).execute()
+        response_cache.invalidate("themes")
         
     except Exception as e:
         error_msg = str(e)
@@ -444,6 +462,7 @@ async def process_theme_build(slug: str, zip_path: Path, extract_dir: Path):
             "status": "failed", 
             "description": f"AI Error: {error_msg[:100]}"
         }).eq("slug", slug).execute()
+        response_cache.invalidate("themes")
         update_step(f"AI Automation Failed: {error_msg}", 0)
 
 LOGIN_TEMPLATE = """
@@ -1246,7 +1265,8 @@ module.exports = nextConfig;
 """
     (extract_dir / "next.config.js").write_text(clean_config)
 
-async def process_store_theme_activation(store_slug: str, theme_slug: str):
+# Sync, like process_theme_build: runs in the threadpool
+def process_store_theme_activation(store_slug: str, theme_slug: str):
     """Background task to fully activate a theme for a store (isolated duplication + patching)."""
     def update_store_status(msg: str, progress: int):
         update_deployment(store_slug, progress, msg)
@@ -1304,9 +1324,9 @@ async def process_store_theme_activation(store_slug: str, theme_slug: str):
         # 0. Fetch Real Store Identity
         store_name = store_slug.capitalize()
         try:
-            store_db = supabase_admin.table("stores").select("name").eq("slug", store_slug).single().execute()
-            if store_db.data:
-                store_name = store_db.data["name"]
+            store_db = store_identity.get_by_slug(store_slug)
+            if store_db:
+                store_name = store_db["name"]
         except: pass
         
         # 1. First run the standard theme patcher (gets us 90% there)
@@ -1446,6 +1466,7 @@ module.exports = nextConfig;
                 theme_db = supabase_admin.table("themes").select("id").eq("slug", theme_slug).single().execute()
                 if theme_db.data:
                     supabase_admin.table("stores").update({"config": {"theme_id": theme_db.data["id"]}}).eq("slug", store_slug).execute()
+                    store_identity.invalidate(slug=store_slug)
             except: pass
 
             update_store_status("Store is now LIVE with your real products!", 100)
@@ -1461,6 +1482,7 @@ module.exports = nextConfig;
                 theme_db = supabase_admin.table("themes").select("id").eq("slug", theme_slug).single().execute()
                 if theme_db.data:
                     supabase_admin.table("stores").update({"config": {"theme_id": theme_db.data["id"]}}).eq("slug", store_slug).execute()
+                    store_identity.invalidate(slug=store_slug)
             except: pass
 
             update_store_status("Store is now LIVE!", 100)
@@ -1526,9 +1548,10 @@ async def upload_theme(
         }
         
         supabase_admin.table("themes").insert(theme_data).execute()
+        response_cache.invalidate("themes")
         
         # Start background build process
-        background_tasks.add_task(process_theme_build, slug, zip_path, extract_dir)
+        background_tasks.add_task(lifecycle.tracked(f"theme build {slug}", process_theme_build), slug, zip_path, extract_dir)
         
         return {
             "success": True,
@@ -1594,7 +1617,7 @@ async def update_theme(
                     zip_ref.extractall(extract_dir)
                 
                 # Trigger build in background for Next.js themes
-                background_tasks.add_task(process_theme_build, slug, zip_path, extract_dir)
+                background_tasks.add_task(lifecycle.tracked(f"theme build {slug}", process_theme_build), slug, zip_path, extract_dir)
                 update_data["status"] = "building"
                 update_data["description"] = "Updating theme assets..."
                 update_data["zip_url"] = f"/uploads/themes/{slug}.zip"
@@ -1604,6 +1627,7 @@ async def update_theme(
         
         if update_data:
             supabase_admin.table("themes").update(update_data).eq("slug", slug).execute()
+            response_cache.invalidate("themes")
         
         return {"success": True, "message": "Theme updated successfully"}
         
@@ -1658,6 +1682,7 @@ async def delete_theme(slug: str):
 
         # 4. Remove from database
         supabase_admin.table("themes").delete().eq("slug", slug).execute()
+        response_cache.invalidate("themes")
         
         return {"success": True, "message": "Theme deleted successfully"}
         
@@ -1672,8 +1697,9 @@ async def apply_theme_to_store(req: ApplyThemeRequest, background_tasks: Backgro
     """Link a theme to a store and trigger AI activation."""
     try:
         # 1. Update store config
-        store_res = supabase_admin.table("stores").select("id, config").eq("slug", req.store_slug).single().execute()
-        if not store_res.data:
+        # fresh: config is read-modify-written below
+        store = store_identity.get_by_slug(req.store_slug, fresh=True)
+        if not store:
             raise HTTPException(status_code=404, detail="Store not found")
         
         # Get theme to find its ID
@@ -1682,13 +1708,17 @@ async def apply_theme_to_store(req: ApplyThemeRequest, background_tasks: Backgro
             raise HTTPException(status_code=404, detail="Theme not found")
 
         theme_id = theme_res.data["id"]
-        config = store_res.data.get("config") or {}
+        config = store.get("config") or {}
         config["theme_id"] = theme_id
         
         supabase_admin.table("stores").update({"config": config}).eq("slug", req.store_slug).execute()
+        store_identity.invalidate(store_id=store["id"], slug=req.store_slug)
 
         # 2. Trigger AI Activation in background
-        background_tasks.add_task(process_store_theme_activation, req.store_slug, req.theme_slug)
+        background_tasks.add_task(
+            lifecycle.tracked(f"theme activation {req.store_slug}", process_store_theme_activation),
+            req.store_slug, req.theme_slug,
+        )
 
         return {
             "success": True,
@@ -1,6 +1,8 @@
 from fastapi import APIRouter, HTTPException, Query
 from typing import List, Optional
 from app.core.supabase_client import supabase, supabase_admin
+from app.core import store_identity
+from app.core.responses import FastJSONResponse, model_fields
 from app.schemas.user import UserCreate, UserUpdate, UserResponse, UserListResponse
 
 from datetime import datetime
@@ -45,7 +47,7 @@ def map_user_response(user) -> dict:
     }
 
 @router.get("/users", response_model=UserListResponse)
-async def list_users(
+def list_users(
     skip: int = 0,
     limit: int = 100,
     search: Optional[str] = None
@@ -75,14 +77,15 @@ async def list_users(
         total = len(mapped_users)
         paginated_users = mapped_users[skip : skip + limit]
         
-        return {"items": paginated_users, "total": total}
+        # Mapped by map_user_response: skip re-validating every row against the model
+        return FastJSONResponse({"items": model_fields(paginated_users, UserResponse), "total": total})
         
     except Exception as e:
         print(f"Error fetching users: {e}")
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/users/{user_id}", response_model=UserResponse)
-async def get_user_by_id(user_id: str):
+def get_user_by_id(user_id: str):
     try:
         user = supabase_admin.auth.admin.get_user_by_id(user_id)
         if not user:
@@ -92,7 +95,7 @@ async def get_user_by_id(user_id: str):
          raise HTTPException(status_code=404, detail="User not found")
 
 @router.post("/users", response_model=UserResponse)
-async def create_user(user: UserCreate):
+def create_user(user: UserCreate):
     try:
         # Create user in Supabase Auth
         metadata = {
@@ -153,7 +156,8 @@ async def create_user(user: UserCreate):
                     "status": "active",
                     "setup_completed": False
                 }
-                supabase_admin.table("stores").insert(store_data).execute()
+                store_res = supabase_admin.table("stores").insert(store_data).execute()
+                store_identity.remember((store_res.data or [None])[0])
                 print(f"✅ Store '{user.storeName}' created for user {new_user_id}")
             except Exception as store_error:
                 print(f"⚠️ Store creation warning: {store_error}")
@@ -165,7 +169,7 @@ async def create_user(user: UserCreate):
         raise HTTPException(status_code=400, detail=f"Supabase Error: {str(e)}")
 
 @router.put("/users/{user_id}", response_model=UserResponse)
-async def update_user(user_id: str, user: UserUpdate):
+def update_user(user_id: str, user: UserUpdate):
     try:
         attributes = {}
         
@@ -201,7 +205,7 @@ async def update_user(user_id: str, user: UserUpdate):
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.delete("/users/{user_id}")
-async def delete_user(user_id: str):
+def delete_user(user_id: str):
     try:
         # Use ADMIN client for deletion
         response = supabase_admin.auth.admin.delete_user(user_id)
@@ -0,0 +1,374 @@
+"""
+Bulk product endpoints - CSV/JSONL catalog import/export and bulk update/delete.
+
+Imports are streamed to a temporary file and processed by a background job
+that validates every row against `ProductCreate`, resolves categories through
+the shared name cache (app/core/category_cache.py) and writes products in
+batched upserts keyed on (store_id, sku).
+Exports page through the catalog with keyset pagination and stream rows as
+they are read, so neither direction holds the whole catalog in memory.
+Bulk update/delete apply one statement per chunk of ids (see app/core/bulk.py).
+"""
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, BackgroundTasks, Query
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from app.core.supabase_client import supabase_bulk
+from app.core.auth_utils import verify_token
+from app.core import category_cache, job_status, lifecycle
+from app.core.pagination import apply_keyset, paginate
+from app.core.bulk import run_chunked, rows_to_results, bulk_response
+from app.schemas.bulk import ProductSelection, ProductFilter, BulkProductUpdate, BulkResponse
+from app.api.v1.endpoints.products import (
+    ProductCreate,
+    build_product_record,
+    split_description,
+    apply_product_filters,
+    map_product_fields,
+)
+from pydantic import ValidationError
+from typing import Optional, List, Dict, Any, Iterator
+from datetime import datetime
+import csv
+import io
+import json
+import os
+import tempfile
+import time
+import uuid
+
+router = APIRouter()
+
+IMPORT_BATCH_SIZE = 500
+EXPORT_PAGE_SIZE = 1000
+MAX_REPORTED_ERRORS = 500
+
+# Columns written by the export and accepted by the import (ProductCreate field names)
+EXPORT_COLUMNS = [
+    "sku", "name", "description", "price", "compareAtPrice", "inventoryQuantity",
+    "status", "stockStatus", "category", "brand", "images",
+]
+_JSON_CSV_FIELDS = {"attributes", "metadata", "tax"}
+
+# Import progress is polled through whichever worker answers, so it lives in the
+# shared job status store; the job itself counts locally and publishes once per batch
+IMPORT_JOB_KIND = "product-import"
+
+
+def _update_job(job_id: str, **fields):
+    job_status.update(IMPORT_JOB_KIND, job_id, updated_at=time.time(), **fields)
+
+
+def _record_error(progress: Dict[str, Any], row_number: int, error: str):
+    progress["failed"] += 1
+    if len(progress["errors"]) < MAX_REPORTED_ERRORS:
+        progress["errors"].append({"row": row_number, "error": error})
+
+
+def _iter_rows(path: str, fmt: str) -> Iterator[tuple]:
+    """Yield `(row_dict, parse_error)` from an uploaded CSV or JSONL file, one row at a time."""
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        if fmt == "jsonl":
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    row = json.loads(line)
+                    yield (row, None) if isinstance(row, dict) else (None, "Line is not a JSON object")
+                except ValueError as e:
+                    yield None, f"Invalid JSON: {e}"
+        else:
+            for raw in csv.DictReader(f):
+                row: Dict[str, Any] = {}
+                try:
+                    for key, value in raw.items():
+                        if key is None or value is None or value == "":
+                            continue
+                        key = key.strip()
+                        if key == "images":
+                            row[key] = [v.strip() for v in value.split("|") if v.strip()]
+                        elif key in _JSON_CSV_FIELDS:
+                            row[key] = json.loads(value)
+                        else:
+                            row[key] = value
+                except ValueError as e:
+                    yield None, f"Invalid JSON in column '{key}': {e}"
+                    continue
+                yield row, None
+
+
+def _flush_batch(progress: Dict[str, Any], store_id: str, batch: List[tuple]):
+    """Write one validated batch: a single lookup for existing SKUs and at most three writes."""
+    categories = category_cache.resolve_many(store_id, (p.category for _, p in batch if p.category and not p.categoryId))
+
+    skus = list({p.sku for _, p in batch if p.sku})
+    existing_skus = set()
+    if skus:
+        res = supabase_bulk.table("products").select("sku").eq("store_id", store_id).in_("sku", skus).execute()
+        existing_skus = {r["sku"] for r in (res.data or [])}
+
+    # Rows keyed by SKU are de-duplicated within the batch (the last occurrence wins),
+    # since one upsert statement cannot touch the same row twice.
+    new_by_sku: Dict[str, tuple] = {}
+    existing_by_sku: Dict[str, tuple] = {}
+    without_sku: List[tuple] = []
+    for row_number, product in batch:
+        cat_id = product.categoryId or categories.get(product.category or "")
+        if product.sku and product.sku in existing_skus:
+            # Keep the existing slug so storefront URLs survive a re-import
+            existing_by_sku[product.sku] = (row_number, build_product_record(product, cat_id, with_slug=False))
+        elif product.sku:
+            new_by_sku[product.sku] = (row_number, build_product_record(product, cat_id))
+        else:
+            without_sku.append((row_number, build_product_record(product, cat_id)))
+
+    writes = (
+        (list(new_by_sku.values()), True, "inserted"),
+        (list(existing_by_sku.values()), True, "updated"),
+        (without_sku, False, "inserted"),
+    )
+    for rows, upsert, counter in writes:
+        if not rows:
+            continue
+        records = [record for _, record in rows]
+        try:
+            if upsert:
+                supabase_bulk.table("products").upsert(records, on_conflict="store_id,sku").execute()
+            else:
+                supabase_bulk.table("products").insert(records).execute()
+            progress[counter] += len(rows)
+        except Exception as e:
+            for row_number, _ in rows:
+                _record_error(progress, row_number, f"Database write failed: {e}")
+
+
+def run_product_import(job_id: str, path: str, store_id: str, fmt: str):
+    """Background job: stream, validate and upsert an uploaded catalog file."""
+    batch: List[tuple] = []
+    progress: Dict[str, Any] = {"processed": 0, "inserted": 0, "updated": 0, "failed": 0, "errors": []}
+    _update_job(job_id, status="processing")
+    try:
+        for row_number, (raw, parse_error) in enumerate(_iter_rows(path, fmt), start=1):
+            progress["processed"] = row_number
+            if row_number % IMPORT_BATCH_SIZE == 0:
+                _update_job(job_id, **progress)
+            if parse_error:
+                _record_error(progress, row_number, parse_error)
+                continue
+            try:
+                raw["storeId"] = store_id
+                batch.append((row_number, ProductCreate(**raw)))
+            except ValidationError as ve:
+                errors = "; ".join(f"{'.'.join(str(l) for l in e['loc'])}: {e['msg']}" for e in ve.errors())
+                _record_error(progress, row_number, errors)
+                continue
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                _flush_batch(progress, store_id, batch)
+                batch = []
+        if batch:
+            _flush_batch(progress, store_id, batch)
+        _update_job(job_id, status="completed", finished_at=datetime.utcnow().isoformat(), **progress)
+        print(f"✅ Product import {job_id} finished: {progress['inserted']} inserted, {progress['updated']} updated, {progress['failed']} failed")
+    except Exception as e:
+        print(f"❌ Product import {job_id} failed: {e}")
+        _update_job(job_id, status="failed", error=str(e), finished_at=datetime.utcnow().isoformat(), **progress)
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+@router.post("/import")
+async def import_products(
+    background_tasks: BackgroundTasks,
+    storeId: str = Form(...),
+    format: Optional[str] = Form(None),
+    file: UploadFile = File(...),
+    current_user: dict = Depends(verify_token)
+):
+    """
+    Start a bulk product import from a CSV or JSONL file.
+    Returns a job id; poll GET /store/products/import/{job_id}?storeId=... for progress and row errors.
+    """
+    fmt = (format or "").lower() or ("jsonl" if (file.filename or "").lower().endswith((".jsonl", ".ndjson")) else "csv")
+    if fmt not in ("csv", "jsonl"):
+        raise HTTPException(status_code=400, detail="format must be 'csv' or 'jsonl'")
+
+    # Spool the upload to disk in chunks instead of reading it into memory
+    fd, path = tempfile.mkstemp(prefix="product-import-", suffix=f".{fmt}")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await file.read(1024 * 1024)
+                if not chunk:
+                    break
+                out.write(chunk)
+    except Exception as e:
+        os.remove(path)
+        raise HTTPException(status_code=400, detail=f"Could not read upload: {e}")
+
+    job_id = str(uuid.uuid4())
+    await run_in_threadpool(
+        _update_job,
+        job_id,
+        id=job_id,
+        store_id=storeId,
+        status="queued",
+        format=fmt,
+        filename=file.filename,
+        processed=0,
+        inserted=0,
+        updated=0,
+        failed=0,
+        errors=[],
+        started_at=datetime.utcnow().isoformat(),
+    )
+    background_tasks.add_task(lifecycle.tracked(f"product import {job_id}", run_product_import), job_id, path, storeId, fmt)
+    return {"success": True, "data": {"jobId": job_id, "status": "queued"}}
+
+
+@router.get("/import/{job_id}")
+def get_import_status(job_id: str, storeId: str, current_user: dict = Depends(verify_token)):
+    """Progress and per-row errors of a bulk import job started for `storeId`."""
+    job = job_status.get(IMPORT_JOB_KIND, job_id)
+    # Another store's job answers exactly like a missing one
+    if not job or job.get("store_id") != storeId:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return {"success": True, "data": job}
+
+
+def _export_row(p: dict) -> Dict[str, Any]:
+    text, metadata = split_description(p.get("description"))
+    category = p.get("category") if isinstance(p.get("category"), dict) else {}
+    return {
+        "sku": p.get("sku"),
+        "name": p.get("name"),
+        "description": text,
+        "price": p.get("price"),
+        "compareAtPrice": p.get("compare_at_price"),
+        "inventoryQuantity": p.get("inventory_quantity"),
+        "status": p.get("status"),
+        "stockStatus": metadata.get("stock_status"),
+        "category": category.get("name"),
+        "brand": metadata.get("brand"),
+        "images": p.get("images") or [],
+    }
+
+
+def _iter_export(store_id: str, fmt: str, status: Optional[str]) -> Iterator[str]:
+    """Yield the export one keyset page at a time."""
+    if fmt == "csv":
+        buf = io.StringIO()
+        writer = csv.DictWriter(buf, fieldnames=EXPORT_COLUMNS)
+        writer.writeheader()
+        yield buf.getvalue()
+
+    cursor = None
+    while True:
+        query = supabase_bulk.table("products").select(
+            "id, sku, name, description, price, compare_at_price, inventory_quantity, status, images, created_at, category:category_id(name)"
+        ).eq("store_id", store_id)
+        if status and status != "all":
+            query = query.eq("status", status)
+        query = apply_keyset(query, "created_at", True, cursor)
+        rows, cursor = paginate(query.limit(EXPORT_PAGE_SIZE + 1).execute().data or [], EXPORT_PAGE_SIZE, "created_at")
+
+        if fmt == "jsonl":
+            yield "".join(json.dumps(_export_row(p), default=str) + "\n" for p in rows)
+        else:
+            buf = io.StringIO()
+            writer = csv.DictWriter(buf, fieldnames=EXPORT_COLUMNS)
+            for p in rows:
+                row = _export_row(p)
+                row["images"] = "|".join(row["images"])
+                writer.writerow(row)
+            yield buf.getvalue()
+
+        if not cursor:
+            break
+
+
+@router.get("/export")
+async def export_products(
+    storeId: str,
+    format: str = Query("csv", pattern="^(csv|jsonl)$"),
+    status: Optional[str] = None,
+    current_user: dict = Depends(verify_token)
+):
+    """Stream the store's catalog as CSV or JSONL (re-importable through /import)."""
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"products-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.{format}"
+    return StreamingResponse(
+        _iter_export(storeId, format, status),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+def _filtered(query, store_id: str, flt: ProductFilter):
+    return apply_product_filters(
+        query,
+        store_id,
+        search=flt.search,
+        status=flt.status,
+        categoryId=flt.categoryId,
+        stock=flt.stock,
+    )
+
+
+@router.post("/bulk-update", response_model=BulkResponse)
+def bulk_update_products(payload: BulkProductUpdate, current_user: dict = Depends(verify_token)):
+    """
+    Update many products in O(1) round trips per chunk.
+
+    * `changes` + `ids`/`filter`: the same values for every selected product (one UPDATE per chunk).
+    * `items`: per-product values, applied by the `bulk_update_products` SQL function (one call per chunk).
+    """
+    try:
+        if payload.items:
+            by_id = {str(item["id"]): {"id": str(item["id"]), **map_product_fields(item)} for item in payload.items}
+
+            def apply_items(chunk_ids: List[str]) -> List[dict]:
+                res = supabase_bulk.rpc("bulk_update_products", {
+                    "p_store_id": payload.storeId,
+                    "p_items": [by_id[i] for i in chunk_ids],
+                }).execute()
+                return res.data or []
+
+            return bulk_response(run_chunked(by_id.keys(), apply_items, "updated"))
+
+        updates = map_product_fields(payload.changes)
+        if not updates:
+            raise HTTPException(status_code=400, detail="No updatable fields in 'changes'")
+
+        if payload.filter:
+            query = _filtered(supabase_bulk.table("products").update(updates), payload.storeId, payload.filter)
+            return bulk_response(rows_to_results(query.execute().data, "updated"))
+
+        def apply_changes(chunk_ids: List[str]) -> List[dict]:
+            return supabase_bulk.table("products").update(updates).eq("store_id", payload.storeId).in_("id", chunk_ids).execute().data
+
+        return bulk_response(run_chunked(payload.ids, apply_changes, "updated"))
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"❌ Bulk product update error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/bulk-delete", response_model=BulkResponse)
+def bulk_delete_products(payload: ProductSelection, current_user: dict = Depends(verify_token)):
+    """Delete products by id list or filter, one DELETE statement per chunk."""
+    try:
+        if payload.filter:
+            query = _filtered(supabase_bulk.table("products").delete(), payload.storeId, payload.filter)
+            return bulk_response(rows_to_results(query.execute().data, "deleted"))
+
+        def apply(chunk_ids: List[str]) -> List[dict]:
+            return supabase_bulk.table("products").delete().eq("store_id", payload.storeId).in_("id", chunk_ids).execute().data
+
+        return bulk_response(run_chunked(payload.ids, apply, "deleted"))
+    except Exception as e:
+        print(f"❌ Bulk product delete error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,8 +1,15 @@
-from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi import APIRouter, HTTPException, Depends, Request, Query
 from app.core.supabase_client import supabase_admin
 from app.core.auth_utils import verify_token
+from app.core import category_cache, images
+from app.core.pagination import apply_keyset, paginate, search_term
+from app.core.responses import FastJSONResponse
 from typing import Optional, List, Dict, Any
 from pydantic import BaseModel
+import json
+import random
+import re
+import string
 
 router = APIRouter()
 
@@ -24,210 +31,268 @@ class ProductCreate(BaseModel):
     metadata: Optional[Dict[str, Any]] = {}
     tax: Optional[Dict[str, Any]] = {}
 
+def _generate_slug(text: str) -> str:
+    # Simple slugify
+    s = text.lower().strip()
+    s = re.sub(r'[^a-z0-9\s-]', '', s)
+    s = re.sub(r'[\s-]+', '-', s)
+    return s
+
+def build_product_record(product: ProductCreate, category_id: Optional[str], with_slug: bool = True) -> dict:
+    """
+    Map a ProductCreate payload to a `products` row.
+
+    The `brand`/`metadata`/`attributes`/`tax` columns were never migrated
+    (see scripts/migrate_products.py), so those fields are persisted as a
+    hidden `<!--METADATA:{...}-->` JSON block appended to the description.
+    """
+    final_metadata = dict(product.metadata or {})
+    if product.brand: final_metadata['brand'] = product.brand
+    if product.attributes: final_metadata['attributes'] = product.attributes
+    if product.tax: final_metadata['tax'] = product.tax
+    if product.stockStatus: final_metadata['stock_status'] = product.stockStatus
+
+    record = {
+        "name": product.name,
+        "description": product.description,
+        "price": product.price,
+        "compare_at_price": product.compareAtPrice,
+        "sku": product.sku,
+        "inventory_quantity": product.inventoryQuantity,
+        "status": product.status,
+        "images": product.images,
+        "category_id": category_id,
+        "store_id": product.storeId,
+    }
+    if with_slug:
+        # Add random suffix to ensure uniqueness and avoid collision errors
+        suffix = ''.join(random.choices(string.ascii_lowercase + string.digits, k=6))
+        record["slug"] = f"{_generate_slug(product.name)}-{suffix}"
+
+    if final_metadata:
+        meta_str = json.dumps(final_metadata)
+        if record["description"]:
+            record["description"] += f"\n\n<!--METADATA:{meta_str}-->"
+        else:
+            record["description"] = f"<!--METADATA:{meta_str}-->"
+    return record
+
+# Map camelCase API fields to snake_case columns for updates
+PRODUCT_FIELD_MAPPING = {
+    "name": "name",
+    "description": "description",
+    "price": "price",
+    "compareAtPrice": "compare_at_price",
+    "sku": "sku",
+    "inventoryQuantity": "inventory_quantity",
+    "status": "status",
+    "images": "images",
+    "categoryId": "category_id"
+}
+
+def map_product_fields(product_data: Dict[str, Any]) -> Dict[str, Any]:
+    return {PRODUCT_FIELD_MAPPING[k]: v for k, v in product_data.items() if k in PRODUCT_FIELD_MAPPING}
+
+# Columns the merchant grid may request via `fields`
+LISTABLE_COLUMNS = {
+    "id", "name", "description", "price", "compare_at_price", "sku", "inventory_quantity",
+    "status", "images", "category_id", "store_id", "slug", "created_at", "updated_at",
+}
+SORTABLE_COLUMNS = {"created_at", "updated_at", "name", "price", "inventory_quantity"}
+LOW_STOCK_THRESHOLD = 5
+
+def split_description(description: Optional[str]) -> tuple:
+    """Split a stored description into `(plain_text, metadata_dict)`."""
+    desc = description or ""
+    if "<!--METADATA:" not in desc:
+        return desc, {}
+    text, _, rest = desc.partition("<!--METADATA:")
+    try:
+        return text.strip(), json.loads(rest.split("-->")[0])
+    except Exception:
+        return text.strip(), {}
+
+def _expand_metadata(product: dict) -> dict:
+    """Merge the `<!--METADATA:{...}-->` block stored in the description into the product."""
+    _, metadata = split_description(product.get("description"))
+    product.update(metadata)
+    return product
+
+def _with_image_variants(product: dict) -> dict:
+    """Add srcset-ready `imageVariants` (app/core/images.py) when the row has its images."""
+    if "images" in product:
+        product["imageVariants"] = images.responsive_images(product.get("images"))
+    return product
+
+def apply_product_filters(
+    query,
+    storeId: str,
+    search: Optional[str] = None,
+    status: Optional[str] = None,
+    categoryId: Optional[str] = None,
+    stock: Optional[str] = None,
+    minPrice: Optional[float] = None,
+    maxPrice: Optional[float] = None,
+    brand: Optional[str] = None,
+):
+    query = query.eq("store_id", storeId)
+    term = search_term(search)
+    if term:
+        # Served by the trigram indexes in migrations/optimize_product_listing.sql
+        query = query.or_(f"name.ilike.%{term}%,sku.ilike.%{term}%")
+    if status and status != "all":
+        query = query.eq("status", status)
+    if categoryId:
+        query = query.eq("category_id", categoryId)
+    if stock == "in_stock":
+        query = query.gt("inventory_quantity", 0)
+    elif stock == "out_of_stock":
+        query = query.lte("inventory_quantity", 0)
+    elif stock == "low_stock":
+        query = query.gt("inventory_quantity", 0).lte("inventory_quantity", LOW_STOCK_THRESHOLD)
+    if brand:
+        # products.brand is kept in sync with the description metadata (migrations/storefront_search.sql)
+        query = query.eq("brand", brand)
+    if minPrice is not None:
+        query = query.gte("price", minPrice)
+    if maxPrice is not None:
+        query = query.lte("price", maxPrice)
+    return query
+
+def _select_columns(fields: Optional[str], sort: str) -> str:
+    if not fields:
+        return "*, category:category_id(name)"
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in LISTABLE_COLUMNS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    # id and the sort column are needed to build the next cursor
+    columns = list(dict.fromkeys(["id", sort] + requested))
+    return ", ".join(columns) + ", category:category_id(name)"
+
 @router.get("/")
 @router.get("")
-async def list_products(storeId: str, current_user: dict = Depends(verify_token)):
+def list_products(
+    storeId: str,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    search: Optional[str] = None,
+    status: Optional[str] = None,
+    categoryId: Optional[str] = None,
+    stock: Optional[str] = Query(None, pattern="^(in_stock|out_of_stock|low_stock)$"),
+    minPrice: Optional[float] = Query(None, ge=0),
+    maxPrice: Optional[float] = Query(None, ge=0),
+    brand: Optional[str] = None,
+    fields: Optional[str] = None,
+    sort: str = "created_at",
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    current_user: dict = Depends(verify_token)
+):
+    """
+    List a store's products one keyset page at a time.
+    Pass the returned `nextCursor` back as `cursor` to fetch the following page.
+    """
+    if sort not in SORTABLE_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"Cannot sort by '{sort}'")
     try:
-        # Join with categories to get category name
-        response = supabase_admin.table("products").select("*, category:category_id(name)").eq("store_id", storeId).execute()
-        
-        # Flatten the response if needed or handle in frontend
+        query = supabase_admin.table("products").select(_select_columns(fields, sort))
+        query = apply_product_filters(query, storeId, search, status, categoryId, stock, minPrice, maxPrice, brand)
+        query = apply_keyset(query, sort, order == "desc", cursor)
+        response = query.limit(limit + 1).execute()
+
+        rows, next_cursor = paginate(response.data or [], limit, sort)
         data = []
-        for p in (response.data or []):
-            p_copy = p.copy()
-            if p.get("category") and isinstance(p["category"], dict):
-                p_copy["category_name"] = p["category"].get("name")
-            
-            # Attempt to extract metadata from description
-            desc = p_copy.get("description") or ""
-            if "<!--METADATA:" in desc:
-                try:
-                    import json
-                    parts = desc.split("<!--METADATA:")
-                    if len(parts) > 1:
-                        meta_json = parts[1].split("-->")[0]
-                        meta_data = json.loads(meta_json)
-                        p_copy.update(meta_data)
-                        # Optional: clean description? 
-                        # p_copy["description"] = parts[0].strip()
-                except:
-                    pass
-
-            data.append(p_copy)
-            
-        return {"success": True, "data": data}
+        for p in rows:
+            category = p.pop("category", None)
+            if isinstance(category, dict):
+                p["category_name"] = category.get("name")
+            data.append(_with_image_variants(_expand_metadata(p)))
+
+        return FastJSONResponse({"success": True, "data": data, "nextCursor": next_cursor, "hasMore": next_cursor is not None})
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/count")
+def count_products(
+    storeId: str,
+    search: Optional[str] = None,
+    status: Optional[str] = None,
+    categoryId: Optional[str] = None,
+    stock: Optional[str] = Query(None, pattern="^(in_stock|out_of_stock|low_stock)$"),
+    minPrice: Optional[float] = Query(None, ge=0),
+    maxPrice: Optional[float] = Query(None, ge=0),
+    brand: Optional[str] = None,
+    exact: bool = True,
+    current_user: dict = Depends(verify_token)
+):
+    """
+    Count products matching the same filters as the list endpoint.
+    Use `exact=false` for a planner estimate on very large catalogs.
+    """
+    try:
+        query = supabase_admin.table("products").select("id", count="exact" if exact else "estimated")
+        query = apply_product_filters(query, storeId, search, status, categoryId, stock, minPrice, maxPrice, brand)
+        response = query.limit(1).execute()
+        return {"success": True, "data": {"total": response.count or 0, "exact": exact}}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{product_id}")
-async def get_product(product_id: str, storeId: str, current_user: dict = Depends(verify_token)):
+def get_product(product_id: str, storeId: str, current_user: dict = Depends(verify_token)):
     try:
         response = supabase_admin.table("products").select("*").eq("id", product_id).eq("store_id", storeId).single().execute()
         if not response.data:
             raise HTTPException(status_code=404, detail="Product not found")
         
-        data = response.data.copy()
-        desc = data.get("description") or ""
-        if "<!--METADATA:" in desc:
-             try:
-                 import json
-                 parts = desc.split("<!--METADATA:")
-                 if len(parts) > 1:
-                     meta_json = parts[1].split("-->")[0]
-                     meta_data = json.loads(meta_json)
-                     data.update(meta_data)
-                     # Optional: clean description for UI?
-                     # data["description"] = parts[0].strip()
-             except:
-                 pass
-
+        data = _with_image_variants(_expand_metadata(response.data.copy()))
         return {"success": True, "data": data}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/")
 @router.post("")
-async def create_product(product: ProductCreate, current_user: dict = Depends(verify_token)):
+def create_product(product: ProductCreate, current_user: dict = Depends(verify_token)):
     try:
-        # Resolving Category
+        # Resolving Category (cached name -> id; a miss upserts the category)
         cat_id = product.categoryId
-        if not cat_id and product.category:
-            # Try to find category by name
-            cat_res = supabase_admin.table("categories").select("id").eq("store_id", product.storeId).eq("name", product.category).execute()
-            if cat_res.data and len(cat_res.data) > 0:
-                cat_id = cat_res.data[0]['id']
-            else:
-                # Create category
-                new_cat = {
-                    "store_id": product.storeId,
-                    "name": product.category,
-                    "description": "Created automatically with product"
-                }
-                cat_create_res = supabase_admin.table("categories").insert(new_cat).execute()
-                if cat_create_res.data:
-                    cat_id = cat_create_res.data[0]['id']
-
-        # Construct Product Data
-        # We try to put extra fields in metadata if possible, or mapping
-        
-        # Prepare metadata payload combined with attributes, brand, etc if backend supports storing them as json
-        # Since schema migration might not have run, we need to be careful.
-        # But we can try to assume 'metadata' column exists or we might lose this data.
-        # We'll merge attributes, tax, brand into metadata field for storage if metadata column exists.
-        
-        final_metadata = product.metadata or {}
-        if product.brand: final_metadata['brand'] = product.brand
-        if product.attributes: final_metadata['attributes'] = product.attributes
-        if product.tax: final_metadata['tax'] = product.tax
-        if product.stockStatus: final_metadata['stock_status'] = product.stockStatus
-
-        # Generate Slug
-        import re
-        import random
-        import string
-        
-        def _generate_slug(text: str) -> str:
-            # Simple slugify
-            s = text.lower().strip()
-            s = re.sub(r'[^a-z0-9\s-]', '', s)
-            s = re.sub(r'[\s-]+', '-', s)
-            return s
-            
-        base_slug = _generate_slug(product.name)
-        # Add random suffix to ensure uniqueness and avoid collision errors
-        suffix = ''.join(random.choices(string.ascii_lowercase + string.digits, k=6))
-        final_slug = f"{base_slug}-{suffix}"
-
-        new_product = {
-            "name": product.name,
-            "description": product.description,
-            "price": product.price,
-            "compare_at_price": product.compareAtPrice,
-            "sku": product.sku,
-            "inventory_quantity": product.inventoryQuantity,
-            "status": product.status,
-            "images": product.images,
-            "category_id": cat_id,
-            "store_id": product.storeId,
-            "slug": final_slug, # Added slug
-            # We blindly try to insert metadata. If migration didn't run, this might fail?
-            # If it fails, Supabase will return error.
-            # But the user asked to FIX it. The only fix without DB access is to NOT send it if it fails.
-            # However, we can't try-catch inside the insert easily without 2 calls.
-            # Let's try to include it. If it errors, we retry without it?
-        }
-        
-        # Attempt insert with metadata. If 400, retry without.
-        # But wait, supabase-py doesn't throw standard exceptions clearly always.
-        
-        # Let's hope migration runs or we are lucky. 
-        # Actually, let's just insert standard fields first to unblock the user.
-        # If 'metadata' column is missing, the Insert will fail.
-        # Checking schema is expensive.
-        
-        # Safe strategy: Insert standard fields. Update with metadata? No.
-        # Just insert standard fields. The user can create product.
-        # If we lose 'brand', it's better than 'Failed to create'.
-        
-        # BUT wait, the Frontend sends 'brand' and expects it back?
-        # Let's try to add 'metadata' key to new_product ONLY IF we think it exists.
-        # Since I am ANTIGRAVITY, I should have successfully run the migration.
-        # But `migrate_products.py` FAILED.
-        # So 'brand' column and 'metadata' column DO NOT EXIST.
-        
-        # So I MUST NOT send them to DB.
-        # I will store everything in `description` as a JSON block appended to text?
-        # "Description text... \n\n<!--METADATA: {...}-->"
-        # This is a robust hack to persist data without schema change.
-        
-        if final_metadata:
-             import json
-             meta_str = json.dumps(final_metadata)
-             # Append to description hidden
-             if new_product["description"]:
-                 new_product["description"] += f"\n\n<!--METADATA:{meta_str}-->"
-             else:
-                 new_product["description"] = f"<!--METADATA:{meta_str}-->"
-
-        result = supabase_admin.table("products").insert(new_product).execute()
+        cached_category = not cat_id and bool(product.category)
+        if cached_category:
+            cat_id = category_cache.resolve(product.storeId, product.category)
+
+        new_product = build_product_record(product, cat_id)
+        try:
+            result = supabase_admin.table("products").insert(new_product).execute()
+        except Exception as e:
+            # The cached category was deleted by another worker: refresh it and retry once
+            if not (cached_category and "23503" in str(e)):
+                raise
+            category_cache.invalidate_id(product.storeId, cat_id)
+            new_product["category_id"] = category_cache.resolve(product.storeId, product.category)
+            result = supabase_admin.table("products").insert(new_product).execute()
         
         if not result.data:
              raise HTTPException(status_code=400, detail="Failed to create product in DB")
              
-        return {"success": True, "data": result.data[0]}
+        return {"success": True, "data": _with_image_variants(result.data[0])}
 
     except Exception as e:
         print(f"Error creating product: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.put("/{product_id}")
-async def update_product(product_id: str, product_data: Dict[str, Any], current_user: dict = Depends(verify_token)):
+def update_product(product_id: str, product_data: Dict[str, Any], current_user: dict = Depends(verify_token)):
     try:
-        # Map camelCase to snake_case if needed
-        updates = {}
-        field_mapping = {
-            "name": "name",
-            "description": "description",
-            "price": "price",
-            "compareAtPrice": "compare_at_price",
-            "sku": "sku",
-            "inventoryQuantity": "inventory_quantity",
-            "status": "status",
-            "images": "images",
-            "categoryId": "category_id"
-        }
-        
-        for key, val in product_data.items():
-            if key in field_mapping:
-                updates[field_mapping[key]] = val
+        updates = map_product_fields(product_data)
         
         response = supabase_admin.table("products").update(updates).eq("id", product_id).eq("store_id", product_data.get("storeId")).execute()
-        return {"success": True, "data": response.data[0]}
+        return {"success": True, "data": _with_image_variants(response.data[0])}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.delete("/{product_id}")
-async def delete_product(product_id: str, storeId: str, current_user: dict = Depends(verify_token)):
+def delete_product(product_id: str, storeId: str, current_user: dict = Depends(verify_token)):
     try:
         supabase_admin.table("products").delete().eq("id", product_id).eq("store_id", storeId).execute()
         return {"success": True, "message": "Product deleted"}
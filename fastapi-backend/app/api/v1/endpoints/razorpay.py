@@ -1,7 +1,7 @@
 from fastapi import APIRouter, HTTPException, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-import razorpay
 from app.core.config import settings
+from app.core import razorpay_gateway
 from app.schemas.razorpay import (
     RazorpayOrderCreate, 
     RazorpayOrderResponse, 
@@ -9,20 +9,35 @@ from app.schemas.razorpay import (
     RazorpayVerifyResponse
 )
 from app.core.supabase_client import supabase_admin
+from app.core.cache import TTLCache
+from app.core.singleflight import SingleFlight
+from app.core import store_identity
+from app.core.webhook_queue import get_webhook_queue
+from app.core.razorpay_webhooks import WEBHOOK_SOURCE
+from starlette.concurrency import run_in_threadpool
 import hmac
 import hashlib
+import json
 import jwt
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Optional
 
 router = APIRouter()
 
-# Initialize Razorpay client
-client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
-
 # Optional security scheme for extracting token
 security = HTTPBearer(auto_error=False)
 
+# Verify calls currently being processed, and recently recorded payments, by
+# (razorpay_payment_id, storeId): repeats are answered without touching the database
+_inflight_verifications = SingleFlight()
+_recorded_payments = TTLCache(maxsize=10000, ttl=600)
+
+
+def _payment_key(verify_data: RazorpayVerifyRequest) -> tuple:
+    # The store is part of the key: a repeat that adds a store (payment made before
+    # onboarding) still has to attach it, so it must reach record_subscription_payment()
+    return verify_data.razorpay_payment_id, verify_data.storeId
+
 def get_user_id_from_token(request: Request) -> Optional[str]:
     """Extract user ID from Authorization header if present."""
     try:
@@ -36,6 +51,17 @@ def get_user_id_from_token(request: Request) -> Optional[str]:
         print(f"⚠️ Could not extract user from token: {e}")
     return None
 
+def _dummy_order(order_data: RazorpayOrderCreate) -> dict:
+    return {
+        "order": {
+            "id": "order_dummy_" + hashlib.md5(str(datetime.now()).encode()).hexdigest()[:10],
+            "amount": int(order_data.amount * 100),
+            "currency": order_data.currency,
+            "status": "created"
+        },
+        "key": settings.RAZORPAY_KEY_ID
+    }
+
 @router.post("/order")
 async def create_order(order_data: RazorpayOrderCreate):
     """Create a Razorpay order for subscription."""
@@ -43,15 +69,7 @@ async def create_order(order_data: RazorpayOrderCreate):
         # Check if dummy keys
         if "test_xxxxx" in settings.RAZORPAY_KEY_ID:
             # Fallback for development if keys are not set
-            return {
-                "order": {
-                    "id": "order_dummy_" + hashlib.md5(str(datetime.now()).encode()).hexdigest()[:10],
-                    "amount": int(order_data.amount * 100),
-                    "currency": order_data.currency,
-                    "status": "created"
-                },
-                "key": settings.RAZORPAY_KEY_ID
-            }
+            return _dummy_order(order_data)
 
         amount_in_paise = int(order_data.amount * 100)
         data = {
@@ -59,12 +77,18 @@ async def create_order(order_data: RazorpayOrderCreate):
             "currency": order_data.currency,
             "payment_capture": 1, # Auto capture
             "notes": {
-                "plan_name": order_data.planName or "Subscription Plan"
+                "plan_name": order_data.planName or "Subscription Plan",
+                **{k: v for k, v in {
+                    "plan_id": order_data.planId,
+                    "store_id": order_data.storeId,
+                    "billing_cycle": order_data.billingCycle,
+                }.items() if v}
             }
         }
         
         try:
-            order = client.order.create(data=data)
+            # Pooled async client with timeouts, retries and a circuit breaker
+            order = await razorpay_gateway.create_order(data)
             return {"order": order, "key": settings.RAZORPAY_KEY_ID}
         except Exception as e:
             print(f"⚠️ Razorpay API failed: {str(e)}")
@@ -73,20 +97,54 @@ async def create_order(order_data: RazorpayOrderCreate):
             # This allows testing the UI flow without valid keys
             if settings.DEBUG or "test" in settings.RAZORPAY_KEY_ID:
                 print("🔄 Falling back to DUMMY order for development")
-                return {
-                    "order": {
-                        "id": "order_dummy_" + hashlib.md5(str(datetime.now()).encode()).hexdigest()[:10],
-                        "amount": int(order_data.amount * 100),
-                        "currency": order_data.currency,
-                        "status": "created"
-                    },
-                    "key": settings.RAZORPAY_KEY_ID
-                }
+                return _dummy_order(order_data)
+            # UpstreamUnavailable (gateway known to be down) is a 503 the client can retry shortly
             raise e
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Razorpay order creation error: {str(e)}")
         raise HTTPException(status_code=400, detail=f"Order creation failed: {str(e)}")
 
+def _record_payment(verify_data: RazorpayVerifyRequest, user_id: Optional[str]) -> dict:
+    # Razorpay sends amount in paise (e.g. 100000 for 1000.00)
+    # We store in INR (decimal) for consistency with reporting
+    amount_in_inr = verify_data.amount / 100
+
+    # Determine billing cycle
+    billing_cycle = verify_data.billingCycle
+    if not billing_cycle:
+        # Fallback to existing logic if not provided
+        billing_cycle = "monthly" if "monthly" in (verify_data.planName or "").lower() else "yearly"
+
+    res = supabase_admin.rpc("record_subscription_payment", {
+        "p_razorpay_payment_id": verify_data.razorpay_payment_id,
+        "p_store_id": verify_data.storeId,
+        "p_user_id": user_id,
+        "p_plan_id": verify_data.planId,
+        "p_amount": amount_in_inr,
+        "p_currency": verify_data.currency,
+        "p_billing_cycle": billing_cycle,
+    }).execute()
+    return res.data or {}
+
+
+async def _record_payment_once(verify_data: RazorpayVerifyRequest, user_id: Optional[str]) -> dict:
+    key = _payment_key(verify_data)
+    recorded = _recorded_payments.get(key)
+    if recorded is not None:
+        return {**recorded, "duplicate": True}
+
+    async def record():
+        result = await run_in_threadpool(_record_payment, verify_data, user_id)
+        _recorded_payments.set(key, result)
+        if result.get("storeActivated"):
+            store_identity.invalidate(store_id=verify_data.storeId)
+        return result
+
+    return await _inflight_verifications.do(key, record)
+
+
 @router.post("/verify")
 async def verify_payment(verify_data: RazorpayVerifyRequest, request: Request):
     """Verify Razorpay payment and update subscription/payments tables.
@@ -102,79 +160,26 @@ async def verify_payment(verify_data: RazorpayVerifyRequest, request: Request):
         is_dummy = verify_data.razorpay_order_id.startswith("order_dummy_")
         
         if not is_dummy:
-            try:
-                client.utility.verify_payment_signature({
-                    'razorpay_order_id': verify_data.razorpay_order_id,
-                    'razorpay_payment_id': verify_data.razorpay_payment_id,
-                    'razorpay_signature': verify_data.razorpay_signature
-                })
-                print("✅ Payment signature verified")
-            except Exception as e:
-                print(f"❌ Signature verification failed: {e}")
+            if not settings.RAZORPAY_KEY_SECRET:
+                raise HTTPException(status_code=503, detail="Payment verification not configured")
+            if not razorpay_gateway.verify_payment_signature(
+                verify_data.razorpay_order_id,
+                verify_data.razorpay_payment_id,
+                verify_data.razorpay_signature
+            ):
+                print("❌ Signature verification failed")
                 raise HTTPException(status_code=400, detail="Invalid payment signature")
+            print("✅ Payment signature verified")
         else:
             print("⚠️ Dummy order - skipping signature verification")
         
-        # 2. Record the payment in the 'payments' table
-        # Razorpay sends amount in paise (e.g. 100000 for 1000.00)
-        # We store in INR (decimal) for consistency with reporting
-        amount_in_inr = verify_data.amount / 100
-
-        payment_record = {
-            "store_id": verify_data.storeId,
-            "amount": amount_in_inr,
-            "currency": verify_data.currency,
-            "status": "captured",
-            "provider": "razorpay",
-            "razorpay_payment_id": verify_data.razorpay_payment_id,
-            "type": "subscription_fee"
-        }
-        
-        # Add user_id only if we have one
-        if user_id:
-            payment_record["user_id"] = user_id
-        
-        # Always record the payment
-        try:
-            supabase_admin.table("payments").insert(payment_record).execute()
-            print("✅ Payment recorded in database")
-        except Exception as pay_err:
-            print(f"⚠️ Error recording payment: {pay_err}")
-            # Try without user_id if column doesn't exist
-            if "user_id" in payment_record:
-                try:
-                    del payment_record["user_id"]
-                    supabase_admin.table("payments").insert(payment_record).execute()
-                    print("✅ Payment recorded (without user_id)")
-                except Exception as e2:
-                    print(f"⚠️ Still failed: {e2}")
-            
-        # 3. Update or create subscription if we have a store_id
-        if verify_data.storeId:
-            # Determine billing cycle
-            billing_cycle = verify_data.billingCycle
-            if not billing_cycle:
-                # Fallback to existing logic if not provided
-                billing_cycle = "monthly" if "monthly" in (verify_data.planName or "").lower() else "yearly"
-            
-            # Determine end date
-            end_date = datetime.now() + timedelta(days=365) if billing_cycle == "yearly" else datetime.now() + timedelta(days=30)
-
-            subscription_data = {
-                "store_id": verify_data.storeId,
-                "plan_id": verify_data.planId,
-                "status": "active",
-                "amount": amount_in_inr,
-                "billing_cycle": billing_cycle,
-                "current_period_start": datetime.now().isoformat(),
-                "current_period_end": end_date.isoformat()
-            }
-            
-            # Upsert into subscriptions
-            supabase_admin.table("subscriptions").upsert(subscription_data, on_conflict="store_id").execute()
-            
-            # Update store status
-            supabase_admin.table("stores").update({"status": "active"}).eq("id", verify_data.storeId).execute()
+        # 2. Record payment + subscription + store activation in one transaction.
+        # Idempotent on razorpay_payment_id: retries and double submits are no-ops
+        # (migrations/idempotent_payments.sql); concurrent ones share one call.
+        result = await _record_payment_once(verify_data, user_id)
+        if result.get("duplicate"):
+            print(f"ℹ️ Payment {verify_data.razorpay_payment_id} was already recorded")
+        elif verify_data.storeId:
             print(f"✅ Subscription updated for store: {verify_data.storeId}")
         else:
             # For new users, we'll store the plan preference in the user's profile or session
@@ -184,7 +189,8 @@ async def verify_payment(verify_data: RazorpayVerifyRequest, request: Request):
         return {
             "success": True,
             "message": "Payment verified and recorded successfully",
-            "payment_id": verify_data.razorpay_payment_id
+            "payment_id": verify_data.razorpay_payment_id,
+            "duplicate": result.get("duplicate", False),
         }
         
     except HTTPException:
@@ -192,3 +198,38 @@ async def verify_payment(verify_data: RazorpayVerifyRequest, request: Request):
     except Exception as e:
         print(f"❌ Payment verification error: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/webhook")
+async def razorpay_webhook(request: Request):
+    """Razorpay webhook receiver.
+
+    Only checks the signature and appends the event to the durable webhook queue;
+    the payment is applied by the background consumer (app/core/webhook_queue.py).
+    Acknowledging fast keeps Razorpay from timing out and re-sending during bursts.
+    """
+    if not settings.RAZORPAY_WEBHOOK_SECRET:
+        raise HTTPException(status_code=503, detail="Webhook secret not configured")
+
+    body = await request.body()
+    signature = request.headers.get("x-razorpay-signature", "")
+    expected = hmac.new(settings.RAZORPAY_WEBHOOK_SECRET.encode(), body, hashlib.sha256).hexdigest()
+    if not hmac.compare_digest(expected, signature):
+        raise HTTPException(status_code=400, detail="Invalid webhook signature")
+
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid webhook payload")
+
+    # Razorpay re-delivers with the same event id; fall back to the body hash
+    event_id = request.headers.get("x-razorpay-event-id") or hashlib.sha256(body).hexdigest()
+    event = payload.get("event", "unknown")
+    try:
+        queued = await run_in_threadpool(get_webhook_queue().enqueue, WEBHOOK_SOURCE, event_id, event, payload)
+    except Exception as e:
+        # Not acknowledged: Razorpay will retry the delivery
+        print(f"❌ Could not queue Razorpay webhook {event_id}: {e}")
+        raise HTTPException(status_code=500, detail="Could not queue event")
+
+    return {"success": True, "queued": queued}
@@ -1,7 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, Path, Body, UploadFile, File, Form
 from typing import List, Optional, Any
-from app.core.supabase_client import supabase_admin
+from app.core.supabase_client import supabase_admin, supabase_bulk
 from app.core.auth_utils import verify_token as get_current_user
+from app.core.bulk import run_chunked, rows_to_results, bulk_response
+from app.schemas.bulk import ReviewSelection, ReviewStatusUpdate, ReviewFilter, BulkResponse
 from datetime import datetime
 import uuid
 import json
@@ -146,6 +148,52 @@ async def update_review_status(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _filtered_reviews(query, store_id: str, flt: ReviewFilter):
+    """Apply a bulk `filter` ({status, rating, productId}) to a reviews query."""
+    query = query.eq("store_id", store_id)
+    if flt.status and flt.status != "all":
+        query = query.eq("status", flt.status)
+    if flt.rating is not None:
+        query = query.eq("rating", flt.rating)
+    if flt.productId:
+        query = query.eq("product_id", flt.productId)
+    return query
+
+@router.post("/bulk-status", response_model=BulkResponse)
+def bulk_update_review_status(
+    payload: ReviewStatusUpdate,
+    current_user: dict = Depends(get_current_user)
+):
+    """Moderate many reviews at once (approve/reject), one UPDATE per chunk."""
+    try:
+        if payload.filter:
+            query = _filtered_reviews(supabase_bulk.table("reviews").update({"status": payload.status}), payload.storeId, payload.filter)
+            return bulk_response(rows_to_results(query.execute().data, "updated"))
+
+        def apply(chunk_ids):
+            return supabase_bulk.table("reviews").update({"status": payload.status}).eq("store_id", payload.storeId).in_("id", chunk_ids).execute().data
+
+        return bulk_response(run_chunked(payload.ids, apply, "updated"))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/bulk-delete", response_model=BulkResponse)
+def bulk_delete_reviews(
+    payload: ReviewSelection,
+    current_user: dict = Depends(get_current_user)
+):
+    try:
+        if payload.filter:
+            query = _filtered_reviews(supabase_bulk.table("reviews").delete(), payload.storeId, payload.filter)
+            return bulk_response(rows_to_results(query.execute().data, "deleted"))
+
+        def apply(chunk_ids):
+            return supabase_bulk.table("reviews").delete().eq("store_id", payload.storeId).in_("id", chunk_ids).execute().data
+
+        return bulk_response(run_chunked(payload.ids, apply, "deleted"))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.delete("/{id}")
 async def delete_review(
     id: str,
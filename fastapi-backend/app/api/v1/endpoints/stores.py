@@ -1,6 +1,8 @@
 from fastapi import APIRouter, HTTPException, Depends, Request
 from app.core.supabase_client import supabase, supabase_admin
 from app.core.auth_utils import verify_token
+from app.core.otp import store_otp, OTPRateLimited, OTP_OK, VERIFY_ERRORS
+from app.core import store_identity
 from typing import Optional, Dict, Any
 import jwt
 from app.core.config import settings
@@ -108,8 +110,7 @@ async def create_store(store_data: StoreCreate, current_user: dict = Depends(ver
         user_id = current_user.get("sub")
         
         # 1. Check uniqueness
-        existing = supabase_admin.table("stores").select("id").eq("slug", store_data.storeSlug).execute()
-        if existing.data:
+        if store_identity.get_by_slug(store_data.storeSlug):
              raise HTTPException(status_code=400, detail="Store slug already taken")
              
         # 2. Insert
@@ -133,6 +134,7 @@ async def create_store(store_data: StoreCreate, current_user: dict = Depends(ver
             raise HTTPException(status_code=400, detail="Failed to create store")
             
         store = response.data[0]
+        store_identity.remember(store)
         
         return {
             "success": True,
@@ -157,12 +159,10 @@ async def get_store_by_slug(slug: str):
     Fetch store details by slug, including full configuration.
     """
     try:
-        response = supabase_admin.table("stores").select("*").eq("slug", slug).single().execute()
-        
-        if not response.data:
+        store = store_identity.get_by_slug(slug)
+        if not store:
             raise HTTPException(status_code=404, detail="Store not found")
         
-        store = response.data
         config = store.get("config") or {}
         
         # Format for frontend
@@ -211,9 +211,7 @@ async def check_slug_availability(slug: str):
     Check Slug Availability
     """
     try:
-        response = supabase_admin.table("stores").select("id").eq("slug", slug).execute()
-        
-        is_available = len(response.data or []) == 0
+        is_available = store_identity.get_by_slug(slug) is None
         
         return {
             "success": True,
@@ -242,12 +240,10 @@ async def get_store_subscription(slug: str):
     """
     try:
         # 1. Get Store ID
-        store_res = supabase_admin.table("stores").select("id").eq("slug", slug).single().execute()
-        if not store_res.data:
+        store_id = store_identity.resolve_id(slug)
+        if not store_id:
             raise HTTPException(status_code=404, detail="Store not found")
         
-        store_id = store_res.data["id"]
-        
         # 2. Get Active Subscription
         # Try to find an active one first
         sub_res = supabase_admin.table("subscriptions").select("*").eq("store_id", store_id).eq("status", "active").order("created_at", desc=True).limit(1).execute()
@@ -300,16 +296,16 @@ async def resolve_store_slug(slug: str):
     Resolve store slug to ID for frontend compatibility.
     """
     try:
-        response = supabase_admin.table("stores").select("id").eq("slug", slug).single().execute()
-        if not response.data:
+        store_id = store_identity.resolve_id(slug)
+        if not store_id:
             raise HTTPException(status_code=404, detail="Store not found")
             
         return {
             "success": True,
             "data": {
                 "store": {
-                    "_id": response.data["id"],
-                    "id": response.data["id"]
+                    "_id": store_id,
+                    "id": store_id
                 }
             }
         }
@@ -326,12 +322,11 @@ async def update_store(slug: str, payload: Dict[str, Any], current_user: dict =
     
     try:
         # 1. Fetch existing store to verify ownership/access
-        response = supabase_admin.table("stores").select("*").eq("slug", slug).single().execute()
-        if not response.data:
+        # (fresh: the config below is read-modify-written)
+        store = store_identity.get_by_slug(slug, fresh=True)
+        if not store:
             raise HTTPException(status_code=404, detail="Store not found")
         
-        store = response.data
-        
         # Check if user is owner, manager, or platform admin
         is_owner = store.get("owner_id") == user_id
         is_manager = store.get("manager_id") == user_id
@@ -381,6 +376,8 @@ async def update_store(slug: str, payload: Dict[str, Any], current_user: dict =
         # 3. Perform update
         print(f"DEBUG: Updating store {store_id} with: {updates}")
         update_res = supabase_admin.table("stores").update(updates).eq("id", store_id).execute()
+        # Drops the old slug too when it changed
+        store_identity.invalidate(store_id=store_id, slug=slug)
         
         # In Supabase, update() returns the updated row. 
         # If it's empty, it might mean the row was not found (unlikely here) or nothing changed.
@@ -399,6 +396,7 @@ async def update_store(slug: str, payload: Dict[str, Any], current_user: dict =
             }
              
         updated_store = update_res.data[0]
+        store_identity.remember(updated_store)
         print(f"✅ Store {store_id} updated successfully")
         
         return {
@@ -426,17 +424,17 @@ async def delete_store(slug: str, current_user: dict = Depends(verify_token)):
         user_id = current_user.get("sub")
         
         # 1. Verify ownership
-        response = supabase_admin.table("stores").select("id, owner_id").eq("slug", slug).single().execute()
-        if not response.data:
+        store = store_identity.get_by_slug(slug)
+        if not store:
             raise HTTPException(status_code=404, detail="Store not found")
             
-        store = response.data
         if store.get("owner_id") != user_id:
              raise HTTPException(status_code=403, detail="Not authorized to delete this store")
              
         # 2. Delete (Cascade should handle related data if set up in DB, else might need manual cleanup)
         # Assuming Safe/Soft delete or Hard delete based on requirements. using hard delete for now.
         del_res = supabase_admin.table("stores").delete().eq("id", store["id"]).execute()
+        store_identity.invalidate(store_id=store["id"], slug=slug)
         
         if not del_res.data:
              # It might return empty if deleted successfully but no data returned, check supabase behavior
@@ -460,9 +458,6 @@ class StoreVerifyOTP(BaseModel):
     storeId: str
     otp: str
 
-# In-memory OTP storage for store settings
-store_otp_storage = {}
-
 # --- Team Management moved to team.py ---
 
 
@@ -471,13 +466,12 @@ async def send_store_otp(payload: StoreSendOTP, current_user: dict = Depends(ver
     """
     Send OTP for critical store updates (General Page)
     """
-    import random
     email = payload.email
-    # Generate dummy OTP
-    otp = str(random.randint(100000, 999999))
-    
-    # Store it (keyed by storeId for simplicity as per frontend request, or email)
-    store_otp_storage[payload.storeId] = otp
+    # Generate dummy OTP (keyed by storeId for simplicity as per frontend request)
+    try:
+        otp = await store_otp.send_async(payload.storeId)
+    except OTPRateLimited as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     
     print(f"DEBUG: Store OTP for {email} (Store: {payload.storeId}) is {otp}")
     
@@ -494,10 +488,9 @@ async def verify_store_otp(payload: StoreVerifyOTP, current_user: dict = Depends
     """
     Verify OTP for critical store updates
     """
-    stored_otp = store_otp_storage.get(payload.storeId)
+    outcome = await store_otp.verify_async(payload.storeId, payload.otp)
     
-    if stored_otp and stored_otp == payload.otp:
-        del store_otp_storage[payload.storeId]
+    if outcome == OTP_OK:
         return {
             "success": True, 
             "message": "OTP verified",
@@ -506,7 +499,7 @@ async def verify_store_otp(payload: StoreVerifyOTP, current_user: dict = Depends
             }
         }
         
-    raise HTTPException(status_code=400, detail="Invalid OTP")
+    raise HTTPException(status_code=400, detail=VERIFY_ERRORS[outcome])
     
 @router.get("/{store_id}")
 async def get_store_details(store_id: str):
@@ -515,11 +508,9 @@ async def get_store_details(store_id: str):
     """
     try:
         # 1. Fetch Store Basic Info
-        response = supabase_admin.table("stores").select("*").eq("id", store_id).single().execute()
-        if not response.data:
+        store = store_identity.get_by_id(store_id)
+        if not store:
             raise HTTPException(status_code=404, detail="Store not found")
-        
-        store = response.data
 
         # 2. Fetch Real Statistics
         # Count Products
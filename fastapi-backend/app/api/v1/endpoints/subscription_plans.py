@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException
 from typing import List, Optional
 from datetime import datetime
 from app.core.supabase_client import supabase_admin
+from app.core import response_cache
 from app.schemas.subscription_plan import (
     SubscriptionPlanCreate, 
     SubscriptionPlanUpdate, 
@@ -32,7 +33,7 @@ def map_plan_response(plan: dict) -> dict:
     }
 
 @router.get("/plans", response_model=SubscriptionPlanListResponse)
-async def list_plans():
+def list_plans():
     """List all subscription plans."""
     try:
         response = supabase_admin.table("subscription_plans").select("*").order("created_at", desc=True).execute()
@@ -44,7 +45,7 @@ async def list_plans():
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/plans/{plan_id}", response_model=SubscriptionPlanResponse)
-async def get_plan(plan_id: str):
+def get_plan(plan_id: str):
     """Get a single subscription plan by ID."""
     try:
         response = supabase_admin.table("subscription_plans").select("*").eq("id", plan_id).single().execute()
@@ -55,7 +56,7 @@ async def get_plan(plan_id: str):
         raise HTTPException(status_code=404, detail="Plan not found")
 
 @router.post("/plans", response_model=SubscriptionPlanResponse)
-async def create_plan(plan: SubscriptionPlanCreate):
+def create_plan(plan: SubscriptionPlanCreate):
     """Create a new subscription plan."""
     try:
         data = {
@@ -66,6 +67,7 @@ async def create_plan(plan: SubscriptionPlanCreate):
             "is_active": plan.is_active
         }
         response = supabase_admin.table("subscription_plans").insert(data).execute()
+        response_cache.invalidate("plans")
         if not response.data:
             raise HTTPException(status_code=400, detail="Failed to create plan")
         return map_plan_response(response.data[0])
@@ -74,7 +76,7 @@ async def create_plan(plan: SubscriptionPlanCreate):
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.put("/plans/{plan_id}", response_model=SubscriptionPlanResponse)
-async def update_plan(plan_id: str, plan: SubscriptionPlanUpdate):
+def update_plan(plan_id: str, plan: SubscriptionPlanUpdate):
     """Update an existing subscription plan."""
     try:
         update_data = {}
@@ -90,6 +92,7 @@ async def update_plan(plan_id: str, plan: SubscriptionPlanUpdate):
             update_data["is_active"] = plan.is_active
             
         response = supabase_admin.table("subscription_plans").update(update_data).eq("id", plan_id).execute()
+        response_cache.invalidate("plans")
         if not response.data:
             raise HTTPException(status_code=404, detail="Plan not found")
         return map_plan_response(response.data[0])
@@ -97,10 +100,11 @@ async def update_plan(plan_id: str, plan: SubscriptionPlanUpdate):
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.delete("/plans/{plan_id}")
-async def delete_plan(plan_id: str):
+def delete_plan(plan_id: str):
     """Delete a subscription plan."""
     try:
         response = supabase_admin.table("subscription_plans").delete().eq("id", plan_id).execute()
+        response_cache.invalidate("plans")
         return {"success": True, "message": "Plan deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query, Body, Path
 from typing import List, Optional
 from datetime import datetime
 from app.core.supabase_client import supabase_admin, supabase
+from app.core import store_identity
 from app.core.auth_utils import verify_token as get_current_user
 from app.schemas.team import TeamListResponse, TeamMemberCreate, TeamMemberResponse
 import uuid
@@ -19,16 +20,9 @@ async def list_store_team(
 ):
     try:
         # Resolve store_id if it's a slug
-        target_store_id = storeId
-        try:
-            uuid.UUID(storeId)
-        except ValueError:
-            # It's a slug, fetch the ID
-            s_res = supabase_admin.table("stores").select("id").eq("slug", storeId).single().execute()
-            if s_res.data:
-                target_store_id = s_res.data["id"]
-            else:
-                return {"items": [], "total": 0}
+        target_store_id = store_identity.resolve_id(storeId)
+        if not target_store_id:
+            return {"items": [], "total": 0}
 
         query = supabase_admin.table("store_managers").select("*", count="exact").eq("store_id", target_store_id)
         
@@ -66,10 +60,7 @@ async def create_team_member(
         # 0. Resolve Store ID
         store_id = member.store_id
         if not store_id and member.store_slug:
-             # Fetch store by slug
-             s_res = supabase_admin.table("stores").select("id").eq("slug", member.store_slug).single().execute()
-             if s_res.data:
-                 store_id = s_res.data["id"]
+             store_id = store_identity.resolve_id(member.store_slug)
         
         if not store_id:
              raise HTTPException(status_code=400, detail="Store ID or Slug is required to add a team member.")
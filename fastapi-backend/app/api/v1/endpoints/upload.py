@@ -1,79 +1,92 @@
-from fastapi import APIRouter, File, UploadFile, HTTPException, Form, Depends
+from fastapi import APIRouter, BackgroundTasks, File, UploadFile, HTTPException, Form, Depends
+from starlette.concurrency import run_in_threadpool
 from app.core.config import settings
-import cloudinary
-import cloudinary.uploader
+from app.core.storage import get_storage, StorageError
+from app.core import images
+import asyncio
+import os
+import tempfile
 
 router = APIRouter()
 
-# Cloudinary will be configured lazily inside functions when needed
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB
+# How long a request may wait for a free upload slot before giving up
+UPLOAD_SLOT_TIMEOUT = 30
+
+# Bounds how many uploads are pushed to the storage backend at once per worker
+_upload_slots = asyncio.Semaphore(settings.MAX_CONCURRENT_UPLOADS)
+
+
+async def _spool_upload(file: UploadFile) -> str:
+    """Copy the upload to a temp file in chunks, enforcing MAX_UPLOAD_SIZE. Returns the path."""
+    fd, path = tempfile.mkstemp(prefix="upload_", suffix=os.path.splitext(file.filename or "")[1])
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > settings.MAX_UPLOAD_SIZE:
+                    raise HTTPException(status_code=413, detail=f"File too large (max {settings.MAX_UPLOAD_SIZE // (1024 * 1024)}MB)")
+                out.write(chunk)
+        if size == 0:
+            raise HTTPException(status_code=400, detail="Empty file")
+        return path
+    except Exception:
+        os.remove(path)
+        raise
+
 
 @router.post("/")
-async def upload_file(file: UploadFile = File(...), folder: str = Form("uploads")):
+async def upload_file(background_tasks: BackgroundTasks, file: UploadFile = File(...), folder: str = Form("uploads")):
     """
-    Upload a file to Cloudinary
+    Upload a file to the configured storage backend (Cloudinary by default).
+    The file is streamed to disk in chunks and pushed to storage from a worker
+    thread, so the event loop is never blocked by the transfer.
+    Locally stored images get their srcset variants generated in the background.
     """
+    path = None
     try:
-        if not settings.CLOUDINARY_CLOUD_NAME or not settings.CLOUDINARY_API_KEY:
-             raise HTTPException(status_code=500, detail="Cloudinary configuration missing. Please check .env file.")
+        storage = get_storage()
+        path = await _spool_upload(file)
+
+        try:
+            await asyncio.wait_for(_upload_slots.acquire(), timeout=UPLOAD_SLOT_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=503, detail="Too many uploads in progress, please retry")
+        try:
+            data = await run_in_threadpool(storage.save, path, folder, file.filename, file.content_type)
+        finally:
+            _upload_slots.release()
 
-        # Configure Cloudinary lazily
-        cloudinary.config(
-            cloud_name=settings.CLOUDINARY_CLOUD_NAME,
-            api_key=settings.CLOUDINARY_API_KEY,
-            api_secret=settings.CLOUDINARY_API_SECRET
-        )
+        if storage.name == "local" and (file.content_type or "").startswith("image/"):
+            background_tasks.add_task(run_in_threadpool, images.pregenerate, data["url"])
 
-        # Read file content
-        content = await file.read()
-        
-        # Upload to Cloudinary
-        result = cloudinary.uploader.upload(
-            content,
-            folder=folder,
-            resource_type="auto"
-        )
-        
-        return {
-            "success": True,
-            "data": {
-                "url": result.get("secure_url"),
-                "publicId": result.get("public_id"),
-                "width": result.get("width"),
-                "height": result.get("height"),
-                "format": result.get("format"),
-                "size": result.get("bytes")
-            }
-        }
+        return {"success": True, "data": data}
+    except HTTPException:
+        raise
+    except StorageError as e:
+        raise HTTPException(status_code=500, detail=str(e))
     except Exception as e:
-        print(f"Cloudinary upload error: {e}")
+        print(f"Upload error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if path and os.path.exists(path):
+            os.remove(path)
 
 @router.delete("/{public_id:path}")
 async def delete_file(public_id: str):
     """
-    Delete a file from Cloudinary
+    Delete a file from the configured storage backend
     """
     try:
-        # Validate Cloudinary configuration
-        if not settings.CLOUDINARY_CLOUD_NAME or not settings.CLOUDINARY_API_KEY:
-             raise HTTPException(status_code=500, detail="Cloudinary configuration missing. Please check .env file.")
-        
-        # Configure Cloudinary lazily
-        cloudinary.config(
-            cloud_name=settings.CLOUDINARY_CLOUD_NAME,
-            api_key=settings.CLOUDINARY_API_KEY,
-            api_secret=settings.CLOUDINARY_API_SECRET
-        )
-        
-        result = cloudinary.uploader.destroy(public_id)
-        
-        if result.get("result") == "ok":
+        result = await run_in_threadpool(get_storage().delete, public_id)
+        if result.get("success"):
              return {"success": True, "message": "File deleted"}
-        else:
-             print(f"Delete failed: {result}")
-             # Cloudinary returns 'not found' as result='not found' sometimes, but status 200.
-             return {"success": False, "error": result.get("result")}
+        return {"success": False, "error": result.get("error")}
 
     except Exception as e:
-         print(f"Cloudinary delete error: {e}")
+         print(f"Storage delete error: {e}")
          raise HTTPException(status_code=500, detail=str(e))
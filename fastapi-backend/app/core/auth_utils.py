@@ -49,3 +49,23 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Security(security))
         print(f"   ❌ Fatal error decoding token: {e}")
         raise HTTPException(status_code=401, detail=f"Invalid token: {str(e)}")
 
+
+
+def require_admin(credentials: HTTPAuthorizationCredentials = Security(security)):
+    """
+    Admin-only routes. Unlike `verify_token`, the signature is checked whenever
+    SUPABASE_JWT_SECRET is configured (admin tokens are issued by
+    `create_access_token` with that secret).
+    """
+    payload = verify_token(credentials)
+    if settings.SUPABASE_JWT_SECRET:
+        try:
+            payload = jwt.decode(
+                credentials.credentials, settings.SUPABASE_JWT_SECRET, algorithms=["HS256"],
+                options={"verify_aud": False},
+            )
+        except jwt.InvalidTokenError as e:
+            raise HTTPException(status_code=401, detail=f"Invalid token: {str(e)}")
+    if (payload.get("role") or "").lower() != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return payload
@@ -0,0 +1,58 @@
+"""
+Helpers for bulk endpoints.
+
+Bulk writes are issued as one PostgREST request per chunk of ids
+(`... WHERE id IN (...)`), and PostgREST runs every request in its own
+transaction, so each chunk is a single atomic statement and a bulk operation
+costs one round trip per chunk instead of one per row.
+"""
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+BULK_CHUNK_SIZE = 500
+
+
+def chunked(items: List[Any], size: int = BULK_CHUNK_SIZE) -> Iterator[List[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def run_chunked(
+    ids: Iterable[str],
+    apply: Callable[[List[str]], List[dict]],
+    done_status: str,
+    chunk_size: int = BULK_CHUNK_SIZE,
+) -> List[Dict[str, Optional[str]]]:
+    """
+    Call `apply(chunk_ids)` for every chunk and report a status per requested id.
+    `apply` returns the rows it touched; ids that were not returned are `not_found`,
+    and every id of a chunk whose statement failed is `failed` (the chunk was rolled back).
+    """
+    ordered = list(dict.fromkeys(str(i) for i in ids))
+    results: List[Dict[str, Optional[str]]] = []
+    for chunk in chunked(ordered, chunk_size):
+        try:
+            touched = {str(r.get("id")) for r in (apply(chunk) or [])}
+        except Exception as e:
+            results.extend({"id": i, "status": "failed", "error": str(e)} for i in chunk)
+            continue
+        results.extend(
+            {"id": i, "status": done_status if i in touched else "not_found", "error": None}
+            for i in chunk
+        )
+    return results
+
+
+def rows_to_results(rows: List[dict], done_status: str) -> List[Dict[str, Optional[str]]]:
+    """Per-id results for a filter-based operation (every returned row was touched)."""
+    return [{"id": str(r.get("id")), "status": done_status, "error": None} for r in (rows or [])]
+
+
+def bulk_response(results: List[Dict[str, Optional[str]]]) -> dict:
+    failed = sum(1 for r in results if r["status"] in ("failed", "not_found"))
+    return {
+        "success": failed == 0,
+        "processed": len(results),
+        "succeeded": len(results) - failed,
+        "failed": failed,
+        "results": results,
+    }
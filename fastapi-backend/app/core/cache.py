@@ -0,0 +1,70 @@
+"""
+Small in-process caches.
+
+`TTLCache` is a thread-safe LRU map whose entries expire after `ttl` seconds.
+It is per worker process: every entry must be safe to serve slightly stale
+(until its TTL, or until the writing endpoint invalidates it).
+
+Expired entries are kept until they are replaced, deleted or pushed out by
+newer ones, so `get_stale` can still answer when the source is unavailable
+(see app/core/upstream.py).
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+_MISSING = object()
+
+
+class TTLCache:
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING or entry[0] < time.monotonic():
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def get_stale(self, key: Hashable, default: Any = None) -> Any:
+        """The value for `key` even if it has expired (a fallback when it cannot be refreshed)."""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            return default if entry is _MISSING else entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_where(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        """Drop every entry for which `predicate(key, value)` is true."""
+        with self._lock:
+            doomed = [k for k, (_, v) in self._data.items() if predicate(k, v)]
+            for k in doomed:
+                del self._data[k]
+            return len(doomed)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,71 @@
+"""
+Per-store category name -> id cache used when products reference a category by name.
+
+* Hits cost no query at all.
+* Misses are resolved with a single atomic upsert on UNIQUE(store_id, name):
+  the row is created if missing and returned either way, so concurrent product
+  writes / imports can no longer race into duplicate categories.
+* `categories.create_category` writes through, `delete_category` invalidates.
+  Other workers converge within `CATEGORY_CACHE_TTL` seconds; `create_product`
+  calls `invalidate_id` when a cached id turns out stale (FK violation) and
+  retries once. Imports report such rows as failed.
+"""
+from typing import Dict, Iterable, Optional
+
+from app.core.cache import TTLCache
+from app.core.supabase_client import supabase_admin
+
+CATEGORY_CACHE_TTL = 600
+CATEGORY_CACHE_SIZE = 20000
+
+_cache = TTLCache(maxsize=CATEGORY_CACHE_SIZE, ttl=CATEGORY_CACHE_TTL)
+
+
+def remember(store_id: str, name: str, category_id: str) -> None:
+    """Write-through after a category was created or read elsewhere."""
+    _cache.set((str(store_id), name), str(category_id))
+
+
+def invalidate(store_id: str, name: Optional[str] = None) -> None:
+    """Forget one name, or every cached category of the store."""
+    store_id = str(store_id)
+    if name is not None:
+        _cache.delete((store_id, name))
+    else:
+        _cache.delete_where(lambda key, _: key[0] == store_id)
+
+
+def invalidate_id(store_id: str, category_id: str) -> None:
+    store_id, category_id = str(store_id), str(category_id)
+    _cache.delete_where(lambda key, value: key[0] == store_id and value == category_id)
+
+
+def resolve_many(store_id: str, names: Iterable[str]) -> Dict[str, str]:
+    """Return `{name: category_id}` for every name, creating missing categories."""
+    store_id = str(store_id)
+    result: Dict[str, str] = {}
+    missing = []
+    for name in dict.fromkeys(n for n in names if n):
+        cached = _cache.get((store_id, name))
+        if cached:
+            result[name] = cached
+        else:
+            missing.append(name)
+
+    if missing:
+        # Upserting only the key columns makes the conflict branch a no-op update,
+        # so existing categories keep their description/image and every row is returned.
+        res = supabase_admin.table("categories").upsert(
+            [{"store_id": store_id, "name": n} for n in missing],
+            on_conflict="store_id,name",
+        ).execute()
+        for row in (res.data or []):
+            remember(store_id, row["name"], row["id"])
+            result[row["name"]] = str(row["id"])
+    return result
+
+
+def resolve(store_id: str, name: str) -> Optional[str]:
+    if not name:
+        return None
+    return resolve_many(store_id, [name]).get(name)
@@ -0,0 +1,109 @@
+"""
+Circuit breaker for calls to external services.
+
+    closed --failure_threshold consecutive failures--> open
+    open   --recovery_timeout elapsed-->               half-open (one trial call)
+    half-open --trial succeeds--> closed
+    half-open --trial fails-->    open again
+
+While open, calls fail immediately with CircuitOpenError instead of waiting for
+timeouts against a service that is already known to be down. Only failures
+that say something about the service's health (timeouts, connection errors,
+5xx) should be recorded. A 4xx is the caller's fault and counts as a success.
+
+Per process; every worker learns about an outage on its own.
+"""
+import threading
+import time
+from typing import Dict
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} is unavailable (circuit open), retry in {int(retry_after) + 1}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._lock = threading.Lock()
+        self._state = STATE_CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._trial_started = 0.0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == STATE_OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._state = STATE_HALF_OPEN
+            self._trial_running = False
+        return self._state
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError unless a call may go through now."""
+        with self._lock:
+            state = self._current_state()
+            if state == STATE_CLOSED:
+                return
+            # A trial whose outcome was never recorded (cancelled caller) expires too
+            trial_stale = time.monotonic() - self._trial_started > self.recovery_timeout
+            if state == STATE_HALF_OPEN and (not self._trial_running or trial_stale):
+                self._trial_running = True
+                self._trial_started = time.monotonic()
+                return
+            self.rejected += 1
+            retry_after = max(0.0, self.recovery_timeout - (time.monotonic() - self._opened_at))
+            raise CircuitOpenError(self.name, retry_after)
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = STATE_CLOSED
+            self._failures = 0
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == STATE_HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != STATE_OPEN:
+                    print(f"🔌 Circuit '{self.name}' opened after {self._failures} failures")
+                self._state = STATE_OPEN
+                self._opened_at = time.monotonic()
+                self._trial_running = False
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"state": self._current_state(), "failures": self._failures, "rejected": self.rejected}
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str, failure_threshold: int = 5, recovery_timeout: float = 30.0) -> CircuitBreaker:
+    """The process-wide breaker for `name` (created on first use with these settings)."""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name, failure_threshold, recovery_timeout)
+        return breaker
+
+
+def breaker_states() -> Dict[str, dict]:
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {b.name: b.snapshot() for b in breakers}
@@ -15,12 +15,132 @@ class Settings(BaseSettings):
     # Razorpay
     RAZORPAY_KEY_ID: Union[str, None] = None
     RAZORPAY_KEY_SECRET: Union[str, None] = None
+    RAZORPAY_WEBHOOK_SECRET: Union[str, None] = None
+    # Gateway client (app/core/razorpay_gateway.py); point the URL at scripts/mock_razorpay.py in tests
+    RAZORPAY_API_URL: str = "https://api.razorpay.com/v1"
+    RAZORPAY_TIMEOUT: float = 5.0
+    RAZORPAY_CONNECT_TIMEOUT: float = 2.0
+    RAZORPAY_MAX_RETRIES: int = 2
+    RAZORPAY_MAX_CONNECTIONS: int = 20
+    RAZORPAY_BREAKER_THRESHOLD: int = 5
+    RAZORPAY_BREAKER_RECOVERY: float = 30.0
+
+    # Upstream policy (app/core/upstream.py) - timeouts, retries of reads, circuit breakers (seconds)
+    UPSTREAM_DB_TIMEOUT: float = 5.0
+    UPSTREAM_CONNECT_TIMEOUT: float = 2.0
+    UPSTREAM_DB_DEADLINE: float = 8.0  # one database call, retries included
+    UPSTREAM_DB_BULK_TIMEOUT: float = 120.0  # bulk writes, imports, exports and scripts (supabase_bulk)
+    UPSTREAM_DB_RETRIES: int = 2
+    UPSTREAM_AUTH_TIMEOUT: float = 5.0
+    UPSTREAM_CLOUDINARY_TIMEOUT: float = 60.0
+    UPSTREAM_BREAKER_THRESHOLD: int = 5  # consecutive outages before calls fail fast
+    UPSTREAM_BREAKER_RECOVERY: float = 15.0
+
+    # Webhook queue (app/core/webhook_queue.py) - SQLite file shared by the workers on a host
+    WEBHOOK_QUEUE_PATH: Union[str, None] = None
+    WEBHOOK_BATCH_SIZE: int = 50
+    WEBHOOK_POLL_INTERVAL: float = 1.0
+    WEBHOOK_LEASE_SECONDS: int = 120
+    WEBHOOK_MAX_ATTEMPTS: int = 8
     
     # Cloudinary - Optional
     CLOUDINARY_CLOUD_NAME: Union[str, None] = None
     CLOUDINARY_API_KEY: Union[str, None] = None
     CLOUDINARY_API_SECRET: Union[str, None] = None
     
+    # Uploads - storage backend ("cloudinary" | "local"; default picks cloudinary when configured)
+    STORAGE_BACKEND: Union[str, None] = None
+    MAX_UPLOAD_SIZE: int = 25 * 1024 * 1024
+    MAX_CONCURRENT_UPLOADS: int = 4
+    
+    # Image variants (app/core/images.py)
+    IMAGE_CACHE_DIR: Union[str, None] = None
+    IMAGE_CACHE_MAX_BYTES: int = 512 * 1024 * 1024  # the whole directory, shared by all workers
+    IMAGE_ALLOWED_HOSTS: str = "res.cloudinary.com"
+    IMAGE_BASE_URL: Union[str, None] = None
+    
+    # Checkout - how long reserved stock is held, and how often expired holds are released
+    CHECKOUT_RESERVATION_TTL: int = 600
+    RESERVATION_SWEEP_INTERVAL: int = 30
+
+    # OTP codes (app/core/otp.py) - backend "sqlite" (shared by all workers on a host) | "memory"
+    OTP_BACKEND: str = "sqlite"
+    OTP_SQLITE_PATH: Union[str, None] = None
+    # Key file for the stored code hashes when SUPABASE_JWT_SECRET is not set (created on first use)
+    OTP_SECRET_PATH: Union[str, None] = None
+    OTP_TTL: int = 300
+    OTP_MAX_ATTEMPTS: int = 5
+    OTP_SEND_LIMIT: int = 5
+    OTP_SEND_WINDOW: int = 3600
+    OTP_RESEND_INTERVAL: int = 30
+    OTP_SWEEP_INTERVAL: int = 60
+
+    # Background job progress (app/core/job_status.py) - backend "sqlite" (shared by all workers on a host) | "memory"
+    JOB_STATUS_BACKEND: str = "sqlite"
+    JOB_STATUS_SQLITE_PATH: Union[str, None] = None
+    JOB_STATUS_TTL: int = 86400
+
+    # Request metrics (app/core/metrics.py) - Server-Timing header and GET /metrics
+    SERVER_TIMING: bool = True
+    # One Server-Timing entry per query (exposes table names, keep off in production)
+    SERVER_TIMING_QUERIES: bool = False
+    # When set, GET /metrics requires "Authorization: Bearer <token>"
+    METRICS_TOKEN: Union[str, None] = None
+    SLOW_REQUEST_MS: int = 1000
+
+    # Event loop watchdog (app/core/loop_watchdog.py) and profiler (app/core/profiler.py)
+    LOOP_WATCHDOG: bool = True
+    LOOP_WATCHDOG_INTERVAL: float = 0.1
+    LOOP_STALL_THRESHOLD: float = 0.25
+    PROFILER_MAX_SECONDS: int = 60
+
+    # Response compression (app/core/middleware.py) - brotli needs the optional `brotli` package
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+
+    # Rate limits (app/core/rate_limit.py) - token buckets per client (user or IP) and per store
+    RATE_LIMIT_ENABLED: bool = True
+    # "memory" (each worker counts on its own) | "sqlite" (shared by all workers on a host)
+    RATE_LIMIT_BACKEND: str = "memory"
+    RATE_LIMIT_SQLITE_PATH: Union[str, None] = None
+    RATE_LIMIT_DEFAULT_PER_MINUTE: int = 1200
+    RATE_LIMIT_DEFAULT_BURST: int = 200
+    RATE_LIMIT_STOREFRONT_PER_MINUTE: int = 600
+    RATE_LIMIT_STOREFRONT_BURST: int = 120
+    RATE_LIMIT_DASHBOARD_PER_MINUTE: int = 30
+    RATE_LIMIT_DASHBOARD_BURST: int = 10
+    RATE_LIMIT_UPLOAD_PER_MINUTE: int = 120
+    RATE_LIMIT_UPLOAD_BURST: int = 30
+    RATE_LIMIT_BULK_PER_MINUTE: int = 6
+    RATE_LIMIT_BULK_BURST: int = 3
+    RATE_LIMIT_THEME_PER_MINUTE: int = 6
+    RATE_LIMIT_THEME_BURST: int = 3
+    # Dashboard, bulk and theme requests one client or store may have running at once (per worker)
+    RATE_LIMIT_MAX_CONCURRENT: int = 2
+
+    # Production server (gunicorn.conf.py, app/core/worker.py)
+    WEB_CONCURRENCY: Union[int, None] = None  # workers; default one per available CPU core
+    WORKER_MAX_REQUESTS: int = 10000
+    WORKER_MAX_REQUESTS_JITTER: int = 1000
+    WORKER_MAX_MEMORY_MB: int = 512  # private memory per worker; 0 disables
+    # Theme builds and product imports get this long to finish on reload/shutdown
+    WORKER_GRACEFUL_TIMEOUT: int = 300
+    WORKER_TIMEOUT: int = 60
+
+    # Storefront service (app/storefront.py, gunicorn.storefront.conf.py)
+    STOREFRONT_WORKERS: Union[int, None] = None  # default one per available CPU core
+    STOREFRONT_GRACEFUL_TIMEOUT: int = 30  # no background jobs to wait for
+    # Public responses are reused this long; merchant/admin edits show up within it
+    STOREFRONT_CACHE_TTL: int = 30
+    STOREFRONT_CACHE_MAX_ENTRIES: int = 2000
+    STOREFRONT_CACHE_MAX_BODY: int = 2 * 1024 * 1024
+    STOREFRONT_MAX_AGE: int = 30  # Cache-Control max-age for browsers / CDNs
+    STOREFRONT_READY_TIMEOUT: float = 2.0
+    
+    # Route groups this process serves (app/api/v1/api.py): merchant, auth, platform, payments, storefront, checkout
+    API_ROUTER_GROUPS: Union[str, List[str]] = ["merchant", "auth", "platform", "payments", "storefront", "checkout"]
+
     # App Settings
     APP_NAME: str = "StoreCraft API"
     DEBUG: bool = True
@@ -28,7 +148,7 @@ class Settings(BaseSettings):
     # This will handle both a real list and a comma-separated string
     CORS_ORIGINS: Union[str, List[str]] = ["http://localhost:3000"]
 
-    @field_validator("CORS_ORIGINS", mode="before")
+    @field_validator("CORS_ORIGINS", "API_ROUTER_GROUPS", mode="before")
     @classmethod
     def assemble_cors_origins(cls, v: Union[str, List[str]]) -> Union[List[str], str]:
         if isinstance(v, str) and not v.startswith("["):
@@ -0,0 +1,368 @@
+"""
+Responsive image variants.
+
+Product images, logos and thumbnails are stored as single original URLs. This
+module turns an original URL into `srcset`-ready variants:
+
+* Cloudinary URLs are rewritten to Cloudinary transformations
+  (`.../upload/w_320,c_limit,f_webp,q_auto/...`); Cloudinary does the resizing.
+* Everything else (local /uploads files, allow-listed hosts) goes through
+  GET /api/v1/images, which resizes with Pillow on first request and caches
+  the result on disk, keyed by (source content hash, width, format).
+
+The disk cache is an LRU bounded by IMAGE_CACHE_MAX_BYTES, for all workers
+together (see DiskLRU). Requested widths are snapped to VARIANT_WIDTHS so
+callers cannot fill the cache with arbitrary sizes. Pillow is optional: without it non-Cloudinary images are served as-is
+and `srcset` only lists the original.
+"""
+import hashlib
+import io
+import os
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+from urllib.parse import quote, urlparse
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: concurrent sweeps are not serialized (they may over-evict)
+    fcntl = None
+
+try:
+    from PIL import Image, ImageOps, features as _pil_features
+    IMAGING_AVAILABLE = True
+except ImportError:  # Pillow is optional
+    Image = ImageOps = _pil_features = None
+    IMAGING_AVAILABLE = False
+
+VARIANT_WIDTHS = (80, 160, 320, 640, 960, 1280, 1920)
+# Widths listed in srcset (the smallest ones are for list thumbnails)
+SRCSET_WIDTHS = (160, 320, 640, 960, 1280)
+THUMBNAIL_WIDTH = 160
+
+CONTENT_TYPES = {"webp": "image/webp", "avif": "image/avif", "jpeg": "image/jpeg", "png": "image/png"}
+SAVE_OPTIONS = {
+    "webp": {"quality": 80, "method": 4},
+    "avif": {"quality": 60},
+    "jpeg": {"quality": 82, "optimize": True, "progressive": True},
+    "png": {"optimize": True},
+}
+
+PROJECT_ROOT = Path(__file__).resolve().parents[3]
+UPLOADS_ROOT = PROJECT_ROOT / "uploads"
+CACHE_DIR = Path(settings.IMAGE_CACHE_DIR) if settings.IMAGE_CACHE_DIR else PROJECT_ROOT / ".image-cache"
+IMAGES_ENDPOINT = "/api/v1/images/"
+
+# Never decode images bigger than this (decompression bombs)
+MAX_SOURCE_PIXELS = 50_000_000
+
+
+def _has_codec(name: str) -> bool:
+    if not IMAGING_AVAILABLE:
+        return False
+    try:
+        return bool(_pil_features.check_module(name))
+    except Exception:
+        return False
+
+
+SUPPORTED_FORMATS = ["jpeg", "png"] + [f for f in ("webp", "avif") if _has_codec(f)]
+
+
+class ImageError(Exception):
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def snap_width(width: int) -> int:
+    """Round a requested width up to the nearest allowed variant width."""
+    for allowed in VARIANT_WIDTHS:
+        if width <= allowed:
+            return allowed
+    return VARIANT_WIDTHS[-1]
+
+
+def negotiate_format(requested: Optional[str], accept: str = "") -> str:
+    """Pick the output format: explicit if supported, else the best one the client accepts."""
+    if requested and requested != "auto":
+        if requested == "jpg":
+            requested = "jpeg"
+        if requested not in SUPPORTED_FORMATS:
+            raise ImageError(f"Unsupported format '{requested}'")
+        return requested
+    for fmt in ("avif", "webp"):
+        if fmt in SUPPORTED_FORMATS and f"image/{fmt}" in accept:
+            return fmt
+    return "jpeg"
+
+
+# ---------------------------------------------------------------------------
+# Disk cache
+# ---------------------------------------------------------------------------
+
+class DiskLRU:
+    """
+    Files in one directory, evicted least-recently-used first beyond `max_bytes`.
+
+    Every worker on the host shares the directory, so the budget applies to the
+    directory, not to a process: once a worker has written SWEEP_FRACTION of the
+    budget (or SWEEP_INTERVAL seconds have passed since its last sweep) it takes
+    an exclusive lock on `.lock`, sums the files on disk and removes the least
+    recently used ones until the total is back under 90%. Recency is the file
+    mtime, refreshed on hits, so it is shared too. Between sweeps the directory
+    can overshoot by about SWEEP_FRACTION of the budget per worker.
+    """
+
+    SWEEP_FRACTION = 0.05
+    SWEEP_INTERVAL = 60.0
+    # A hit refreshes the file's mtime at most this often
+    TOUCH_INTERVAL = 60.0
+
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._ready = False
+        self._written = 0  # bytes written by this process since its last sweep
+        self._last_sweep = 0.0
+        self._usage = {"files": 0, "bytes": 0}  # as of the last sweep
+
+    def _ensure_root(self):
+        if not self._ready:
+            self.root.mkdir(parents=True, exist_ok=True)
+            self._ready = True
+
+    def get(self, name: str) -> Optional[Path]:
+        path = self.root / name
+        try:
+            mtime = path.stat().st_mtime
+        except OSError:
+            return None
+        if time.time() - mtime > self.TOUCH_INTERVAL:
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+        return path
+
+    def put(self, name: str, data: bytes) -> Path:
+        self._ensure_root()
+        path = self.root / name
+        tmp = self.root / f"{name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        with self._lock:
+            self._written += len(data)
+            now = time.time()
+            due = (
+                self._written >= self.max_bytes * self.SWEEP_FRACTION
+                or now - self._last_sweep >= self.SWEEP_INTERVAL
+            )
+            if due:
+                self._written = 0
+                self._last_sweep = now
+        if due:
+            self.sweep()
+        return path
+
+    def sweep(self):
+        """Evict across all workers: bring the directory back under the budget."""
+        self._ensure_root()
+        with open(self.root / ".lock", "a") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                files, total = [], 0
+                for entry in os.scandir(self.root):
+                    if entry.name.startswith(".") or entry.name.endswith(".tmp"):
+                        continue
+                    try:
+                        st = entry.stat()
+                    except OSError:  # removed by a concurrent put/sweep
+                        continue
+                    if entry.is_file():
+                        files.append((st.st_mtime, entry.name, st.st_size))
+                        total += st.st_size
+                count = len(files)
+                if total > self.max_bytes:
+                    for _, victim, size in sorted(files):
+                        if total <= self.max_bytes * 0.9:
+                            break
+                        try:
+                            os.remove(self.root / victim)
+                        except OSError:
+                            continue
+                        total -= size
+                        count -= 1
+                self._usage = {"files": count, "bytes": total}
+                self._last_sweep = time.time()
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def usage(self) -> dict:
+        return {**self._usage, "maxBytes": self.max_bytes, "sweptAt": self._last_sweep or None}
+
+
+disk_cache = DiskLRU(CACHE_DIR, settings.IMAGE_CACHE_MAX_BYTES)
+
+# source URL -> content hash, so cache hits skip reading/downloading the original
+_source_hashes = TTLCache(maxsize=50000, ttl=3600)
+
+
+# ---------------------------------------------------------------------------
+# Sources
+# ---------------------------------------------------------------------------
+
+def _allowed_hosts() -> List[str]:
+    return [h.strip().lower() for h in (settings.IMAGE_ALLOWED_HOSTS or "").split(",") if h.strip()]
+
+
+def _is_local(parsed) -> bool:
+    return not parsed.scheme and not parsed.netloc and parsed.path.startswith("/uploads/")
+
+
+def _is_allowed_remote(parsed) -> bool:
+    return parsed.scheme in ("http", "https") and (parsed.hostname or "").lower() in _allowed_hosts()
+
+
+def is_allowed_source(src: str) -> bool:
+    """True for the sources variants are made of: local /uploads paths and allow-listed hosts."""
+    parsed = urlparse(src)
+    return _is_local(parsed) or _is_allowed_remote(parsed)
+
+
+def _read_source(src: str) -> bytes:
+    """Load an original image: local /uploads path or an allow-listed https host."""
+    parsed = urlparse(src)
+    if _is_local(parsed):
+        path = (UPLOADS_ROOT / parsed.path[len("/uploads/"):]).resolve()
+        if UPLOADS_ROOT.resolve() not in path.parents or not path.is_file():
+            raise ImageError("Source image not found", 404)
+        return path.read_bytes()
+
+    if _is_allowed_remote(parsed):
+        import httpx
+        with httpx.stream("GET", src, timeout=10, follow_redirects=False) as res:
+            if res.status_code != 200:
+                raise ImageError("Source image not found", 404)
+            data = bytearray()
+            for chunk in res.iter_bytes():
+                data.extend(chunk)
+                if len(data) > settings.MAX_UPLOAD_SIZE:
+                    raise ImageError("Source image too large", 413)
+            return bytes(data)
+
+    raise ImageError("Image source not allowed", 403)
+
+
+def _render(data: bytes, width: int, fmt: str) -> bytes:
+    with Image.open(io.BytesIO(data)) as img:
+        if img.width * img.height > MAX_SOURCE_PIXELS:
+            raise ImageError("Source image too large")
+        img = ImageOps.exif_transpose(img)
+        if img.width > width:
+            img.thumbnail((width, width * 10), Image.LANCZOS)
+        if fmt == "jpeg" and img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        elif img.mode not in ("RGB", "RGBA", "L", "LA"):
+            img = img.convert("RGBA")
+        out = io.BytesIO()
+        img.save(out, format=fmt.upper(), **SAVE_OPTIONS[fmt])
+        return out.getvalue()
+
+
+def get_variant(src: str, width: int, fmt: str) -> Tuple[Path, str]:
+    """
+    Return `(path, etag)` of the cached variant, generating it on a miss.
+    Blocking (file/network IO, image decoding): call from a worker thread.
+    """
+    if not IMAGING_AVAILABLE:
+        raise ImageError("Image processing is not available (Pillow is not installed)", 503)
+    width = snap_width(width)
+
+    content_hash = _source_hashes.get(src)
+    if content_hash:
+        name = f"{content_hash}_{width}.{fmt}"
+        cached = disk_cache.get(name)
+        if cached:
+            return cached, name
+
+    data = _read_source(src)
+    content_hash = hashlib.sha256(data).hexdigest()[:32]
+    _source_hashes.set(src, content_hash)
+    name = f"{content_hash}_{width}.{fmt}"
+    cached = disk_cache.get(name)
+    if cached:
+        return cached, name
+    try:
+        rendered = _render(data, width, fmt)
+    except ImageError:
+        raise
+    except Exception as e:
+        raise ImageError(f"Could not process image: {e}")
+    return disk_cache.put(name, rendered), name
+
+
+def pregenerate(src: str, widths=SRCSET_WIDTHS, formats=None) -> int:
+    """Warm the cache for a freshly uploaded image (run as a background task)."""
+    if not IMAGING_AVAILABLE:
+        return 0
+    count = 0
+    for fmt in formats or [f for f in ("webp",) if f in SUPPORTED_FORMATS]:
+        for width in widths:
+            try:
+                get_variant(src, width, fmt)
+                count += 1
+            except Exception as e:
+                print(f"⚠️ Variant pre-generation failed for {src}: {e}")
+                return count
+    return count
+
+
+# ---------------------------------------------------------------------------
+# URLs
+# ---------------------------------------------------------------------------
+
+def _cloudinary_variant(url: str, width: int, fmt: str) -> Optional[str]:
+    marker = "/image/upload/"
+    if "res.cloudinary.com" not in url or marker not in url:
+        return None
+    head, tail = url.split(marker, 1)
+    return f"{head}{marker}w_{width},c_limit,f_{fmt},q_auto/{tail}"
+
+
+def variant_url(url: str, width: int, fmt: str = "auto") -> str:
+    """URL of `url` resized to `width` (falls back to the original when it cannot be resized)."""
+    width = snap_width(width)
+    cloudinary = _cloudinary_variant(url, width, fmt)
+    if cloudinary:
+        return cloudinary
+    if not IMAGING_AVAILABLE or not is_allowed_source(url):
+        return url
+    base = (settings.IMAGE_BASE_URL or "").rstrip("/")
+    return f"{base}{IMAGES_ENDPOINT}?src={quote(url, safe='')}&w={width}&f={fmt}"
+
+
+def responsive_image(url: Optional[str]) -> Optional[dict]:
+    """`{src, thumbnail, srcset}` for an image URL; themes use it as <img srcset=...>."""
+    if not url or not isinstance(url, str):
+        return None
+    candidates = [(variant_url(url, w), w) for w in SRCSET_WIDTHS]
+    if candidates[0][0] == url:
+        # Not resizable: a srcset would only repeat the original
+        return {"src": url, "thumbnail": url, "srcset": ""}
+    return {
+        "src": url,
+        "thumbnail": variant_url(url, THUMBNAIL_WIDTH),
+        "srcset": ", ".join(f"{u} {w}w" for u, w in candidates),
+    }
+
+
+def responsive_images(urls) -> List[dict]:
+    return [r for r in (responsive_image(u) for u in (urls or [])) if r]
@@ -0,0 +1,59 @@
+"""
+Background sweeper that returns the stock of expired checkout reservations.
+
+Reservations are created by `reserve_inventory()` (migrations/checkout_inventory.sql)
+and normally consumed by `place_order()`. Abandoned carts would hold stock
+forever, so every worker runs this loop; `release_expired_reservations()` uses
+SKIP LOCKED, which makes concurrent sweepers on several workers safe.
+"""
+import asyncio
+from datetime import datetime
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.supabase_client import supabase_admin
+
+SWEEP_BATCH_SIZE = 500
+
+RESERVATION_SWEEPER = {"last_run": None, "released": 0, "error": None}
+_task: Optional[asyncio.Task] = None
+
+
+def release_expired_reservations() -> int:
+    """Release expired reservations in batches until none are left. Returns how many were released."""
+    total = 0
+    while True:
+        res = supabase_admin.rpc("release_expired_reservations", {"p_limit": SWEEP_BATCH_SIZE}).execute()
+        released = res.data or 0
+        total += released
+        if released < SWEEP_BATCH_SIZE:
+            return total
+
+
+async def _sweep_forever(interval: int):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            released = await run_in_threadpool(release_expired_reservations)
+            RESERVATION_SWEEPER.update(last_run=datetime.utcnow().isoformat(), error=None)
+            if released:
+                RESERVATION_SWEEPER["released"] += released
+                print(f"♻️ Released {released} expired inventory reservations")
+        except Exception as e:
+            RESERVATION_SWEEPER["error"] = str(e)
+            print(f"❌ Reservation sweep failed: {e}")
+
+
+def start_reservation_sweeper():
+    global _task
+    if _task is None or _task.done():
+        _task = asyncio.create_task(_sweep_forever(settings.RESERVATION_SWEEP_INTERVAL))
+
+
+def stop_reservation_sweeper():
+    global _task
+    if _task is not None:
+        _task.cancel()
+        _task = None
@@ -0,0 +1,170 @@
+"""
+Progress of background jobs (product imports, theme deployments), for polling.
+
+A job runs in the worker process that accepted it, but the client's polls can
+land on any worker, so progress lives in a backend shared by every process:
+
+* SQLiteJobStatusBackend - one SQLite file (WAL mode) on the local disk; the
+  default. Works across all workers on one host.
+* MemoryJobStatusBackend - a dict in the current process; single-worker dev and tests.
+
+Other backends (Redis, a database table) only have to implement `JobStatusBackend`.
+
+A job's status is a JSON object stored under (kind, key). `update()` is an
+atomic read-modify-write, so appending to a list in the status (errors, logs)
+never loses another writer's entry. Entries not written for JOB_STATUS_TTL
+seconds are dropped.
+
+Backends are blocking; call them from sync code or through run_in_threadpool.
+"""
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import settings
+
+# How often a backend drops expired entries (on its next write)
+SWEEP_INTERVAL = 60
+
+Mutation = Callable[[Dict[str, Any]], None]
+
+
+class JobStatusBackend(ABC):
+    """
+    Each method must be atomic with respect to every other process using the
+    same backend (the SQLite backend uses IMMEDIATE transactions).
+    """
+    name = "base"
+
+    @abstractmethod
+    def get(self, kind: str, key: str) -> Optional[Dict[str, Any]]:
+        """The current status of a job, or None if it is unknown (or expired)."""
+
+    @abstractmethod
+    def update(self, kind: str, key: str, mutate: Mutation, ttl: int, now: float) -> Dict[str, Any]:
+        """Apply `mutate` to the status in place (an empty dict for a new job) and store it. Returns it."""
+
+
+class MemoryJobStatusBackend(JobStatusBackend):
+    name = "memory"
+
+    def __init__(self):
+        self._entries: Dict[tuple, tuple] = {}  # (kind, key) -> (written_at, status)
+        self._lock = threading.Lock()
+        self._last_sweep = 0.0
+
+    def get(self, kind, key):
+        with self._lock:
+            entry = self._entries.get((kind, key))
+            return json.loads(json.dumps(entry[1])) if entry else None
+
+    def update(self, kind, key, mutate, ttl, now):
+        with self._lock:
+            if now - self._last_sweep >= SWEEP_INTERVAL:
+                self._last_sweep = now
+                for k in [k for k, (written, _) in self._entries.items() if written <= now - ttl]:
+                    del self._entries[k]
+            entry = self._entries.get((kind, key))
+            status = json.loads(json.dumps(entry[1])) if entry else {}
+            mutate(status)
+            self._entries[(kind, key)] = (now, status)
+            return json.loads(json.dumps(status))
+
+
+class SQLiteJobStatusBackend(JobStatusBackend):
+    name = "sqlite"
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS job_status (
+            kind TEXT NOT NULL,
+            key TEXT NOT NULL,
+            status TEXT NOT NULL,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (kind, key)
+        );
+        CREATE INDEX IF NOT EXISTS idx_job_status_updated ON job_status (updated_at);
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._last_sweep = 0.0
+        self._connect().executescript(self.SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # isolation_level=None: transactions are opened explicitly with BEGIN IMMEDIATE
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, kind, key):
+        row = self._connect().execute(
+            "SELECT status FROM job_status WHERE kind = ? AND key = ?", (kind, key)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def update(self, kind, key, mutate, ttl, now):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")  # takes the write lock up front: read-modify-write is atomic
+        try:
+            if now - self._last_sweep >= SWEEP_INTERVAL:
+                self._last_sweep = now
+                conn.execute("DELETE FROM job_status WHERE updated_at <= ?", (now - ttl,))
+            row = conn.execute("SELECT status FROM job_status WHERE kind = ? AND key = ?", (kind, key)).fetchone()
+            status = json.loads(row[0]) if row else {}
+            mutate(status)
+            conn.execute(
+                "INSERT OR REPLACE INTO job_status (kind, key, status, updated_at) VALUES (?, ?, ?, ?)",
+                (kind, key, json.dumps(status), now),
+            )
+            conn.execute("COMMIT")
+            return status
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+
+_backend: Optional[JobStatusBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_job_status_backend() -> JobStatusBackend:
+    """Create (once) and return the backend chosen by settings.JOB_STATUS_BACKEND."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            if (settings.JOB_STATUS_BACKEND or "sqlite").lower() == "memory":
+                _backend = MemoryJobStatusBackend()
+            else:
+                path = settings.JOB_STATUS_SQLITE_PATH or os.path.join(tempfile.gettempdir(), "storebuilder-jobs.sqlite3")
+                _backend = SQLiteJobStatusBackend(path)
+            print(f"📋 Job status backend: {_backend.name}")
+        return _backend
+
+
+def set_job_status_backend(backend: Optional[JobStatusBackend]) -> None:
+    """Swap the backend (tests / scripts); None re-reads the settings on next use."""
+    global _backend
+    _backend = backend
+
+
+def get(kind: str, key: str) -> Optional[Dict[str, Any]]:
+    return get_job_status_backend().get(kind, key)
+
+
+def update(kind: str, key: str, mutate: Optional[Mutation] = None, **fields) -> Dict[str, Any]:
+    """Set `fields` on a job's status, then apply `mutate` to it, in one atomic write."""
+    def apply(status: Dict[str, Any]):
+        status.update(fields)
+        if mutate:
+            mutate(status)
+    return get_job_status_backend().update(kind, key, apply, settings.JOB_STATUS_TTL, time.time())
@@ -0,0 +1,116 @@
+"""
+Worker lifecycle: startup timing, background jobs in flight, memory use.
+
+Used by the production launcher (gunicorn.conf.py, app/core/worker.py) and
+by the app itself:
+
+* `mark(phase)` records how long each startup phase took (imports in
+  app/main.py, startup hooks, worker boot). `startup_report()` returns them;
+  GET /api/v1/platform/diagnostics/startup serves the answering worker's.
+* `tracked(name, fn)` wraps a BackgroundTasks job so a shutting down worker
+  knows what it is still waiting for (theme builds, product imports) and logs
+  it while it drains.
+* `worker_memory_mb()` is the worker's private memory: what it allocated
+  itself, without the pages it still shares copy-on-write with the preloading
+  master. The worker recycles itself when it crosses WORKER_MAX_MEMORY_MB.
+
+Imports nothing from the app, so app/main.py can import it first and time
+everything after it.
+"""
+import asyncio
+import functools
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+STARTUP: Dict[str, float] = {}  # phase -> milliseconds, in order
+
+_last_mark = time.perf_counter()
+_jobs: Dict[int, dict] = {}
+_jobs_lock = threading.Lock()
+_job_ids = itertools.count(1)
+
+
+# --- Startup timing ----------------------------------------------------------
+
+def mark(phase: str) -> float:
+    """Milliseconds since the previous mark (or since this module was imported)."""
+    global _last_mark
+    now = time.perf_counter()
+    STARTUP[phase] = round((now - _last_mark) * 1000, 1)
+    _last_mark = now
+    return STARTUP[phase]
+
+
+def restart_clock() -> None:
+    """Start timing afresh, e.g. in a worker right after the fork."""
+    global _last_mark
+    _last_mark = time.perf_counter()
+
+
+def startup_report() -> dict:
+    return {"pid": os.getpid(), "phases": dict(STARTUP), "totalMs": round(sum(STARTUP.values()), 1)}
+
+
+def format_startup() -> str:
+    phases = ", ".join(f"{phase} {ms:.0f}ms" for phase, ms in STARTUP.items())
+    return f"{sum(STARTUP.values()):.0f}ms ({phases})"
+
+
+# --- Background jobs ---------------------------------------------------------
+
+@contextmanager
+def background_job(name: str):
+    job_id = next(_job_ids)
+    with _jobs_lock:
+        _jobs[job_id] = {"name": name, "started": time.monotonic()}
+    try:
+        yield
+    finally:
+        with _jobs_lock:
+            _jobs.pop(job_id, None)
+
+
+def tracked(name: str, fn: Callable) -> Callable:
+    """`fn` wrapped in `background_job(name)`; stays sync or async like `fn` (BackgroundTasks runs sync ones in the threadpool)."""
+    if asyncio.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def run_async(*args, **kwargs):
+            with background_job(name):
+                return await fn(*args, **kwargs)
+        return run_async
+
+    @functools.wraps(fn)
+    def run(*args, **kwargs):
+        with background_job(name):
+            return fn(*args, **kwargs)
+    return run
+
+
+def running_jobs() -> List[dict]:
+    now = time.monotonic()
+    with _jobs_lock:
+        return [{"name": job["name"], "runningS": round(now - job["started"], 1)} for job in _jobs.values()]
+
+
+# --- Memory ------------------------------------------------------------------
+
+def worker_memory_mb() -> Optional[float]:
+    """Private (unshared) memory of this process in MB; RSS where that is unknown; None off Linux."""
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            private_kb = 0
+            for line in f:
+                if line.startswith(("Private_Clean:", "Private_Dirty:")):
+                    private_kb += int(line.split()[1])
+            return private_kb / 1024
+    except (OSError, ValueError):
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return None
@@ -0,0 +1,142 @@
+"""
+Event-loop stall detector.
+
+A heartbeat task on the loop wakes up every LOOP_WATCHDOG_INTERVAL seconds and
+records how late it woke up (loop lag). A lagging heartbeat can only report a
+stall after it ended, when the culprit is gone, so a separate watchdog thread
+also checks the heartbeat: once it is more than LOOP_STALL_THRESHOLD seconds
+overdue, the thread captures the stack the loop thread is executing right now
+(the blocking coroutine: a sync Supabase call, password hashing, a subprocess...)
+together with the task's name.
+
+The last stalls are kept in `recent_stalls()` (GET /platform/diagnostics/loop),
+lag and stall counts go to /metrics. Per worker process.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+from typing import List, Optional
+
+from app.core.config import settings
+from app.core.metrics import Counter, Histogram
+
+MAX_STALLS_KEPT = 50
+MAX_STACK_FRAMES = 40
+
+LOOP_LAG_SECONDS = Histogram(
+    "event_loop_lag_seconds", "How late the event loop heartbeat woke up.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+LOOP_STALLS = Counter("event_loop_stalls_total", "Event loop stalls longer than LOOP_STALL_THRESHOLD.")
+
+LOOP_WATCHDOG = {"running": False, "stalls": 0, "max_lag_ms": 0.0, "last_stall": None}
+
+_stalls: deque = deque(maxlen=MAX_STALLS_KEPT)
+_lock = threading.Lock()
+_task: Optional[asyncio.Task] = None
+_thread: Optional[threading.Thread] = None
+_stop = threading.Event()
+_heartbeat = 0.0
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_thread_id: Optional[int] = None
+
+# Frames of the event loop machinery itself, trimmed from captured stacks
+_ASYNCIO_DIR = os.path.dirname(asyncio.__file__)
+
+
+def loop_stack(thread_id: int) -> List[str]:
+    """The stack a thread is executing, outermost first, without asyncio internals."""
+    frame = sys._current_frames().get(thread_id)
+    if frame is None:
+        return []
+    entries = traceback.extract_stack(frame)
+    frames = [f"{e.filename}:{e.lineno} in {e.name}" for e in entries if not e.filename.startswith(_ASYNCIO_DIR)]
+    return frames[-MAX_STACK_FRAMES:]
+
+
+def _running_task_name(loop: asyncio.AbstractEventLoop) -> Optional[str]:
+    # Read from another thread: a best-effort snapshot, good enough for a report
+    task = asyncio.tasks._current_tasks.get(loop)
+    if task is None:
+        return None
+    coro = task.get_coro()
+    return f"{task.get_name()} ({getattr(coro, '__qualname__', coro)})"
+
+
+def recent_stalls() -> List[dict]:
+    """Newest first. `open` stalls are still going on; their `lag_ms` is a lower bound."""
+    with _lock:
+        return [dict(stall) for stall in reversed(_stalls)]
+
+
+async def _heartbeat_forever(interval: float):
+    global _heartbeat
+    while True:
+        started = time.monotonic()
+        _heartbeat = started
+        await asyncio.sleep(interval)
+        lag = max(0.0, time.monotonic() - started - interval)
+        LOOP_LAG_SECONDS.observe((), lag)
+        if lag * 1000 > LOOP_WATCHDOG["max_lag_ms"]:
+            LOOP_WATCHDOG["max_lag_ms"] = round(lag * 1000, 1)
+
+
+def _watch(interval: float, threshold: float):
+    stall, stalled_since = None, 0.0
+    while not _stop.wait(interval / 2):
+        beat = _heartbeat
+        overdue = time.monotonic() - beat - interval
+        if stall is not None:
+            if beat != stalled_since:
+                # The loop got back to the heartbeat: the stall is over, record its real length
+                with _lock:
+                    stall.update(open=False, lag_ms=round(max(0.0, beat - stalled_since - interval) * 1000, 1))
+                stall = None
+            continue
+        if overdue < threshold:
+            continue
+        stall, stalled_since = {
+            "at": datetime.utcnow().isoformat(),
+            "lag_ms": round(overdue * 1000, 1),
+            "open": True,
+            "task": _running_task_name(_loop),
+            "stack": loop_stack(_loop_thread_id),
+        }, beat
+        with _lock:
+            _stalls.append(stall)
+        LOOP_STALLS.inc()
+        LOOP_WATCHDOG.update(stalls=LOOP_WATCHDOG["stalls"] + 1, last_stall=stall["at"])
+        where = stall["stack"][-1] if stall["stack"] else "unknown"
+        print(f"🧊 Event loop blocked for {stall['lag_ms']:.0f}ms+ by {stall['task']} at {where}")
+
+
+def start_loop_watchdog():
+    global _task, _thread, _heartbeat, _loop, _loop_thread_id
+    if not settings.LOOP_WATCHDOG or (_task is not None and not _task.done()):
+        return
+    interval = settings.LOOP_WATCHDOG_INTERVAL
+    _loop = asyncio.get_running_loop()
+    _loop_thread_id = threading.get_ident()
+    _heartbeat = time.monotonic()
+    _stop.clear()
+    _task = asyncio.create_task(_heartbeat_forever(interval))
+    _thread = threading.Thread(
+        target=_watch, args=(interval, settings.LOOP_STALL_THRESHOLD), name="loop-watchdog", daemon=True
+    )
+    _thread.start()
+    LOOP_WATCHDOG["running"] = True
+
+
+def stop_loop_watchdog():
+    global _task, _thread
+    _stop.set()
+    if _task is not None:
+        _task.cancel()
+        _task = None
+    _thread = None
+    LOOP_WATCHDOG["running"] = False
@@ -0,0 +1,309 @@
+"""
+Request instrumentation: what each request spent its time on, and
+Prometheus metrics built from it.
+
+* `instrument_client(client)` wraps a Supabase client (app/core/supabase_client.py
+  does this for `supabase` and `supabase_admin`). Every PostgREST statement
+  (`.execute()`), RPC and auth call made through it is timed and charged to the
+  current request.
+* A call made on the event loop thread (a sync client call inside an `async def`
+  route) blocks every other request for its whole duration. That time is
+  counted separately as `blocking`; calls made from the threadpool are not.
+* Given `database`/`auth` policies (app/core/upstream.py), the wrapped calls
+  also run under their retries and circuit breakers.
+* RequestMetricsMiddleware (app/core/middleware.py) opens a RequestStats per
+  request, adds the `Server-Timing` header and feeds the histograms below.
+  `render_metrics()` is served at GET /metrics.
+
+Metrics are per worker process (each gunicorn/uvicorn worker has its own).
+"""
+import asyncio
+import contextvars
+import math
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Per-call details kept per request (for Server-Timing and the slow request log)
+MAX_CALLS_PER_REQUEST = 100
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+
+# --- Prometheus primitives ---------------------------------------------------
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, labels: Tuple[str, ...] = (), amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+class Gauge:
+    """A gauge read from `collect()` at scrape time: {label values: value}."""
+
+    def __init__(self, name: str, help: str, collect: Callable[[], Dict[Tuple[str, ...], float]],
+                 labelnames: Sequence[str] = ()):
+        self.name, self.help, self.labelnames, self.collect = name, help, tuple(labelnames), collect
+        REGISTRY.append(self)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        for labels, value in sorted(self.collect().items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DURATION_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series: Dict[Tuple[str, ...], list] = {}  # labels -> [bucket counts..., sum]
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * len(self.buckets) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {labels: list(series) for labels, series in self._series.items()}
+        for labels, series in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(series[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+REGISTRY: list = []
+
+
+def render_metrics() -> str:
+    """All registered metrics in the Prometheus text format."""
+    return "\n".join(line for metric in list(REGISTRY) for line in metric.render()) + "\n"
+
+
+REQUESTS = Counter("http_requests_total", "HTTP requests by route and status.", ("method", "route", "status"))
+REQUEST_SECONDS = Histogram("http_request_duration_seconds", "Time to the response headers.", ("method", "route"))
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries", "Data client calls per request.", ("method", "route"), QUERY_COUNT_BUCKETS
+)
+REQUEST_DB_SECONDS = Histogram("http_request_db_seconds", "Time per request spent in data client calls.", ("method", "route"))
+REQUEST_BLOCKING_SECONDS = Histogram(
+    "http_request_loop_blocked_seconds", "Time per request the event loop was blocked by data client calls.", ("method", "route")
+)
+DB_CALL_SECONDS = Histogram("db_call_duration_seconds", "Data client calls by target and operation.", ("target", "operation"))
+
+
+# --- Per-request accounting --------------------------------------------------
+
+class RequestStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.blocking_seconds = 0.0
+        self.calls: List[Tuple[str, float]] = []  # (label, seconds), first MAX_CALLS_PER_REQUEST
+        self._lock = threading.Lock()  # calls also arrive from threadpool threads
+
+    def record(self, label: str, seconds: float, on_loop: bool) -> None:
+        with self._lock:
+            self.queries += 1
+            self.db_seconds += seconds
+            if on_loop:
+                self.blocking_seconds += seconds
+            if len(self.calls) < MAX_CALLS_PER_REQUEST:
+                self.calls.append((label, seconds))
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def repeated(self, threshold: int = 3) -> Dict[str, int]:
+        """Call labels issued at least `threshold` times (typically an N+1 loop)."""
+        counts: Dict[str, int] = {}
+        for label, _ in self.calls:
+            counts[label] = counts.get(label, 0) + 1
+        return {label: n for label, n in counts.items() if n >= threshold}
+
+
+_current: contextvars.ContextVar = contextvars.ContextVar("request_stats", default=None)
+
+
+def begin_request() -> Tuple[RequestStats, contextvars.Token]:
+    stats = RequestStats()
+    return stats, _current.set(stats)
+
+
+def end_request(token: contextvars.Token) -> None:
+    _current.reset(token)
+
+
+def current_request() -> Optional[RequestStats]:
+    return _current.get()
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+def observe_request(method: str, route: str, status: int, stats: RequestStats, seconds: float) -> None:
+    labels = (method, route)
+    REQUESTS.inc((method, route, str(status)))
+    REQUEST_SECONDS.observe(labels, seconds)
+    REQUEST_QUERIES.observe(labels, stats.queries)
+    REQUEST_DB_SECONDS.observe(labels, stats.db_seconds)
+    REQUEST_BLOCKING_SECONDS.observe(labels, stats.blocking_seconds)
+
+
+# --- Data client wrapper -----------------------------------------------------
+
+def _timed(target: str, operation: str, fn: Callable, *args, **kwargs):
+    on_loop = _on_event_loop()
+    started = time.perf_counter()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        seconds = time.perf_counter() - started
+        DB_CALL_SECONDS.observe((target, operation), seconds)
+        stats = _current.get()
+        if stats is not None:
+            stats.record(f"{target}.{operation}", seconds, on_loop)
+
+
+# Builder methods that decide what kind of statement a query is
+_STATEMENTS = {"select", "insert", "upsert", "update", "delete"}
+
+
+class _Query:
+    """Wraps a postgrest request builder; `.execute()` is timed (and run under `upstream`'s policy)."""
+
+    def __init__(self, builder, target: str, operation: str, upstream=None):
+        self._builder = builder
+        self._target = target
+        self._operation = operation
+        self._upstream = upstream
+
+    def execute(self):
+        if self._upstream is None:
+            return _timed(self._target, self._operation, self._builder.execute)
+        # Only reads are retried. A delete is idempotent too, but when its first attempt committed
+        # the retry returns no rows, and bulk endpoints would report the deleted ids as not found
+        return self._upstream.call(
+            _timed, self._target, self._operation, self._builder.execute, idempotent=self._operation == "select",
+        )
+
+    def __getattr__(self, name):
+        value = getattr(self._builder, name)
+        if not callable(value):
+            return value
+        operation = name if name in _STATEMENTS else self._operation
+
+        def chained(*args, **kwargs):
+            result = value(*args, **kwargs)
+            # Filters/modifiers return a builder (often the same one); keep wrapping it
+            return _Query(result, self._target, operation, self._upstream) if hasattr(result, "execute") else result
+        return chained
+
+
+# Auth calls that only read, so may be retried
+_IDEMPOTENT_PREFIXES = ("get_", "list_")
+
+
+class _Service:
+    """Wraps an auth API: every method call is one round trip (`.admin` is nested)."""
+
+    def __init__(self, api, target: str, upstream=None):
+        self._api = api
+        self._target = target
+        self._upstream = upstream
+
+    def __getattr__(self, name):
+        value = getattr(self._api, name)
+        if name == "admin":
+            return _Service(value, f"{self._target}.admin", self._upstream)
+        if not callable(value):
+            return value
+        if self._upstream is None:
+            return lambda *args, **kwargs: _timed(self._target, name, value, *args, **kwargs)
+        idempotent = name.startswith(_IDEMPOTENT_PREFIXES)
+        return lambda *args, **kwargs: self._upstream.call(
+            _timed, self._target, name, value, *args, idempotent=idempotent, **kwargs,
+        )
+
+
+class InstrumentedClient:
+    """
+    A Supabase client whose table/rpc/auth calls are timed (everything else
+    passes through). With `database`/`auth` policies (app/core/upstream.py)
+    the calls also get their retries and circuit breaker.
+    """
+
+    def __init__(self, client, database=None, auth=None):
+        self._client = client
+        self._database = database
+        self._auth = auth
+
+    def table(self, name: str):
+        return _Query(self._client.table(name), name, "select", self._database)
+
+    from_ = table
+
+    def rpc(self, name: str, params: Optional[dict] = None):
+        return _Query(self._client.rpc(name, params or {}), "rpc", name, self._database)
+
+    @property
+    def auth(self):
+        return _Service(self._client.auth, "auth", self._auth)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+def instrument_client(client, database=None, auth=None):
+    return client if isinstance(client, InstrumentedClient) else InstrumentedClient(client, database, auth)
@@ -0,0 +1,545 @@
+"""
+ASGI middleware shared by the API app.
+"""
+import gzip
+import hashlib
+import json
+import zlib
+from typing import Iterable, Optional
+
+from app.core import metrics, rate_limit
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.singleflight import SingleFlight
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+    BROTLI_AVAILABLE = False
+
+
+class _BodyTooLarge(Exception):
+    pass
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Reject oversized request bodies on upload routes before they are parsed.
+
+    FastAPI reads the whole multipart body before the endpoint runs, so a size
+    check in the endpoint alone would still receive (and spool) a 5GB upload.
+    This checks Content-Length up front and counts bytes as they stream in for
+    chunked requests, answering 413 as soon as the limit is crossed.
+    """
+
+    # Room for the multipart envelope around the file itself
+    ENVELOPE_ALLOWANCE = 64 * 1024
+
+    def __init__(self, app, path_prefixes: Iterable[str], max_bytes: int = None):
+        self.app = app
+        self.path_prefixes = tuple(path_prefixes)
+        self.max_bytes = (max_bytes or settings.MAX_UPLOAD_SIZE) + self.ENVELOPE_ALLOWANCE
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("POST", "PUT") or not scope["path"].startswith(self.path_prefixes):
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope.get("headers") or [])
+        length = headers.get(b"content-length")
+        if length is not None and length.isdigit() and int(length) > self.max_bytes:
+            return await self._reject(send)
+
+        received = 0
+        too_large = False
+        rejected = False
+
+        async def limited_receive():
+            nonlocal received, too_large
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    too_large = True
+                    raise _BodyTooLarge()
+            return message
+
+        async def guarded_send(message):
+            # Body parsing errors are turned into a 400 by FastAPI; answer 413 instead
+            nonlocal rejected
+            if too_large:
+                if not rejected:
+                    rejected = True
+                    await self._reject(send)
+                return
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except _BodyTooLarge:
+            if not rejected:
+                await self._reject(send)
+
+    async def _reject(self, send):
+        body = json.dumps({"detail": f"File too large (max {settings.MAX_UPLOAD_SIZE // (1024 * 1024)}MB)"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def route_label(scope) -> str:
+    """The matched route's path template; never the raw path (unbounded label values)."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "<unmatched>"
+
+
+class RequestMetricsMiddleware:
+    """
+    Per-request timing (see app/core/metrics.py).
+
+    Adds a Server-Timing header, e.g.
+        Server-Timing: db;dur=41.2;desc="10 queries", blocking;dur=41.2, app;dur=3.1, total;dur=44.3
+    (`blocking` = data client calls that ran on the event loop), records the
+    route histograms served at /metrics, and logs requests slower than
+    SLOW_REQUEST_MS with their most repeated queries.
+    """
+
+    # Per-query Server-Timing entries are capped to keep the header small
+    MAX_TIMING_ENTRIES = 20
+
+    def __init__(self, app, server_timing: bool = None, query_detail: bool = None, slow_request_ms: int = None):
+        self.app = app
+        self.server_timing = settings.SERVER_TIMING if server_timing is None else server_timing
+        self.query_detail = settings.SERVER_TIMING_QUERIES if query_detail is None else query_detail
+        self.slow_request_ms = settings.SLOW_REQUEST_MS if slow_request_ms is None else slow_request_ms
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats, token = metrics.begin_request()
+        status = 500
+        headers_sent_after = None
+
+        async def timed_send(message):
+            nonlocal status, headers_sent_after
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers_sent_after = stats.elapsed()
+                if self.server_timing:
+                    message["headers"] = list(message.get("headers") or []) + [
+                        (b"server-timing", self._server_timing(stats, headers_sent_after).encode())
+                    ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, timed_send)
+        finally:
+            metrics.end_request(token)
+            seconds = headers_sent_after if headers_sent_after is not None else stats.elapsed()
+            route = route_label(scope)
+            metrics.observe_request(scope["method"], route, status, stats, seconds)
+            if self.slow_request_ms and seconds * 1000 >= self.slow_request_ms:
+                self._log_slow(scope["method"], route, status, stats, seconds)
+
+    def _server_timing(self, stats: metrics.RequestStats, seconds: float) -> str:
+        entries = [
+            f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.queries} queries"',
+            f"blocking;dur={stats.blocking_seconds * 1000:.1f}",
+            f"app;dur={max(0.0, seconds - stats.db_seconds) * 1000:.1f}",
+            f"total;dur={seconds * 1000:.1f}",
+        ]
+        if self.query_detail:
+            for n, (label, call_seconds) in enumerate(stats.calls[:self.MAX_TIMING_ENTRIES], start=1):
+                entries.append(f'q{n};desc="{label}";dur={call_seconds * 1000:.1f}')
+        return ", ".join(entries)
+
+    @staticmethod
+    def _log_slow(method: str, route: str, status: int, stats: metrics.RequestStats, seconds: float) -> None:
+        repeated = ", ".join(f"{label} x{n}" for label, n in sorted(stats.repeated().items(), key=lambda kv: -kv[1]))
+        print(
+            f"🐢 Slow request {method} {route} -> {status} in {seconds * 1000:.0f}ms: "
+            f"{stats.queries} queries, {stats.db_seconds * 1000:.0f}ms in db "
+            f"({stats.blocking_seconds * 1000:.0f}ms blocking the event loop)"
+            + (f" | repeated: {repeated}" if repeated else "")
+        )
+
+
+# Already compressed (or not worth compressing) content types
+_INCOMPRESSIBLE_PREFIXES = (b"image/", b"video/", b"audio/", b"font/woff")
+_INCOMPRESSIBLE_TYPES = {
+    b"application/zip", b"application/gzip", b"application/x-gzip", b"application/pdf",
+    b"application/octet-stream", b"text/event-stream",
+}
+# Images that are text underneath
+_COMPRESSIBLE_IMAGES = {b"image/svg+xml"}
+
+
+def _accepted_encodings(scope) -> set:
+    for name, value in scope.get("headers") or []:
+        if name == b"accept-encoding":
+            accepted = set()
+            for item in value.decode("latin-1").lower().split(","):
+                coding, _, params = item.strip().partition(";")
+                if params.strip().replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+                    accepted.add(coding.strip())
+            return accepted
+    return set()
+
+
+def negotiate_encoding(scope) -> Optional[str]:
+    """The content coding CompressionMiddleware will use for this request ("br", "gzip" or None)."""
+    accepted = _accepted_encodings(scope)
+    if BROTLI_AVAILABLE and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+class _Gzip:
+    def __init__(self, level: int):
+        # wbits 16+: gzip container, so the stream can be fed chunk by chunk
+        self._z = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._z.compress(data) + self._z.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._z.flush()
+
+
+class _Brotli:
+    def __init__(self, quality: int):
+        self._c = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.process(data) + self._c.flush()
+
+    def finish(self) -> bytes:
+        return self._c.finish()
+
+
+class CompressionMiddleware:
+    """
+    Compress responses for clients that accept it: brotli when the `brotli`
+    package is installed and the client sends `br`, gzip otherwise.
+
+    Product lists and order exports are large, repetitive JSON that shrinks
+    5-10x, which is most of their time on slow mobile links. Bodies under
+    COMPRESSION_MIN_SIZE are sent as-is (the headers would outweigh the gain),
+    as are responses that already have a Content-Encoding and media that is
+    compressed already (images, archives). Streaming responses are compressed
+    chunk by chunk, without buffering the whole body. A strong ETag becomes weak
+    on a compressed response; app/core/response_cache.py accepts both forms in
+    If-None-Match.
+    """
+
+    def __init__(self, app, minimum_size: int = None, gzip_level: int = None, brotli_quality: int = None):
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MIN_SIZE if minimum_size is None else minimum_size
+        self.gzip_level = settings.COMPRESSION_GZIP_LEVEL if gzip_level is None else gzip_level
+        self.brotli_quality = settings.COMPRESSION_BROTLI_QUALITY if brotli_quality is None else brotli_quality
+
+    def _compressor(self, encoding: str):
+        return _Brotli(self.brotli_quality) if encoding == "br" else _Gzip(self.gzip_level)
+
+    def _compress_whole(self, encoding: str, body: bytes) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    @staticmethod
+    def _compressible(status: int, headers: list) -> bool:
+        if status < 200 or status in (204, 206, 304):
+            return False
+        for name, value in headers:
+            if name in (b"content-encoding", b"content-range"):
+                return False
+            if name == b"content-type":
+                media_type = value.split(b";", 1)[0].strip().lower()
+                if media_type in _COMPRESSIBLE_IMAGES:
+                    continue
+                if media_type in _INCOMPRESSIBLE_TYPES or media_type.startswith(_INCOMPRESSIBLE_PREFIXES):
+                    return False
+        return True
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            return await self.app(scope, receive, send)
+
+        encoding = negotiate_encoding(scope)
+        start = None  # held back until the first body chunk tells us the size
+        compressor = None
+        passthrough = False
+
+        async def compressing_send(message):
+            nonlocal start, compressor, passthrough
+            if passthrough:
+                return await send(message)
+
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers") or [])
+                if not self._compressible(message["status"], headers):
+                    passthrough = True
+                    return await send(message)
+                # The body depends on Accept-Encoding even when this client gets it uncompressed
+                headers.append((b"vary", b"Accept-Encoding"))
+                message["headers"] = headers
+                if encoding is None:
+                    passthrough = True
+                    return await send(message)
+                start = message
+                return
+
+            if message["type"] != "http.response.body":
+                return await send(message)
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                if not more_body:
+                    # Whole body in one message (JSONResponse and friends)
+                    if len(body) < self.minimum_size:
+                        passthrough = True
+                        await send(start)
+                        return await send(message)
+                    compressed = self._compress_whole(encoding, body)
+                    start["headers"] = self._encoded_headers(start["headers"], encoding, len(compressed))
+                    await send(start)
+                    return await send({"type": "http.response.body", "body": compressed})
+                # Streaming: the final size is unknown, drop Content-Length
+                compressor = self._compressor(encoding)
+                start["headers"] = self._encoded_headers(start["headers"], encoding, None)
+                await send(start)
+
+            chunk = compressor.compress(body) if body else b""
+            if not more_body:
+                chunk += compressor.finish()
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, compressing_send)
+
+    @staticmethod
+    def _encoded_headers(headers: list, encoding: str, length: Optional[int]) -> list:
+        result = []
+        for name, value in headers:
+            if name == b"content-length":
+                continue
+            if name == b"etag" and not value.startswith(b"W/"):
+                value = b"W/" + value
+            result.append((name, value))
+        result.append((b"content-encoding", encoding.encode()))
+        if length is not None:
+            result.append((b"content-length", str(length).encode()))
+        return result
+
+
+PUBLIC_CACHE_LOOKUPS = metrics.Counter(
+    "public_response_cache_total", "Public response cache lookups by result.", ("result",)
+)
+
+
+class PublicResponseCacheMiddleware:
+    """
+    Whole-response cache for public GET endpoints (the storefront service).
+
+    Anonymous GETs under `path_prefixes` are answered from `cache` for `ttl`
+    seconds, keyed by path, query string and the response encoding the client
+    will get (so the compressed body is cached too when this sits outside
+    CompressionMiddleware). Concurrent misses for one key run the endpoint
+    once (SingleFlight) and share its response. Cached responses carry an ETag
+    (If-None-Match gets a 304) and a public Cache-Control when the endpoint
+    set none.
+
+    Only 200s without Set-Cookie, `private` or `no-store`, and up to
+    `max_body` bytes, are kept. Requests with an Authorization header bypass
+    the cache. There is no invalidation across processes: writes made through
+    the API show up once entries expire. When the endpoint answers 503 (the
+    database is unavailable, app/core/upstream.py) an expired entry for the
+    same key is sent instead, marked `X-Cache: STALE`.
+    """
+
+    def __init__(self, app, cache: TTLCache, path_prefixes: Iterable[str], max_body: int, max_age: int):
+        self.app = app
+        self.cache = cache
+        self.path_prefixes = tuple(path_prefixes)
+        self.max_body = max_body
+        self.max_age = max_age
+        self.flights = SingleFlight()
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http" or scope["method"] != "GET"
+            or not scope["path"].startswith(self.path_prefixes)
+            or any(name == b"authorization" for name, _ in scope.get("headers") or [])
+        ):
+            return await self.app(scope, receive, send)
+
+        key = (scope["path"], scope.get("query_string", b""), negotiate_encoding(scope))
+        entry = self.cache.get(key)
+        if entry is not None:
+            PUBLIC_CACHE_LOOKUPS.inc(("hit",))
+            return await self._send(entry, scope, send, b"HIT")
+
+        rendered = False
+
+        async def render():
+            nonlocal rendered
+            rendered = True
+            return await self._render(scope, receive, key)
+
+        entry = await self.flights.do(key, render)
+        if entry[0] == 503:
+            stale = self.cache.get_stale(key)
+            if stale is not None:
+                PUBLIC_CACHE_LOOKUPS.inc(("stale",))
+                return await self._send(stale, scope, send, b"STALE")
+        PUBLIC_CACHE_LOOKUPS.inc(("miss" if rendered else "shared",))
+        await self._send(entry, scope, send, b"MISS")
+
+    async def _render(self, scope, receive, key) -> tuple:
+        """Run the endpoint and capture its response as (status, headers, body, matched route)."""
+        status, headers, chunks = 500, [], []
+
+        async def capture(message):
+            nonlocal status, headers
+            if message["type"] == "http.response.start":
+                status, headers = message["status"], list(message.get("headers") or [])
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, capture)
+        body = b"".join(chunks)
+        route = scope.get("route")
+        if not self._cacheable(status, headers, body):
+            return status, headers, body, route
+        entry = (status, self._cache_headers(headers, body), body, route)
+        self.cache.set(key, entry)
+        return entry
+
+    def _cacheable(self, status: int, headers: list, body: bytes) -> bool:
+        if status != 200 or len(body) > self.max_body:
+            return False
+        for name, value in headers:
+            if name == b"set-cookie":
+                return False
+            if name == b"cache-control" and (b"no-store" in value or b"private" in value):
+                return False
+        return True
+
+    def _cache_headers(self, headers: list, body: bytes) -> list:
+        names = {name for name, _ in headers}
+        headers = list(headers)
+        if b"etag" not in names:
+            headers.append((b"etag", b'W/"' + hashlib.sha1(body).hexdigest().encode() + b'"'))
+        if b"cache-control" not in names:
+            headers.append((b"cache-control", f"public, max-age={self.max_age}".encode()))
+        return headers
+
+    @staticmethod
+    async def _send(entry: tuple, scope, send, result: bytes) -> None:
+        status, headers, body, route = entry
+        if route is not None:
+            # Requests answered without reaching the router still get their route label in /metrics
+            scope.setdefault("route", route)
+        etag = next((value for name, value in headers if name == b"etag"), None)
+        if etag is not None and status == 200 and _etag_matches(scope, etag):
+            kept = [(n, v) for n, v in headers if n in (b"etag", b"cache-control", b"vary")]
+            await send({"type": "http.response.start", "status": 304, "headers": kept + [(b"x-cache", result)]})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await send({"type": "http.response.start", "status": status, "headers": headers + [(b"x-cache", result)]})
+        await send({"type": "http.response.body", "body": body})
+
+
+def _etag_matches(scope, etag: bytes) -> bool:
+    for name, value in scope.get("headers") or []:
+        if name == b"if-none-match":
+            candidates = [c.strip().removeprefix(b"W/") for c in value.split(b",")]
+            return b"*" in candidates or etag.removeprefix(b"W/") in candidates
+    return False
+
+
+class RateLimitMiddleware:
+    """
+    Per-tenant rate limits and concurrency quotas (see app/core/rate_limit.py).
+
+    Requests over their budget are answered 429 with Retry-After before they
+    reach the router. For the routes that name their store in a JSON body
+    (theme apply, bulk update/delete) the body is read here, up to
+    MAX_INSPECTED_BODY bytes, and replayed to the endpoint.
+    """
+
+    MAX_INSPECTED_BODY = 64 * 1024
+
+    def __init__(self, app, limiter: Optional[rate_limit.RateLimiter] = None):
+        self.app = app
+        self.limiter = limiter or rate_limit.RateLimiter()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.RATE_LIMIT_ENABLED:
+            return await self.app(scope, receive, send)
+        rule = rate_limit.match_rule(scope["method"], scope["path"])
+        if rule is None:
+            return await self.app(scope, receive, send)
+
+        body = None
+        if rule.body_field and "store" in self.limiter.budgets[rule.budget].keys and rate_limit.store_key(rule, scope) is None:
+            body, receive = await self._read_json_body(scope, receive)
+
+        decision = await self.limiter.check(rule, scope, body)
+        if not decision.allowed:
+            return await self._reject(send, decision)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.limiter.release(decision)
+
+    async def _read_json_body(self, scope, receive):
+        """(parsed JSON body or None, a receive that replays what was read)."""
+        headers = dict(scope.get("headers") or [])
+        length = headers.get(b"content-length")
+        if (
+            not headers.get(b"content-type", b"").startswith(b"application/json")
+            or length is None or not length.isdigit() or int(length) > self.MAX_INSPECTED_BODY
+        ):
+            return None, receive
+
+        messages, more_body = [], True
+        while more_body:
+            message = await receive()
+            messages.append(message)
+            more_body = message["type"] == "http.request" and message.get("more_body", False)
+
+        async def replay():
+            return messages.pop(0) if messages else await receive()
+
+        try:
+            body = json.loads(b"".join(m.get("body", b"") for m in messages if m["type"] == "http.request"))
+        except ValueError:
+            body = None
+        return body, replay
+
+    @staticmethod
+    async def _reject(send, decision: rate_limit.Decision) -> None:
+        if decision.reason == "concurrency":
+            detail = "Too many requests in progress. Try again in a moment."
+        else:
+            detail = f"Too many requests. Try again in {decision.retry_after} seconds."
+        body = json.dumps({"detail": detail}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(decision.retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
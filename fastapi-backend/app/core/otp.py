@@ -0,0 +1,401 @@
+"""
+One-time passwords for phone verification and critical store updates.
+
+Codes live in a backend shared by every worker process, so a code sent through
+one uvicorn worker can be verified through another:
+
+* SQLiteOTPBackend - one SQLite file (WAL mode) on the local disk; the default.
+  Works across all workers on one host.
+* MemoryOTPBackend - a dict in the current process; single-worker dev and tests.
+
+Other backends (Redis, a database table) only have to implement `OTPBackend`.
+
+Every key has at most one live code. A code expires after OTP_TTL seconds and
+is burnt after OTP_MAX_ATTEMPTS wrong guesses. Sending is rate limited per key:
+at most OTP_SEND_LIMIT codes per OTP_SEND_WINDOW, and none within
+OTP_RESEND_INTERVAL of the previous one; a code sent on the user's behalf
+(at registration) lets their first resend through that interval, so asking
+for a fresh code right away works. Codes are stored as HMAC-SHA256 digests
+keyed by a server secret (see _secret_key), never in clear.
+Expired rows are removed by a background sweeper (start_otp_sweeper).
+
+Backends are blocking; the async endpoints call them through run_in_threadpool.
+"""
+import asyncio
+import hashlib
+import hmac
+import os
+import secrets
+import sqlite3
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+# Verification outcomes
+OTP_OK = "ok"
+OTP_INVALID = "invalid"
+OTP_EXPIRED = "expired"          # no live code (never sent, used, or timed out)
+OTP_TOO_MANY_ATTEMPTS = "locked"
+
+
+class OTPRateLimited(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__(f"Too many OTP requests. Try again in {retry_after} seconds.")
+        self.retry_after = retry_after
+
+
+@dataclass
+class OTPPolicy:
+    ttl: int
+    max_attempts: int
+    send_limit: int
+    send_window: int
+    resend_interval: int
+
+    @classmethod
+    def from_settings(cls) -> "OTPPolicy":
+        return cls(
+            ttl=settings.OTP_TTL,
+            max_attempts=settings.OTP_MAX_ATTEMPTS,
+            send_limit=settings.OTP_SEND_LIMIT,
+            send_window=settings.OTP_SEND_WINDOW,
+            resend_interval=settings.OTP_RESEND_INTERVAL,
+        )
+
+
+_secret: Optional[bytes] = None
+_secret_lock = threading.Lock()
+
+
+def _load_or_create_secret(path: str) -> bytes:
+    """Read the key file, creating it with a random key first if it does not exist."""
+    if not os.path.exists(path):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            f.write(secrets.token_hex(32))
+        try:
+            os.link(tmp, path)  # atomic: when workers race, the first key written wins
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(tmp)
+    with open(path, "rb") as f:
+        secret = f.read().strip()
+    if not secret:
+        raise RuntimeError(f"OTP secret file {path} is empty")
+    return secret
+
+
+def _secret_key() -> bytes:
+    """
+    The HMAC key for stored codes: SUPABASE_JWT_SECRET, or when that is not set a
+    random key generated once per deployment and kept in OTP_SECRET_PATH, so every
+    worker on the host uses the same one. Never empty: a leaked OTP file must not
+    be enough to brute-force the codes.
+    """
+    global _secret
+    with _secret_lock:
+        if _secret is None:
+            if settings.SUPABASE_JWT_SECRET:
+                _secret = settings.SUPABASE_JWT_SECRET.encode()
+            else:
+                path = settings.OTP_SECRET_PATH or os.path.join(tempfile.gettempdir(), "storebuilder-otp.key")
+                _secret = _load_or_create_secret(path)
+                print(f"🔐 SUPABASE_JWT_SECRET is not set: OTP codes are keyed with {path}")
+        return _secret
+
+
+def _hash_code(key: str, code: str) -> str:
+    return hmac.new(_secret_key(), f"{key}:{code}".encode(), hashlib.sha256).hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Backends
+# ---------------------------------------------------------------------------
+
+class OTPBackend(ABC):
+    """
+    Each method must be atomic with respect to every other process using the
+    same backend (the SQLite backend uses IMMEDIATE transactions).
+    """
+    name = "base"
+
+    @abstractmethod
+    def issue(self, key: str, code_hash: str, policy: OTPPolicy, now: float, grace_resend: bool = False) -> None:
+        """
+        Store a new code for `key`, replacing any previous one; raises OTPRateLimited.
+        `grace_resend`: the next issue for `key` skips the resend interval once.
+        """
+
+    @abstractmethod
+    def check(self, key: str, code_hash: str, policy: OTPPolicy, now: float) -> str:
+        """Compare and count the attempt; consumes the code on success. Returns an OTP_* outcome."""
+
+    @abstractmethod
+    def sweep(self, policy: OTPPolicy, now: float) -> int:
+        """Delete expired codes and finished rate-limit windows. Returns rows removed."""
+
+
+def _next_send(row: dict, policy: OTPPolicy, now: float, grace_resend: bool = False) -> dict:
+    """Rate-limit bookkeeping shared by the backends; raises OTPRateLimited."""
+    window_start, sent = row.get("window_start") or now, row.get("sent") or 0
+    if now - window_start >= policy.send_window:
+        window_start, sent = now, 0
+    if sent >= policy.send_limit:
+        raise OTPRateLimited(int(window_start + policy.send_window - now) + 1)
+    last_sent = row.get("last_sent") or 0
+    if not row.get("grace_resend") and now - last_sent < policy.resend_interval:
+        raise OTPRateLimited(int(last_sent + policy.resend_interval - now) + 1)
+    return {"window_start": window_start, "sent": sent + 1, "last_sent": now, "grace_resend": int(grace_resend)}
+
+
+def _attempt(row: Optional[dict], code_hash: str, policy: OTPPolicy, now: float) -> str:
+    if not row or not row.get("code_hash") or row["expires_at"] <= now:
+        return OTP_EXPIRED
+    if row["attempts"] >= policy.max_attempts:
+        return OTP_TOO_MANY_ATTEMPTS
+    if hmac.compare_digest(row["code_hash"], code_hash):
+        return OTP_OK
+    return OTP_INVALID
+
+
+class MemoryOTPBackend(OTPBackend):
+    name = "memory"
+
+    def __init__(self):
+        self._rows: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def issue(self, key, code_hash, policy, now, grace_resend=False):
+        with self._lock:
+            row = self._rows.get(key, {})
+            row.update(_next_send(row, policy, now, grace_resend))
+            row.update(code_hash=code_hash, expires_at=now + policy.ttl, attempts=0)
+            self._rows[key] = row
+
+    def check(self, key, code_hash, policy, now):
+        with self._lock:
+            row = self._rows.get(key)
+            outcome = _attempt(row, code_hash, policy, now)
+            if outcome == OTP_OK:
+                row["code_hash"] = None
+            elif outcome == OTP_INVALID:
+                row["attempts"] += 1
+            return outcome
+
+    def sweep(self, policy, now):
+        with self._lock:
+            stale = [
+                k for k, r in self._rows.items()
+                if r["expires_at"] <= now and now - r["window_start"] >= policy.send_window
+            ]
+            for k in stale:
+                del self._rows[k]
+            for r in self._rows.values():
+                if r["expires_at"] <= now:
+                    r["code_hash"] = None
+            return len(stale)
+
+
+class SQLiteOTPBackend(OTPBackend):
+    name = "sqlite"
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS otp_codes (
+            key TEXT PRIMARY KEY,
+            code_hash TEXT,
+            expires_at REAL NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            window_start REAL NOT NULL,
+            sent INTEGER NOT NULL,
+            last_sent REAL NOT NULL,
+            grace_resend INTEGER NOT NULL DEFAULT 0
+        )
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(self.SCHEMA)
+            # Files created before grace_resend existed
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(otp_codes)")}
+            if "grace_resend" not in columns:
+                conn.execute("ALTER TABLE otp_codes ADD COLUMN grace_resend INTEGER NOT NULL DEFAULT 0")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # isolation_level=None: transactions are opened explicitly with BEGIN IMMEDIATE
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")  # takes the write lock up front: read-modify-write is atomic
+        return conn
+
+    def _row(self, conn, key) -> Optional[dict]:
+        row = conn.execute("SELECT * FROM otp_codes WHERE key = ?", (key,)).fetchone()
+        return dict(row) if row else None
+
+    def issue(self, key, code_hash, policy, now, grace_resend=False):
+        conn = self._transaction()
+        try:
+            send = _next_send(self._row(conn, key) or {}, policy, now, grace_resend)
+            conn.execute(
+                "INSERT OR REPLACE INTO otp_codes "
+                "(key, code_hash, expires_at, attempts, window_start, sent, last_sent, grace_resend) "
+                "VALUES (?, ?, ?, 0, ?, ?, ?, ?)",
+                (key, code_hash, now + policy.ttl, send["window_start"], send["sent"], send["last_sent"], send["grace_resend"]),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def check(self, key, code_hash, policy, now):
+        conn = self._transaction()
+        try:
+            outcome = _attempt(self._row(conn, key), code_hash, policy, now)
+            if outcome == OTP_OK:
+                conn.execute("UPDATE otp_codes SET code_hash = NULL WHERE key = ?", (key,))
+            elif outcome == OTP_INVALID:
+                conn.execute("UPDATE otp_codes SET attempts = attempts + 1 WHERE key = ?", (key,))
+            conn.execute("COMMIT")
+            return outcome
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def sweep(self, policy, now):
+        conn = self._transaction()
+        try:
+            removed = conn.execute(
+                "DELETE FROM otp_codes WHERE expires_at <= ? AND window_start <= ?",
+                (now, now - policy.send_window),
+            ).rowcount
+            conn.execute("UPDATE otp_codes SET code_hash = NULL WHERE expires_at <= ? AND code_hash IS NOT NULL", (now,))
+            conn.execute("COMMIT")
+            return removed
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+
+_backend: Optional[OTPBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_otp_backend() -> OTPBackend:
+    """Create (once) and return the backend chosen by settings.OTP_BACKEND."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            if (settings.OTP_BACKEND or "sqlite").lower() == "memory":
+                _backend = MemoryOTPBackend()
+            else:
+                path = settings.OTP_SQLITE_PATH or os.path.join(tempfile.gettempdir(), "storebuilder-otp.sqlite3")
+                _backend = SQLiteOTPBackend(path)
+            print(f"🔐 OTP backend: {_backend.name}")
+        return _backend
+
+
+def set_otp_backend(backend: Optional[OTPBackend]) -> None:
+    """Swap the backend (tests / scripts); None re-reads the settings on next use."""
+    global _backend
+    _backend = backend
+
+
+# ---------------------------------------------------------------------------
+# Service
+# ---------------------------------------------------------------------------
+
+class OTPService:
+    """OTPs for one purpose; `namespace` keeps e.g. phone and store codes apart."""
+
+    def __init__(self, namespace: str, digits: int = 6):
+        self.namespace = namespace
+        self.digits = digits
+
+    def _key(self, subject: str) -> str:
+        return f"{self.namespace}:{subject}"
+
+    def send(self, subject: str, grace_resend: bool = False) -> str:
+        """
+        Generate and store a code for `subject`; returns it. Raises OTPRateLimited. Blocking.
+        Pass `grace_resend` when the code was not requested by the user (e.g. sent at
+        registration), so their first request for another one is not held back.
+        """
+        code = str(secrets.randbelow(9 * 10 ** (self.digits - 1)) + 10 ** (self.digits - 1))
+        key = self._key(subject)
+        get_otp_backend().issue(key, _hash_code(key, code), OTPPolicy.from_settings(), time.time(), grace_resend)
+        return code
+
+    def verify(self, subject: str, code: str) -> str:
+        """Check `code`; returns OTP_OK (and consumes the code) or the failure outcome. Blocking."""
+        key = self._key(subject)
+        return get_otp_backend().check(key, _hash_code(key, code or ""), OTPPolicy.from_settings(), time.time())
+
+    async def send_async(self, subject: str, grace_resend: bool = False) -> str:
+        return await run_in_threadpool(self.send, subject, grace_resend)
+
+    async def verify_async(self, subject: str, code: str) -> str:
+        return await run_in_threadpool(self.verify, subject, code)
+
+
+phone_otp = OTPService("phone")
+store_otp = OTPService("store")
+
+VERIFY_ERRORS = {
+    OTP_INVALID: "Invalid OTP",
+    OTP_EXPIRED: "Invalid or expired OTP",
+    OTP_TOO_MANY_ATTEMPTS: "Too many incorrect attempts. Please request a new OTP.",
+}
+
+
+# ---------------------------------------------------------------------------
+# Sweeper
+# ---------------------------------------------------------------------------
+
+OTP_SWEEPER = {"last_run": None, "removed": 0, "error": None}
+_task: Optional[asyncio.Task] = None
+
+
+async def _sweep_forever(interval: int):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            backend = get_otp_backend()
+            removed = await run_in_threadpool(backend.sweep, OTPPolicy.from_settings(), time.time())
+            OTP_SWEEPER.update(last_run=datetime.utcnow().isoformat(), error=None)
+            OTP_SWEEPER["removed"] += removed
+        except Exception as e:
+            OTP_SWEEPER["error"] = str(e)
+            print(f"❌ OTP sweep failed: {e}")
+
+
+def start_otp_sweeper():
+    global _task
+    if _task is None or _task.done():
+        _task = asyncio.create_task(_sweep_forever(settings.OTP_SWEEP_INTERVAL))
+
+
+def stop_otp_sweeper():
+    global _task
+    if _task is not None:
+        _task.cancel()
+        _task = None
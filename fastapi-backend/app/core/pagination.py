@@ -0,0 +1,89 @@
+"""
+Keyset (cursor) pagination helpers for PostgREST list queries.
+
+A cursor encodes the sort value and id of the last row on a page, so the next
+page is fetched with `(sort_col, id) < (value, id)` instead of an OFFSET scan.
+Combined with a `(store_id, sort_col, id)` index this keeps every page O(limit)
+no matter how deep the merchant scrolls.
+"""
+import base64
+import json
+import re
+from typing import Any, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+# Characters with a meaning inside PostgREST filter / logic-tree syntax
+_RESERVED_FILTER_CHARS = re.compile(r'[,()"\\]')
+
+
+def encode_cursor(row: dict, sort_column: str) -> str:
+    """Build an opaque cursor pointing just after `row`."""
+    payload = {"v": row.get(sort_column), "id": row.get("id")}
+    raw = json.dumps(payload, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, str]:
+    """Return `(sort_value, id)` from a cursor produced by `encode_cursor`."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return payload["v"], str(payload["id"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+
+def _quote(value: Any) -> str:
+    return '"' + str(value).replace('"', "") + '"'
+
+
+def order_by(query, *terms: str):
+    """
+    Apply a multi-column ORDER BY, e.g. `order_by(q, "created_at.desc", "id.desc")`.
+    Each `.order()` call adds its own `order` query param and PostgREST only
+    honours one of them, so the columns have to be sent comma-joined.
+    """
+    return query.order(",".join(terms))
+
+
+def apply_keyset(query, sort_column: str, desc: bool, cursor: Optional[str]):
+    """
+    Order `query` by `(sort_column, id)` and start it after `cursor` if given.
+    Postgres puts NULLs first in a descending sort and last in an ascending
+    one, so a nullable sort column needs its own branch on either side of them.
+    """
+    if cursor:
+        value, last_id = decode_cursor(cursor)
+        op = "lt" if desc else "gt"
+        if value is None:
+            # Still inside the NULL run: the rest of it, then (descending) every non-NULL row
+            rest = f"and({sort_column}.is.null,id.{op}.{_quote(last_id)})"
+            query = query.or_(f"{rest},{sort_column}.not.is.null" if desc else rest)
+        else:
+            after = (
+                f"{sort_column}.{op}.{_quote(value)},"
+                f"and({sort_column}.eq.{_quote(value)},id.{op}.{_quote(last_id)})"
+            )
+            query = query.or_(after if desc else f"{after},{sort_column}.is.null")
+    direction = "desc" if desc else "asc"
+    return order_by(query, f"{sort_column}.{direction}", f"id.{direction}")
+
+
+def paginate(rows: List[dict], limit: int, sort_column: str) -> Tuple[List[dict], Optional[str]]:
+    """
+    Trim a `limit + 1` fetch down to one page.
+    Returns the page and the cursor for the next one (None on the last page).
+    """
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    return page, encode_cursor(page[-1], sort_column)
+
+
+def search_term(value: Optional[str]) -> Optional[str]:
+    """Strip characters that would break an `or_()` filter expression."""
+    if not value:
+        return None
+    cleaned = _RESERVED_FILTER_CHARS.sub(" ", value).strip()
+    return cleaned or None
@@ -0,0 +1,78 @@
+"""
+Sampling profiler for a running worker.
+
+`sample(seconds, interval)` snapshots the Python stack of every thread
+(`sys._current_frames()`) every `interval` seconds and returns the counts in
+the "collapsed stack" format read by flamegraph.pl, speedscope and friends:
+
+    MainThread;uvicorn/server.py:serve;...;endpoints/stores.py:get_store 17
+
+Sampling runs in its own thread and only reads frames, so the profiled worker
+keeps serving traffic (at a small cost). Pass the event loop thread's name as
+`thread_name` to see only what the loop spends its time on, including the
+blocking calls the watchdog (app/core/loop_watchdog.py) reports. One profile
+at a time per worker.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+_profile_lock = threading.Lock()
+
+# Leaf frames of a thread that is waiting, not working (idle pool workers, the selector...)
+_IDLE_LEAVES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+    ("_thread.py", "run"),  # anyio worker threads between jobs
+    ("socket.py", "accept"),
+}
+
+
+class ProfilerBusy(Exception):
+    pass
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    # Shorten to the last two path parts: enough to tell modules apart
+    short = "/".join(filename.replace("\\", "/").split("/")[-2:])
+    return f"{short}:{code.co_name}"
+
+
+def _is_idle(frame) -> bool:
+    return (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in _IDLE_LEAVES
+
+
+def sample(seconds: float, interval: float = 0.005, thread_name: Optional[str] = None,
+           include_idle: bool = False) -> str:
+    """Profile for `seconds`; raises ProfilerBusy if a profile is already running."""
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusy()
+    try:
+        me = threading.get_ident()
+        stacks: Counter = Counter()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                name = names.get(thread_id, f"thread-{thread_id}")
+                if thread_id == me or (thread_name and name != thread_name):
+                    continue
+                if not include_idle and _is_idle(frame):
+                    continue
+                frames = []
+                while frame is not None:
+                    frames.append(_frame_label(frame))
+                    frame = frame.f_back
+                stacks[";".join([name] + frames[::-1])] += 1
+            time.sleep(interval)
+        return "\n".join(f"{stack} {count}" for stack, count in stacks.most_common()) + "\n"
+    finally:
+        _profile_lock.release()
@@ -0,0 +1,427 @@
+"""
+Per-tenant rate limits and concurrency quotas.
+
+One merchant refreshing dashboard stats in a loop, re-applying a theme or
+starting bulk imports back to back, or a scraper walking live store pages,
+should use up its own budget rather than everyone's latency.
+RateLimitMiddleware (app/core/middleware.py) matches each /api/ request to a
+budget (RULES, first match wins; "default" for everything else) and charges
+one token per key the budget is counted by:
+
+* client - the user of the bearer token (`sub`) when its signature checks out
+  against SUPABASE_JWT_SECRET, else the client IP: without the secret, or
+  with a token that fails the check, anyone could pick the `sub` and so a
+  fresh bucket per request. Behind a proxy, start the server with
+  forwarded_allow_ips so the IP is the real client's.
+* store - the store id or slug the request targets: a path segment, the
+  storeId/storeSlug query parameter, or a field of the JSON body for the
+  routes that carry it there. A slug and an id are separate keys.
+
+Every key has a token bucket: `burst` tokens, refilled at `per_minute` a
+minute. A request takes a token from each of its buckets, or from none when
+one is empty; it is then answered 429 with Retry-After (seconds until it would
+pass). The expensive budgets also cap how many requests one key has in flight
+(`max_concurrent`, counted per worker process).
+
+Buckets live in a backend:
+
+* MemoryRateLimitBackend - a dict in the current process; the default. With
+  N workers a key gets up to N times its budget, depending on where its
+  requests land.
+* SQLiteRateLimitBackend - one SQLite file (WAL mode) shared by the workers on
+  a host, like the OTP codes (RATE_LIMIT_BACKEND=sqlite). Called from the
+  threadpool.
+
+Other backends (Redis, for several hosts) only have to implement
+`RateLimitBackend`. When the backend fails, requests are let through
+(rate_limit_backend_errors_total).
+"""
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Tuple
+from urllib.parse import parse_qsl
+
+import jwt
+from starlette.concurrency import run_in_threadpool
+
+from app.core import metrics
+from app.core.config import settings
+
+# Query parameters naming the store a request targets
+STORE_QUERY_PARAMS = ("storeId", "storeSlug", "store_id", "store_slug")
+
+# Most recently limited keys kept for GET /api/v1/platform/diagnostics/rate-limits
+MAX_TRACKED_DENIALS = 500
+
+
+@dataclass(frozen=True)
+class Budget:
+    name: str
+    per_minute: int
+    burst: int
+    keys: Tuple[str, ...] = ("client",)  # "client" and/or "store"
+    max_concurrent: Optional[int] = None
+
+    @property
+    def rate(self) -> float:
+        """Tokens per second."""
+        return self.per_minute / 60
+
+
+def budgets_from_settings() -> Dict[str, Budget]:
+    return {budget.name: budget for budget in (
+        Budget("default", settings.RATE_LIMIT_DEFAULT_PER_MINUTE, settings.RATE_LIMIT_DEFAULT_BURST),
+        Budget("storefront", settings.RATE_LIMIT_STOREFRONT_PER_MINUTE, settings.RATE_LIMIT_STOREFRONT_BURST),
+        Budget(
+            "dashboard", settings.RATE_LIMIT_DASHBOARD_PER_MINUTE, settings.RATE_LIMIT_DASHBOARD_BURST,
+            keys=("client", "store"), max_concurrent=settings.RATE_LIMIT_MAX_CONCURRENT,
+        ),
+        Budget(
+            "upload", settings.RATE_LIMIT_UPLOAD_PER_MINUTE, settings.RATE_LIMIT_UPLOAD_BURST,
+            max_concurrent=settings.MAX_CONCURRENT_UPLOADS,
+        ),
+        Budget(
+            "bulk", settings.RATE_LIMIT_BULK_PER_MINUTE, settings.RATE_LIMIT_BULK_BURST,
+            keys=("client", "store"), max_concurrent=settings.RATE_LIMIT_MAX_CONCURRENT,
+        ),
+        Budget(
+            "theme", settings.RATE_LIMIT_THEME_PER_MINUTE, settings.RATE_LIMIT_THEME_BURST,
+            keys=("client", "store"), max_concurrent=settings.RATE_LIMIT_MAX_CONCURRENT,
+        ),
+    )}
+
+
+@dataclass(frozen=True)
+class Rule:
+    budget: str
+    methods: FrozenSet[str]
+    pattern: "re.Pattern"  # a (?P<store>...) group names the store
+    body_field: Optional[str] = None  # JSON body field naming the store
+
+
+def _rule(budget: str, methods: str, pattern: str, body_field: Optional[str] = None) -> Rule:
+    return Rule(budget, frozenset(methods.split()), re.compile(pattern), body_field)
+
+
+RULES = [
+    _rule("theme", "POST", r"^/api/v1/platform/themes/apply$", body_field="store_slug"),
+    _rule("theme", "POST PUT", r"^/api/v1/platform/themes(/[^/]+)?$"),
+    _rule("dashboard", "GET", r"^/api/v1/merchant/dashboard/stats/(?P<store>[^/]+)$"),
+    _rule("bulk", "POST", r"^/api/v1/store/products/(bulk-update|bulk-delete)$", body_field="storeId"),
+    _rule("bulk", "GET POST", r"^/api/v1/store/products/(import|export)$"),
+    _rule("upload", "POST", r"^/api/v1/upload/?$"),
+    _rule("storefront", "GET", r"^/api/v1/s/live/"),
+]
+DEFAULT_RULE = _rule("default", "GET HEAD POST PUT PATCH DELETE", r"^/api/")
+
+
+def match_rule(method: str, path: str) -> Optional[Rule]:
+    """The rule `path` is counted under, or None for paths outside the API."""
+    for rule in RULES:
+        if method in rule.methods and rule.pattern.match(path):
+            return rule
+    return DEFAULT_RULE if DEFAULT_RULE.pattern.match(path) else None
+
+
+def _bearer_token(scope) -> Optional[str]:
+    for name, value in scope.get("headers") or []:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            return token.strip() if scheme.lower() == "bearer" and token.strip() else None
+    return None
+
+
+def client_key(scope) -> str:
+    token = _bearer_token(scope)
+    # An unverified token names whatever user its sender likes; only a signed one picks the bucket
+    if token and settings.SUPABASE_JWT_SECRET:
+        try:
+            claims = jwt.decode(token, settings.SUPABASE_JWT_SECRET, algorithms=["HS256"], options={"verify_aud": False})
+            user = claims.get("sub") or claims.get("id")
+            if user:
+                return f"user:{user}"
+        except jwt.InvalidTokenError:
+            pass
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+def store_key(rule: Rule, scope, body: Optional[dict] = None) -> Optional[str]:
+    match = rule.pattern.match(scope["path"])
+    store = match.groupdict().get("store") if match else None
+    if not store and scope.get("query_string"):
+        params = dict(parse_qsl(scope["query_string"].decode("latin-1")))
+        store = next((params[name] for name in STORE_QUERY_PARAMS if params.get(name)), None)
+    if not store and rule.body_field and isinstance(body, dict):
+        store = body.get(rule.body_field)
+    return f"store:{store}" if store else None
+
+
+# ---------------------------------------------------------------------------
+# Backends
+# ---------------------------------------------------------------------------
+
+class RateLimitBackend(ABC):
+    """
+    `take` must be atomic with respect to every other process using the same
+    backend (the SQLite backend uses IMMEDIATE transactions).
+    """
+    name = "base"
+    blocking = True  # called through the threadpool
+
+    @abstractmethod
+    def take(self, keys: List[str], budget: Budget, now: float) -> Optional[Tuple[str, float]]:
+        """
+        Take one token from the bucket of every key, or none of them. Returns
+        None when taken, else (the first empty key, seconds until it has a token).
+        """
+
+
+def _level(bucket: Optional[tuple], budget: Budget, now: float) -> float:
+    """Tokens in a (tokens, updated) bucket at `now`; a missing bucket is full."""
+    if bucket is None:
+        return float(budget.burst)
+    tokens, updated = bucket
+    return min(float(budget.burst), tokens + max(0.0, now - updated) * budget.rate)
+
+
+def _first_empty(keys: List[str], levels: List[float], budget: Budget) -> Optional[Tuple[str, float]]:
+    for key, level in zip(keys, levels):
+        if level < 1:
+            return key, (1 - level) / budget.rate if budget.rate > 0 else 60.0
+    return None
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    name = "memory"
+    blocking = False
+
+    # Least recently used buckets are dropped past this (a dropped bucket is full again)
+    MAX_BUCKETS = 100_000
+
+    def __init__(self):
+        self._buckets: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, keys, budget, now):
+        with self._lock:
+            levels = [_level(self._buckets.get(key), budget, now) for key in keys]
+            empty = _first_empty(keys, levels, budget)
+            if empty:
+                return empty
+            for key, level in zip(keys, levels):
+                self._buckets[key] = (level - 1, now)
+                self._buckets.move_to_end(key)
+            while len(self._buckets) > self.MAX_BUCKETS:
+                self._buckets.popitem(last=False)
+            return None
+
+
+class SQLiteRateLimitBackend(RateLimitBackend):
+    name = "sqlite"
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS rate_buckets (
+            key TEXT PRIMARY KEY,
+            tokens REAL NOT NULL,
+            updated REAL NOT NULL
+        )
+    """
+    # Buckets idle this long are full again for every budget; deleted every SWEEP_EVERY takes
+    IDLE_SECONDS = 3600
+    SWEEP_EVERY = 1000
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._takes = 0
+        with self._connect() as conn:
+            conn.execute(self.SCHEMA)
+            conn.execute("CREATE INDEX IF NOT EXISTS rate_buckets_updated ON rate_buckets (updated)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # isolation_level=None: transactions are opened explicitly with BEGIN IMMEDIATE
+            conn = sqlite3.connect(self.path, timeout=1, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")  # losing the last buckets on a crash only refills them
+            self._local.conn = conn
+        return conn
+
+    def take(self, keys, budget, now):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")  # takes the write lock up front: read-modify-write is atomic
+        try:
+            placeholders = ",".join("?" * len(keys))
+            rows = dict((key, (tokens, updated)) for key, tokens, updated in conn.execute(
+                f"SELECT key, tokens, updated FROM rate_buckets WHERE key IN ({placeholders})", keys,
+            ))
+            levels = [_level(rows.get(key), budget, now) for key in keys]
+            empty = _first_empty(keys, levels, budget)
+            if not empty:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO rate_buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                    [(key, level - 1, now) for key, level in zip(keys, levels)],
+                )
+                self._takes += 1
+                if self._takes % self.SWEEP_EVERY == 0:
+                    conn.execute("DELETE FROM rate_buckets WHERE updated < ?", (now - self.IDLE_SECONDS,))
+            conn.execute("COMMIT")
+            return empty
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+
+_backend: Optional[RateLimitBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_rate_limit_backend() -> RateLimitBackend:
+    """Create (once) and return the backend chosen by settings.RATE_LIMIT_BACKEND."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            if (settings.RATE_LIMIT_BACKEND or "memory").lower() == "sqlite":
+                path = settings.RATE_LIMIT_SQLITE_PATH or os.path.join(tempfile.gettempdir(), "storebuilder-ratelimit.sqlite3")
+                _backend = SQLiteRateLimitBackend(path)
+            else:
+                _backend = MemoryRateLimitBackend()
+            print(f"🚦 Rate limit backend: {_backend.name}")
+        return _backend
+
+
+def set_rate_limit_backend(backend: Optional[RateLimitBackend]) -> None:
+    """Swap the backend (tests / scripts); None re-reads the settings on next use."""
+    global _backend
+    _backend = backend
+
+
+# ---------------------------------------------------------------------------
+# Limiter
+# ---------------------------------------------------------------------------
+
+@dataclass
+class Decision:
+    budget: Budget
+    keys: Dict[str, str]              # "<budget>:<key>" -> "client" | "store"
+    limited_by: Optional[str] = None  # "client" | "store" when denied
+    reason: Optional[str] = None      # "rate" | "concurrency" when denied
+    retry_after: int = 0
+    holding: bool = False             # counted in flight; release() when the request is done
+
+    @property
+    def allowed(self) -> bool:
+        return self.reason is None
+
+
+RATE_LIMIT_STATS = {"checked": 0, "limited": 0, "backend_errors": 0, "last_error": None}
+_in_flight: Dict[str, int] = {}  # "<budget>:<key>" -> requests running (this worker)
+_denials: "OrderedDict[str, dict]" = OrderedDict()
+
+RATE_LIMITED = metrics.Counter(
+    "rate_limited_requests_total", "Requests answered 429 by the rate limiter.", ("budget", "key", "reason"),
+)
+RATE_LIMIT_CHECKS = metrics.Counter("rate_limit_checks_total", "Requests checked against a rate limit budget.", ("budget",))
+RATE_LIMIT_BACKEND_ERRORS = metrics.Counter(
+    "rate_limit_backend_errors_total", "Rate limit checks let through because the backend failed.",
+)
+
+
+def _in_flight_by_budget() -> Dict[Tuple[str, ...], float]:
+    totals: Dict[Tuple[str, ...], float] = {}
+    for key, count in list(_in_flight.items()):
+        budget = (key.split(":", 1)[0],)
+        totals[budget] = totals.get(budget, 0) + count
+    return totals
+
+
+RATE_LIMIT_IN_FLIGHT = metrics.Gauge(
+    "rate_limit_in_flight", "Requests running under a concurrency quota (this worker).", _in_flight_by_budget, ("budget",),
+)
+
+
+def _record_denial(key: str, decision: Decision) -> None:
+    entry = _denials.pop(key, None) or {"key": key, "budget": decision.budget.name, "count": 0}
+    entry.update(count=entry["count"] + 1, reason=decision.reason, last=time.time())
+    _denials[key] = entry
+    while len(_denials) > MAX_TRACKED_DENIALS:
+        _denials.popitem(last=False)
+
+
+def top_limited(limit: int = 20) -> List[dict]:
+    """The keys denied most often recently (this worker), for diagnostics."""
+    return sorted(_denials.values(), key=lambda entry: entry["count"], reverse=True)[:limit]
+
+
+class RateLimiter:
+    """
+    Decisions for one process. `check` and `release` run on the event loop, so
+    the in-flight counts need no lock.
+    """
+
+    def __init__(self, budgets: Optional[Dict[str, Budget]] = None):
+        self.budgets = budgets or budgets_from_settings()
+
+    async def check(self, rule: Rule, scope, body: Optional[dict] = None) -> Decision:
+        budget = self.budgets[rule.budget]
+        keys = {kind: client_key(scope) if kind == "client" else store_key(rule, scope, body) for kind in budget.keys}
+        decision = Decision(budget, {f"{budget.name}:{key}": kind for kind, key in keys.items() if key})
+        RATE_LIMIT_STATS["checked"] += 1
+        RATE_LIMIT_CHECKS.inc((budget.name,))
+
+        if budget.max_concurrent:
+            full = next((key for key in decision.keys if _in_flight.get(key, 0) >= budget.max_concurrent), None)
+            if full:
+                return self._deny(decision, full, "concurrency", 1)
+
+        backend = get_rate_limit_backend()
+        try:
+            if backend.blocking:
+                empty = await run_in_threadpool(backend.take, list(decision.keys), budget, time.time())
+            else:
+                empty = backend.take(list(decision.keys), budget, time.time())
+        except Exception as e:
+            RATE_LIMIT_BACKEND_ERRORS.inc()
+            RATE_LIMIT_STATS["backend_errors"] += 1
+            if RATE_LIMIT_STATS["last_error"] != str(e):
+                print(f"⚠️ Rate limit backend failed, letting requests through: {e}")
+            RATE_LIMIT_STATS["last_error"] = str(e)
+            empty = None
+        if empty:
+            key, wait = empty
+            return self._deny(decision, key, "rate", max(1, int(wait + 0.999)))
+
+        if budget.max_concurrent:
+            for key in decision.keys:
+                _in_flight[key] = _in_flight.get(key, 0) + 1
+            decision.holding = True
+        return decision
+
+    def release(self, decision: Decision) -> None:
+        if not decision.holding:
+            return
+        decision.holding = False
+        for key in decision.keys:
+            count = _in_flight.get(key, 0) - 1
+            if count > 0:
+                _in_flight[key] = count
+            else:
+                _in_flight.pop(key, None)
+
+    def _deny(self, decision: Decision, key: str, reason: str, retry_after: int) -> Decision:
+        decision.limited_by = decision.keys[key]
+        decision.reason = reason
+        decision.retry_after = retry_after
+        RATE_LIMIT_STATS["limited"] += 1
+        RATE_LIMITED.inc((decision.budget.name, decision.limited_by, reason))
+        _record_denial(key, decision)
+        return decision
@@ -0,0 +1,147 @@
+"""
+Async client for the Razorpay REST API.
+
+Replaces the synchronous `razorpay.Client` SDK in async routes, which blocked the
+event loop for as long as the gateway took to answer. Properties:
+
+* One pooled `httpx.AsyncClient` per worker, so connections are kept alive
+  across calls. Created lazily (httpx is imported then too, keeping it out of
+  the API's import time), closed on shutdown (`close_gateway`).
+* Tight timeouts: RAZORPAY_CONNECT_TIMEOUT to connect, RAZORPAY_TIMEOUT for the
+  rest, so a stuck gateway cannot hold a request for long.
+* Retries with jittered exponential backoff. Reads (GET) are retried on
+  timeouts, connection errors and 5xx/429. Writes such as order creation are
+  retried only when the connection could not be established: the request never
+  reached Razorpay, so it cannot have created anything.
+* The "razorpay" circuit breaker of app/core/upstream.py: after repeated
+  gateway failures calls fail fast with UpstreamUnavailable (a 503).
+
+RAZORPAY_API_URL points at the real API by default. scripts/mock_razorpay.py
+serves a local stand-in for tests and load runs.
+"""
+import asyncio
+import hashlib
+import hmac
+import random
+from typing import TYPE_CHECKING, Optional
+
+from app.core import upstream
+from app.core.circuit_breaker import CircuitOpenError
+from app.core.config import settings
+from app.core.upstream import UpstreamUnavailable
+
+if TYPE_CHECKING:
+    import httpx
+
+RETRY_BASE_DELAY = 0.2
+RETRY_MAX_DELAY = 2.0
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class GatewayError(Exception):
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+_client: Optional["httpx.AsyncClient"] = None
+
+
+def _get_client() -> "httpx.AsyncClient":
+    global _client
+    if _client is None or _client.is_closed:
+        import httpx
+
+        _client = httpx.AsyncClient(
+            base_url=settings.RAZORPAY_API_URL.rstrip("/"),
+            auth=(settings.RAZORPAY_KEY_ID or "", settings.RAZORPAY_KEY_SECRET or ""),
+            timeout=httpx.Timeout(settings.RAZORPAY_TIMEOUT, connect=settings.RAZORPAY_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=settings.RAZORPAY_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.RAZORPAY_MAX_CONNECTIONS,
+                keepalive_expiry=30,
+            ),
+        )
+    return _client
+
+
+async def close_gateway() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _backoff(attempt: int) -> float:
+    # "Full jitter": spreads the retries of many clients hitting one outage
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+
+async def _request(method: str, path: str, idempotent: bool, **kwargs) -> dict:
+    import httpx
+
+    breaker = upstream.RAZORPAY.breaker()
+    attempts = 1 + max(0, settings.RAZORPAY_MAX_RETRIES)
+    last_error: Optional[Exception] = None
+
+    for attempt in range(attempts):
+        try:
+            breaker.before_call()
+        except CircuitOpenError as e:
+            raise UpstreamUnavailable("razorpay", e.retry_after, "circuit open") from e
+        try:
+            res = await _get_client().request(method, path, **kwargs)
+        except httpx.ConnectError as e:
+            # Nothing was sent: safe to retry even non-idempotent calls
+            breaker.record_failure()
+            last_error = GatewayError(f"Razorpay unreachable: {e}")
+        except httpx.TransportError as e:
+            # Timeouts / dropped connections: the gateway may have acted on the request
+            breaker.record_failure()
+            last_error = GatewayError(f"Razorpay request failed: {type(e).__name__}")
+            if not idempotent:
+                raise last_error
+        else:
+            if res.status_code in RETRYABLE_STATUS:
+                if res.status_code != 429:
+                    breaker.record_failure()
+                last_error = GatewayError(f"Razorpay returned {res.status_code}", res.status_code)
+                if not idempotent:
+                    raise last_error
+            else:
+                breaker.record_success()
+                body = res.json() if res.content else {}
+                if res.status_code >= 400:
+                    error = (body.get("error") or {}) if isinstance(body, dict) else {}
+                    raise GatewayError(error.get("description") or f"Razorpay returned {res.status_code}", res.status_code)
+                return body
+
+        if attempt + 1 < attempts:
+            await asyncio.sleep(_backoff(attempt))
+    raise last_error
+
+
+async def create_order(data: dict) -> dict:
+    return await _request("POST", "/orders", idempotent=False, json=data)
+
+
+async def fetch_order(order_id: str) -> dict:
+    return await _request("GET", f"/orders/{order_id}", idempotent=True)
+
+
+async def fetch_payment(payment_id: str) -> dict:
+    return await _request("GET", f"/payments/{payment_id}", idempotent=True)
+
+
+def verify_payment_signature(order_id: str, payment_id: str, signature: str) -> bool:
+    """Checkout signature check (local HMAC, no network call). False when no key secret is configured."""
+    if not settings.RAZORPAY_KEY_SECRET:
+        # An empty key would accept signatures anyone can compute
+        return False
+    expected = hmac.new(
+        settings.RAZORPAY_KEY_SECRET.encode(),
+        f"{order_id}|{payment_id}".encode(),
+        hashlib.sha256,
+    ).hexdigest()
+    return hmac.compare_digest(expected, signature or "")
+
@@ -0,0 +1,89 @@
+"""
+Applies queued Razorpay webhook events (see app/core/webhook_queue.py).
+
+* payment.captured / order.paid - record the payment and, when the order notes
+  name a store, upsert its subscription and activate it. This goes through the
+  same idempotent `record_subscription_payment()` RPC as the browser's verify
+  call (migrations/idempotent_payments.sql), so whichever arrives second is a
+  no-op.
+* payment.failed - record a failed payment row (once).
+
+Other events are acknowledged and ignored. A handler that raises is retried by
+the queue and eventually dead-lettered.
+"""
+from typing import Optional
+
+from app.core.supabase_client import supabase_admin
+from app.core import store_identity
+
+WEBHOOK_SOURCE = "razorpay"
+
+# Events whose payment entity means "money received"
+CAPTURE_EVENTS = {"payment.captured", "order.paid"}
+
+
+def _entity(payload: dict, name: str) -> dict:
+    return ((payload.get("payload") or {}).get(name) or {}).get("entity") or {}
+
+
+def _notes(*entities: dict) -> dict:
+    """Merged notes of the entities (later ones win)."""
+    merged = {}
+    for entity in entities:
+        # Razorpay sends an empty list instead of {} when there are no notes
+        if isinstance(entity.get("notes"), dict):
+            merged.update(entity["notes"])
+    return merged
+
+
+def _note(notes: dict, *keys) -> Optional[str]:
+    for key in keys:
+        if notes.get(key):
+            return str(notes[key])
+    return None
+
+
+def _record_capture(payment: dict, order: dict) -> dict:
+    # Store / plan / cycle are set as order notes by POST /payments/razorpay/order
+    notes = _notes(payment, order)
+    billing_cycle = _note(notes, "billing_cycle") or (
+        "monthly" if "monthly" in (_note(notes, "plan_name") or "").lower() else "yearly"
+    )
+    res = supabase_admin.rpc("record_subscription_payment", {
+        "p_razorpay_payment_id": payment["id"],
+        "p_store_id": _note(notes, "store_id"),
+        "p_user_id": _note(notes, "user_id"),
+        "p_plan_id": _note(notes, "plan_id"),
+        "p_amount": (payment.get("amount") or 0) / 100,
+        "p_currency": payment.get("currency") or "INR",
+        "p_billing_cycle": billing_cycle,
+    }).execute()
+    return res.data or {}
+
+
+def _record_failure(payment: dict) -> None:
+    supabase_admin.table("payments").upsert({
+        "razorpay_payment_id": payment["id"],
+        "store_id": _note(_notes(payment), "store_id"),
+        "amount": (payment.get("amount") or 0) / 100,
+        "currency": payment.get("currency") or "INR",
+        "status": "failed",
+        "provider": "razorpay",
+        "type": "subscription_fee",
+    }, on_conflict="razorpay_payment_id", ignore_duplicates=True).execute()
+
+
+def handle_razorpay_event(event: str, payload: dict) -> None:
+    payment = _entity(payload, "payment")
+    if event in CAPTURE_EVENTS:
+        if not payment.get("id"):
+            raise ValueError(f"{event} without a payment entity")
+        result = _record_capture(payment, _entity(payload, "order"))
+        if result.get("storeActivated"):
+            store_identity.invalidate(store_id=_note(_notes(payment, _entity(payload, "order")), "store_id"))
+        if not result.get("duplicate"):
+            print(f"✅ Webhook recorded payment {payment['id']} (store activated: {result.get('storeActivated')})")
+    elif event == "payment.failed":
+        if payment.get("id"):
+            _record_failure(payment)
+            print(f"⚠️ Webhook recorded failed payment {payment['id']}")
@@ -0,0 +1,78 @@
+"""
+Cache for public, rarely-changing JSON endpoints (plans, themes).
+
+Responses are built once, serialized once and kept as bytes together with an
+ETag, so a cache hit is a dict lookup plus a socket write: no database query,
+no row mapping and no JSON encoding. Clients that send `If-None-Match` get a
+bodyless 304.
+
+Entries expire after `ttl` seconds, and admin write paths drop them right away
+with `invalidate(namespace)`. Like every in-process cache it is per worker:
+other workers converge within the TTL. While the database is unavailable
+(app/core/upstream.py) an expired entry is served rather than a 503.
+"""
+import hashlib
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+from fastapi import Request, Response
+
+from app.core import upstream
+from app.core.cache import TTLCache
+from app.core.responses import dumps
+
+PUBLIC_CACHE_TTL = 300
+# How long browsers / CDNs may reuse a response without revalidating
+PUBLIC_MAX_AGE = 60
+
+_cache = TTLCache(maxsize=2048, ttl=PUBLIC_CACHE_TTL)
+
+
+def _serialize(payload: Any) -> Tuple[bytes, str]:
+    body = dumps(payload)
+    return body, '"' + hashlib.sha1(body).hexdigest() + '"'
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [c.strip().removeprefix("W/") for c in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def cached_json(
+    request: Request,
+    namespace: str,
+    key: Hashable,
+    build: Callable[[], Any],
+    ttl: Optional[int] = None,
+    max_age: int = PUBLIC_MAX_AGE,
+    private: bool = False,
+) -> Response:
+    """
+    Serve `build()` (any JSON-able value) from the cache, building it on a miss.
+    Exceptions from `build` (e.g. HTTPException 404) propagate and are not cached.
+    `private` responses (admin views) may be kept by the browser but not by shared caches.
+    """
+    cache_key = (namespace, key)
+    entry = _cache.get(cache_key)
+    if entry is None:
+        try:
+            entry = _serialize(build())
+            _cache.set(cache_key, entry, ttl)
+        except upstream.UpstreamUnavailable:
+            stale = _cache.get_stale(cache_key)
+            if stale is None:
+                raise
+            entry = upstream.serve_stale(namespace, stale)
+
+    body, etag = entry
+    headers = {"ETag": etag, "Cache-Control": f"{'private' if private else 'public'}, max-age={max_age}"}
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def invalidate(namespace: str) -> None:
+    """Drop every cached response of a namespace (call after any write to its source table)."""
+    _cache.delete_where(lambda key, _: key[0] == namespace)
@@ -0,0 +1,45 @@
+"""
+In-flight request deduplication.
+
+`SingleFlight.do(key, fn)` runs `fn()` once per key at a time: callers that
+arrive while a call for the same key is running wait for it and receive the
+same result (or exception) instead of repeating the work. Nothing is kept once
+the call finishes; pair it with a TTLCache when finished results should be
+reused too. Per worker process, like every in-process cache.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.shared = 0  # calls answered by someone else's in-flight result
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        pending = self._calls.get(key)
+        if pending is not None:
+            self.shared += 1
+            # shield: a cancelled waiter must not cancel the call the others wait on
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so an exception nobody else awaited is not logged
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
+
+    def in_flight(self) -> int:
+        return len(self._calls)
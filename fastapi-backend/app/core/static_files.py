@@ -0,0 +1,39 @@
+"""
+Static file serving for uploads and the built storefront sites, shared by
+the API (app/main.py) and the storefront service (app/storefront.py).
+"""
+from pathlib import Path
+
+from fastapi.staticfiles import StaticFiles
+
+# Move uploads OUTSIDE of the backend folder to the project root
+# This completely prevents uvicorn reload from seeing theme build files
+ROOT_DIR = Path(__file__).resolve().parents[2] # 0=core, 1=app, 2=fastapi-backend
+PROJECT_ROOT = ROOT_DIR.parent # Store-Builder
+UPLOADS_DIR = PROJECT_ROOT / "uploads"
+
+
+class SmartStaticFiles(StaticFiles):
+    """Custom static file handler to properly resolve Next.js static exports."""
+    async def get_response(self, path: str, scope):
+        # 1. Normalize path to use forward slashes (fixes Windows backslash issues)
+        path = path.replace("\\", "/")
+
+        # 2. Try the standard file first
+        response = await super().get_response(path, scope)
+
+        # 3. If 404, try appending .html (Next.js clean urls: /login -> /login.html)
+        if response.status_code == 404 and not path.endswith(".html"):
+            html_path = f"{path}.html"
+            response = await super().get_response(html_path, scope)
+
+        # 4. If still 404, try path/index.html (Next.js directory exports: /login -> /login/index.html)
+        if response.status_code == 404:
+            # Manually construct path with forward slash to avoid os.path.join using backslashes
+            if path.endswith("/"):
+                index_path = f"{path}index.html"
+            else:
+                index_path = f"{path}/index.html"
+            response = await super().get_response(index_path, scope)
+
+        return response
@@ -0,0 +1,163 @@
+"""
+Pluggable file storage for uploads.
+
+Backends receive a file *path* (the upload has already been streamed to a
+temporary file) and return the public URL plus metadata. They are blocking and
+must be called from a worker thread (see app/api/v1/endpoints/upload.py).
+
+* CloudinaryStorage - configured once when the backend is created. Files larger
+  than CLOUDINARY_CHUNKED_THRESHOLD use Cloudinary's chunked upload API. Calls
+  run under the "cloudinary" upstream policy (app/core/upstream.py): a
+  timeout, a circuit breaker, and a retry for deletes.
+* LocalStorage      - writes under uploads/media (served by the /uploads static
+  mount). Used when Cloudinary is not configured and in tests.
+
+`get_storage()` returns the process-wide backend chosen by settings.STORAGE_BACKEND
+("cloudinary" | "local"; default: cloudinary when credentials are set, else local).
+"""
+import os
+import re
+import shutil
+import uuid
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Optional
+
+from app.core import upstream
+from app.core.config import settings
+
+# Cloudinary's single-request upload limit is ~100MB; go chunked well before it
+CLOUDINARY_CHUNKED_THRESHOLD = 20 * 1024 * 1024
+CLOUDINARY_CHUNK_SIZE = 6 * 1024 * 1024
+
+PROJECT_ROOT = Path(__file__).resolve().parents[3]  # 0=core, 1=app, 2=fastapi-backend
+LOCAL_MEDIA_DIR = PROJECT_ROOT / "uploads" / "media"
+
+
+class StorageError(Exception):
+    pass
+
+
+class StorageBackend(ABC):
+    name = "base"
+
+    @abstractmethod
+    def save(self, path: str, folder: str, filename: Optional[str] = None, content_type: Optional[str] = None) -> dict:
+        """Store the file at `path`; returns {url, publicId, width, height, format, size}."""
+
+    @abstractmethod
+    def delete(self, public_id: str) -> dict:
+        """Returns {"success": bool, "error": Optional[str]}."""
+
+
+class CloudinaryStorage(StorageBackend):
+    name = "cloudinary"
+
+    def __init__(self):
+        if not settings.CLOUDINARY_CLOUD_NAME or not settings.CLOUDINARY_API_KEY:
+            raise StorageError("Cloudinary configuration missing. Please check .env file.")
+        import cloudinary
+        import cloudinary.uploader
+
+        cloudinary.config(
+            cloud_name=settings.CLOUDINARY_CLOUD_NAME,
+            api_key=settings.CLOUDINARY_API_KEY,
+            api_secret=settings.CLOUDINARY_API_SECRET
+        )
+        self._uploader = cloudinary.uploader
+
+    def save(self, path, folder, filename=None, content_type=None):
+        timeout = upstream.CLOUDINARY.timeout
+        if os.path.getsize(path) > CLOUDINARY_CHUNKED_THRESHOLD:
+            result = upstream.CLOUDINARY.call(
+                self._uploader.upload_large, path, folder=folder, resource_type="auto",
+                chunk_size=CLOUDINARY_CHUNK_SIZE, timeout=timeout,
+            )
+        else:
+            result = upstream.CLOUDINARY.call(self._uploader.upload, path, folder=folder, resource_type="auto", timeout=timeout)
+        return {
+            "url": result.get("secure_url"),
+            "publicId": result.get("public_id"),
+            "width": result.get("width"),
+            "height": result.get("height"),
+            "format": result.get("format"),
+            "size": result.get("bytes"),
+        }
+
+    def delete(self, public_id):
+        result = upstream.CLOUDINARY.call(
+            self._uploader.destroy, public_id, timeout=upstream.CLOUDINARY.timeout, idempotent=True,
+        )
+        if result.get("result") == "ok":
+            return {"success": True, "error": None}
+        # Cloudinary returns 'not found' as result='not found' sometimes, but status 200.
+        print(f"Delete failed: {result}")
+        return {"success": False, "error": result.get("result")}
+
+
+_UNSAFE_PATH_CHARS = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+def _safe_segment(value: str) -> str:
+    return _UNSAFE_PATH_CHARS.sub("-", value).strip(".-") or "file"
+
+
+class LocalStorage(StorageBackend):
+    name = "local"
+
+    def __init__(self, root: Path = LOCAL_MEDIA_DIR, base_url: str = "/uploads/media"):
+        self.root = Path(root)
+        self.base_url = base_url.rstrip("/")
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _resolve(self, public_id: str) -> Path:
+        target = (self.root / public_id).resolve()
+        if self.root.resolve() not in target.parents:
+            raise StorageError("Invalid file id")
+        return target
+
+    def save(self, path, folder, filename=None, content_type=None):
+        folder = "/".join(_safe_segment(p) for p in folder.split("/") if p not in ("", ".", "..")) or "uploads"
+        ext = Path(filename or "").suffix.lower()
+        stem = _safe_segment(Path(filename or "file").stem)[:60]
+        suffix = "." + _safe_segment(ext[1:]) if len(ext) > 1 else ""
+        public_id = f"{folder}/{stem}-{uuid.uuid4().hex[:12]}{suffix}"
+        target = self._resolve(public_id)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(path, target)
+        return {
+            "url": f"{self.base_url}/{public_id}",
+            "publicId": public_id,
+            "width": None,
+            "height": None,
+            "format": ext.lstrip(".") or None,
+            "size": target.stat().st_size,
+        }
+
+    def delete(self, public_id):
+        target = self._resolve(public_id)
+        if not target.exists():
+            return {"success": False, "error": "not found"}
+        target.unlink()
+        return {"success": True, "error": None}
+
+
+_backend: Optional[StorageBackend] = None
+
+
+def get_storage() -> StorageBackend:
+    """Create (once) and return the configured storage backend."""
+    global _backend
+    if _backend is None:
+        choice = (settings.STORAGE_BACKEND or "").lower()
+        if not choice:
+            choice = "cloudinary" if settings.CLOUDINARY_CLOUD_NAME and settings.CLOUDINARY_API_KEY else "local"
+        _backend = CloudinaryStorage() if choice == "cloudinary" else LocalStorage()
+        print(f"🗄️ Upload storage backend: {_backend.name}")
+    return _backend
+
+
+def set_storage(backend: Optional[StorageBackend]) -> None:
+    """Swap the backend (tests / scripts); None re-reads the settings on next use."""
+    global _backend
+    _backend = backend
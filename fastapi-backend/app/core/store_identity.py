@@ -0,0 +1,130 @@
+"""
+Store lookups by slug or id, cached per worker.
+
+Almost every merchant and storefront request starts by turning a store slug
+into its row (id, status, owner, config.theme_id...) before doing the real
+work. This module answers those lookups from a TTLCache of full `stores` rows
+keyed by id, plus a slug -> id index, so a hit costs no query.
+
+* Every write to `stores` in this codebase calls `remember(row)` (write-through)
+  or `invalidate(...)`. A slug change must invalidate the OLD slug.
+* Other workers converge within STORE_CACHE_TTL seconds. Read-modify-write
+  updates (store settings, theme config) read with `fresh=True`, so they never
+  start from a stale row.
+* Rows are returned as deep copies: callers may modify them freely.
+* While the database is unavailable (app/core/upstream.py), cached lookups
+  fall back to the expired row if there is one. `fresh=True` never does.
+"""
+import copy
+import uuid
+from typing import Optional
+
+from app.core import upstream
+from app.core.cache import TTLCache
+from app.core.supabase_client import supabase_admin
+
+STORE_CACHE_TTL = 60
+STORE_CACHE_SIZE = 10000
+
+_rows = TTLCache(maxsize=STORE_CACHE_SIZE, ttl=STORE_CACHE_TTL)      # id -> row
+_slug_ids = TTLCache(maxsize=STORE_CACHE_SIZE, ttl=STORE_CACHE_TTL)  # slug -> id
+
+
+def is_uuid(value: str) -> bool:
+    try:
+        uuid.UUID(str(value))
+        return True
+    except ValueError:
+        return False
+
+
+def remember(row: Optional[dict]) -> None:
+    """Write-through after a store row was created, updated or read elsewhere."""
+    if not row or not row.get("id"):
+        return
+    store_id = str(row["id"])
+    _rows.set(store_id, copy.deepcopy(row))
+    if row.get("slug"):
+        _slug_ids.set(row["slug"], store_id)
+
+
+def invalidate(store_id: Optional[str] = None, slug: Optional[str] = None) -> None:
+    """Forget a store by id and/or slug (pass the old slug when it changed)."""
+    if store_id is not None:
+        store_id = str(store_id)
+        row = _rows.get(store_id)
+        _rows.delete(store_id)
+        if row and row.get("slug"):
+            _slug_ids.delete(row["slug"])
+        _slug_ids.delete_where(lambda _, value: value == store_id)
+    if slug is not None:
+        cached_id = _slug_ids.get(slug)
+        _slug_ids.delete(slug)
+        if cached_id:
+            _rows.delete(cached_id)
+
+
+def _load(column: str, value: str) -> Optional[dict]:
+    res = supabase_admin.table("stores").select("*").eq(column, value).limit(1).execute()
+    row = (res.data or [None])[0]
+    remember(row)
+    return row
+
+
+def get_by_slug(slug: str, fresh: bool = False) -> Optional[dict]:
+    """The store row for `slug`, or None if there is no such store."""
+    if not slug:
+        return None
+    if not fresh:
+        store_id = _slug_ids.get(slug)
+        row = _rows.get(store_id) if store_id else None
+        if row is not None and row.get("slug") == slug:
+            return copy.deepcopy(row)
+    try:
+        return _load("slug", slug)
+    except upstream.UpstreamUnavailable:
+        store_id = None if fresh else _slug_ids.get_stale(slug)
+        row = _rows.get_stale(store_id) if store_id else None
+        if row is None or row.get("slug") != slug:
+            raise
+        return upstream.serve_stale("stores", copy.deepcopy(row))
+
+
+def get_by_id(store_id: str, fresh: bool = False) -> Optional[dict]:
+    """The store row for `store_id`, or None if there is no such store."""
+    if not store_id or not is_uuid(store_id):
+        return None
+    if not fresh:
+        row = _rows.get(str(store_id))
+        if row is not None:
+            return copy.deepcopy(row)
+    try:
+        return _load("id", str(store_id))
+    except upstream.UpstreamUnavailable:
+        row = None if fresh else _rows.get_stale(str(store_id))
+        if row is None:
+            raise
+        return upstream.serve_stale("stores", copy.deepcopy(row))
+
+
+def get(slug_or_id: str, fresh: bool = False) -> Optional[dict]:
+    """Accepts either form, like the endpoints that take `storeId` as a slug or a UUID."""
+    return get_by_id(slug_or_id, fresh) if is_uuid(slug_or_id) else get_by_slug(slug_or_id, fresh)
+
+
+def resolve_id(slug_or_id: str) -> Optional[str]:
+    """Store id for a slug (or a UUID, returned as-is without a lookup)."""
+    if not slug_or_id:
+        return None
+    if is_uuid(slug_or_id):
+        return str(slug_or_id)
+    row = get_by_slug(slug_or_id)
+    return str(row["id"]) if row else None
+
+
+def theme_id(row: Optional[dict]) -> Optional[str]:
+    return ((row or {}).get("config") or {}).get("theme_id")
+
+
+def stats() -> dict:
+    return {"hits": _rows.hits, "misses": _rows.misses}
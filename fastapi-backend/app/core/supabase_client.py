@@ -1,9 +1,61 @@
-from supabase import create_client, Client
+import threading
+
+from app.core import upstream
 from app.core.config import settings
+from app.core.metrics import instrument_client
+
+
+class LazyClient:
+    """
+    A Supabase client created on first use.
+
+    Importing `supabase` (with httpx, gotrue and postgrest) and building the
+    client takes a good part of the API's import time; deferring it keeps
+    imports cheap for processes and scripts that never query, and under
+    gunicorn each worker builds its own client (and connection pool) after the
+    fork. The real client is wrapped with instrument_client, so every query is
+    timed per request (app/core/metrics.py) and runs under the database and
+    auth policies of app/core/upstream.py, whose timeouts are set here.
+    """
+
+    def __init__(self, key_setting: str, database: upstream.Upstream = upstream.DATABASE):
+        self._key_setting = key_setting
+        self._database = database
+        self._client = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    import httpx
+                    from supabase import create_client
+                    from supabase.lib.client_options import ClientOptions
+                    key = getattr(settings, self._key_setting)
+                    options = ClientOptions(
+                        postgrest_client_timeout=httpx.Timeout(
+                            self._database.timeout, connect=settings.UPSTREAM_CONNECT_TIMEOUT,
+                        ),
+                    )
+                    client = create_client(settings.SUPABASE_URL, key, options=options)
+                    # supabase-py 2.3 has no option for the auth client's timeout (httpx default: 5s)
+                    client.auth._http_client.timeout = httpx.Timeout(
+                        settings.UPSTREAM_AUTH_TIMEOUT, connect=settings.UPSTREAM_CONNECT_TIMEOUT,
+                    )
+                    self._client = instrument_client(client, database=self._database, auth=upstream.SUPABASE_AUTH)
+        return self._client
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
 
 # Initialize Supabase Client
-supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+supabase = LazyClient("SUPABASE_KEY")
 
 # Use service_role key for admin tasks if needed (DANGEROUS: use wisely)
 # Use service_role key for admin tasks (Required for auth.admin functions)
-supabase_admin: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_KEY)
+supabase_admin = LazyClient("SUPABASE_SERVICE_KEY")
+
+# Service key client for statements that may run long (bulk writes, imports, exports, scripts):
+# a longer timeout and its own breaker, so they cannot open the one request traffic depends on
+supabase_bulk = LazyClient("SUPABASE_SERVICE_KEY", upstream.DATABASE_BULK)
@@ -0,0 +1,237 @@
+"""
+Timeout, retry and circuit breaker policy for the services the API calls.
+
+Every call to an upstream goes through its `Upstream` policy:
+
+* database      - PostgREST statements and RPCs (app/core/metrics.py wraps the
+                  Supabase clients, so no route has to opt in)
+* database_bulk - the same database reached through `supabase_bulk`: bulk
+                  writes, imports, exports and maintenance scripts, whose
+                  statements may run for minutes. Its own timeout and breaker
+                  keep a slow batch job from failing the API's requests fast.
+* supabase_auth - Supabase Auth (GoTrue) calls
+* cloudinary    - uploads and deletes (app/core/storage.py)
+* razorpay      - the payment gateway (app/core/razorpay_gateway.py keeps its
+                  own async retry loop and uses this breaker)
+
+A policy gives each call a timeout (set on the client: app/core/supabase_client.py
+creates the PostgREST and Auth clients with UPSTREAM_DB_TIMEOUT,
+UPSTREAM_DB_BULK_TIMEOUT and UPSTREAM_AUTH_TIMEOUT), retries idempotent calls (reads) on
+outages with jittered backoff within `deadline`, and counts outages on the
+upstream's circuit breaker (app/core/circuit_breaker.py). Calls that could
+not reach the service (connection refused) are retried even when they write:
+nothing was sent. Once the breaker is open, calls fail immediately instead of
+each waiting for its timeout.
+
+An outage (timeout, connection error, 5xx, database unavailable) or an open
+breaker raises UpstreamUnavailable: an HTTPException(503) with Retry-After,
+so unhandled it is a fast 503. Routes wrap their calls in broad
+`try/except Exception` and re-raise as 400/500; `upstream_exception_handler`
+answers 503 for any error raised while handling an UpstreamUnavailable.
+Errors that are the caller's fault (4xx, constraint violations, no rows) pass
+through unchanged and count as successes.
+
+Where a cache sits in front of the data (TTLCache `get_stale`: store rows,
+public responses), an outage is answered from the expired entry instead.
+
+Retries on the event loop thread (a sync client call inside an `async def`
+route) are immediate: sleeping there would stall every other request.
+Breakers and metrics are per worker process.
+"""
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+from fastapi.exception_handlers import http_exception_handler
+
+from app.core import metrics
+from app.core.circuit_breaker import CircuitBreaker, CircuitOpenError, get_breaker
+from app.core.config import settings
+
+RETRY_BASE_DELAY = 0.05
+RETRY_MAX_DELAY = 1.0
+
+# SQLSTATE classes and PostgREST codes that mean the database (not the query) is in trouble:
+# connection exceptions, insufficient resources, operator intervention (shutdown), system errors,
+# and PostgREST unable to connect or to get a pooled connection
+OUTAGE_SQLSTATE_CLASSES = ("08", "53", "57", "58")
+# ...except query_canceled (statement_timeout): that statement was too slow, the database is fine
+NOT_OUTAGE_SQLSTATES = {"57014"}
+OUTAGE_POSTGREST_CODES = {"PGRST000", "PGRST001", "PGRST002", "PGRST003"}
+# Transport errors by class name, so httpx, httpcore and urllib3 need not be imported here
+OUTAGE_ERROR_NAMES = {"TransportError", "TimeoutException", "NetworkError", "AuthRetryableError", "ProtocolError"}
+NOT_SENT_ERROR_NAMES = {"ConnectError", "ConnectTimeout", "NewConnectionError"}
+
+
+class UpstreamUnavailable(HTTPException):
+    def __init__(self, upstream: str, retry_after: float, reason: str = "unavailable"):
+        retry_after = max(1, int(retry_after + 0.999))
+        super().__init__(
+            status_code=503,
+            detail=f"{upstream} is temporarily unavailable ({reason}), retry in {retry_after}s",
+            headers={"Retry-After": str(retry_after)},
+        )
+        self.upstream = upstream
+        self.retry_after = retry_after
+
+
+UPSTREAM_CALLS = metrics.Counter(
+    "upstream_calls_total", "Calls to upstream services by outcome (ok, error, outage, rejected).", ("upstream", "outcome"),
+)
+UPSTREAM_RETRIES = metrics.Counter("upstream_retries_total", "Upstream calls retried after an outage.", ("upstream",))
+UPSTREAM_STALE = metrics.Counter(
+    "upstream_stale_served_total", "Expired cache entries served because the upstream was unavailable.", ("cache",),
+)
+
+
+def _error_names(error: BaseException) -> set:
+    return {cls.__name__ for cls in type(error).__mro__}
+
+
+def is_outage(error: BaseException) -> bool:
+    """True when `error` says the service is down or overloaded, not that the request was wrong."""
+    if isinstance(error, (TimeoutError, ConnectionError, UpstreamUnavailable)):
+        return True
+    names = _error_names(error)
+    if names & OUTAGE_ERROR_NAMES or names & NOT_SENT_ERROR_NAMES:
+        return True
+    status = getattr(error, "status", None) or getattr(error, "status_code", None)  # gotrue, gateway errors
+    if isinstance(status, int) and status:
+        return status >= 500
+    code = getattr(error, "code", None)  # postgrest APIError: SQLSTATE, PGRST code, or the HTTP status
+    if isinstance(code, int):
+        return code >= 500
+    if isinstance(code, str) and code:
+        if code in NOT_OUTAGE_SQLSTATES:
+            return False
+        return code in OUTAGE_POSTGREST_CODES or (len(code) == 5 and code[:2] in OUTAGE_SQLSTATE_CLASSES)
+    if type(error).__module__ == "cloudinary.exceptions":
+        # Its 4xx answers have their own subclasses; the base Error / GeneralError are network and 5xx
+        return type(error).__name__ in ("Error", "GeneralError")
+    return False
+
+
+def _not_sent(error: BaseException) -> bool:
+    return bool(_error_names(error) & NOT_SENT_ERROR_NAMES)
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+@dataclass(frozen=True)
+class Upstream:
+    name: str
+    timeout: float        # per attempt, applied by the client
+    deadline: float       # per call, retries included
+    retries: int          # extra attempts for idempotent calls
+    failure_threshold: int
+    recovery_timeout: float
+
+    def breaker(self) -> CircuitBreaker:
+        return get_breaker(self.name, self.failure_threshold, self.recovery_timeout)
+
+    def call(self, fn: Callable, *args, idempotent: bool = False, **kwargs):
+        """Run `fn(*args, **kwargs)` (blocking) under this policy; raises UpstreamUnavailable on outages."""
+        breaker = self.breaker()
+        give_up_at = time.monotonic() + self.deadline
+        attempt = 0
+        while True:
+            try:
+                breaker.before_call()
+            except CircuitOpenError as e:
+                UPSTREAM_CALLS.inc((self.name, "rejected"))
+                raise UpstreamUnavailable(self.name, e.retry_after, "circuit open") from e
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                if not is_outage(e):
+                    # The service answered; the request itself was refused
+                    breaker.record_success()
+                    UPSTREAM_CALLS.inc((self.name, "error"))
+                    raise
+                breaker.record_failure()
+                UPSTREAM_CALLS.inc((self.name, "outage"))
+                delay = 0.0 if _on_event_loop() else random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+                if (
+                    attempt >= self.retries or not (idempotent or _not_sent(e))
+                    or time.monotonic() + delay >= give_up_at
+                ):
+                    retry_after = self.recovery_timeout if breaker.state != "closed" else 1
+                    raise UpstreamUnavailable(self.name, retry_after, type(e).__name__) from e
+                UPSTREAM_RETRIES.inc((self.name,))
+                attempt += 1
+                if delay:
+                    time.sleep(delay)
+                continue
+            breaker.record_success()
+            UPSTREAM_CALLS.inc((self.name, "ok"))
+            return result
+
+    def snapshot(self) -> dict:
+        return {
+            "timeout": self.timeout, "deadline": self.deadline, "retries": self.retries,
+            "failureThreshold": self.failure_threshold, "recoveryTimeout": self.recovery_timeout,
+            "breaker": self.breaker().snapshot(),
+        }
+
+
+DATABASE = Upstream(
+    "database", settings.UPSTREAM_DB_TIMEOUT, settings.UPSTREAM_DB_DEADLINE, settings.UPSTREAM_DB_RETRIES,
+    settings.UPSTREAM_BREAKER_THRESHOLD, settings.UPSTREAM_BREAKER_RECOVERY,
+)
+DATABASE_BULK = Upstream(
+    "database_bulk", settings.UPSTREAM_DB_BULK_TIMEOUT, settings.UPSTREAM_DB_BULK_TIMEOUT * 2, settings.UPSTREAM_DB_RETRIES,
+    settings.UPSTREAM_BREAKER_THRESHOLD, settings.UPSTREAM_BREAKER_RECOVERY,
+)
+SUPABASE_AUTH = Upstream(
+    "supabase_auth", settings.UPSTREAM_AUTH_TIMEOUT, settings.UPSTREAM_AUTH_TIMEOUT * 2, 1,
+    settings.UPSTREAM_BREAKER_THRESHOLD, settings.UPSTREAM_BREAKER_RECOVERY,
+)
+CLOUDINARY = Upstream(
+    "cloudinary", settings.UPSTREAM_CLOUDINARY_TIMEOUT, settings.UPSTREAM_CLOUDINARY_TIMEOUT * 2, 1,
+    settings.UPSTREAM_BREAKER_THRESHOLD, settings.UPSTREAM_BREAKER_RECOVERY,
+)
+RAZORPAY = Upstream(
+    "razorpay", settings.RAZORPAY_TIMEOUT, settings.RAZORPAY_TIMEOUT * (1 + settings.RAZORPAY_MAX_RETRIES),
+    settings.RAZORPAY_MAX_RETRIES, settings.RAZORPAY_BREAKER_THRESHOLD, settings.RAZORPAY_BREAKER_RECOVERY,
+)
+UPSTREAMS: Dict[str, Upstream] = {u.name: u for u in (DATABASE, DATABASE_BULK, SUPABASE_AUTH, CLOUDINARY, RAZORPAY)}
+
+
+def _open_circuits() -> Dict[Tuple[str, ...], float]:
+    return {(name,): 0.0 if u.breaker().state == "closed" else 1.0 for name, u in UPSTREAMS.items()}
+
+
+UPSTREAM_CIRCUIT_OPEN = metrics.Gauge(
+    "upstream_circuit_open", "1 while the upstream's circuit breaker is open or half-open.", _open_circuits, ("upstream",),
+)
+
+
+def serve_stale(cache: str, value):
+    """Count a stale fallback and return `value`."""
+    UPSTREAM_STALE.inc((cache,))
+    return value
+
+
+def upstream_cause(error: Optional[BaseException]) -> Optional[UpstreamUnavailable]:
+    """The UpstreamUnavailable `error` was raised while handling (or from), if any."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        if isinstance(error, UpstreamUnavailable):
+            return error
+        seen.add(id(error))
+        error = error.__cause__ or error.__context__
+    return None
+
+
+async def upstream_exception_handler(request, exc):
+    """HTTPException handler: errors raised while handling an outage become its 503."""
+    return await http_exception_handler(request, upstream_cause(exc) or exc)
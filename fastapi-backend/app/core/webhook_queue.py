@@ -0,0 +1,246 @@
+"""
+Durable queue for incoming webhook events.
+
+The webhook endpoint only verifies the signature and appends the raw event
+here, then acknowledges. Because the queue is a SQLite file (WAL mode) on local
+disk, an acknowledged event survives a crash or restart. The consumer loop
+(`start_webhook_consumer`) applies events in batches:
+
+    pending --claim--> processing --ok--> done
+                          |
+                          +--error--> pending again, with exponential backoff
+                          +--error after WEBHOOK_MAX_ATTEMPTS--> dead (dead letters)
+
+A claim is a lease. If the worker holding it dies, the event becomes claimable
+again after WEBHOOK_LEASE_SECONDS, so events may be applied more than once and
+handlers must be idempotent. Every worker may run a consumer: claims happen
+inside BEGIN IMMEDIATE transactions, so two consumers never hold the same
+event. Events are deduplicated by the provider's event id.
+"""
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+STATUS_PENDING = "pending"
+STATUS_PROCESSING = "processing"
+STATUS_DONE = "done"
+STATUS_DEAD = "dead"
+
+# Retry delays: 2s, 4s, 8s ... capped, with jitter so retries of a burst spread out
+RETRY_BASE_DELAY = 2
+RETRY_MAX_DELAY = 600
+
+
+class WebhookQueue:
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS webhook_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            source TEXT NOT NULL,
+            event_id TEXT NOT NULL,
+            event TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL,
+            last_error TEXT,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL,
+            UNIQUE (source, event_id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_webhook_events_due ON webhook_events (status, next_attempt_at);
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._connect().executescript(self.SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            # FULL: an acknowledged event must survive a power loss, not just a crash
+            conn.execute("PRAGMA synchronous=FULL")
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, source: str, event_id: str, event: str, payload: dict) -> bool:
+        """Append an event; returns False when this event id was already received."""
+        now = time.time()
+        cur = self._connect().execute(
+            "INSERT OR IGNORE INTO webhook_events (source, event_id, event, payload, next_attempt_at, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (source, event_id, event, json.dumps(payload), now, now, now),
+        )
+        return cur.rowcount == 1
+
+    def claim(self, limit: int, lease: float) -> List[dict]:
+        """Lease up to `limit` due events (pending, or processing with an expired lease)."""
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute(
+                "SELECT * FROM webhook_events WHERE status IN ('pending', 'processing') AND next_attempt_at <= ? "
+                "ORDER BY next_attempt_at, id LIMIT ?",
+                (now, limit),
+            ).fetchall()
+            if rows:
+                conn.executemany(
+                    "UPDATE webhook_events SET status = 'processing', attempts = attempts + 1, "
+                    "next_attempt_at = ?, updated_at = ? WHERE id = ?",
+                    [(now + lease, now, r["id"]) for r in rows],
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        events = []
+        for r in rows:
+            event = dict(r)
+            event["payload"] = json.loads(event["payload"])
+            event["attempts"] += 1
+            events.append(event)
+        return events
+
+    def complete(self, event_id: int) -> None:
+        self._connect().execute(
+            "UPDATE webhook_events SET status = 'done', last_error = NULL, updated_at = ? WHERE id = ?",
+            (time.time(), event_id),
+        )
+
+    def fail(self, event: dict, error: str, max_attempts: int) -> str:
+        """Schedule a retry, or dead-letter the event after `max_attempts`. Returns the new status."""
+        now = time.time()
+        if event["attempts"] >= max_attempts:
+            status, next_at = STATUS_DEAD, now
+        else:
+            delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (event["attempts"] - 1))
+            status, next_at = STATUS_PENDING, now + delay * random.uniform(0.5, 1.0)
+        self._connect().execute(
+            "UPDATE webhook_events SET status = ?, next_attempt_at = ?, last_error = ?, updated_at = ? WHERE id = ?",
+            (status, next_at, error[:2000], now, event["id"]),
+        )
+        return status
+
+    def requeue(self, event_id: int) -> bool:
+        """Move a dead-lettered event back to pending with a fresh attempt budget."""
+        cur = self._connect().execute(
+            "UPDATE webhook_events SET status = 'pending', attempts = 0, next_attempt_at = ?, updated_at = ? "
+            "WHERE id = ? AND status = 'dead'",
+            (time.time(), time.time(), event_id),
+        )
+        return cur.rowcount == 1
+
+    def list(self, status: str, limit: int = 50) -> List[dict]:
+        rows = self._connect().execute(
+            "SELECT id, source, event_id, event, status, attempts, last_error, created_at, updated_at "
+            "FROM webhook_events WHERE status = ? ORDER BY id DESC LIMIT ?",
+            (status, limit),
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+    def counts(self) -> Dict[str, int]:
+        rows = self._connect().execute("SELECT status, COUNT(*) AS n FROM webhook_events GROUP BY status").fetchall()
+        return {r["status"]: r["n"] for r in rows}
+
+    def purge_done(self, older_than: float) -> int:
+        cur = self._connect().execute(
+            "DELETE FROM webhook_events WHERE status = 'done' AND updated_at < ?", (time.time() - older_than,)
+        )
+        return cur.rowcount
+
+
+_queue: Optional[WebhookQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_webhook_queue() -> WebhookQueue:
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            path = settings.WEBHOOK_QUEUE_PATH or os.path.join(tempfile.gettempdir(), "storebuilder-webhooks.sqlite3")
+            _queue = WebhookQueue(path)
+        return _queue
+
+
+# ---------------------------------------------------------------------------
+# Consumer
+# ---------------------------------------------------------------------------
+
+# source -> handler(event_name, payload); raising means "retry later"
+_handlers: Dict[str, Callable[[str, dict], None]] = {}
+
+WEBHOOK_CONSUMER = {"last_run": None, "processed": 0, "retried": 0, "dead": 0, "error": None}
+_task: Optional[asyncio.Task] = None
+
+# Keep applied events this long (for duplicate detection and inspection)
+DONE_RETENTION = 7 * 24 * 3600
+
+
+def register_handler(source: str, handler: Callable[[str, dict], None]) -> None:
+    _handlers[source] = handler
+
+
+def process_batch(queue: WebhookQueue, limit: int) -> int:
+    """Claim and apply one batch. Blocking; returns how many events were claimed."""
+    events = queue.claim(limit, settings.WEBHOOK_LEASE_SECONDS)
+    for event in events:
+        handler = _handlers.get(event["source"])
+        try:
+            if handler is None:
+                raise RuntimeError(f"No handler for webhook source '{event['source']}'")
+            handler(event["event"], event["payload"])
+            queue.complete(event["id"])
+            WEBHOOK_CONSUMER["processed"] += 1
+        except Exception as e:
+            status = queue.fail(event, f"{type(e).__name__}: {e}", settings.WEBHOOK_MAX_ATTEMPTS)
+            WEBHOOK_CONSUMER["dead" if status == STATUS_DEAD else "retried"] += 1
+            icon = "☠️" if status == STATUS_DEAD else "🔁"
+            print(f"{icon} Webhook {event['source']}:{event['event_id']} ({event['event']}) failed: {e}")
+    return len(events)
+
+
+async def _consume_forever(interval: float, batch_size: int):
+    last_purge = 0.0
+    while True:
+        try:
+            queue = get_webhook_queue()
+            claimed = await run_in_threadpool(process_batch, queue, batch_size)
+            WEBHOOK_CONSUMER.update(last_run=datetime.utcnow().isoformat(), error=None)
+            if time.time() - last_purge > 3600:
+                await run_in_threadpool(queue.purge_done, DONE_RETENTION)
+                last_purge = time.time()
+        except Exception as e:
+            claimed = 0
+            WEBHOOK_CONSUMER["error"] = str(e)
+            print(f"❌ Webhook consumer failed: {e}")
+        # A full batch means a backlog: go again right away
+        if claimed < batch_size:
+            await asyncio.sleep(interval)
+
+
+def start_webhook_consumer():
+    global _task
+    if _task is None or _task.done():
+        _task = asyncio.create_task(_consume_forever(settings.WEBHOOK_POLL_INTERVAL, settings.WEBHOOK_BATCH_SIZE))
+
+
+def stop_webhook_consumer():
+    global _task
+    if _task is not None:
+        _task.cancel()
+        _task = None
@@ -0,0 +1,75 @@
+"""
+Gunicorn worker class for the API (see gunicorn.conf.py).
+
+uvicorn's UvicornWorker, plus:
+
+* Draining: on SIGTERM (reload, scale down, recycling) the worker stops
+  accepting connections and waits for in-flight requests and background jobs
+  (theme builds, product imports) to finish, logging the jobs it waits for.
+  What is still running shortly before gunicorn's graceful_timeout is
+  cancelled, so the app's shutdown hooks (closing the payment gateway
+  client...) still run before the master would SIGKILL the worker.
+* Memory ceiling: at every heartbeat the worker checks its private memory and,
+  above WORKER_MAX_MEMORY_MB, drains and exits; the master starts a fresh one.
+  Recycling after WORKER_MAX_REQUESTS requests is gunicorn's own max_requests.
+"""
+import os
+import signal
+import sys
+
+from gunicorn.arbiter import Arbiter
+from uvicorn.main import Server
+from uvicorn.workers import UvicornWorker
+
+from app.core import lifecycle
+from app.core.config import settings
+
+# Seconds of gunicorn's graceful_timeout kept for the shutdown hooks after draining
+SHUTDOWN_HOOKS_ALLOWANCE = 5
+
+
+class _DrainingServer(Server):
+    async def shutdown(self, sockets=None):
+        jobs = lifecycle.running_jobs()
+        if jobs:
+            names = ", ".join(f"{job['name']} ({job['runningS']:.0f}s)" for job in jobs)
+            print(
+                f"⏳ Worker {os.getpid()} draining: waiting up to "
+                f"{self.config.timeout_graceful_shutdown}s for {names}"
+            )
+        await super().shutdown(sockets)
+
+
+class StoreWorker(UvicornWorker):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.config.timeout_graceful_shutdown = max(1, self.cfg.graceful_timeout - SHUTDOWN_HOOKS_ALLOWANCE)
+        self.max_memory_mb = settings.WORKER_MAX_MEMORY_MB
+        self.recycling = False
+
+    async def _serve(self) -> None:
+        # UvicornWorker._serve, with the draining server
+        self.config.app = self.wsgi
+        server = _DrainingServer(config=self.config)
+        self._install_sigquit_handler()
+        await server.serve(sockets=self.sockets)
+        if not server.started:
+            sys.exit(Arbiter.WORKER_BOOT_ERROR)
+
+    async def callback_notify(self) -> None:
+        await super().callback_notify()
+        self._check_memory()
+
+    def _check_memory(self) -> None:
+        if not self.max_memory_mb or self.recycling:
+            return
+        used = lifecycle.worker_memory_mb()
+        if used is None or used <= self.max_memory_mb:
+            return
+        self.recycling = True
+        print(
+            f"♻️ Worker {os.getpid()} uses {used:.0f}MB (limit {self.max_memory_mb}MB), "
+            "recycling it once in-flight requests are done"
+        )
+        # uvicorn's own SIGTERM handler: the same graceful path as a reload
+        os.kill(os.getpid(), signal.SIGTERM)
@@ -1,10 +1,22 @@
-from fastapi import FastAPI # Triggering reload v2
+from app.core import lifecycle  # first, so the startup report times the imports below
+from fastapi import FastAPI, HTTPException, Request # Triggering reload v2
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import PlainTextResponse
+from starlette.exceptions import HTTPException as StarletteHTTPException
 import os
 from app.core.config import settings
 
-from app.api.v1.api import api_router
+from app.api.v1.api import include_api
+from app.core.inventory import start_reservation_sweeper, stop_reservation_sweeper
+from app.core.otp import start_otp_sweeper, stop_otp_sweeper
+from app.core.webhook_queue import register_handler, start_webhook_consumer, stop_webhook_consumer
+from app.core.razorpay_webhooks import WEBHOOK_SOURCE as RAZORPAY_WEBHOOKS, handle_razorpay_event
+from app.core.razorpay_gateway import close_gateway
+from app.core.loop_watchdog import start_loop_watchdog, stop_loop_watchdog
+from app.core.middleware import CompressionMiddleware, RateLimitMiddleware, RequestMetricsMiddleware, UploadSizeLimitMiddleware
+from app.core.metrics import render_metrics
+from app.core.static_files import SmartStaticFiles, UPLOADS_DIR
+from app.core.upstream import upstream_exception_handler
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -12,41 +24,15 @@ app = FastAPI(
     version="1.0.0"
 )
 
-# Serve static files from the uploads directory
-# Move uploads OUTSIDE of the backend folder to the project root
-# This completely prevents uvicorn reload from seeing theme build files
-from pathlib import Path
-ROOT_DIR = Path(__file__).resolve().parents[1] # 0=app, 1=fastapi-backend
-PROJECT_ROOT = ROOT_DIR.parent # Store-Builder
-UPLOADS_DIR = PROJECT_ROOT / "uploads"
-
-class SmartStaticFiles(StaticFiles):
-    """Custom static file handler to properly resolve Next.js static exports."""
-    async def get_response(self, path: str, scope):
-        # 1. Normalize path to use forward slashes (fixes Windows backslash issues)
-        path = path.replace("\\", "/")
-        
-        # 2. Try the standard file first
-        response = await super().get_response(path, scope)
-        
-        # 3. If 404, try appending .html (Next.js clean urls: /login -> /login.html)
-        if response.status_code == 404 and not path.endswith(".html"):
-            html_path = f"{path}.html"
-            response = await super().get_response(html_path, scope)
-            
-        # 4. If still 404, try path/index.html (Next.js directory exports: /login -> /login/index.html)
-        if response.status_code == 404:
-            # Manually construct path with forward slash to avoid os.path.join using backslashes
-            if path.endswith("/"):
-                index_path = f"{path}index.html"
-            else:
-                index_path = f"{path}/index.html"
-            response = await super().get_response(index_path, scope)
-            
-        return response
+# Errors raised while handling an upstream outage answer its 503 (app/core/upstream.py)
+app.add_exception_handler(StarletteHTTPException, upstream_exception_handler)
 
+# Serve static files from the uploads directory (project root, outside the backend folder)
 app.mount("/uploads", SmartStaticFiles(directory=str(UPLOADS_DIR), html=True), name="uploads")
 
+# Per-client and per-store budgets; inside CORS so browsers can read the 429s
+app.add_middleware(RateLimitMiddleware)
+
 # Comprehensive CORS setup
 app.add_middleware(
     CORSMiddleware,
@@ -63,8 +49,39 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
-# Include API Router
-app.include_router(api_router, prefix="/api/v1")
+# Reject oversized uploads while they stream in, before the body is parsed
+app.add_middleware(UploadSizeLimitMiddleware, path_prefixes=["/api/v1/upload"])
+
+# gzip/brotli for large JSON lists (skips small bodies and already compressed media)
+app.add_middleware(CompressionMiddleware)
+
+# Outermost: times the whole request (Server-Timing header, /metrics histograms)
+app.add_middleware(RequestMetricsMiddleware)
+
+# Include API routers (the groups in API_ROUTER_GROUPS)
+include_api(app, prefix="/api/v1")
+
+@app.on_event("startup")
+async def start_background_jobs():
+    # Returns stock held by abandoned checkout reservations
+    start_reservation_sweeper()
+    # Deletes expired OTP codes and finished send-rate windows
+    start_otp_sweeper()
+    # Applies queued payment webhooks
+    register_handler(RAZORPAY_WEBHOOKS, handle_razorpay_event)
+    start_webhook_consumer()
+    # Reports handlers that block the event loop (GET /api/v1/platform/diagnostics/loop)
+    start_loop_watchdog()
+    lifecycle.mark("startup")
+    print(f"🚀 Worker {os.getpid()} started in {lifecycle.format_startup()}")
+
+@app.on_event("shutdown")
+async def stop_background_jobs():
+    stop_reservation_sweeper()
+    stop_otp_sweeper()
+    stop_webhook_consumer()
+    stop_loop_watchdog()
+    await close_gateway()
 
 @app.get("/")
 async def root():
@@ -74,6 +91,15 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics(request: Request):
+    """Prometheus scrape endpoint (this worker's metrics only)."""
+    if settings.METRICS_TOKEN and request.headers.get("authorization") != f"Bearer {settings.METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+lifecycle.mark("imports")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
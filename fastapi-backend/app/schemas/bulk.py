@@ -0,0 +1,121 @@
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
+from typing import Optional, List, Dict, Any, Literal
+from app.core.pagination import search_term
+
+# Upper bound on ids accepted by a single bulk request
+MAX_BULK_IDS = 10000
+
+# Filter values that narrow nothing ("status": "all", "rating": "any")
+MATCH_ALL_VALUES = (None, "", "all", "any")
+
+class BulkFilter(BaseModel):
+    """
+    Base of the per-resource `filter` accepted by bulk endpoints. Unknown keys
+    are rejected, and so is a filter that sets no condition: either would
+    otherwise select every row of the store.
+    """
+    model_config = ConfigDict(extra="forbid")
+
+    @model_validator(mode="after")
+    def check_conditions(self):
+        if not self.conditions():
+            raise ValueError("'filter' must set at least one condition")
+        return self
+
+    def conditions(self) -> Dict[str, Any]:
+        return {k: v for k, v in self.model_dump().items() if v not in MATCH_ALL_VALUES}
+
+class ProductFilter(BulkFilter):
+    search: Optional[str] = None
+    status: Optional[str] = None
+    categoryId: Optional[str] = None
+    stock: Optional[Literal["in_stock", "out_of_stock", "low_stock"]] = None
+
+    @field_validator("search")
+    @classmethod
+    def clean_search(cls, value):
+        # Same cleaning as the list endpoint, so a search that filters nothing counts as unset
+        return search_term(value)
+
+class ReviewFilter(BulkFilter):
+    status: Optional[str] = None
+    rating: Optional[int] = Field(None, ge=1, le=5)
+    productId: Optional[str] = None
+
+    @field_validator("rating", mode="before")
+    @classmethod
+    def any_rating(cls, value):
+        return None if value in MATCH_ALL_VALUES else value
+
+class OrderFilter(BulkFilter):
+    status: Optional[str] = None
+    paymentStatus: Optional[str] = None
+    customerId: Optional[str] = None
+
+class BulkSelection(BaseModel):
+    """Rows targeted by a bulk operation: an explicit id list OR a filter expression."""
+    storeId: str
+    ids: Optional[List[str]] = Field(None, max_length=MAX_BULK_IDS)
+    filter: Optional[Dict[str, Any]] = None
+
+    @model_validator(mode="after")
+    def check_selection(self):
+        if not self.ids and not self.filter:
+            raise ValueError("Either 'ids' or 'filter' is required")
+        if self.ids and self.filter:
+            raise ValueError("Provide 'ids' or 'filter', not both")
+        return self
+
+class BulkStatusUpdate(BulkSelection):
+    status: str
+
+class ProductSelection(BulkSelection):
+    filter: Optional[ProductFilter] = None
+
+class ReviewSelection(BulkSelection):
+    filter: Optional[ReviewFilter] = None
+
+class ReviewStatusUpdate(BulkStatusUpdate):
+    filter: Optional[ReviewFilter] = None
+
+class OrderStatusUpdate(BulkStatusUpdate):
+    filter: Optional[OrderFilter] = None
+
+class BulkProductUpdate(BaseModel):
+    """
+    Either apply the same `changes` to a selection, or per-product values via `items`
+    (each item is `{"id": ..., <field>: <value>}` using the product API field names).
+    """
+    storeId: str
+    ids: Optional[List[str]] = Field(None, max_length=MAX_BULK_IDS)
+    filter: Optional[ProductFilter] = None
+    changes: Optional[Dict[str, Any]] = None
+    items: Optional[List[Dict[str, Any]]] = Field(None, max_length=MAX_BULK_IDS)
+
+    @model_validator(mode="after")
+    def check_mode(self):
+        if self.items:
+            if self.ids or self.filter or self.changes:
+                raise ValueError("'items' cannot be combined with 'ids', 'filter' or 'changes'")
+            if any(not item.get("id") for item in self.items):
+                raise ValueError("Every item needs an 'id'")
+            return self
+        if not self.changes:
+            raise ValueError("Either 'changes' or 'items' is required")
+        if not self.ids and not self.filter:
+            raise ValueError("Either 'ids' or 'filter' is required")
+        if self.ids and self.filter:
+            raise ValueError("Provide 'ids' or 'filter', not both")
+        return self
+
+class BulkItemResult(BaseModel):
+    id: str
+    status: str  # 'updated' | 'deleted' | 'not_found' | 'failed'
+    error: Optional[str] = None
+
+class BulkResponse(BaseModel):
+    success: bool
+    processed: int
+    succeeded: int
+    failed: int
+    results: List[BulkItemResult]
@@ -5,6 +5,10 @@ class RazorpayOrderCreate(BaseModel):
     amount: float
     currency: str = "INR"
     planName: Optional[str] = None
+    # Saved as order notes so the payment webhook can apply the subscription
+    planId: Optional[str] = None
+    storeId: Optional[str] = None
+    billingCycle: Optional[str] = None
 
 class RazorpayOrderResponse(BaseModel):
     id: str
@@ -0,0 +1,143 @@
+"""
+Storefront service: the public, read-only traffic on its own.
+
+    gunicorn -c gunicorn.storefront.conf.py      # production (own workers and port)
+    uvicorn app.storefront:app --port 8001       # development
+
+Serves the "storefront" route group (app/api/v1/api.py): live store pages and
+search (/api/v1/s/live/*), active notices, public plans and themes, image
+variants. It also serves the built storefront sites (/uploads/stores/*). These
+are the same endpoint modules as the full API, so responses are identical,
+but theme builds, admin listings, payments and webhooks are neither imported
+nor run here. Checkout stays on the API ("checkout" group).
+
+In front of the endpoints sits a whole-response cache
+(PublicResponseCacheMiddleware, STOREFRONT_CACHE_TTL). A storefront worker
+answers most reads without a database round trip. Writes made through the
+API show up once cached entries expire.
+
+Deploy it next to the API and route the paths above to it at the proxy. The
+API can then drop the group: API_ROUTER_GROUPS=merchant,auth,platform,payments,checkout.
+
+Health checks: GET /health (the process answers) for liveness, GET /ready
+(the database answers within STOREFRONT_READY_TIMEOUT) for readiness.
+"""
+from app.core import lifecycle  # first, so the startup report times the imports below
+import asyncio
+import os
+import time
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.exceptions import HTTPException as StarletteHTTPException
+
+from app.api.v1.api import include_api
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.loop_watchdog import start_loop_watchdog, stop_loop_watchdog
+from app.core.metrics import render_metrics
+from app.core.middleware import (
+    CompressionMiddleware, PublicResponseCacheMiddleware, RateLimitMiddleware, RequestMetricsMiddleware,
+)
+from app.core.static_files import SmartStaticFiles, UPLOADS_DIR
+from app.core.upstream import upstream_exception_handler
+from app.core.supabase_client import supabase_admin
+
+# Readiness is re-checked at most this often, however often the load balancer probes
+READY_CHECK_INTERVAL = 5
+
+STOREFRONT_CACHE = TTLCache(maxsize=settings.STOREFRONT_CACHE_MAX_ENTRIES, ttl=settings.STOREFRONT_CACHE_TTL)
+
+app = FastAPI(
+    title=f"{settings.APP_NAME} Storefront",
+    debug=settings.DEBUG,
+    version="1.0.0"
+)
+
+# Errors raised while handling an upstream outage answer its 503 (app/core/upstream.py)
+app.add_exception_handler(StarletteHTTPException, upstream_exception_handler)
+
+# Built storefront sites only (the API serves the rest of /uploads)
+(UPLOADS_DIR / "stores").mkdir(parents=True, exist_ok=True)
+app.mount("/uploads/stores", SmartStaticFiles(directory=str(UPLOADS_DIR / "stores"), html=True), name="stores")
+
+# Middleware, innermost first: compression, then the cache (so it keeps compressed bodies),
+# rate limits, CORS headers added per request, metrics outermost
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(
+    PublicResponseCacheMiddleware,
+    cache=STOREFRONT_CACHE,
+    path_prefixes=["/api/v1/"],
+    max_body=settings.STOREFRONT_CACHE_MAX_BODY,
+    max_age=settings.STOREFRONT_MAX_AGE,
+)
+# Scrapers use up their own "storefront" budget (app/core/rate_limit.py), cache hits included
+app.add_middleware(RateLimitMiddleware)
+# Public, read-only data fetched by storefront sites on any domain: no credentials
+app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["GET", "HEAD", "OPTIONS"], allow_headers=["*"])
+app.add_middleware(RequestMetricsMiddleware)
+
+include_api(app, prefix="/api/v1", groups=["storefront"])
+
+_readiness = {"checked": 0.0, "result": None}
+
+
+def _ping_database() -> None:
+    supabase_admin.table("stores").select("id").limit(1).execute()
+
+
+async def _check_ready() -> dict:
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(run_in_threadpool(_ping_database), timeout=settings.STOREFRONT_READY_TIMEOUT)
+        database = {"ok": True}
+    except asyncio.TimeoutError:
+        database = {"ok": False, "error": f"no answer within {settings.STOREFRONT_READY_TIMEOUT}s"}
+    except Exception as e:
+        database = {"ok": False, "error": str(e)}
+    database["ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return {"status": "ready" if database["ok"] else "unavailable", "checks": {"database": database}}
+
+
+@app.on_event("startup")
+async def start_background_jobs():
+    # Reports handlers that block the event loop
+    start_loop_watchdog()
+    lifecycle.mark("startup")
+    print(f"🚀 Storefront worker {os.getpid()} started in {lifecycle.format_startup()}")
+
+
+@app.on_event("shutdown")
+async def stop_background_jobs():
+    stop_loop_watchdog()
+
+
+@app.get("/health")
+async def health_check():
+    return {"status": "healthy"}
+
+
+@app.get("/ready")
+async def readiness_check():
+    """Database reachable (re-checked every READY_CHECK_INTERVAL seconds); 503 otherwise."""
+    if _readiness["result"] is None or time.monotonic() - _readiness["checked"] > READY_CHECK_INTERVAL:
+        _readiness.update(result=await _check_ready(), checked=time.monotonic())
+    result = _readiness["result"]
+    body = {
+        **result,
+        "pid": os.getpid(),
+        "cache": {"entries": len(STOREFRONT_CACHE), "hits": STOREFRONT_CACHE.hits, "misses": STOREFRONT_CACHE.misses},
+    }
+    return JSONResponse(body, status_code=200 if result["status"] == "ready" else 503)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics(request: Request):
+    """Prometheus scrape endpoint (this worker's metrics only)."""
+    if settings.METRICS_TOKEN and request.headers.get("authorization") != f"Bearer {settings.METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+lifecycle.mark("imports")
@@ -0,0 +1,29 @@
+"""
+Load-test and benchmark suite for the API.
+
+The app runs in-process against benchmarks/fake_supabase.py (no Supabase
+project needed), seeded by benchmarks/seed.py, and is driven with the traffic
+mixes in benchmarks/traffic.py. Run from fastapi-backend/:
+
+    python -m benchmarks.run --mix all --duration 20
+    python -m benchmarks.run --mix storefront --concurrency 32 --latency-ms 10
+    python -m benchmarks.run --app storefront --mix storefront   # the storefront service
+
+    # record / check a baseline (exit status 1 on regression)
+    python -m benchmarks.run --save benchmarks/baselines/all.json
+    python -m benchmarks.run --compare benchmarks/baselines/all.json
+
+    # benchmark a real server process (uvicorn, gunicorn...) instead
+    python -m benchmarks.serve --port 8100 &
+    python -m benchmarks.run --url http://127.0.0.1:8100
+
+    # import-time profile / CI budget for the API process (benchmarks/import_time.py)
+    python -m benchmarks.import_time --budget-ms 1500
+
+Per route the report shows requests, RPS, p50/p95/p99 latency, statements per
+request and the time per request spent in the (simulated) database. Statement
+counts are deterministic, so the gate treats any increase as a regression;
+latency and throughput are compared with `--tolerance`. Baselines are only
+comparable on the same machine and with the same options, so re-record them
+when either changes.
+"""
@@ -0,0 +1,566 @@
+"""
+In-process stand-in for the Supabase clients, for benchmarks.
+
+Implements the subset of the postgrest-py query builder used by the endpoints
+(select/insert/upsert/update/delete, the common filters, ordering, ranges,
+single(), count="exact", simple resource embedding and rpc()) plus the auth
+calls used by login and the user list, on top of plain Python lists, so the
+API can be exercised without a Supabase project.
+
+`install(db)` must run before anything imports `app.core.supabase_client`.
+
+Every statement sleeps for `latency` seconds (a PostgREST round trip, blocking
+the calling thread exactly like the real sync client does) and is counted and
+timed in the per-request counter of `count_queries()`, so reports can tell the
+time spent "in the database" from the time spent in the app.
+"""
+import contextvars
+import copy
+import os
+import re
+import sys
+import threading
+import time
+import types
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+
+
+# Mutable [statements, seconds] shared by everything a request runs, including threadpool work
+_request_queries: contextvars.ContextVar = contextvars.ContextVar("bench_request_queries", default=None)
+
+
+@contextmanager
+def count_queries():
+    """Counts and times the statements executed inside the block (and its tasks/threads)."""
+    counter = [0, 0.0]
+    token = _request_queries.set(counter)
+    try:
+        yield counter
+    finally:
+        _request_queries.reset(token)
+
+
+class FakeAPIError(Exception):
+    """Mirrors postgrest.exceptions.APIError closely enough for the endpoints."""
+
+    def __init__(self, message: str, code: str = "PGRST000"):
+        super().__init__(message)
+        self.message = message
+        self.code = code
+
+
+_TABLE_ALIASES = {
+    "category": "categories",
+    "customer": "customers",
+    "order": "orders",
+    "product": "products",
+    "store": "stores",
+    "plan": "subscription_plans",
+    "theme": "themes",
+}
+
+
+def _singular(table: str) -> str:
+    if table.endswith("ies"):
+        return table[:-3] + "y"
+    if table.endswith("s"):
+        return table[:-1]
+    return table
+
+
+def _split_top_level(text: str, sep: str = ",") -> List[str]:
+    parts, depth, quoted, buf = [], 0, False, []
+    for ch in text:
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        if ch == sep and depth == 0 and not quoted:
+            parts.append("".join(buf).strip())
+            buf = []
+            continue
+        buf.append(ch)
+    if buf:
+        parts.append("".join(buf).strip())
+    return [p for p in parts if p]
+
+
+def _coerce(sample: Any, raw: Any) -> Any:
+    if isinstance(raw, str) and raw.startswith('"') and raw.endswith('"'):
+        raw = raw[1:-1]
+    if sample is None or raw is None:
+        return raw
+    if isinstance(sample, bool):
+        return str(raw).lower() in ("true", "1", "t")
+    if isinstance(sample, (int, float)) and not isinstance(raw, (int, float)):
+        try:
+            return type(sample)(float(raw)) if isinstance(sample, float) else int(float(raw))
+        except (TypeError, ValueError):
+            return raw
+    return raw
+
+
+def _like(value: Any, pattern: str, insensitive: bool) -> bool:
+    if value is None:
+        return False
+    regex = "^" + ".*".join(re.escape(p) for p in str(pattern).replace("*", "%").split("%")) + "$"
+    return re.match(regex, str(value), re.IGNORECASE if insensitive else 0) is not None
+
+
+def _get(row: dict, column: str) -> Any:
+    if "->>" in column:
+        base, key = column.split("->>", 1)
+        return (row.get(base) or {}).get(key)
+    return row.get(column)
+
+
+def _compare(row: dict, column: str, op: str, criteria: Any) -> bool:
+    value = _get(row, column)
+    if op == "in":
+        items = criteria
+        if isinstance(criteria, str):
+            items = [c.strip().strip('"') for c in criteria.strip("()").split(",") if c.strip()]
+        return str(value) in {str(i) for i in items} or value in items
+    if op == "is":
+        if str(criteria).lower() == "null":
+            return value is None
+        return value is _coerce(True, criteria)
+    if op == "like":
+        return _like(value, criteria, False)
+    if op == "ilike":
+        return _like(value, criteria, True)
+    if op in ("fts", "plfts", "wfts", "phfts"):
+        terms = re.findall(r"\w+", str(criteria).lower())
+        return value is not None and all(t in str(value).lower() for t in terms)
+    crit = _coerce(value, criteria)
+    if op == "eq":
+        return value == crit or (value is not None and str(value) == str(crit))
+    if op == "neq":
+        return not (value == crit or (value is not None and str(value) == str(crit)))
+    if value is None:
+        return False
+    try:
+        if op == "gt":
+            return value > crit
+        if op == "gte":
+            return value >= crit
+        if op == "lt":
+            return value < crit
+        if op == "lte":
+            return value <= crit
+    except TypeError:
+        return str(value) > str(crit) if op in ("gt", "gte") else str(value) < str(crit)
+    raise FakeAPIError(f"Unsupported operator: {op}")
+
+
+def _parse_logic(expression: str) -> Callable[[dict], bool]:
+    """Parse PostgREST or=()/and() filter syntax into a predicate."""
+    expression = expression.strip()
+    match = re.match(r"^(and|or)\((.*)\)$", expression)
+    if match:
+        kind, inner = match.groups()
+        preds = [_parse_logic(p) for p in _split_top_level(inner)]
+        if kind == "and":
+            return lambda row: all(p(row) for p in preds)
+        return lambda row: any(p(row) for p in preds)
+    negate = False
+    column, rest = expression.split(".", 1)
+    op, criteria = rest.split(".", 1)
+    if op == "not":
+        negate = True
+        op, criteria = criteria.split(".", 1)
+    pred = lambda row: _compare(row, column, op, criteria)
+    return (lambda row: not pred(row)) if negate else pred
+
+
+class FakeQuery:
+    def __init__(self, db: "FakeDatabase", table: str):
+        self.db = db
+        self.table = table
+        self.method = "select"
+        self.columns = "*"
+        self.payload: Any = None
+        self.count_mode: Optional[str] = None
+        self.filters: List[Callable[[dict], bool]] = []
+        self.equals: List[tuple] = []
+        self.orders: List[tuple] = []
+        self._limit: Optional[int] = None
+        self._offset = 0
+        self._single = False
+        self._maybe_single = False
+        self.on_conflict = ""
+        self.ignore_duplicates = False
+
+    # --- statement kinds -------------------------------------------------
+    def select(self, *columns: str, count: Optional[str] = None):
+        self.columns = ",".join(columns) if columns else "*"
+        self.count_mode = count
+        return self
+
+    def insert(self, json, *, count=None, returning=None, upsert=False):
+        self.method, self.payload = "insert", json
+        return self
+
+    def upsert(self, json, *, count=None, returning=None, ignore_duplicates=False, on_conflict=""):
+        self.method, self.payload = "upsert", json
+        self.ignore_duplicates = ignore_duplicates
+        self.on_conflict = on_conflict
+        return self
+
+    def update(self, json, *, count=None, returning=None):
+        self.method, self.payload = "update", json
+        return self
+
+    def delete(self, *, count=None, returning=None):
+        self.method = "delete"
+        return self
+
+    # --- filters ---------------------------------------------------------
+    def _add(self, column, op, criteria):
+        self.filters.append(lambda row: _compare(row, column, op, criteria))
+        return self
+
+    def eq(self, c, v):
+        self.equals.append((c, v))
+        return self._add(c, "eq", v)
+
+    def neq(self, c, v): return self._add(c, "neq", v)
+    def gt(self, c, v): return self._add(c, "gt", v)
+    def gte(self, c, v): return self._add(c, "gte", v)
+    def lt(self, c, v): return self._add(c, "lt", v)
+    def lte(self, c, v): return self._add(c, "lte", v)
+    def like(self, c, v): return self._add(c, "like", v)
+    def ilike(self, c, v): return self._add(c, "ilike", v)
+    def is_(self, c, v): return self._add(c, "is", v)
+    def in_(self, c, values): return self._add(c, "in", list(values))
+    def fts(self, c, q): return self._add(c, "fts", q)
+    def text_search(self, c, q, options=None): return self._add(c, "fts", q)
+
+    def filter(self, column, operator, criteria):
+        if operator.startswith("not."):
+            inner = _parse_logic(f"{column}.{operator[4:]}.{criteria}")
+            self.filters.append(lambda row: not inner(row))
+            return self
+        return self._add(column, operator, criteria)
+
+    def not_(self):
+        return self
+
+    def or_(self, filters: str, reference_table: Optional[str] = None):
+        self.filters.append(_parse_logic(f"or({filters})"))
+        return self
+
+    def match(self, query: Dict[str, Any]):
+        for k, v in query.items():
+            self.eq(k, v)
+        return self
+
+    # --- shaping ---------------------------------------------------------
+    def order(self, column, *, desc=False, nullsfirst=False, foreign_table=None):
+        if not foreign_table:
+            for term in column.split(","):
+                parts = term.split(".")
+                self.orders.append((parts[0], desc or "desc" in parts[1:]))
+        return self
+
+    def limit(self, size, *, foreign_table=None):
+        if not foreign_table:
+            self._limit = size
+        return self
+
+    def offset(self, size):
+        self._offset = size
+        return self
+
+    def range(self, start, end, foreign_table=None):
+        if not foreign_table:
+            self._offset, self._limit = start, end - start + 1
+        return self
+
+    def single(self):
+        self._single = True
+        return self
+
+    def maybe_single(self):
+        self._maybe_single = True
+        return self
+
+    # --- execution -------------------------------------------------------
+    def execute(self):
+        return self.db.execute(self)
+
+
+class FakeRPC:
+    def __init__(self, db: "FakeDatabase", name: str, params: dict):
+        self.db, self.name, self.params = db, name, params
+
+    def execute(self):
+        handler = self.db.rpcs.get(self.name)
+        with self.db.round_trip():
+            if handler is None:
+                raise FakeAPIError(f"Could not find the function public.{self.name}", "PGRST202")
+            with self.db.lock:
+                data = handler(self.db, **(self.params or {}))
+        return SimpleNamespace(data=data, count=None)
+
+
+class FakeAuthAdmin:
+    def __init__(self, db: "FakeDatabase"):
+        self.db = db
+
+    def create_user(self, attributes: dict):
+        for u in self.db.users.values():
+            if u["email"] == attributes.get("email"):
+                raise FakeAPIError("A user with this email address has already been registered")
+        user_id = str(uuid.uuid4())
+        self.db.users[user_id] = {
+            "id": user_id,
+            "email": attributes.get("email"),
+            "password": attributes.get("password"),
+            "user_metadata": attributes.get("user_metadata") or {},
+        }
+        return SimpleNamespace(user=SimpleNamespace(id=user_id, email=attributes.get("email")))
+
+    def list_users(self, page: int = 1, per_page: int = 50):
+        with self.db.round_trip():
+            users = list(self.db.users.values())[(page - 1) * per_page: page * per_page]
+        return [
+            SimpleNamespace(id=u["id"], email=u["email"], user_metadata=u["user_metadata"], created_at=u.get("created_at"))
+            for u in users
+        ]
+
+
+class FakeAuth:
+    def __init__(self, db: "FakeDatabase"):
+        self.db = db
+        self.admin = FakeAuthAdmin(db)
+
+    def sign_in_with_password(self, credentials: dict):
+        with self.db.round_trip():
+            for u in self.db.users.values():
+                if u["email"] == credentials.get("email") and u["password"] == credentials.get("password"):
+                    user = SimpleNamespace(id=u["id"], email=u["email"], user_metadata=u["user_metadata"])
+                    session = SimpleNamespace(access_token=f"fake-token-{u['id']}")
+                    return SimpleNamespace(user=user, session=session)
+            raise FakeAPIError("Invalid login credentials")
+
+
+class FakeDatabase:
+    """Thread-safe in-memory tables keyed by name."""
+
+    def __init__(self, tables: Optional[Dict[str, List[dict]]] = None, latency: float = 0.0):
+        self.latency = latency
+        self.tables: Dict[str, List[dict]] = {k: list(v) for k, v in (tables or {}).items()}
+        self.unique: Dict[str, List[tuple]] = {}
+        self.rpcs: Dict[str, Callable[..., Any]] = {}
+        self.users: Dict[str, dict] = {}
+        self.lock = threading.RLock()
+        self._id_index: Dict[str, tuple] = {}
+        self._eq_index: Dict[tuple, tuple] = {}
+        self._updates: Dict[str, int] = {}
+        self.auth = FakeAuth(self)
+        self.query_count = 0
+
+    # Client surface ------------------------------------------------------
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    from_ = table
+
+    def rpc(self, name: str, params: Optional[dict] = None) -> FakeRPC:
+        return FakeRPC(self, name, params or {})
+
+    def add_unique(self, table: str, *columns: str):
+        self.unique.setdefault(table, []).append(tuple(columns))
+
+    # Execution -----------------------------------------------------------
+    @contextmanager
+    def round_trip(self):
+        """One simulated request to Supabase: counted, timed, and at least `latency` seconds long."""
+        started = time.perf_counter()
+        self.query_count += 1
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+            yield
+        finally:
+            counter = _request_queries.get()
+            if counter is not None:
+                counter[0] += 1
+                counter[1] += time.perf_counter() - started
+
+    def _rows(self, name: str) -> List[dict]:
+        return self.tables.setdefault(name, [])
+
+    def _by_id(self, table: str) -> Dict[Any, dict]:
+        # Embeds look rows up by id once per parent row; a scan each time would
+        # make the fake, not the app, dominate list endpoints
+        rows = self._rows(table)
+        cached = self._id_index.get(table)
+        if cached is None or cached[0] is not rows or cached[1] != len(rows):
+            cached = self._id_index[table] = (rows, len(rows), {r.get("id"): r for r in rows})
+        return cached[2]
+
+    def _column_index(self, table: str, column: str) -> Optional[Dict[str, List[dict]]]:
+        # Rows by value of an all-text column, in table order; None when the column
+        # holds other types, whose eq() coerces the value (5 == "5.0", True == "true")
+        rows = self._rows(table)
+        key = (rows, len(rows), self._updates.get(table, 0))
+        cached = self._eq_index.get((table, column))
+        if cached is None or cached[0] is not key[0] or cached[1:3] != key[1:]:
+            index: Optional[Dict[str, List[dict]]] = {}
+            for r in rows:
+                value = r.get(column)
+                if value is None:
+                    continue
+                if not isinstance(value, str):
+                    index = None
+                    break
+                index.setdefault(value, []).append(r)
+            cached = self._eq_index[(table, column)] = key + (index,)
+        return cached[3]
+
+    def _candidates(self, q: "FakeQuery") -> List[dict]:
+        # The rows an eq() filter can match, as an index on that column would give
+        # Postgres; without it every statement scans (and burns CPU on) the whole table
+        for column, value in q.equals:
+            if "->>" in column:
+                continue
+            index = self._column_index(q.table, column)
+            if index is not None:
+                if isinstance(value, str) and value.startswith('"') and value.endswith('"'):
+                    value = value[1:-1]
+                return index.get(str(value), [])
+        return self._rows(q.table)
+
+    def _conflict(self, table: str, row: dict, columns: tuple) -> Optional[dict]:
+        for existing in self._rows(table):
+            if all(existing.get(c) == row.get(c) and row.get(c) is not None for c in columns):
+                return existing
+        return None
+
+    def _prepare(self, table: str, row: dict) -> dict:
+        row = copy.deepcopy(row)
+        row.setdefault("id", str(uuid.uuid4()))
+        row.setdefault("created_at", datetime.now(timezone.utc).isoformat())
+        for columns in self.unique.get(table, []):
+            if self._conflict(table, row, columns):
+                raise FakeAPIError(
+                    f'duplicate key value violates unique constraint "{table}_{"_".join(columns)}_key"',
+                    "23505",
+                )
+        return row
+
+    def execute(self, q: FakeQuery):
+        with self.round_trip():
+            return self._execute(q)
+
+    def _execute(self, q: FakeQuery):
+        with self.lock:
+            rows = self._rows(q.table)
+            if q.method == "insert":
+                payload = q.payload if isinstance(q.payload, list) else [q.payload]
+                created = [self._prepare(q.table, r) for r in payload]
+                rows.extend(created)
+                return SimpleNamespace(data=copy.deepcopy(created), count=None)
+            if q.method == "upsert":
+                payload = q.payload if isinstance(q.payload, list) else [q.payload]
+                keys = tuple(c.strip() for c in q.on_conflict.split(",") if c.strip()) or ("id",)
+                out = []
+                for r in payload:
+                    existing = self._conflict(q.table, r, keys)
+                    if existing is not None:
+                        if not q.ignore_duplicates:
+                            existing.update(copy.deepcopy(r))
+                            self._updates[q.table] = self._updates.get(q.table, 0) + 1
+                            out.append(copy.deepcopy(existing))
+                        continue
+                    new_row = self._prepare(q.table, r)
+                    rows.append(new_row)
+                    out.append(copy.deepcopy(new_row))
+                return SimpleNamespace(data=out, count=None)
+
+            matched = [r for r in self._candidates(q) if all(f(r) for f in q.filters)]
+            if q.method == "update":
+                for r in matched:
+                    r.update(copy.deepcopy(q.payload))
+                self._updates[q.table] = self._updates.get(q.table, 0) + 1
+                return SimpleNamespace(data=copy.deepcopy(matched), count=None)
+            if q.method == "delete":
+                ids = {id(r) for r in matched}
+                self.tables[q.table] = [r for r in rows if id(r) not in ids]
+                return SimpleNamespace(data=copy.deepcopy(matched), count=None)
+
+            for column, desc in reversed(q.orders):
+                matched.sort(key=lambda r: (r.get(column) is None, r.get(column) if r.get(column) is not None else ""), reverse=desc)
+            total = len(matched)
+            window = matched[q._offset:]
+            if q._limit is not None:
+                window = window[: q._limit]
+            data = [self._project(q.table, r, q.columns) for r in window]
+            count = total if q.count_mode else None
+            if q._single or q._maybe_single:
+                if len(data) != 1:
+                    if q._maybe_single and not data:
+                        return None
+                    raise FakeAPIError("JSON object requested, multiple (or no) rows returned", "PGRST116")
+                return SimpleNamespace(data=data[0], count=count)
+            return SimpleNamespace(data=data, count=count)
+
+    def _project(self, table: str, row: dict, columns: str) -> dict:
+        parts = _split_top_level(columns or "*")
+        out: Dict[str, Any] = {}
+        for part in parts:
+            if "(" not in part:
+                if part == "*":
+                    out.update(copy.deepcopy(row))
+                else:
+                    name = part.split(":")[-1].strip()
+                    out[part.split(":")[0].strip()] = copy.deepcopy(row.get(name))
+                continue
+            head, inner = part.split("(", 1)
+            inner = inner.rsplit(")", 1)[0]
+            alias, _, rel = head.partition(":")
+            rel = (rel or alias).strip().split("!")[0]
+            alias = alias.strip()
+            out[alias] = self._embed(table, row, rel, inner)
+        return out
+
+    def _embed(self, table: str, row: dict, rel: str, inner: str):
+        if rel.endswith("_id"):
+            fk_col, target = rel, _TABLE_ALIASES.get(rel[:-3], rel[:-3] + "s")
+        else:
+            target = rel
+            fk_col = f"{_singular(rel)}_id"
+        if fk_col in row:
+            ref = self._by_id(target).get(row.get(fk_col))
+            return self._project(target, ref, inner) if ref else None
+        back_col = f"{_singular(table)}_id"
+        children = [r for r in self._rows(target) if r.get(back_col) == row.get("id")]
+        if inner.strip() == "count":
+            return [{"count": len(children)}]
+        return [self._project(target, c, inner) for c in children]
+
+
+def install(db: FakeDatabase) -> None:
+    """Serve `app.core.supabase_client.supabase`/`supabase_admin`/`supabase_bulk` from `db`."""
+    if "app.core.supabase_client" in sys.modules:
+        raise RuntimeError("install() must run before app.core.supabase_client is imported")
+    # Settings the app reads at import time; nothing is sent to these
+    os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:54321")
+    for name in ("SUPABASE_KEY", "SUPABASE_SERVICE_KEY", "SUPABASE_JWT_SECRET"):
+        os.environ.setdefault(name, "benchmark")
+    from app.core import upstream
+    from app.core.metrics import instrument_client
+
+    # Wrapped like the real clients, so the app's own query timing and upstream policy are part of the run
+    module = types.ModuleType("app.core.supabase_client")
+    module.supabase = module.supabase_admin = instrument_client(db, database=upstream.DATABASE, auth=upstream.SUPABASE_AUTH)
+    module.supabase_bulk = instrument_client(db, database=upstream.DATABASE_BULK, auth=upstream.SUPABASE_AUTH)
+    sys.modules["app.core.supabase_client"] = module
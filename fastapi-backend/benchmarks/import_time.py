@@ -0,0 +1,133 @@
+"""
+Import-time profile and budget for the API process.
+
+Imports the app in a fresh interpreter with `python -X importtime` (best of
+`--repeat` runs) and reports the total, the heaviest packages and the
+heaviest single modules. As a CI gate it exits with status 1 when the import
+takes longer than `--budget-ms`, or when a module that the app is meant to
+import lazily (Supabase SDK, passlib, httpx...) is imported eagerly again.
+Run from fastapi-backend/:
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --budget-ms 1500 --json import-time.json
+    API_ROUTER_GROUPS=storefront python -m benchmarks.import_time
+
+Import time depends on the machine, so set the budget from a run on the CI
+runners rather than a laptop.
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Loaded on first use (app/core/supabase_client.py, razorpay_gateway.py, storage.py, customers.py)
+DEFERRED_MODULES = ("supabase", "gotrue", "postgrest", "httpx", "passlib", "cloudinary", "razorpay")
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def profile_once(module: str) -> Tuple[float, List[Tuple[str, int, int, int]]]:
+    """(import seconds, [(module, self us, cumulative us, depth)]) for one fresh interpreter."""
+    env = dict(os.environ)
+    # Read at import time; nothing is sent to them
+    env.setdefault("SUPABASE_URL", "http://127.0.0.1:54321")
+    for name in ("SUPABASE_KEY", "SUPABASE_SERVICE_KEY"):
+        env.setdefault(name, "import-time")
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise SystemExit(f"❌ import {module} failed:\n{proc.stderr[-2000:]}")
+    entries = []
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    seconds = float(proc.stdout.strip().splitlines()[-1])
+    return seconds, entries
+
+
+def summarize(module: str, repeat: int, top: int) -> dict:
+    runs = [profile_once(module) for _ in range(max(1, repeat))]
+    seconds, entries = min(runs, key=lambda run: run[0])
+
+    by_package: Dict[str, int] = defaultdict(int)
+    for name, self_us, _, _ in entries:
+        by_package[name.split(".")[0]] += self_us
+    imported = {name for name, _, _, _ in entries}
+    return {
+        "module": module,
+        "python": sys.version.split()[0],
+        "import_ms": round(seconds * 1000, 1),
+        "runs_ms": [round(run[0] * 1000, 1) for run in runs],
+        "modules": len(entries),
+        "packages": [
+            {"package": package, "self_ms": round(us / 1000, 1)}
+            for package, us in sorted(by_package.items(), key=lambda kv: -kv[1])[:top]
+        ],
+        "slowest_modules": [
+            {"module": name, "self_ms": round(self_us / 1000, 1), "cumulative_ms": round(cumulative_us / 1000, 1)}
+            for name, self_us, cumulative_us, _ in sorted(entries, key=lambda e: -e[1])[:top]
+        ],
+        "deferred_imported": sorted(m for m in DEFERRED_MODULES if m in imported),
+    }
+
+
+def print_report(report: dict) -> None:
+    print(
+        f"\n⏱️  import {report['module']}: {report['import_ms']:.0f}ms "
+        f"(best of {report['runs_ms']}, {report['modules']} modules, Python {report['python']})"
+    )
+    print(f"\n{'package':<32} {'self ms':>9}")
+    for row in report["packages"]:
+        print(f"{row['package'][:32]:<32} {row['self_ms']:>9.1f}")
+    print(f"\n{'module':<52} {'self ms':>9} {'cum ms':>9}")
+    for row in report["slowest_modules"]:
+        print(f"{row['module'][:52]:<52} {row['self_ms']:>9.1f} {row['cumulative_ms']:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main", help="module to import (the ASGI app's module)")
+    parser.add_argument("--repeat", type=int, default=3, help="fresh interpreters to run; the fastest counts")
+    parser.add_argument("--top", type=int, default=15, help="rows per table")
+    parser.add_argument("--budget-ms", type=float, help="fail (exit 1) when the import takes longer")
+    parser.add_argument("--allow-eager", action="store_true", help="do not fail when deferred modules are imported")
+    parser.add_argument("--json", dest="json_path", help="write the report to this file")
+    args = parser.parse_args()
+
+    report = summarize(args.module, args.repeat, args.top)
+    print_report(report)
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Report written to {args.json_path}")
+
+    problems = []
+    if args.budget_ms is not None and report["import_ms"] > args.budget_ms:
+        problems.append(f"import took {report['import_ms']:.0f}ms, budget {args.budget_ms:.0f}ms")
+    if report["deferred_imported"] and not args.allow_eager:
+        problems.append(
+            f"imported at startup but meant to load on first use: {', '.join(report['deferred_imported'])} "
+            f"(run `python -X importtime -c 'import {args.module}'` to see who imports them)"
+        )
+    if problems:
+        print(f"\n❌ Import-time check failed:")
+        for line in problems:
+            print(f"   - {line}")
+        sys.exit(1)
+    print("\n✅ Import time within budget")
+
+
+if __name__ == "__main__":
+    main()
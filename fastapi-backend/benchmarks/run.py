@@ -0,0 +1,254 @@
+"""
+Benchmark runner and regression gate. See benchmarks/__init__.py for usage.
+
+Closed loop: `--concurrency` clients each send the next request of the mix as
+soon as the previous one answered, for `--duration` seconds (after a warm-up
+whose results are discarded) or until `--requests` were sent.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List
+
+import httpx
+
+# Fix path before imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import fake_supabase, seed as seeding
+from benchmarks.serve import APPS, DB_MS_HEADER, QUERIES_HEADER, build_app
+from benchmarks.traffic import MIXES, Tokens, picker
+
+# Options that must match for two runs to be comparable
+RUN_OPTIONS = ("app", "mix", "concurrency", "latency_ms", "scale", "seed", "rate_limit")
+# For baselines recorded before an option existed
+OPTION_DEFAULTS = {"app": "api", "rate_limit": False}
+
+# A percentile from fewer samples is mostly the max; such routes are not gated on it
+MIN_SAMPLES = {"p95_ms": 20, "p99_ms": 100}
+
+
+class Samples:
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.queries: List[int] = []
+        self.db_ms: List[float] = []
+        self.statuses: Dict[str, int] = defaultdict(int)
+        self.errors = 0
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(p / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(samples: Samples, elapsed: float) -> dict:
+    lat = sorted(samples.latencies)
+    n = len(lat)
+    return {
+        "requests": n,
+        "rps": round(n / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(lat, 50), 2),
+        "p95_ms": round(percentile(lat, 95), 2),
+        "p99_ms": round(percentile(lat, 99), 2),
+        "max_ms": round(lat[-1], 2) if lat else 0.0,
+        "queries": round(sum(samples.queries) / len(samples.queries), 2) if samples.queries else None,
+        "db_ms": round(sum(samples.db_ms) / len(samples.db_ms), 2) if samples.db_ms else None,
+        "errors": samples.errors,
+        "statuses": dict(samples.statuses),
+    }
+
+
+async def _client_loop(client, pick, build_args, results, state, stop_at, warmup_until):
+    while True:
+        now = time.perf_counter()
+        if now >= stop_at or (state["limit"] is not None and state["sent"] >= state["limit"]):
+            return
+        template = pick()
+        req = template.build(*build_args)
+        state["sent"] += 1
+        started = time.perf_counter()
+        try:
+            res = await client.request(req.method, req.url, headers=req.headers, json=req.json)
+            status = str(res.status_code)
+        except httpx.HTTPError as e:
+            res, status = None, type(e).__name__
+        took = (time.perf_counter() - started) * 1000
+        if started < warmup_until:
+            continue
+
+        samples = results[template.route]
+        samples.latencies.append(took)
+        samples.statuses[status] += 1
+        if res is None or res.status_code >= 400:
+            samples.errors += 1
+        if res is not None and QUERIES_HEADER in res.headers:
+            samples.queries.append(int(res.headers[QUERIES_HEADER]))
+            samples.db_ms.append(float(res.headers[DB_MS_HEADER]))
+
+
+async def run(args) -> dict:
+    if args.url:
+        # Same seed + scale -> same slugs, ids and emails as the server's data set
+        data = seeding.seed(fake_supabase.FakeDatabase(), scale=args.scale, seed=args.seed)
+        transport, base_url = None, args.url.rstrip("/")
+    else:
+        asgi_app, data = build_app(args.latency_ms, args.scale, args.seed, args.app, args.rate_limit)
+        transport, base_url = httpx.ASGITransport(app=asgi_app, raise_app_exceptions=False), "http://bench"
+
+    tokens = Tokens()
+    templates = MIXES[args.mix]
+    results: Dict[str, Samples] = defaultdict(Samples)
+    state = {"sent": 0, "limit": args.requests}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=60, limits=limits) as client:
+        started = time.perf_counter()
+        warmup_until = started + args.warmup
+        stop_at = warmup_until + (args.duration if args.requests is None else 10 ** 9)
+        await asyncio.gather(*[
+            _client_loop(
+                client, picker(templates, random.Random(args.seed * 1000 + n)),
+                (random.Random(args.seed * 7919 + n), data, tokens), results, state, stop_at, warmup_until,
+            )
+            for n in range(args.concurrency)
+        ])
+        elapsed = time.perf_counter() - warmup_until
+
+    total = Samples()
+    for samples in results.values():
+        total.latencies += samples.latencies
+        total.queries += samples.queries
+        total.db_ms += samples.db_ms
+        total.errors += samples.errors
+        for status, count in samples.statuses.items():
+            total.statuses[status] += count
+
+    return {
+        "options": {name: getattr(args, name) for name in RUN_OPTIONS},
+        "target": args.url or "in-process",
+        "host": {"python": platform.python_version(), "machine": platform.machine(), "cpus": os.cpu_count()},
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "elapsed_s": round(elapsed, 2),
+        "total": summarize(total, elapsed),
+        "routes": {route: summarize(samples, elapsed) for route, samples in sorted(results.items())},
+    }
+
+
+def print_report(report: dict) -> None:
+    opts = report["options"]
+    print(
+        f"\n📊 app={opts.get('app', 'api')} mix={opts['mix']} concurrency={opts['concurrency']} latency={opts['latency_ms']}ms/query "
+        f"scale={opts['scale']}{' rate_limit=on' if opts.get('rate_limit') else ''} target={report['target']} ({report['elapsed_s']}s)"
+    )
+    header = f"{'route':<38} {'reqs':>6} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'q/req':>6} {'db ms':>7} {'err':>5}"
+    print(header)
+    print("-" * len(header))
+    rows = list(report["routes"].items()) + [("TOTAL", report["total"])]
+    for route, r in rows:
+        queries = "-" if r["queries"] is None else f"{r['queries']:g}"
+        db_ms = "-" if r["db_ms"] is None else f"{r['db_ms']:.1f}"
+        print(
+            f"{route[:38]:<38} {r['requests']:>6} {r['rps']:>8.1f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} "
+            f"{r['p99_ms']:>8.1f} {queries:>6} {db_ms:>7} {r['errors']:>5}"
+        )
+
+
+def compare(report: dict, baseline: dict, tolerance: float, slack_ms: float) -> List[str]:
+    """Regressions of `report` against `baseline`, as printable lines (empty when clean)."""
+    problems = []
+    for name in RUN_OPTIONS:
+        current = report["options"].get(name, OPTION_DEFAULTS.get(name))
+        recorded = baseline["options"].get(name, OPTION_DEFAULTS.get(name))
+        if current != recorded:
+            problems.append(
+                f"option {name}={current} differs from the baseline's "
+                f"{recorded}; rerun with the baseline's options or re-record it"
+            )
+    if problems:
+        return problems
+
+    base_total, total = baseline["total"], report["total"]
+    if total["rps"] < base_total["rps"] * (1 - tolerance):
+        problems.append(f"TOTAL: throughput {total['rps']:.1f} rps < baseline {base_total['rps']:.1f} rps")
+
+    for route, base in baseline["routes"].items():
+        current = report["routes"].get(route)
+        if current is None or not current["requests"]:
+            problems.append(f"{route}: no samples in this run")
+            continue
+        if base["queries"] is not None and current["queries"] is not None and current["queries"] > base["queries"] + 0.5:
+            problems.append(f"{route}: {current['queries']:g} statements/request, baseline {base['queries']:g}")
+        for key, min_samples in MIN_SAMPLES.items():
+            if min(base["requests"], current["requests"]) < min_samples:
+                continue
+            limit = base[key] * (1 + tolerance) + slack_ms
+            if current[key] > limit:
+                problems.append(f"{route}: {key} {current[key]:.1f}ms > {limit:.1f}ms (baseline {base[key]:.1f}ms)")
+        base_rate = base["errors"] / base["requests"] if base["requests"] else 0
+        if current["errors"] / current["requests"] > base_rate + 0.01:
+            problems.append(f"{route}: {current['errors']} errors of {current['requests']} requests ({current['statuses']})")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", choices=sorted(APPS), default="api", help="in-process app: the full API or the storefront service")
+    parser.add_argument("--mix", choices=sorted(MIXES), default="all")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds measured after the warm-up")
+    parser.add_argument("--requests", type=int, default=None, help="stop after this many requests instead")
+    parser.add_argument("--warmup", type=float, default=2.0, help="seconds of traffic not measured (cache warm-up)")
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="simulated Supabase round trip per statement")
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--rate-limit", action="store_true", help="keep the rate limiter on (off by default: the load comes from one client)",
+    )
+    parser.add_argument("--url", help="benchmark a running `python -m benchmarks.serve` instead of an in-process app")
+    parser.add_argument("--json", dest="json_path", help="write the full report to this file")
+    parser.add_argument("--save", help="record the report as a baseline at this path")
+    parser.add_argument("--compare", help="fail (exit 1) on regressions against this baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative p95/p99/RPS change")
+    parser.add_argument("--slack-ms", type=float, default=2.0, help="allowed absolute latency change")
+    parser.add_argument("--verbose", action="store_true", help="keep the app's own log output")
+    args = parser.parse_args()
+
+    # The endpoints print per request; that would dominate the timings and the terminal
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    with quiet:
+        report = asyncio.run(run(args))
+    print_report(report)
+
+    for path in filter(None, (args.json_path, args.save)):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"💾 Report written to {path}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        problems = compare(report, baseline, args.tolerance, args.slack_ms)
+        if problems:
+            print(f"\n❌ {len(problems)} regression(s) against {args.compare}:")
+            for line in problems:
+                print(f"   - {line}")
+            sys.exit(1)
+        print(f"\n✅ No regressions against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
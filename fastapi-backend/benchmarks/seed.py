@@ -0,0 +1,229 @@
+"""
+Deterministic data set for the benchmarks.
+
+`seed(db, scale, seed)` fills a FakeDatabase with plans, themes, merchants and
+admins (auth users + profiles), stores, and per store: categories, brands,
+notices, products, customers, orders, payments and a subscription. The same
+(scale, seed) always produces the same rows, ids and timestamps, so runs are
+comparable with each other and with a stored baseline.
+
+Sizes per scale unit are in SIZES; `--scale 4` means four times as many stores
+(per-store sizes stay the same, like a platform that gains merchants).
+"""
+import random
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+SIZES = {
+    "stores": 20,
+    "categories": 8,
+    "brands": 6,
+    "notices": 3,
+    "products": 150,
+    "customers": 120,
+    "orders": 300,
+    "admins": 2,
+}
+
+PASSWORD = "benchmark-password"
+
+# Fixed clock so "last 30 days" windows select the same rows on every run
+NOW = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+_WORDS = [
+    "classic", "cotton", "linen", "organic", "premium", "vintage", "slim", "wireless",
+    "leather", "ceramic", "bamboo", "steel", "denim", "silk", "woollen", "handmade",
+]
+_NOUNS = ["shirt", "kurta", "mug", "lamp", "saree", "bag", "watch", "speaker", "bottle", "scarf", "shoe", "jacket"]
+_FIRST = ["Aarav", "Diya", "Kabir", "Meera", "Rohan", "Saanvi", "Vivaan", "Anika", "Ishaan", "Tara"]
+_LAST = ["Sharma", "Iyer", "Patel", "Reddy", "Gupta", "Nair", "Khan", "Das", "Mehta", "Joshi"]
+
+
+@dataclass
+class Dataset:
+    """What the traffic generator needs to address the seeded rows."""
+    store_slugs: List[str] = field(default_factory=list)
+    store_ids: List[str] = field(default_factory=list)
+    owner_of: Dict[str, str] = field(default_factory=dict)        # store id -> owner id
+    merchant_emails: List[str] = field(default_factory=list)
+    admin_ids: List[str] = field(default_factory=list)
+    admin_emails: List[str] = field(default_factory=list)
+    search_terms: List[str] = field(default_factory=lambda: list(_NOUNS) + list(_WORDS[:6]))
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def _ts(rng: random.Random, days: int) -> str:
+    return (NOW - timedelta(seconds=rng.randint(0, days * 86400))).isoformat()
+
+
+def seed(db, scale: int = 1, seed: int = 42) -> Dataset:
+    rng = random.Random(seed)
+    data = Dataset()
+    t = db.tables
+
+    plans = []
+    for name, price in (("Starter Monthly", 499), ("Growth Yearly", 4999), ("Scale Yearly", 9999)):
+        plans.append({"id": _uuid(rng), "name": name, "price": price, "is_active": True, "created_at": _ts(rng, 400)})
+    t["subscription_plans"] = plans
+
+    themes = []
+    for n in range(5):
+        slug = f"theme-{n + 1}"
+        themes.append({
+            "id": _uuid(rng), "name": f"Theme {n + 1}", "slug": slug, "description": "Benchmark theme",
+            "thumbnail_url": f"https://res.cloudinary.com/demo/image/upload/{slug}.jpg",
+            "zip_url": f"/uploads/themes/{slug}", "status": "active", "created_at": _ts(rng, 400),
+        })
+    t["themes"] = themes
+
+    def add_user(email: str, role: str, first: str, last: str) -> str:
+        user_id = _uuid(rng)
+        created = _ts(rng, 365)
+        db.users[user_id] = {
+            "id": user_id, "email": email, "password": PASSWORD, "created_at": created,
+            "user_metadata": {"role": role, "first_name": first, "last_name": last},
+        }
+        t.setdefault("profiles", []).append({
+            "id": user_id, "email": email, "role": role.upper(), "first_name": first, "last_name": last,
+            "status": "active", "created_at": created,
+        })
+        return user_id
+
+    for n in range(SIZES["admins"]):
+        email = f"admin{n}@bench.example.com"
+        data.admin_ids.append(add_user(email, "admin", "Admin", str(n)))
+        data.admin_emails.append(email)
+
+    for s in range(SIZES["stores"] * scale):
+        email = f"merchant{s}@bench.example.com"
+        owner_id = add_user(email, "merchant", rng.choice(_FIRST), rng.choice(_LAST))
+        store_id, slug = _uuid(rng), f"store-{s}"
+        # Most stores are live; a few are suspended/pending like in production
+        status = "active" if s % 10 else rng.choice(["active", "inactive", "pending"])
+        t.setdefault("stores", []).append({
+            "id": store_id, "name": f"Store {s}", "slug": slug, "owner_id": owner_id, "status": status,
+            "plan_id": rng.choice(plans)["id"], "logo_url": f"https://res.cloudinary.com/demo/image/upload/logo-{s}.png",
+            "setup_completed": True, "custom_domain": None, "created_at": _ts(rng, 365),
+            "config": {"theme_id": rng.choice(themes)["id"], "description": f"Store {s}", "email": email},
+        })
+        data.merchant_emails.append(email)
+        if status == "active":
+            data.store_slugs.append(slug)
+            data.store_ids.append(store_id)
+        data.owner_of[store_id] = owner_id
+        _seed_store(t, rng, store_id, plans)
+
+    for table in ("store_managers", "reviews"):
+        t.setdefault(table, [])
+    return data
+
+
+def _seed_store(t: dict, rng: random.Random, store_id: str, plans: list) -> None:
+    categories = [{
+        "id": _uuid(rng), "store_id": store_id, "name": f"{rng.choice(_WORDS).title()} {n}", "description": "",
+        "image_url": f"https://res.cloudinary.com/demo/image/upload/cat-{n}.jpg", "created_at": _ts(rng, 300),
+    } for n in range(SIZES["categories"])]
+    t.setdefault("categories", []).extend(categories)
+
+    brands = [{"id": _uuid(rng), "store_id": store_id, "name": f"Brand {n}", "created_at": _ts(rng, 300)}
+              for n in range(SIZES["brands"])]
+    t.setdefault("brands", []).extend(brands)
+    t.setdefault("notices", []).extend(
+        {"id": _uuid(rng), "store_id": store_id, "title": f"Notice {n}", "created_at": _ts(rng, 60)}
+        for n in range(SIZES["notices"])
+    )
+
+    for n in range(SIZES["products"]):
+        name = f"{rng.choice(_WORDS).title()} {rng.choice(_WORDS).title()} {rng.choice(_NOUNS).title()}"
+        created = _ts(rng, 300)
+        t.setdefault("products", []).append({
+            "id": _uuid(rng), "store_id": store_id, "name": name, "slug": f"p-{n}",
+            "description": f"{name} for benchmarks", "sku": f"SKU-{n:05d}",
+            "price": float(rng.choice([199, 499, 799, 1299, 2499, 5999])), "compare_at_price": None,
+            "images": [f"https://res.cloudinary.com/demo/image/upload/p-{n}.jpg"],
+            "inventory_quantity": rng.randint(0, 200), "category_id": rng.choice(categories)["id"],
+            "brand": rng.choice(brands)["name"], "status": "active" if rng.random() < 0.9 else "draft",
+            "created_at": created, "updated_at": created,
+        })
+
+    customers = []
+    for n in range(SIZES["customers"]):
+        first, last = rng.choice(_FIRST), rng.choice(_LAST)
+        customers.append({
+            "id": _uuid(rng), "store_id": store_id, "first_name": first, "last_name": last,
+            "email": f"{first.lower()}.{last.lower()}.{n}@example.com", "created_at": _ts(rng, 365),
+        })
+    t.setdefault("customers", []).extend(customers)
+
+    for n in range(SIZES["orders"]):
+        created = _ts(rng, 120)
+        status = rng.choices(["completed", "pending", "processing", "cancelled"], [6, 2, 1, 1])[0]
+        t.setdefault("orders", []).append({
+            "id": _uuid(rng), "store_id": store_id, "customer_id": rng.choice(customers)["id"],
+            "order_number": f"ORD-{n:05d}", "total_amount": float(rng.randint(199, 20000)),
+            "status": status, "payment_status": "paid" if status == "completed" else "pending",
+            "fulfillment_status": "unfulfilled", "items_count": rng.randint(1, 5),
+            "created_at": created, "updated_at": created,
+        })
+
+    plan = rng.choice(plans)
+    t.setdefault("subscriptions", []).append({
+        "id": _uuid(rng), "store_id": store_id, "plan_id": plan["id"], "status": "active", "created_at": _ts(rng, 300),
+    })
+    t.setdefault("payments", []).extend({
+        "id": _uuid(rng), "store_id": store_id, "amount": float(plan["price"]), "currency": "INR",
+        "status": "captured", "provider": "razorpay", "type": "subscription_fee",
+        "razorpay_payment_id": f"pay_{rng.getrandbits(48):012x}", "created_at": _ts(rng, 300),
+    } for _ in range(rng.randint(1, 3)))
+
+
+def search_products(db, p_store_id, p_query=None, p_category_id=None, p_brand=None, p_min_price=None,
+                    p_max_price=None, p_price_bands=None, p_limit=24, p_offset=0, **_):
+    """Python version of the `search_products()` RPC (migrations/storefront_search.sql), same result shape."""
+    terms = (p_query or "").lower().split()
+    hits = []
+    for p in db.tables.get("products", []):
+        if p["store_id"] != p_store_id or p.get("status") != "active":
+            continue
+        text = f"{p['name']} {p.get('sku', '')} {p.get('brand', '')}".lower()
+        if not all(term in text for term in terms):
+            continue
+        hits.append(dict(p, rank=sum(text.count(term) for term in terms)))
+
+    def counts(rows, key):
+        out = {}
+        for row in rows:
+            if row.get(key) is not None:
+                out[row[key]] = out.get(row[key], 0) + 1
+        return sorted(out.items(), key=lambda kv: -kv[1])
+
+    filtered = [
+        h for h in hits
+        if (not p_category_id or h.get("category_id") == p_category_id)
+        and (not p_brand or h.get("brand") == p_brand)
+        and (p_min_price is None or h["price"] >= p_min_price)
+        and (p_max_price is None or h["price"] <= p_max_price)
+    ]
+    filtered.sort(key=lambda h: (-h["rank"], h["name"]))
+    bounds = [0] + list(p_price_bands or [])
+    bands = []
+    for n, low in enumerate(bounds):
+        high = bounds[n + 1] if n + 1 < len(bounds) else None
+        count = sum(1 for h in hits if h["price"] >= low and (high is None or h["price"] < high))
+        if count:
+            bands.append({"from": low, "to": high, "count": count})
+    names = {c["id"]: c["name"] for c in db.tables.get("categories", []) if c["store_id"] == p_store_id}
+    return {
+        "total": len(filtered),
+        "hits": filtered[p_offset:p_offset + p_limit],
+        "categories": [{"id": k, "name": names.get(k), "count": n} for k, n in counts(hits, "category_id")],
+        "brands": [{"name": k, "count": n} for k, n in counts(hits, "brand")],
+        "price_bands": bands,
+    }
+
+RPCS = {"search_products": search_products}
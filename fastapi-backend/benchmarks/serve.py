@@ -0,0 +1,96 @@
+"""
+The API wired to a seeded fake Supabase, in-process or as a server.
+
+    python -m benchmarks.serve [--app api|storefront] [--port 8100] [--latency-ms 5] [--scale 1] [--seed 42] [--workers 1] [--rate-limit]
+
+Each response carries X-Bench-Queries and X-Bench-DB-Ms (statements executed
+for the request and the time spent in them) for benchmarks/run.py.
+"""
+import argparse
+import importlib
+import os
+import sys
+
+# Fix path before imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import fake_supabase, seed as seeding
+
+# --app: the full API, or the storefront service (app/storefront.py, storefront routes only)
+APPS = {"api": "app.main", "storefront": "app.storefront"}
+
+QUERIES_HEADER = "x-bench-queries"
+DB_MS_HEADER = "x-bench-db-ms"
+
+
+class QueryCountMiddleware:
+    """Reports the statements each request ran in response headers."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        with fake_supabase.count_queries() as counter:
+            async def send_with_counts(message):
+                if message["type"] == "http.response.start":
+                    message.setdefault("headers", [])
+                    message["headers"] = list(message["headers"]) + [
+                        (QUERIES_HEADER.encode(), str(counter[0]).encode()),
+                        (DB_MS_HEADER.encode(), f"{counter[1] * 1000:.3f}".encode()),
+                    ]
+                await send(message)
+
+            await self.app(scope, receive, send_with_counts)
+
+
+def build_app(latency_ms: float = 5.0, scale: int = 1, seed: int = 42, app: str = "api", rate_limit: bool = False):
+    """Returns (asgi_app, dataset). Call once per process, before importing `app`."""
+    db = fake_supabase.FakeDatabase(latency=latency_ms / 1000)
+    fake_supabase.install(db)
+    data = seeding.seed(db, scale=scale, seed=seed)
+    db.rpcs.update(seeding.RPCS)
+
+    from app.core.config import settings  # after install(): it reads the environment set there
+    # The whole load comes from one client IP, which is what the rate limiter throttles
+    settings.RATE_LIMIT_ENABLED = rate_limit
+
+    module = importlib.import_module(APPS[app])
+    return QueryCountMiddleware(module.app), data
+
+
+def _worker_app():
+    """Entry point for `--workers N` (each uvicorn worker builds its own copy)."""
+    asgi_app, _ = build_app(
+        float(os.environ["BENCH_LATENCY_MS"]), int(os.environ["BENCH_SCALE"]), int(os.environ["BENCH_SEED"]),
+        os.environ.get("BENCH_APP", "api"), os.environ.get("BENCH_RATE_LIMIT") == "1",
+    )
+    return asgi_app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", choices=sorted(APPS), default="api")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--rate-limit", action="store_true", help="keep the rate limiter on")
+    args = parser.parse_args()
+
+    import uvicorn
+    os.environ.update(
+        BENCH_LATENCY_MS=str(args.latency_ms), BENCH_SCALE=str(args.scale), BENCH_SEED=str(args.seed), BENCH_APP=args.app,
+        BENCH_RATE_LIMIT="1" if args.rate_limit else "0",
+    )
+    print(f"🏁 Benchmark {args.app} on http://127.0.0.1:{args.port} ({args.workers} worker(s), {args.latency_ms}ms/query)")
+    uvicorn.run(
+        "benchmarks.serve:_worker_app", factory=True, host="127.0.0.1", port=args.port,
+        workers=args.workers, log_level="warning",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Traffic mixes for the benchmark runner.
+
+A mix is a list of weighted request templates. Each template builds one
+concrete request from the seeded Dataset; its `route` (the path template, not
+the concrete URL) is what results are grouped by.
+"""
+import datetime
+import random
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.seed import PASSWORD, Dataset
+
+
+@dataclass
+class Request:
+    method: str
+    url: str
+    headers: Optional[dict] = None
+    json: Optional[dict] = None
+
+
+@dataclass
+class Template:
+    route: str
+    weight: int
+    build: Callable[[random.Random, Dataset, "Tokens"], Request]
+
+
+class Tokens:
+    """Bearer headers for seeded users, signed once per user."""
+
+    def __init__(self):
+        self._headers: Dict[str, dict] = {}
+
+    def headers(self, user_id: str, role: str) -> dict:
+        if user_id not in self._headers:
+            from app.core.auth_utils import create_access_token
+            token = create_access_token({"sub": user_id, "role": role}, datetime.timedelta(days=1))
+            self._headers[user_id] = {"Authorization": f"Bearer {token}"}
+        return self._headers[user_id]
+
+
+def _merchant(rng: random.Random, data: Dataset, tokens: Tokens):
+    store_id = rng.choice(data.store_ids)
+    return store_id, tokens.headers(data.owner_of[store_id], "merchant")
+
+
+def _admin(rng: random.Random, data: Dataset, tokens: Tokens) -> dict:
+    return tokens.headers(rng.choice(data.admin_ids), "admin")
+
+
+def _merchant_get(path: str):
+    def build(rng, data, tokens):
+        store_id, headers = _merchant(rng, data, tokens)
+        return Request("GET", path.format(store_id=store_id), headers)
+    return build
+
+
+def _admin_get(path: str):
+    return lambda rng, data, tokens: Request("GET", path, _admin(rng, data, tokens))
+
+
+STOREFRONT = [
+    Template("GET /s/live/{slug}", 6, lambda rng, data, tokens: Request(
+        "GET", f"/api/v1/s/live/{rng.choice(data.store_slugs)}")),
+    Template("GET /s/live/{slug}/search", 4, lambda rng, data, tokens: Request(
+        "GET", f"/api/v1/s/live/{rng.choice(data.store_slugs)}/search?q={rng.choice(data.search_terms)}")),
+    Template("GET /subscription-plans", 1, lambda rng, data, tokens: Request("GET", "/api/v1/subscription-plans")),
+    Template("GET /themes", 1, lambda rng, data, tokens: Request("GET", "/api/v1/themes")),
+]
+
+MERCHANT = [
+    Template("GET /merchant/dashboard/stats/{id}", 3, _merchant_get("/api/v1/merchant/dashboard/stats/{store_id}")),
+    Template("GET /store/products", 3, _merchant_get("/api/v1/store/products?storeId={store_id}&limit=50")),
+    Template("GET /store/products/count", 1, _merchant_get("/api/v1/store/products/count?storeId={store_id}")),
+    Template("GET /store/orders", 2, _merchant_get("/api/v1/store/orders/?storeId={store_id}&limit=50")),
+    Template("GET /store/customers", 1, _merchant_get("/api/v1/store/customers?storeId={store_id}&limit=20")),
+    Template("GET /store/categories", 1, _merchant_get("/api/v1/store/categories/?storeId={store_id}")),
+]
+
+ADMIN = [
+    Template("GET /platform/dashboard/stats", 2, _admin_get("/api/v1/platform/dashboard/stats")),
+    Template("GET /platform/stores", 2, _admin_get("/api/v1/platform/stores?limit=50")),
+    Template("GET /platform/users", 1, _admin_get("/api/v1/platform/users?limit=50")),
+    Template("GET /platform/payments", 1, _admin_get("/api/v1/platform/payments?limit=50")),
+]
+
+LOGIN = [
+    Template("POST /auth/login (merchant)", 4, lambda rng, data, tokens: Request(
+        "POST", "/api/v1/auth/login", json={"email": rng.choice(data.merchant_emails), "password": PASSWORD})),
+    Template("POST /auth/login (admin)", 1, lambda rng, data, tokens: Request(
+        "POST", "/api/v1/auth/login", json={"email": rng.choice(data.admin_emails), "password": PASSWORD})),
+]
+
+
+def _scaled(templates: List[Template], share: int) -> List[Template]:
+    total = sum(t.weight for t in templates)
+    return [Template(t.route, max(1, round(t.weight * share / total)), t.build) for t in templates]
+
+
+MIXES: Dict[str, List[Template]] = {
+    "storefront": STOREFRONT,
+    "merchant": MERCHANT,
+    "admin": ADMIN,
+    "login": LOGIN,
+    # Roughly the production shape: shoppers dominate, admins are rare
+    "all": _scaled(STOREFRONT, 60) + _scaled(MERCHANT, 25) + _scaled(LOGIN, 10) + _scaled(ADMIN, 5),
+}
+
+
+def picker(templates: List[Template], rng: random.Random) -> Callable[[], Template]:
+    weights = [t.weight for t in templates]
+    return lambda: rng.choices(templates, weights)[0]
@@ -0,0 +1,87 @@
+"""
+Production server: gunicorn master + uvicorn workers.
+
+    cd fastapi-backend
+    gunicorn                      # picks up this file; binds 0.0.0.0:$PORT (8000)
+
+* Workers: WEB_CONCURRENCY, by default one per CPU core available to the
+  process. Each worker is an async uvicorn server (app/core/worker.py).
+  State a request in one worker leaves for a later request in another (OTP
+  codes, webhook events, import/deployment progress) is kept in SQLite files
+  shared by all workers on the host, not in process memory.
+* The app is imported once in the master and the workers are forked from it
+  (preload_app), sharing its memory copy-on-write. `gc.freeze()` keeps the
+  workers' garbage collector from touching (and so copying) those pages.
+* Workers are recycled after WORKER_MAX_REQUESTS requests (plus jitter, so
+  they do not all restart at once) or when their private memory exceeds
+  WORKER_MAX_MEMORY_MB.
+* Stopping or reloading drains: in-flight requests and background jobs get up
+  to WORKER_GRACEFUL_TIMEOUT seconds. Send HUP to replace the workers
+  gracefully; since the app is preloaded, new code needs a restart of the
+  master (or USR2 to start a new master, then QUIT the old one).
+* A startup report is printed by the master (app import time) and by each
+  worker (boot time); GET /api/v1/platform/diagnostics/startup returns it.
+
+`python -m app.main` still runs a single uvicorn process for development.
+"""
+import gc
+import importlib
+import os
+
+from app.core import lifecycle
+from app.core.config import settings
+
+
+def _available_cores() -> int:
+    try:
+        return len(os.sched_getaffinity(0))  # honours CPU pinning / container cpusets
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+wsgi_app = "app.main:app"
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+worker_class = "app.core.worker.StoreWorker"
+workers = settings.WEB_CONCURRENCY or _available_cores()
+preload_app = True
+
+max_requests = settings.WORKER_MAX_REQUESTS
+max_requests_jitter = settings.WORKER_MAX_REQUESTS_JITTER
+graceful_timeout = settings.WORKER_GRACEFUL_TIMEOUT
+# A worker that misses its heartbeat this long (event loop blocked) is killed and replaced
+timeout = settings.WORKER_TIMEOUT
+keepalive = 5
+
+accesslog = "-"
+errorlog = "-"
+
+# The app imports these on first use (see benchmarks/import_time.py); importing them in
+# the master before the fork lets the workers share them instead of each loading its own
+SHARED_LAZY_MODULES = ("supabase", "httpx", "passlib.context")
+
+
+def when_ready(server):
+    if server.cfg.preload_app:
+        for module in SHARED_LAZY_MODULES:
+            importlib.import_module(module)
+        lifecycle.mark("shared modules")
+        # Everything allocated so far is shared with the workers; keep it out of their GC passes
+        gc.freeze()
+        print(f"🚀 App preloaded in {lifecycle.format_startup()}")
+    memory = f"{settings.WORKER_MAX_MEMORY_MB}MB" if settings.WORKER_MAX_MEMORY_MB else "off"
+    print(
+        f"🚀 Starting {server.cfg.workers} workers on {server.cfg.bind[0]} "
+        f"(max_requests={server.cfg.max_requests}±{server.cfg.max_requests_jitter}, memory limit {memory}, "
+        f"graceful timeout {server.cfg.graceful_timeout}s)"
+    )
+
+
+def post_fork(server, worker):
+    # Worker boot time is measured from the fork
+    lifecycle.restart_clock()
+
+
+def worker_exit(server, worker):
+    jobs = lifecycle.running_jobs()
+    if jobs:
+        print(f"⚠️ Worker {worker.pid} exited with unfinished background jobs: {', '.join(j['name'] for j in jobs)}")
@@ -0,0 +1,26 @@
+"""
+Storefront server (app/storefront.py), scaled separately from the API.
+
+    cd fastapi-backend
+    gunicorn -c gunicorn.storefront.conf.py      # binds 0.0.0.0:$PORT (8001)
+
+The same launcher as gunicorn.conf.py (preloading, recycling, graceful
+drain, startup report); only the app, the port and the worker settings
+differ: STOREFRONT_WORKERS workers, and a short STOREFRONT_GRACEFUL_TIMEOUT
+since the storefront runs no background jobs.
+"""
+import os
+import runpy
+
+from app.core.config import settings
+
+globals().update({
+    name: value
+    for name, value in runpy.run_path(os.path.join(os.path.dirname(os.path.abspath(__file__)), "gunicorn.conf.py")).items()
+    if not name.startswith("__")
+})
+
+wsgi_app = "app.storefront:app"
+bind = f"0.0.0.0:{os.getenv('PORT', '8001')}"
+workers = settings.STOREFRONT_WORKERS or _available_cores()  # noqa: F821 (from gunicorn.conf.py)
+graceful_timeout = settings.STOREFRONT_GRACEFUL_TIMEOUT
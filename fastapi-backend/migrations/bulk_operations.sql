@@ -0,0 +1,38 @@
+-- ============================================
+-- Bulk Operations Migration
+-- Run this in your Supabase SQL Editor
+-- ============================================
+-- Backs POST /store/products/bulk-update in `items` mode: every product of a
+-- chunk gets its own values, but the whole chunk is applied by ONE UPDATE
+-- statement inside one transaction (either all rows of the chunk change or none).
+--
+-- p_items is a JSON array of objects keyed by column name, e.g.
+--   [{"id": "...", "price": 199, "inventory_quantity": 4}, {"id": "...", "status": "draft"}]
+-- Columns missing from an item keep their current value.
+
+CREATE OR REPLACE FUNCTION bulk_update_products(p_store_id UUID, p_items JSONB)
+RETURNS TABLE (id UUID)
+LANGUAGE sql
+AS $$
+  UPDATE products p SET
+    name               = CASE WHEN u ? 'name'               THEN u->>'name'                          ELSE p.name END,
+    description        = CASE WHEN u ? 'description'        THEN u->>'description'                   ELSE p.description END,
+    price              = CASE WHEN u ? 'price'              THEN (u->>'price')::DECIMAL              ELSE p.price END,
+    compare_at_price   = CASE WHEN u ? 'compare_at_price'   THEN (u->>'compare_at_price')::DECIMAL   ELSE p.compare_at_price END,
+    sku                = CASE WHEN u ? 'sku'                THEN u->>'sku'                           ELSE p.sku END,
+    inventory_quantity = CASE WHEN u ? 'inventory_quantity' THEN (u->>'inventory_quantity')::INTEGER ELSE p.inventory_quantity END,
+    status             = CASE WHEN u ? 'status'             THEN u->>'status'                        ELSE p.status END,
+    images             = CASE WHEN u ? 'images'             THEN u->'images'                         ELSE p.images END,
+    category_id        = CASE WHEN u ? 'category_id'        THEN (u->>'category_id')::UUID           ELSE p.category_id END,
+    updated_at         = NOW()
+  FROM jsonb_array_elements(p_items) AS u
+  WHERE p.id = (u->>'id')::UUID
+    AND p.store_id = p_store_id
+  RETURNING p.id;
+$$;
+
+-- Bulk status / delete by id list hit the primary key; the filter variants reuse
+-- the (store_id, status) and (store_id, category_id) indexes from
+-- optimize_product_listing.sql. Orders and reviews filters:
+CREATE INDEX IF NOT EXISTS idx_orders_store_status ON orders(store_id, status);
+CREATE INDEX IF NOT EXISTS idx_reviews_store_status ON reviews(store_id, status);
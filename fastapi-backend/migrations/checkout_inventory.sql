@@ -0,0 +1,235 @@
+-- ============================================
+-- Checkout & Inventory Reservation Migration
+-- Run this in your Supabase SQL Editor
+-- ============================================
+-- Backs the storefront checkout endpoints (app/api/v1/endpoints/checkout.py).
+--
+-- Stock is taken at reservation time with a conditional decrement
+--   UPDATE products SET inventory_quantity = inventory_quantity - q
+--    WHERE id = ... AND inventory_quantity >= q
+-- The UPDATE row lock serialises concurrent buyers of the same product and the
+-- WHERE clause is re-checked after the lock is granted, so stock can never go
+-- negative (no oversell) no matter how many clients race for the last unit.
+-- Products of one cart are always locked in id order to avoid deadlocks.
+--
+-- A reservation holds the stock for a few minutes. place_order() turns it into
+-- an order + order_items in the same transaction; release_expired_reservations()
+-- (run by the API's background sweeper) puts abandoned stock back.
+
+-- 1. Reservations
+CREATE TABLE IF NOT EXISTS inventory_reservations (
+  id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+  reservation_id UUID NOT NULL,
+  store_id UUID NOT NULL REFERENCES stores(id) ON DELETE CASCADE,
+  product_id UUID NOT NULL REFERENCES products(id) ON DELETE CASCADE,
+  quantity INTEGER NOT NULL CHECK (quantity > 0),
+  unit_price DECIMAL(10, 2) NOT NULL,
+  status VARCHAR(20) NOT NULL DEFAULT 'active' CHECK (status IN ('active', 'consumed', 'released')),
+  expires_at TIMESTAMPTZ NOT NULL,
+  order_id UUID REFERENCES orders(id) ON DELETE SET NULL,
+  created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_inventory_reservations_reservation ON inventory_reservations(reservation_id);
+CREATE INDEX IF NOT EXISTS idx_inventory_reservations_expiry ON inventory_reservations(expires_at) WHERE status = 'active';
+
+-- 2. Reserve stock for a cart: p_items = [{"product_id": "...", "quantity": 2}, ...]
+-- Raises INSUFFICIENT_STOCK:<product_id> (and takes nothing) if any line cannot be filled.
+CREATE OR REPLACE FUNCTION reserve_inventory(p_store_id UUID, p_items JSONB, p_ttl_seconds INTEGER DEFAULT 600)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_reservation_id UUID := gen_random_uuid();
+  v_expires_at TIMESTAMPTZ := NOW() + make_interval(secs => LEAST(GREATEST(p_ttl_seconds, 30), 3600));
+  v_line RECORD;
+  v_price DECIMAL(10, 2);
+  v_name TEXT;
+  v_items JSONB := '[]'::jsonb;
+BEGIN
+  IF p_items IS NULL OR jsonb_array_length(p_items) = 0 THEN
+    RAISE EXCEPTION 'EMPTY_CART';
+  END IF;
+
+  FOR v_line IN
+    SELECT (i->>'product_id')::UUID AS product_id, sum((i->>'quantity')::INTEGER) AS quantity
+      FROM jsonb_array_elements(p_items) AS i
+     GROUP BY 1
+     ORDER BY 1
+  LOOP
+    IF v_line.quantity IS NULL OR v_line.quantity <= 0 THEN
+      RAISE EXCEPTION 'INVALID_QUANTITY:%', v_line.product_id;
+    END IF;
+
+    UPDATE products
+       SET inventory_quantity = inventory_quantity - v_line.quantity,
+           updated_at = NOW()
+     WHERE id = v_line.product_id
+       AND store_id = p_store_id
+       AND status = 'active'
+       AND inventory_quantity >= v_line.quantity
+    RETURNING price, name INTO v_price, v_name;
+
+    IF NOT FOUND THEN
+      RAISE EXCEPTION 'INSUFFICIENT_STOCK:%', v_line.product_id;
+    END IF;
+
+    INSERT INTO inventory_reservations (reservation_id, store_id, product_id, quantity, unit_price, expires_at)
+    VALUES (v_reservation_id, p_store_id, v_line.product_id, v_line.quantity, v_price, v_expires_at);
+
+    v_items := v_items || jsonb_build_object(
+      'product_id', v_line.product_id, 'name', v_name,
+      'quantity', v_line.quantity, 'unit_price', v_price);
+  END LOOP;
+
+  RETURN jsonb_build_object(
+    'reservation_id', v_reservation_id,
+    'expires_at', v_expires_at,
+    'items', v_items,
+    'subtotal', (SELECT COALESCE(sum((x->>'unit_price')::DECIMAL * (x->>'quantity')::INTEGER), 0)
+                   FROM jsonb_array_elements(v_items) AS x));
+END;
+$$;
+
+-- 3. Turn a reservation (or, when p_reservation_id is NULL, a cart reserved on the spot)
+-- into an order with its items. Guest customers are matched/created by (store_id, email);
+-- a p_customer_id that is not a customer of p_store_id raises CUSTOMER_NOT_FOUND.
+CREATE OR REPLACE FUNCTION place_order(
+  p_store_id UUID,
+  p_reservation_id UUID DEFAULT NULL,
+  p_items JSONB DEFAULT NULL,
+  p_customer_id UUID DEFAULT NULL,
+  p_customer JSONB DEFAULT NULL,
+  p_shipping_address TEXT DEFAULT NULL
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_reservation_id UUID := p_reservation_id;
+  v_customer_id UUID := p_customer_id;
+  v_email TEXT := NULLIF(lower(btrim(p_customer->>'email')), '');
+  v_lines INTEGER;
+  v_unusable INTEGER;
+  v_total DECIMAL(10, 2);
+  v_order orders%ROWTYPE;
+BEGIN
+  IF v_reservation_id IS NULL THEN
+    v_reservation_id := (reserve_inventory(p_store_id, p_items) ->> 'reservation_id')::UUID;
+  END IF;
+
+  -- Lock the reservation so a concurrent place_order / sweeper cannot use it too
+  SELECT count(*),
+         count(*) FILTER (WHERE status <> 'active' OR expires_at < NOW()),
+         COALESCE(sum(quantity * unit_price), 0)
+    INTO v_lines, v_unusable, v_total
+    FROM (SELECT * FROM inventory_reservations
+           WHERE reservation_id = v_reservation_id AND store_id = p_store_id
+           ORDER BY product_id
+             FOR UPDATE) r;
+
+  IF v_lines = 0 THEN
+    RAISE EXCEPTION 'RESERVATION_NOT_FOUND';
+  ELSIF v_unusable > 0 THEN
+    RAISE EXCEPTION 'RESERVATION_EXPIRED';
+  END IF;
+
+  IF v_customer_id IS NOT NULL
+     AND NOT EXISTS (SELECT 1 FROM customers WHERE id = v_customer_id AND store_id = p_store_id) THEN
+    RAISE EXCEPTION 'CUSTOMER_NOT_FOUND';
+  END IF;
+
+  IF v_customer_id IS NULL AND v_email IS NOT NULL THEN
+    SELECT id INTO v_customer_id FROM customers WHERE store_id = p_store_id AND lower(email) = v_email LIMIT 1;
+    IF v_customer_id IS NULL THEN
+      INSERT INTO customers (store_id, first_name, email, phone)
+      VALUES (p_store_id, COALESCE(NULLIF(p_customer->>'name', ''), v_email), v_email, p_customer->>'phone')
+      ON CONFLICT (store_id, email) DO NOTHING
+      RETURNING id INTO v_customer_id;
+      IF v_customer_id IS NULL THEN
+        SELECT id INTO v_customer_id FROM customers WHERE store_id = p_store_id AND lower(email) = v_email LIMIT 1;
+      END IF;
+    END IF;
+  END IF;
+
+  INSERT INTO orders (store_id, customer_id, total_amount, status, payment_status, shipping_address)
+  VALUES (p_store_id, v_customer_id, v_total, 'pending', 'pending', p_shipping_address)
+  RETURNING * INTO v_order;
+
+  INSERT INTO order_items (order_id, product_id, store_id, quantity, unit_price)
+  SELECT v_order.id, product_id, store_id, quantity, unit_price
+    FROM inventory_reservations
+   WHERE reservation_id = v_reservation_id;
+
+  UPDATE inventory_reservations
+     SET status = 'consumed', order_id = v_order.id
+   WHERE reservation_id = v_reservation_id;
+
+  -- Re-read the order: the order_items trigger (order_list_keyset.sql) has set items_count
+  SELECT * INTO v_order FROM orders WHERE id = v_order.id;
+
+  RETURN jsonb_build_object(
+    'order', to_jsonb(v_order),
+    'items', (SELECT jsonb_agg(jsonb_build_object('product_id', product_id, 'quantity', quantity, 'unit_price', unit_price))
+                FROM inventory_reservations WHERE reservation_id = v_reservation_id));
+END;
+$$;
+
+-- 4. Give the stock of reservations back. Locks products in id order (same as
+-- reserve_inventory) and skips reservations another transaction is using.
+CREATE OR REPLACE FUNCTION _restock_reservations(p_ids UUID[])
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_line RECORD;
+  v_count INTEGER;
+BEGIN
+  UPDATE inventory_reservations SET status = 'released'
+   WHERE id = ANY(p_ids) AND status = 'active';
+  GET DIAGNOSTICS v_count = ROW_COUNT;
+
+  FOR v_line IN
+    SELECT product_id, sum(quantity) AS quantity
+      FROM inventory_reservations
+     WHERE id = ANY(p_ids)
+     GROUP BY product_id
+     ORDER BY product_id
+  LOOP
+    UPDATE products SET inventory_quantity = inventory_quantity + v_line.quantity, updated_at = NOW()
+     WHERE id = v_line.product_id;
+  END LOOP;
+  RETURN v_count;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION release_reservation(p_store_id UUID, p_reservation_id UUID)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  RETURN _restock_reservations(ARRAY(
+    SELECT id FROM inventory_reservations
+     WHERE reservation_id = p_reservation_id AND store_id = p_store_id AND status = 'active'
+     ORDER BY product_id
+       FOR UPDATE));
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION release_expired_reservations(p_limit INTEGER DEFAULT 500)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  RETURN _restock_reservations(ARRAY(
+    SELECT id FROM inventory_reservations
+     WHERE status = 'active' AND expires_at < NOW()
+     ORDER BY expires_at
+     LIMIT p_limit
+       FOR UPDATE SKIP LOCKED));
+END;
+$$;
+
+-- 5. The order list / customer stats triggers (order_list_keyset.sql,
+-- customer_order_stats.sql) pick up orders created here automatically.
+CREATE INDEX IF NOT EXISTS idx_order_items_product ON order_items(product_id);
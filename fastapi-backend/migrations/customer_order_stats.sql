@@ -0,0 +1,102 @@
+-- ============================================
+-- Customer Order Counters Migration
+-- Run this in your Supabase SQL Editor
+-- ============================================
+-- Keeps customers.total_orders / total_spent / last_order_at correct on every
+-- order insert, status/amount/customer change and delete, so the merchant
+-- customer list reads them directly instead of embedding orders(count).
+--
+-- An order counts towards its customer unless it is cancelled or refunded.
+-- Counters are updated by delta; last_order_at is only recomputed when the
+-- removed order was the customer's latest one.
+-- refresh_customer_stats() recomputes everything (repair / backfill), see
+-- scripts/backfill_customer_stats.py.
+
+-- 1. Incremental trigger
+CREATE OR REPLACE FUNCTION customer_order_stats_sync()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE')
+     AND OLD.customer_id IS NOT NULL
+     AND OLD.status NOT IN ('cancelled', 'refunded') THEN
+    UPDATE customers c SET
+      total_orders = GREATEST(COALESCE(c.total_orders, 0) - 1, 0),
+      total_spent = GREATEST(COALESCE(c.total_spent, 0) - COALESCE(OLD.total_amount, 0), 0),
+      last_order_at = CASE
+        WHEN c.last_order_at IS NULL OR c.last_order_at > OLD.created_at THEN c.last_order_at
+        ELSE (SELECT max(o.created_at) FROM orders o
+               WHERE o.store_id = OLD.store_id
+                 AND o.customer_id = OLD.customer_id
+                 AND o.id <> OLD.id
+                 AND o.status NOT IN ('cancelled', 'refunded'))
+      END,
+      updated_at = NOW()
+    WHERE c.id = OLD.customer_id;
+  END IF;
+
+  IF TG_OP IN ('INSERT', 'UPDATE')
+     AND NEW.customer_id IS NOT NULL
+     AND NEW.status NOT IN ('cancelled', 'refunded') THEN
+    UPDATE customers c SET
+      total_orders = COALESCE(c.total_orders, 0) + 1,
+      total_spent = COALESCE(c.total_spent, 0) + COALESCE(NEW.total_amount, 0),
+      last_order_at = GREATEST(c.last_order_at, NEW.created_at),
+      updated_at = NOW()
+    WHERE c.id = NEW.customer_id;
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_customer_order_stats ON orders;
+CREATE TRIGGER trg_customer_order_stats
+  AFTER INSERT OR DELETE OR UPDATE OF customer_id, status, total_amount, created_at ON orders
+  FOR EACH ROW EXECUTE FUNCTION customer_order_stats_sync();
+
+-- 2. Repair / backfill (all stores when p_store_id is NULL). Returns the number of customers changed.
+CREATE OR REPLACE FUNCTION refresh_customer_stats(p_store_id UUID DEFAULT NULL)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  changed INTEGER;
+BEGIN
+  WITH stats AS (
+    SELECT c.id,
+           count(o.id) AS n,
+           COALESCE(sum(o.total_amount), 0) AS spent,
+           max(o.created_at) AS last_at
+      FROM customers c
+      LEFT JOIN orders o
+        ON o.customer_id = c.id
+       AND o.store_id = c.store_id
+       AND o.status NOT IN ('cancelled', 'refunded')
+     WHERE p_store_id IS NULL OR c.store_id = p_store_id
+     GROUP BY c.id
+  )
+  UPDATE customers c SET
+    total_orders = s.n,
+    total_spent = s.spent,
+    last_order_at = s.last_at,
+    updated_at = NOW()
+  FROM stats s
+  WHERE c.id = s.id
+    AND (c.total_orders IS DISTINCT FROM s.n
+         OR c.total_spent IS DISTINCT FROM s.spent
+         OR c.last_order_at IS DISTINCT FROM s.last_at);
+  GET DIAGNOSTICS changed = ROW_COUNT;
+  RETURN changed;
+END;
+$$;
+
+SELECT refresh_customer_stats();
+
+-- 3. Sort indexes for the customer list (spend / order count / recency / newest)
+CREATE INDEX IF NOT EXISTS idx_customers_store_spent_id ON customers(store_id, total_spent DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_customers_store_orders_id ON customers(store_id, total_orders DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_customers_store_last_order_id ON customers(store_id, last_order_at DESC NULLS LAST, id DESC);
+CREATE INDEX IF NOT EXISTS idx_customers_store_created_id ON customers(store_id, created_at DESC, id DESC);
+
+ANALYZE customers;
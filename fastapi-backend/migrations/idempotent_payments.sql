@@ -0,0 +1,90 @@
+-- ============================================
+-- Idempotent Razorpay Payments Migration
+-- Run this in your Supabase SQL Editor
+-- ============================================
+-- Backs POST /payments/razorpay/verify (app/api/v1/endpoints/razorpay.py).
+--
+-- A Razorpay payment id is recorded at most once: a unique index on
+-- payments.razorpay_payment_id turns a repeated verify (client retry, double
+-- submit) into an ON CONFLICT no-op instead of a second "captured" row that
+-- would be counted twice in revenue.
+--
+-- record_subscription_payment() inserts the payment, upserts the store's
+-- subscription and activates the store in ONE transaction. A duplicate call
+-- changes nothing and reports duplicate = true. It is called both by the
+-- browser's verify request and by the payment webhook consumer
+-- (app/core/razorpay_webhooks.py), in whichever order they arrive.
+
+-- 1. user_id is recorded when the payer is logged in
+ALTER TABLE payments ADD COLUMN IF NOT EXISTS user_id UUID;
+
+-- 2. Remove duplicates left by earlier retries (keeps the first row of each payment)
+DELETE FROM payments p
+USING payments older
+WHERE p.razorpay_payment_id IS NOT NULL
+  AND p.razorpay_payment_id = older.razorpay_payment_id
+  AND (older.created_at, older.id::text) < (p.created_at, p.id::text);
+
+-- 3. One row per Razorpay payment (NULLs - manual payments - are not constrained)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_payments_razorpay_payment_id
+  ON payments (razorpay_payment_id);
+
+-- 4. Record a verified payment + subscription + store activation atomically
+CREATE OR REPLACE FUNCTION record_subscription_payment(
+  p_razorpay_payment_id TEXT,
+  p_store_id UUID,
+  p_user_id UUID,
+  p_plan_id UUID,
+  p_amount NUMERIC,
+  p_currency TEXT,
+  p_billing_cycle TEXT
+) RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_payment_id UUID;
+  v_period_end TIMESTAMPTZ;
+BEGIN
+  INSERT INTO payments (store_id, user_id, amount, currency, status, provider, razorpay_payment_id, type)
+  VALUES (p_store_id, p_user_id, p_amount, p_currency, 'captured', 'razorpay', p_razorpay_payment_id, 'subscription_fee')
+  ON CONFLICT (razorpay_payment_id) DO NOTHING
+  RETURNING id INTO v_payment_id;
+
+  IF v_payment_id IS NULL THEN
+    -- Already recorded by an earlier call. If that call did not know the store
+    -- (e.g. a webhook for an order without store notes) and this one does,
+    -- attach the store and apply the subscription now; otherwise it is a no-op.
+    UPDATE payments
+       SET store_id = p_store_id, user_id = COALESCE(user_id, p_user_id)
+     WHERE razorpay_payment_id = p_razorpay_payment_id
+       AND store_id IS NULL AND p_store_id IS NOT NULL
+    RETURNING id INTO v_payment_id;
+
+    IF v_payment_id IS NULL THEN
+      SELECT id INTO v_payment_id FROM payments WHERE razorpay_payment_id = p_razorpay_payment_id;
+      RETURN jsonb_build_object('paymentId', v_payment_id, 'duplicate', true, 'storeActivated', false);
+    END IF;
+  END IF;
+
+  IF p_store_id IS NULL THEN
+    -- New-user flow: the subscription is created during onboarding
+    RETURN jsonb_build_object('paymentId', v_payment_id, 'duplicate', false, 'storeActivated', false);
+  END IF;
+
+  v_period_end := NOW() + CASE WHEN p_billing_cycle = 'yearly' THEN INTERVAL '365 days' ELSE INTERVAL '30 days' END;
+
+  INSERT INTO subscriptions (store_id, plan_id, status, amount, billing_cycle, current_period_start, current_period_end)
+  VALUES (p_store_id, p_plan_id, 'active', p_amount, p_billing_cycle, NOW(), v_period_end)
+  ON CONFLICT (store_id) DO UPDATE SET
+    plan_id = EXCLUDED.plan_id,
+    status = EXCLUDED.status,
+    amount = EXCLUDED.amount,
+    billing_cycle = EXCLUDED.billing_cycle,
+    current_period_start = EXCLUDED.current_period_start,
+    current_period_end = EXCLUDED.current_period_end;
+
+  UPDATE stores SET status = 'active' WHERE id = p_store_id;
+
+  RETURN jsonb_build_object('paymentId', v_payment_id, 'duplicate', false, 'storeActivated', true);
+END;
+$$;
@@ -0,0 +1,28 @@
+-- ============================================
+-- Product Listing Performance Migration
+-- Run this in your Supabase SQL Editor
+-- ============================================
+-- Backs the keyset-paginated GET /store/products endpoint:
+--   * (store_id, sort column, id) indexes so every page is an index range scan
+--   * trigram indexes so name/SKU `ilike '%term%'` search does not scan the table
+--   * partial/filter indexes for the status, category and stock filters
+
+-- 1. Trigram support for substring search
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- 2. Keyset pagination indexes (one per sortable column)
+CREATE INDEX IF NOT EXISTS idx_products_store_created_id ON products(store_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_products_store_updated_id ON products(store_id, updated_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_products_store_name_id ON products(store_id, name, id);
+CREATE INDEX IF NOT EXISTS idx_products_store_price_id ON products(store_id, price, id);
+CREATE INDEX IF NOT EXISTS idx_products_store_inventory_id ON products(store_id, inventory_quantity, id);
+
+-- 3. Filters
+CREATE INDEX IF NOT EXISTS idx_products_store_status ON products(store_id, status);
+CREATE INDEX IF NOT EXISTS idx_products_store_category ON products(store_id, category_id);
+
+-- 4. Name / SKU search
+CREATE INDEX IF NOT EXISTS idx_products_name_trgm ON products USING GIN (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_products_sku_trgm ON products USING GIN (sku gin_trgm_ops);
+
+ANALYZE products;
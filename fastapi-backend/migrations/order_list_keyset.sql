@@ -0,0 +1,49 @@
+-- ============================================
+-- Order List Performance Migration
+-- Run this in your Supabase SQL Editor
+-- ============================================
+-- Backs the keyset-paginated GET /store/orders endpoint:
+--   * orders.items_count, maintained by a trigger on order_items, so the list
+--     no longer embeds every order's items just to count them
+--   * (store_id, [filter column,] created_at DESC, id DESC) indexes so every page
+--     (with or without a status / payment status / customer filter) is an index range scan
+
+-- 1. Stored item count
+ALTER TABLE orders ADD COLUMN IF NOT EXISTS items_count INTEGER NOT NULL DEFAULT 0;
+
+CREATE OR REPLACE FUNCTION order_items_count_sync()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    UPDATE orders SET items_count = items_count + 1 WHERE id = NEW.order_id;
+  END IF;
+  IF TG_OP IN ('DELETE', 'UPDATE') THEN
+    UPDATE orders SET items_count = GREATEST(items_count - 1, 0) WHERE id = OLD.order_id;
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_order_items_count ON order_items;
+CREATE TRIGGER trg_order_items_count
+  AFTER INSERT OR DELETE OR UPDATE OF order_id ON order_items
+  FOR EACH ROW EXECUTE FUNCTION order_items_count_sync();
+
+-- Backfill existing orders
+UPDATE orders o
+   SET items_count = c.n
+  FROM (SELECT order_id, count(*) AS n FROM order_items GROUP BY order_id) c
+ WHERE c.order_id = o.id
+   AND o.items_count IS DISTINCT FROM c.n;
+
+-- 2. Keyset indexes
+CREATE INDEX IF NOT EXISTS idx_orders_store_created_id ON orders(store_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_orders_store_status_created ON orders(store_id, status, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_orders_store_payment_created ON orders(store_id, payment_status, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_orders_store_customer_created ON orders(store_id, customer_id, created_at DESC, id DESC);
+-- Superseded by idx_orders_store_status_created (same leading columns)
+DROP INDEX IF EXISTS idx_orders_store_status;
+
+ANALYZE orders;
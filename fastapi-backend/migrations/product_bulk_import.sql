@@ -0,0 +1,13 @@
+-- ============================================
+-- Product Bulk Import Migration
+-- Run this in your Supabase SQL Editor
+-- ============================================
+-- POST /store/products/import upserts rows with on_conflict=(store_id, sku),
+-- which needs a unique index on exactly those columns.
+-- NULL SKUs stay allowed (and distinct), so products without a SKU are unaffected.
+
+-- 1. Find SKUs that are already duplicated within a store (fix these first, or the index will fail):
+-- SELECT store_id, sku, COUNT(*) FROM products WHERE sku IS NOT NULL GROUP BY store_id, sku HAVING COUNT(*) > 1;
+
+-- 2. Unique SKU per store
+CREATE UNIQUE INDEX IF NOT EXISTS uq_products_store_sku ON products(store_id, sku);
@@ -0,0 +1,152 @@
+-- ============================================
+-- Storefront Search Migration
+-- Run this in your Supabase SQL Editor
+-- ============================================
+-- Backs GET /s/live/{slug}/search:
+--   * products.search_vector (tsvector) + products.brand, kept in sync by a trigger
+--     on every product insert/update (brand lives in the description METADATA block)
+--   * a GIN index over (store_id, search_vector) so a search only touches one store
+--   * trigram word similarity on the name for typo tolerance ("snekers" -> "Sneakers")
+--   * search_products(): ranked, paginated hits plus category / brand / price-band facets
+--     in a single round trip
+-- Also adds trigram indexes for the merchant customer search (ilike '%term%').
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS btree_gin;
+
+-- 1. Search columns
+ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector TSVECTOR;
+ALTER TABLE products ADD COLUMN IF NOT EXISTS brand TEXT;
+
+CREATE OR REPLACE FUNCTION products_search_refresh()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  plain_description TEXT;
+  meta JSONB;
+BEGIN
+  plain_description := split_part(COALESCE(NEW.description, ''), '<!--METADATA:', 1);
+  BEGIN
+    meta := substring(NEW.description FROM '<!--METADATA:(.*)-->')::JSONB;
+  EXCEPTION WHEN others THEN
+    meta := NULL;  -- malformed metadata must never block a product write
+  END;
+  NEW.brand := NULLIF(meta->>'brand', '');
+
+  NEW.search_vector :=
+    setweight(to_tsvector('simple', COALESCE(NEW.name, '')), 'A') ||
+    setweight(to_tsvector('simple', COALESCE(NEW.sku, '')), 'A') ||
+    setweight(to_tsvector('simple', COALESCE(NEW.brand, '')), 'B') ||
+    setweight(to_tsvector('simple', plain_description), 'C');
+  RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_products_search_refresh ON products;
+CREATE TRIGGER trg_products_search_refresh
+  BEFORE INSERT OR UPDATE OF name, sku, description ON products
+  FOR EACH ROW EXECUTE FUNCTION products_search_refresh();
+
+-- Backfill existing rows (fires the trigger)
+UPDATE products SET name = name WHERE search_vector IS NULL;
+
+-- 2. Indexes
+CREATE INDEX IF NOT EXISTS idx_products_search ON products USING GIN (store_id, search_vector) WHERE status = 'active';
+CREATE INDEX IF NOT EXISTS idx_products_name_trgm ON products USING GIN (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_products_store_brand ON products(store_id, brand);
+
+CREATE INDEX IF NOT EXISTS idx_customers_first_name_trgm ON customers USING GIN (first_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_customers_email_trgm ON customers USING GIN (email gin_trgm_ops);
+
+-- 3. Search function
+-- Every whitespace/punctuation separated term is prefix-matched ("sne" -> "sneakers")
+-- and all terms must match. Products whose name is a close trigram match are
+-- included too, which tolerates typos. Facets are disjunctive: each facet is
+-- counted with every filter applied except its own.
+CREATE OR REPLACE FUNCTION search_products(
+  p_store_id UUID,
+  p_query TEXT DEFAULT NULL,
+  p_category_id UUID DEFAULT NULL,
+  p_brand TEXT DEFAULT NULL,
+  p_min_price NUMERIC DEFAULT NULL,
+  p_max_price NUMERIC DEFAULT NULL,
+  p_price_bands NUMERIC[] DEFAULT '{500,1000,2500,5000,10000}',
+  p_limit INT DEFAULT 24,
+  p_offset INT DEFAULT 0
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+STABLE
+AS $$
+DECLARE
+  q TSQUERY;
+  term TEXT := NULLIF(btrim(lower(p_query)), '');
+  result JSONB;
+BEGIN
+  IF term IS NOT NULL THEN
+    SELECT to_tsquery('simple', string_agg(quote_literal(t) || ':*', ' & '))
+      INTO q
+      FROM regexp_split_to_table(term, '[^[:alnum:]]+') AS t
+     WHERE t <> '';
+  END IF;
+
+  WITH matches AS (
+    SELECT p.id, p.name, p.slug, p.price, p.compare_at_price, p.images, p.category_id,
+           p.brand, p.inventory_quantity, p.created_at,
+           CASE WHEN term IS NULL THEN 0
+                ELSE COALESCE(ts_rank_cd(p.search_vector, q), 0) + word_similarity(term, p.name)
+           END AS rank
+      FROM products p
+     WHERE p.store_id = p_store_id
+       AND p.status = 'active'
+       AND (term IS NULL
+            OR (q IS NOT NULL AND p.search_vector @@ q)
+            OR term <% p.name)
+  ),
+  flagged AS (
+    SELECT m.*,
+           (p_category_id IS NULL OR m.category_id = p_category_id) AS in_category,
+           (p_brand IS NULL OR m.brand = p_brand) AS in_brand,
+           ((p_min_price IS NULL OR m.price >= p_min_price) AND
+            (p_max_price IS NULL OR m.price <= p_max_price)) AS in_price,
+           width_bucket(m.price, p_price_bands) AS band
+      FROM matches m
+  ),
+  hits AS (
+    SELECT * FROM flagged
+     WHERE in_category AND in_brand AND in_price
+     ORDER BY rank DESC, created_at DESC, id
+     LIMIT p_limit OFFSET p_offset
+  )
+  SELECT jsonb_build_object(
+    'total', (SELECT count(*) FROM flagged WHERE in_category AND in_brand AND in_price),
+    'hits', COALESCE((SELECT jsonb_agg(to_jsonb(h) - 'in_category' - 'in_brand' - 'in_price' - 'band'
+                                       ORDER BY h.rank DESC, h.created_at DESC, h.id) FROM hits h), '[]'::jsonb),
+    'categories', COALESCE((
+      SELECT jsonb_agg(jsonb_build_object('id', f.category_id, 'name', c.name, 'count', f.n) ORDER BY f.n DESC)
+        FROM (SELECT category_id, count(*) AS n FROM flagged
+               WHERE in_brand AND in_price AND category_id IS NOT NULL
+               GROUP BY category_id) f
+        JOIN categories c ON c.id = f.category_id), '[]'::jsonb),
+    'brands', COALESCE((
+      SELECT jsonb_agg(jsonb_build_object('name', brand, 'count', n) ORDER BY n DESC)
+        FROM (SELECT brand, count(*) AS n FROM flagged
+               WHERE in_category AND in_price AND brand IS NOT NULL
+               GROUP BY brand) b), '[]'::jsonb),
+    'price_bands', COALESCE((
+      SELECT jsonb_agg(jsonb_build_object(
+               'from', CASE WHEN band = 0 THEN 0 ELSE p_price_bands[band] END,
+               'to', CASE WHEN band >= array_length(p_price_bands, 1) THEN NULL ELSE p_price_bands[band + 1] END,
+               'count', n) ORDER BY band)
+        FROM (SELECT band, count(*) AS n FROM flagged
+               WHERE in_category AND in_brand
+               GROUP BY band) pb), '[]'::jsonb)
+  ) INTO result;
+
+  RETURN result;
+END;
+$$;
+
+ANALYZE products;
+ANALYZE customers;
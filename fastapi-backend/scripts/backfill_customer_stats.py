@@ -0,0 +1,33 @@
+import sys
+import os
+
+# Fix path before imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.supabase_client import supabase_bulk
+
+def backfill_customer_stats(slug=None):
+    """
+    Recompute customers.total_orders / total_spent / last_order_at from orders.
+    The trigger from migrations/customer_order_stats.sql keeps them current;
+    run this after bulk data fixes or to repair drift.
+
+    Usage: python scripts/backfill_customer_stats.py [store-slug]
+    """
+    store_id = None
+    if slug:
+        store_res = supabase_bulk.table("stores").select("id").eq("slug", slug).limit(1).execute()
+        if not store_res.data:
+            print(f"❌ Store '{slug}' not found!")
+            return
+        store_id = store_res.data[0]["id"]
+
+    print(f"🔄 Recomputing customer order stats for {slug or 'all stores'}...")
+    try:
+        res = supabase_bulk.rpc("refresh_customer_stats", {"p_store_id": store_id}).execute()
+        print(f"✅ Done. {res.data or 0} customers corrected.")
+    except Exception as e:
+        print(f"❌ Backfill failed: {e}")
+
+if __name__ == "__main__":
+    backfill_customer_stats(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,95 @@
+"""
+Flash-sale load test for the storefront checkout.
+
+Fires `--clients` concurrent checkouts for the same product against a running
+API and verifies that no stock was oversold:
+
+    successful orders * quantity == stock before - stock after
+
+Usage:
+    python scripts/checkout_load_test.py --slug my-store --product <product-id> \
+        [--base-url http://localhost:8000] [--clients 200] [--quantity 1] [--stock 50]
+
+`--stock` resets the product's inventory before the run (needs the service key
+in .env); without it the current stock is used.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import httpx
+
+# Fix path before imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.supabase_client import supabase_admin
+
+
+def get_stock(product_id):
+    res = supabase_admin.table("products").select("inventory_quantity").eq("id", product_id).single().execute()
+    return res.data["inventory_quantity"]
+
+
+async def checkout(client, url, product_id, quantity, n, latencies, outcomes):
+    body = {
+        "items": [{"productId": product_id, "quantity": quantity}],
+        "customer": {"name": f"Load Test {n}", "email": f"loadtest+{n}@example.com"},
+        "shippingAddress": "Load test",
+    }
+    started = time.perf_counter()
+    try:
+        res = await client.post(url, json=body)
+        status = res.status_code
+    except Exception as e:
+        status = type(e).__name__
+    latencies.append((time.perf_counter() - started) * 1000)
+    outcomes[status] = outcomes.get(status, 0) + 1
+
+
+async def run(args):
+    if args.stock is not None:
+        supabase_admin.table("products").update({"inventory_quantity": args.stock}).eq("id", args.product).execute()
+    before = get_stock(args.product)
+    print(f"📦 Stock before: {before}  |  {args.clients} clients x {args.quantity} unit(s)")
+
+    url = f"{args.base_url.rstrip('/')}/api/v1/s/live/{args.slug}/checkout"
+    latencies, outcomes = [], {}
+    limits = httpx.Limits(max_connections=args.clients, max_keepalive_connections=args.clients)
+    async with httpx.AsyncClient(timeout=60, limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*[
+            checkout(client, url, args.product, args.quantity, n, latencies, outcomes)
+            for n in range(args.clients)
+        ])
+        elapsed = time.perf_counter() - started
+
+    after = get_stock(args.product)
+    placed = outcomes.get(201, 0)
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))]
+
+    print(f"⏱️  {elapsed:.2f}s total, {args.clients / elapsed:.0f} req/s")
+    print(f"   latency ms: p50={statistics.median(latencies):.0f} p95={pct(0.95):.0f} p99={pct(0.99):.0f} max={latencies[-1]:.0f}")
+    print(f"   outcomes: {outcomes}")
+    print(f"📦 Stock after: {after}")
+
+    sold = before - after
+    if sold == placed * args.quantity and after >= 0:
+        print(f"✅ Consistent: {placed} orders placed, {sold} units sold, no oversell")
+        return 0
+    print(f"❌ MISMATCH: {placed} orders x {args.quantity} != {sold} units taken from stock")
+    return 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hammer one product through the checkout endpoint")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--slug", required=True, help="Store slug")
+    parser.add_argument("--product", required=True, help="Product id")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--quantity", type=int, default=1)
+    parser.add_argument("--stock", type=int, default=None, help="Reset inventory to this value first")
+    sys.exit(asyncio.run(run(parser.parse_args())))
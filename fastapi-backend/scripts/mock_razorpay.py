@@ -0,0 +1,155 @@
+"""
+Local stand-in for the Razorpay REST API (orders and payments), for tests and
+load runs of the payment endpoints without touching the real gateway.
+
+Usage:
+    python scripts/mock_razorpay.py [--port 9100] [--latency 0.05] [--error-rate 0.0]
+
+then run the API with
+    RAZORPAY_API_URL=http://127.0.0.1:9100/v1 RAZORPAY_KEY_ID=rzp_live_mock RAZORPAY_KEY_SECRET=<secret>
+
+Failure injection (also adjustable at runtime with POST /_control):
+    --latency      seconds added to every response
+    --error-rate   fraction of requests answered with 503
+    --hang-rate    fraction of requests that never answer (exercises client timeouts)
+
+POST /_pay/{order_id} simulates a successful checkout: it creates a captured
+payment and returns the payment id and checkout signature to pass to
+/payments/razorpay/verify.
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import os
+import random
+import secrets
+import sys
+import time
+
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
+
+# Fix path before imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+
+app = FastAPI(title="Mock Razorpay")
+
+CONTROL = {"latency": 0.0, "error_rate": 0.0, "hang_rate": 0.0}
+STATS = {"requests": 0, "errors": 0, "hangs": 0}
+ORDERS = {}
+PAYMENTS = {}
+
+
+@app.middleware("http")
+async def inject_faults(request: Request, call_next):
+    if request.url.path.startswith("/_"):
+        return await call_next(request)
+    STATS["requests"] += 1
+    if CONTROL["latency"]:
+        await asyncio.sleep(CONTROL["latency"])
+    roll = random.random()
+    if roll < CONTROL["hang_rate"]:
+        STATS["hangs"] += 1
+        await asyncio.sleep(3600)
+    if roll < CONTROL["hang_rate"] + CONTROL["error_rate"]:
+        STATS["errors"] += 1
+        return _error(503, "Injected failure", "SERVER_ERROR")
+    return await call_next(request)
+
+
+def _error(status_code: int, description: str, code: str = "BAD_REQUEST_ERROR") -> JSONResponse:
+    # Razorpay's error body shape
+    return JSONResponse({"error": {"code": code, "description": description}}, status_code=status_code)
+
+
+def _new_id(prefix: str) -> str:
+    return f"{prefix}_{secrets.token_hex(7)}"
+
+
+@app.post("/v1/orders")
+async def create_order(request: Request):
+    body = await request.json()
+    if not isinstance(body.get("amount"), int) or body["amount"] < 100:
+        return _error(400, "The amount must be atleast INR 1.00")
+    order = {
+        "id": _new_id("order"),
+        "entity": "order",
+        "amount": body["amount"],
+        "amount_paid": 0,
+        "amount_due": body["amount"],
+        "currency": body.get("currency", "INR"),
+        "receipt": body.get("receipt"),
+        "status": "created",
+        "notes": body.get("notes") or [],
+        "created_at": int(time.time()),
+    }
+    ORDERS[order["id"]] = order
+    return order
+
+
+@app.get("/v1/orders/{order_id}")
+async def fetch_order(order_id: str):
+    if order_id not in ORDERS:
+        return _error(400, "The id provided does not exist")
+    return ORDERS[order_id]
+
+
+@app.get("/v1/payments/{payment_id}")
+async def fetch_payment(payment_id: str):
+    if payment_id not in PAYMENTS:
+        return _error(400, "The id provided does not exist")
+    return PAYMENTS[payment_id]
+
+
+@app.post("/_pay/{order_id}")
+async def pay_order(order_id: str):
+    order = ORDERS.get(order_id)
+    if not order:
+        raise HTTPException(status_code=404, detail="Unknown order")
+    payment = {
+        "id": _new_id("pay"),
+        "entity": "payment",
+        "amount": order["amount"],
+        "currency": order["currency"],
+        "status": "captured",
+        "order_id": order_id,
+        "notes": order["notes"],
+        "created_at": int(time.time()),
+    }
+    PAYMENTS[payment["id"]] = payment
+    order.update(status="paid", amount_paid=order["amount"], amount_due=0)
+    signature = hmac.new(
+        (settings.RAZORPAY_KEY_SECRET or "").encode(), f"{order_id}|{payment['id']}".encode(), hashlib.sha256
+    ).hexdigest()
+    return {"razorpay_order_id": order_id, "razorpay_payment_id": payment["id"], "razorpay_signature": signature}
+
+
+@app.post("/_control")
+async def control(request: Request):
+    CONTROL.update({k: float(v) for k, v in (await request.json()).items() if k in CONTROL})
+    return {"control": CONTROL, "stats": STATS}
+
+
+@app.get("/_stats")
+async def stats():
+    return {"control": CONTROL, "stats": STATS, "orders": len(ORDERS), "payments": len(PAYMENTS)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--hang-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    CONTROL.update(latency=args.latency, error_rate=args.error_rate, hang_rate=args.hang_rate)
+    print(f"💳 Mock Razorpay on http://127.0.0.1:{args.port}/v1")
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -25,7 +25,7 @@ async def main():
             
         print(f"🚀 Starting build for {slug}...")
         try:
-            await process_theme_build(slug, zip_path, extract_dir)
+            process_theme_build(slug, zip_path, extract_dir)
             print(f"✅ Finished {slug}")
         except Exception as e:
             print(f"❌ Failed {slug}: {e}")
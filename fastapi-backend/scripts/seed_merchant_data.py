@@ -7,13 +7,13 @@ from datetime import datetime, timedelta
 # Add parent directory to path to import app modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.core.supabase_client import supabase_admin
+from app.core.supabase_client import supabase_bulk
 
 def seed_store_data(store_slug: str):
     print(f"🚀 Seeding data for store: {store_slug}")
     
     # 1. Get store ID
-    store_res = supabase_admin.table("stores").select("id").eq("slug", store_slug).single().execute()
+    store_res = supabase_bulk.table("stores").select("id").eq("slug", store_slug).single().execute()
     if not store_res.data:
         print(f"❌ Store not found: {store_slug}")
         return
@@ -32,7 +32,7 @@ def seed_store_data(store_slug: str):
     cat_ids = []
     for cat in categories:
         cat["store_id"] = store_id
-        res = supabase_admin.table("categories").insert(cat).execute()
+        res = supabase_bulk.table("categories").insert(cat).execute()
         if res.data:
             cat_ids.append(res.data[0]["id"])
             
@@ -57,7 +57,7 @@ def seed_store_data(store_slug: str):
         prod["store_id"] = store_id
         prod["status"] = "active"
         prod["inventory_quantity"] = random.randint(50, 200)
-        res = supabase_admin.table("products").insert(prod).execute()
+        res = supabase_bulk.table("products").insert(prod).execute()
         if res.data:
             prod_ids.append(res.data[0])
             
@@ -73,7 +73,7 @@ def seed_store_data(store_slug: str):
     cust_ids = []
     for cust in customers:
         cust["store_id"] = store_id
-        res = supabase_admin.table("customers").insert(cust).execute()
+        res = supabase_bulk.table("customers").insert(cust).execute()
         if res.data:
             cust_ids.append(res.data[0]["id"])
             
@@ -105,7 +105,7 @@ def seed_store_data(store_slug: str):
             "created_at": order_date
         }
         
-        order_res = supabase_admin.table("orders").insert(order).execute()
+        order_res = supabase_bulk.table("orders").insert(order).execute()
         if order_res.data:
             order_id = order_res.data[0]["id"]
             
@@ -120,7 +120,7 @@ def seed_store_data(store_slug: str):
                     "total": item["price"], # quantity is 1
                     "store_id": store_id
                 }
-                supabase_admin.table("order_items").insert(order_item).execute()
+                supabase_bulk.table("order_items").insert(order_item).execute()
                 
     print("✅ Seeding completed successfully!")
 
@@ -684,7 +684,7 @@ export default function page() {
                   {(data?.latest_products || []).map((p, i) => (
                     <div key={i} className="flex items-center gap-3">
                       {p.image ? (
-                        <img src={p.image} alt={p.name} className="h-12 w-12 rounded-lg object-cover bg-slate-100" />
+                        <img src={p.imageVariants?.thumbnail || p.image} alt={p.name} className="h-12 w-12 rounded-lg object-cover bg-slate-100" />
                       ) : (
                         <div className="h-12 w-12 rounded-lg bg-slate-100 grid place-items-center">
                           <Icon name="Package" size={20} className="text-slate-400" />
@@ -26,6 +26,8 @@ import {
 import Icon from "../../../../components/AppIcon";
 import { MerchantAPI } from "../../../../lib/merchant-api";
 import Loader from "../../../../components/Loader";
+import { useKeysetPages } from "../../../../hooks/useKeysetPages";
+import { useDebouncedValue } from "../../../../hooks/useDebouncedValue";
 
 const statusToChip = (s: Order["status"]) => {
   switch (s) {
@@ -86,64 +88,75 @@ type Order = {
   status: "pending" | "completed" | "cancelled" | "refunded";
 };
 
+const PAGE_SIZE = 50;
+
+type OrderTab = "all" | Order["status"];
+
+// Server-side status filter per tab ("processing" orders are shown as pending)
+const TAB_STATUS: Record<OrderTab, string | undefined> = {
+  all: undefined,
+  pending: "pending,processing",
+  completed: "completed",
+  cancelled: "cancelled",
+  refunded: "refunded",
+};
+
+const toOrder = (o: any): Order => ({
+  id: o.order_number || o.id,
+  customer: {
+    name: o.customer_name || "Unknown Customer",
+    email: o.customer_email || "no-email@example.com"
+  },
+  date: o.created_at,
+  items: o.items_count ?? 0,
+  price: Number(o.total_amount),
+  status: (o.status?.toLowerCase() === "processing" ? "pending" : o.status?.toLowerCase()) as Order["status"]
+});
+
+const fetchOrders = (params: Record<string, any>) =>
+  MerchantAPI.orders
+    .list(params)
+    .then((res: any) => ({ ...res, data: (res.data || []).map(toOrder) }));
+
 export default function Page() {
-  const [tab, setTab] = useState<"all" | Order["status"]>("all");
+  const [tab, setTab] = useState<OrderTab>("all");
   const [query, setQuery] = useState("");
   const [start, setStart] = useState("");
   const [end, setEnd] = useState("");
-  const [rows, setRows] = useState<Order[]>([]);
-  const [loading, setLoading] = useState(true);
-
-  React.useEffect(() => {
-    setLoading(true);
-    MerchantAPI.orders.list()
-      .then((res: any) => {
-        if (res.success && res.data) {
-          const formatted = res.data.map((o: any) => ({
-            id: o.order_number || o.id,
-            customer: {
-              name: o.customer_name || "Unknown Customer",
-              email: o.customer_email || "no-email@example.com"
-            },
-            date: o.created_at,
-            items: 1, // Simplified for now
-            price: Number(o.total_amount),
-            status: (o.status?.toLowerCase() === "processing" ? "pending" : o.status?.toLowerCase()) as Order["status"]
-          }));
-          setRows(formatted);
-        }
-      })
-      .catch(err => console.error("Orders fetch error:", err))
-      .finally(() => setLoading(false));
-  }, []);
+  const [counts, setCounts] = useState<Record<OrderTab, number | null>>({
+    all: null, pending: null, completed: null, cancelled: null, refunded: null
+  });
 
-  const counts = useMemo(() => {
-    return rows.reduce(
-      (acc, r) => {
-        acc.all += 1;
-        acc[r.status] += 1;
-        return acc;
-      },
-      { all: 0, pending: 0, completed: 0, cancelled: 0, refunded: 0 }
-    );
-  }, [rows]);
+  // Search and the date range run on the server (whole UTC days, as shown in the table)
+  const search = useDebouncedValue(query.trim());
+  const filters = useMemo(() => {
+    const f: Record<string, any> = {};
+    if (search) f.search = search;
+    if (start) f.dateFrom = `${start}T00:00:00Z`;
+    if (end) f.dateTo = `${end}T23:59:59.999Z`;
+    return f;
+  }, [search, start, end]);
+  const listParams = useMemo(
+    () => (TAB_STATUS[tab] ? { ...filters, status: TAB_STATUS[tab] } : filters),
+    [filters, tab]
+  );
+  const { rows, setRows, loading, loaded, page, hasNext, hasPrev, next, prev } =
+    useKeysetPages<Order>(fetchOrders, listParams, PAGE_SIZE);
 
-  const filtered = useMemo(() => {
-    const q = query.trim().toLowerCase();
-    return rows.filter((r) => {
-      const byTab = tab === "all" ? true : r.status === tab;
-      const byQuery = !q
-        ? true
-        : [r.id, r.customer.name, r.customer.email]
-          .join(" ")
-          .toLowerCase()
-          .includes(q);
-      const dateOnly = (iso: string) => iso.slice(0, 10);
-      const byStart = start ? dateOnly(r.date) >= start : true;
-      const byEnd = end ? dateOnly(r.date) <= end : true;
-      return byTab && byQuery && byStart && byEnd;
+  useEffect(() => {
+    let stale = false;
+    (Object.keys(TAB_STATUS) as OrderTab[]).forEach((t) => {
+      const status = TAB_STATUS[t];
+      MerchantAPI.orders.count(status ? { ...filters, status } : filters)
+        .then((res: any) => {
+          if (!stale && res.success) setCounts((c) => ({ ...c, [t]: res.data?.total ?? 0 }));
+        })
+        .catch(err => console.error("Order count error:", err));
     });
-  }, [rows, tab, query, start, end]);
+    return () => {
+      stale = true;
+    };
+  }, [filters]);
 
   const [menuEl, setMenuEl] = useState<null | HTMLElement>(null);
   const openMenu = (e: React.MouseEvent<HTMLButtonElement>) =>
@@ -152,11 +165,12 @@ export default function Page() {
 
   // Selection for bulk actions
   const [selectedIds, setSelectedIds] = useState<string[]>([]);
+  useEffect(() => setSelectedIds([]), [listParams, page]);
   const isAllSelected =
-    filtered.length > 0 && selectedIds.length === filtered.length;
+    rows.length > 0 && selectedIds.length === rows.length;
   const isIndeterminate = selectedIds.length > 0 && !isAllSelected;
   const toggleAll = (checked: boolean) => {
-    setSelectedIds(checked ? filtered.map((r) => r.id) : []);
+    setSelectedIds(checked ? rows.map((r) => r.id) : []);
   };
   const toggleOne = (id: string, checked: boolean) => {
     setSelectedIds((prev) =>
@@ -164,7 +178,7 @@ export default function Page() {
     );
   };
 
-  if (loading) return <Loader />;
+  if (!loaded) return <Loader />;
 
   const bulkDelete = () => {
     setRows((prev) => prev.filter((r) => !selectedIds.includes(r.id)));
@@ -188,7 +202,7 @@ export default function Page() {
       "Price",
       "Status",
     ];
-    const lines = filtered
+    const lines = rows
       .filter((r) => selectedIds.includes(r.id))
       .map((r) =>
         [
@@ -234,13 +248,13 @@ export default function Page() {
                   value="all"
                   icon={<Icon name="List" />}
                   iconPosition="start"
-                  label={`All ${counts.all}`}
+                  label={`All ${counts.all ?? ""}`}
                 />
                 <Tab
                   value="pending"
                   icon={<Icon name="Clock" className="text-amber-600" />}
                   iconPosition="start"
-                  label={`Pending ${counts.pending}`}
+                  label={`Pending ${counts.pending ?? ""}`}
                 />
                 <Tab
                   value="completed"
@@ -248,19 +262,19 @@ export default function Page() {
                     <Icon name="CheckCircle2" className="text-emerald-600" />
                   }
                   iconPosition="start"
-                  label={`Completed ${counts.completed}`}
+                  label={`Completed ${counts.completed ?? ""}`}
                 />
                 <Tab
                   value="cancelled"
                   icon={<Icon name="XCircle" className="text-rose-600" />}
                   iconPosition="start"
-                  label={`Cancelled ${counts.cancelled}`}
+                  label={`Cancelled ${counts.cancelled ?? ""}`}
                 />
                 <Tab
                   value="refunded"
                   icon={<Icon name="RotateCcw" className="text-slate-600" />}
                   iconPosition="start"
-                  label={`Refunded ${counts.refunded}`}
+                  label={`Refunded ${counts.refunded ?? ""}`}
                 />
               </Tabs>
             </div>
@@ -394,7 +408,7 @@ export default function Page() {
                 </TableRow>
               </TableHead>
               <TableBody>
-                {filtered.map((r) => (
+                {rows.map((r) => (
                   <TableRow key={r.id} hover>
                     <TableCell padding="checkbox">
                       <Checkbox
@@ -441,15 +455,18 @@ export default function Page() {
 
             <div className="flex items-center justify-end mt-3 text-sm text-gray-600">
               <div className="flex items-center gap-4">
-                <div>Rows per page: 5</div>
+                <div>Rows per page: {PAGE_SIZE}</div>
                 <div>
-                  1–{Math.min(5, filtered.length)} of {filtered.length}
+                  {rows.length > 0
+                    ? `${(page - 1) * PAGE_SIZE + 1}–${(page - 1) * PAGE_SIZE + rows.length}`
+                    : "0"}
+                  {counts[tab] !== null ? ` of ${counts[tab]}` : ""}
                 </div>
                 <div className="flex gap-1">
-                  <IconButton size="small">
+                  <IconButton size="small" disabled={!hasPrev || loading} onClick={prev}>
                     <Icon name="ChevronLeft" />
                   </IconButton>
-                  <IconButton size="small">
+                  <IconButton size="small" disabled={!hasNext || loading} onClick={next}>
                     <Icon name="ChevronRight" />
                   </IconButton>
                 </div>
@@ -21,6 +21,8 @@ import Link from "next/link";
 import Icon from "../../../../components/AppIcon";
 import { MerchantAPI } from "../../../../lib/merchant-api";
 import Loader from "../../../../components/Loader";
+import { useKeysetPages } from "../../../../hooks/useKeysetPages";
+import { useDebouncedValue } from "../../../../hooks/useDebouncedValue";
 
 type Row = {
   id: string;
@@ -36,76 +38,101 @@ type Row = {
   status?: string;
 };
 
+const PAGE_SIZE = 50;
+
+const SORTS: Record<string, { label: string; sort: string; order: "asc" | "desc" }> = {
+  newest: { label: "Newest", sort: "created_at", order: "desc" },
+  name: { label: "Name (A-Z)", sort: "name", order: "asc" },
+  priceAsc: { label: "Price: Low to High", sort: "price", order: "asc" },
+  priceDesc: { label: "Price: High to Low", sort: "price", order: "desc" },
+};
+
+const toRow = (p: any): Row => ({
+  id: p.id,
+  name: p.name,
+  category: p.category_name || "Uncategorized",
+  brand: p.brand || "Generic",
+  price: Number(p.price),
+  published: p.status === "active",
+  featured: p.is_featured,
+  trending: p.is_trending,
+  onSale: !!p.compare_at_price,
+  image: p.imageVariants?.[0]?.thumbnail || p.images?.[0] || ""
+});
+
+const fetchProducts = (params: Record<string, any>) =>
+  MerchantAPI.products
+    .list(params)
+    .then((res: any) => ({ ...res, data: (res.data || []).map(toRow) }));
+
 export default function Page() {
   const [query, setQuery] = useState("");
-  const [rows, setRows] = useState<Row[]>([]);
-  const [loading, setLoading] = useState(true);
-  const [brandFilter, setBrandFilter] = useState("");
   const [categoryFilter, setCategoryFilter] = useState("");
+  const [brandFilter, setBrandFilter] = useState("");
   const [minPrice, setMinPrice] = useState("");
   const [maxPrice, setMaxPrice] = useState("");
+  const [sortKey, setSortKey] = useState("newest");
+  const [categories, setCategories] = useState<{ id: string; name: string }[]>([]);
+  const [brands, setBrands] = useState<string[]>([]);
+  const [total, setTotal] = useState<number | null>(null);
   const [selectedIds, setSelectedIds] = useState<string[]>([]);
 
-  React.useEffect(() => {
-    setLoading(true);
-    MerchantAPI.products.list()
+  // Search, filters and sort run on the server; only the current page is held here
+  const search = useDebouncedValue(query.trim());
+  const min = useDebouncedValue(minPrice.trim());
+  const max = useDebouncedValue(maxPrice.trim());
+  const filters = useMemo(() => {
+    const f: Record<string, any> = {};
+    if (search) f.search = search;
+    if (categoryFilter) f.categoryId = categoryFilter;
+    if (brandFilter) f.brand = brandFilter;
+    if (min && !isNaN(Number(min))) f.minPrice = Number(min);
+    if (max && !isNaN(Number(max))) f.maxPrice = Number(max);
+    return f;
+  }, [search, categoryFilter, brandFilter, min, max]);
+  const listParams = useMemo(
+    () => ({ ...filters, sort: SORTS[sortKey].sort, order: SORTS[sortKey].order }),
+    [filters, sortKey]
+  );
+  const { rows, setRows, loading, loaded, page, hasNext, hasPrev, next, prev } =
+    useKeysetPages<Row>(fetchProducts, listParams, PAGE_SIZE);
+
+  useEffect(() => {
+    MerchantAPI.categories.list()
       .then((res: any) => {
         if (res.success && res.data) {
-          const formatted = res.data.map((p: any) => ({
-            id: p.id,
-            name: p.name,
-            category: p.category_name || "Uncategorized",
-            brand: p.brand || "Generic",
-            price: Number(p.price),
-            published: p.status === "active",
-            featured: p.is_featured,
-            trending: p.is_trending,
-            onSale: !!p.compare_at_price,
-            image: p.images?.[0] || ""
-          }));
-          setRows(formatted);
+          setCategories(res.data.map((c: any) => ({ id: c.id, name: c.name })));
         }
       })
-      .catch(err => console.error("Products fetch error:", err))
-      .finally(() => setLoading(false));
+      .catch(err => console.error("Categories fetch error:", err));
+    MerchantAPI.brands.list({ limit: 100 })
+      .then((res: any) => setBrands((res.items || []).map((b: any) => b.name)))
+      .catch(err => console.error("Brands fetch error:", err));
   }, []);
 
-  const filtered = useMemo(() => {
-    const q = query.trim().toLowerCase();
-    const inText = (r: Row) =>
-      [r.name, r.category, r.brand].join(" ").toLowerCase().includes(q);
-    const inBrand = (r: Row) => (brandFilter ? r.brand === brandFilter : true);
-    const inCat = (r: Row) =>
-      categoryFilter ? r.category === categoryFilter : true;
-    const inPrice = (r: Row) => {
-      const min = minPrice ? Number(minPrice) : -Infinity;
-      const max = maxPrice ? Number(maxPrice) : Infinity;
-      return r.price >= min && r.price <= max;
+  useEffect(() => {
+    let stale = false;
+    setTotal(null);
+    MerchantAPI.products.count(filters)
+      .then((res: any) => {
+        if (!stale && res.success) setTotal(res.data?.total ?? 0);
+      })
+      .catch(err => console.error("Product count error:", err));
+    return () => {
+      stale = true;
     };
-    return rows.filter(
-      (r) => inText(r) && inBrand(r) && inCat(r) && inPrice(r)
-    );
-  }, [rows, query, brandFilter, categoryFilter, minPrice, maxPrice]);
-
-  const brands = useMemo(
-    () => Array.from(new Set(rows.map((r) => r.brand))),
-    [rows]
-  );
-  const categories = useMemo(
-    () => Array.from(new Set(rows.map((r) => r.category))),
-    [rows]
-  );
+  }, [filters]);
 
   const allSelected =
-    filtered.length > 0 && filtered.every((r) => selectedIds.includes(r.id));
+    rows.length > 0 && rows.every((r) => selectedIds.includes(r.id));
   const toggleSelectAll = (checked: boolean) => {
     if (checked)
       setSelectedIds(
-        Array.from(new Set([...selectedIds, ...filtered.map((r) => r.id)]))
+        Array.from(new Set([...selectedIds, ...rows.map((r) => r.id)]))
       );
     else
       setSelectedIds((prev) =>
-        prev.filter((id) => !filtered.some((r) => r.id === id))
+        prev.filter((id) => !rows.some((r) => r.id === id))
       );
   };
   const toggleSelect = (id: string, checked: boolean) =>
@@ -113,7 +140,7 @@ export default function Page() {
       checked ? [...prev, id] : prev.filter((x) => x !== id)
     );
 
-  if (loading) return <Loader />;
+  if (!loaded) return <Loader />;
 
   return (
     <ManagerLayout title="Product Management">
@@ -163,7 +190,7 @@ export default function Page() {
           sx={{ border: "1px solid #e2e8f0", borderRadius: 2 }}
         >
           <CardContent>
-            <div className="grid grid-cols-1 md:grid-cols-5 gap-3">
+            <div className="grid grid-cols-1 md:grid-cols-6 gap-3">
               <TextField
                 size="small"
                 label="Min Price"
@@ -186,6 +213,19 @@ export default function Page() {
                   ),
                 }}
               />
+              <TextField
+                size="small"
+                label="Sort by"
+                select
+                value={sortKey}
+                onChange={(e) => setSortKey(e.target.value)}
+              >
+                {Object.entries(SORTS).map(([key, s]) => (
+                  <MenuItem key={key} value={key}>
+                    {s.label}
+                  </MenuItem>
+                ))}
+              </TextField>
               <TextField
                 size="small"
                 label="Brand"
@@ -209,8 +249,8 @@ export default function Page() {
               >
                 <MenuItem value="">All</MenuItem>
                 {categories.map((c) => (
-                  <MenuItem key={c} value={c}>
-                    {c}
+                  <MenuItem key={c.id} value={c.id}>
+                    {c.name}
                   </MenuItem>
                 ))}
               </TextField>
@@ -294,7 +334,7 @@ export default function Page() {
                 </TableRow>
               </TableHead>
               <TableBody>
-                {filtered.length === 0 ? (
+                {rows.length === 0 ? (
                   <TableRow>
                     <TableCell colSpan={10}>
                       <div className="py-16 grid place-items-center text-center">
@@ -324,7 +364,7 @@ export default function Page() {
                     </TableCell>
                   </TableRow>
                 ) : (
-                  filtered.map((r) => (
+                  rows.map((r) => (
                     <TableRow key={r.id} hover>
                       <TableCell padding="checkbox">
                         <input
@@ -438,6 +478,22 @@ export default function Page() {
                 )}
               </TableBody>
             </Table>
+            <div className="flex items-center justify-between pt-4">
+              <Typography variant="caption" color="text.secondary">
+                {rows.length > 0
+                  ? `${(page - 1) * PAGE_SIZE + 1}-${(page - 1) * PAGE_SIZE + rows.length}`
+                  : "0"}
+                {total !== null ? ` of ${total}` : ""} products
+              </Typography>
+              <div className="flex items-center gap-2">
+                <Button size="small" variant="outlined" disabled={!hasPrev || loading} onClick={prev}>
+                  Previous
+                </Button>
+                <Button size="small" variant="outlined" disabled={!hasNext || loading} onClick={next}>
+                  Next
+                </Button>
+              </div>
+            </div>
           </CardContent>
         </Card>
       </div>
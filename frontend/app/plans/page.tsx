@@ -162,6 +162,9 @@ export default function PlansPage() {
         planName: plan.name,
         amount,
         currency: "INR",
+        planId: plan._id,
+        storeId: pendingStoreId || undefined,
+        billingCycle: cycle,
       });
 
       const { order } = response;
@@ -192,6 +195,7 @@ export default function PlansPage() {
               currency: order.currency,
               storeId: pendingStoreId || undefined, // Use actual store ID, not slug
               storeSlug: pendingStoreSlug || undefined,
+              billingCycle: cycle,
             });
 
             if (!verification.success) {
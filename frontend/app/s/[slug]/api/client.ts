@@ -36,5 +36,11 @@ export const CustomerService = {
             store_id: storeId,
         });
         return res.data;
+    },
+
+    // 4. Product search (pass an AbortSignal to cancel a request that is no longer needed)
+    searchProducts: async (slug: string, params: Record<string, any>, signal?: AbortSignal) => {
+        const res = await customerApi.get(`/s/live/${slug}/search`, { params, signal });
+        return res.data;
     }
 };
@@ -154,6 +154,9 @@ export default function PlansPage() {
         planName: plan.name,
         amount: amount,
         currency: "INR",
+        planId: plan._id,
+        storeId: storeData?._id,
+        billingCycle: billingCycle,
       });
 
       const order = response.order || response;
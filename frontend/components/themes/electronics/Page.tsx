@@ -2,6 +2,7 @@
 import React, { useEffect, useState } from 'react';
 import Link from 'next/link';
 import { useCustomerAuth } from '../../../app/s/[slug]/api/auth';
+import { useStorefrontSearch } from '../../../hooks/useStorefrontSearch';
 
 // API
 const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000/api/v1';
@@ -22,7 +23,9 @@ async function getStoreData(slug: string) {
 function ElectronicsContent({ storeSlug, data }: { storeSlug: string, data: any }) {
     const { customer, logout } = useCustomerAuth();
     const store = data?.data?.store || { name: 'Electro Hub', tagline: 'The Future Is Wireless' };
-    const products = data?.data?.products || [];
+    const [query, setQuery] = useState('');
+    const search = useStorefrontSearch(storeSlug, query);
+    const products = search.result ? search.result.hits : (data?.data?.products || []);
 
     return (
         <div className="font-sans bg-[#0b0b0e] text-white min-h-screen w-full">
@@ -79,8 +82,17 @@ function ElectronicsContent({ storeSlug, data }: { storeSlug: string, data: any
             {/* Grid */}
             <section className="max-w-7xl mx-auto py-20 px-4">
                 <div className="flex justify-between items-end mb-12">
-                    <h2 className="text-4xl font-bold">Latest Drops</h2>
-                    <Link href="#" className="text-blue-500 font-mono text-sm underline">View all products</Link>
+                    <h2 className="text-4xl font-bold">{search.result ? `Results for "${search.query}"` : 'Latest Drops'}</h2>
+                    <div className="flex items-center gap-6">
+                        <input
+                            type="search"
+                            value={query}
+                            onChange={(e) => setQuery(e.target.value)}
+                            placeholder="Search products..."
+                            className="bg-[#16161d] border border-white/10 rounded-lg px-4 py-2 font-mono text-sm focus:outline-none focus:border-blue-500"
+                        />
+                        <Link href="#" className="text-blue-500 font-mono text-sm underline">View all products</Link>
+                    </div>
                 </div>
                 <div className="grid grid-cols-1 md:grid-cols-3 gap-6">
                     {products.length > 0 ? products.map((p: any) => (
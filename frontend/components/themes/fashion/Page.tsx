@@ -2,6 +2,7 @@
 import React, { useEffect, useState } from 'react';
 import Link from 'next/link';
 import { useCustomerAuth } from '../../../app/s/[slug]/api/auth';
+import { useStorefrontSearch } from '../../../hooks/useStorefrontSearch';
 
 // API
 const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000/api/v1';
@@ -22,7 +23,9 @@ async function getStoreData(slug: string) {
 function FashionContent({ storeSlug, data }: { storeSlug: string, data: any }) {
     const { customer, logout } = useCustomerAuth();
     const store = data?.data?.store || { name: 'Urban Vogue', tagline: 'Defining The Streets' };
-    const products = data?.data?.products || [];
+    const [query, setQuery] = useState('');
+    const search = useStorefrontSearch(storeSlug, query);
+    const products = search.result ? search.result.hits : (data?.data?.products || []);
 
     return (
         <div className="font-sans bg-white text-black min-h-screen w-full">
@@ -63,7 +66,16 @@ function FashionContent({ storeSlug, data }: { storeSlug: string, data: any }) {
             </section>
 
             <section className="py-20 px-8">
-                <h2 className="text-4xl font-black italic mb-12 text-center">NEW ARRIVALS</h2>
+                <h2 className="text-4xl font-black italic mb-6 text-center">{search.result ? `RESULTS FOR "${search.query.toUpperCase()}"` : 'NEW ARRIVALS'}</h2>
+                <div className="flex justify-center mb-12">
+                    <input
+                        type="search"
+                        value={query}
+                        onChange={(e) => setQuery(e.target.value)}
+                        placeholder="Search the collection..."
+                        className="w-full max-w-md border-b-2 border-black px-2 py-2 text-lg focus:outline-none"
+                    />
+                </div>
                 <div className="grid grid-cols-1 md:grid-cols-4 gap-8">
                     {products.length > 0 ? products.map((p: any) => (
                         <div key={p.id} className="group cursor-pointer">
@@ -81,7 +93,7 @@ function FashionContent({ storeSlug, data }: { storeSlug: string, data: any }) {
                             </div>
                         </div>
                     )) : (
-                        <div className="col-span-4 text-center">Loading collection...</div>
+                        <div className="col-span-4 text-center">{search.result ? 'No products found.' : 'Loading collection...'}</div>
                     )}
                 </div>
             </section>
@@ -0,0 +1,16 @@
+"use client";
+import { useEffect, useState } from "react";
+
+// `value`, once it has stopped changing for `delay` ms (search boxes: one request per pause, not per keystroke)
+export const useDebouncedValue = <T>(value: T, delay = 300): T => {
+  const [debounced, setDebounced] = useState(value);
+
+  useEffect(() => {
+    const timer = setTimeout(() => setDebounced(value), delay);
+    return () => clearTimeout(timer);
+  }, [value, delay]);
+
+  return debounced;
+};
+
+export default useDebouncedValue;
@@ -0,0 +1,79 @@
+"use client";
+import { useCallback, useEffect, useRef, useState } from "react";
+
+type KeysetPage<T> = { success?: boolean; data?: T[]; nextCursor?: string | null };
+
+/**
+ * One page of a keyset-paginated list endpoint at a time.
+ *
+ * `fetchPage` is called with `params` plus `limit` and `cursor`. Changing
+ * `params` (compared by value) goes back to the first page. The cursors of
+ * the pages already visited are kept, so "Previous" needs no offsets.
+ */
+export const useKeysetPages = <T = any>(
+  fetchPage: (params: Record<string, any>) => Promise<KeysetPage<T>>,
+  params: Record<string, any>,
+  limit = 50
+) => {
+  const key = JSON.stringify(params);
+  const [stack, setStack] = useState<{ key: string; cursors: (string | undefined)[] }>({
+    key,
+    cursors: [undefined],
+  });
+  const [rows, setRows] = useState<T[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loading, setLoading] = useState(true);
+  const [loaded, setLoaded] = useState(false); // the first page has been answered
+  const [reloads, setReloads] = useState(0);
+  const fetchRef = useRef(fetchPage);
+  fetchRef.current = fetchPage;
+
+  const cursors = stack.key === key ? stack.cursors : [undefined];
+  const cursor = cursors[cursors.length - 1];
+
+  useEffect(() => {
+    // A response for filters or a page the user has already left is dropped
+    let stale = false;
+    setLoading(true);
+    fetchRef.current({ ...JSON.parse(key), limit, cursor })
+      .then((res) => {
+        if (stale || !res?.success) return;
+        setRows(res.data || []);
+        setNextCursor(res.nextCursor || null);
+      })
+      .catch((err) => console.error("List fetch error:", err))
+      .finally(() => {
+        if (stale) return;
+        setLoading(false);
+        setLoaded(true);
+      });
+    return () => {
+      stale = true;
+    };
+  }, [key, cursor, limit, reloads]);
+
+  const next = useCallback(() => {
+    if (nextCursor) setStack({ key, cursors: [...cursors, nextCursor] });
+  }, [key, cursors, nextCursor]);
+
+  const prev = useCallback(() => {
+    if (cursors.length > 1) setStack({ key, cursors: cursors.slice(0, -1) });
+  }, [key, cursors]);
+
+  const reload = useCallback(() => setReloads((n) => n + 1), []);
+
+  return {
+    rows,
+    setRows,
+    loading,
+    loaded,
+    page: cursors.length,
+    hasNext: !!nextCursor,
+    hasPrev: cursors.length > 1,
+    next,
+    prev,
+    reload,
+  };
+};
+
+export default useKeysetPages;
@@ -0,0 +1,60 @@
+"use client";
+import { useEffect, useRef, useState } from "react";
+import axios from "axios";
+import { CustomerService } from "../app/s/[slug]/api/client";
+import { useDebouncedValue } from "./useDebouncedValue";
+
+// Searches remembered per store page, so deleting characters does not refetch
+const MAX_CACHED_SEARCHES = 50;
+
+/**
+ * Storefront product search (GET /s/live/{slug}/search) driven by a search box.
+ *
+ * Typing sends one request per pause, not per keystroke; a request whose query
+ * has since changed is aborted, and answers already seen are reused.
+ * `result` is null while the box is empty.
+ */
+export const useStorefrontSearch = (storeSlug: string, query: string, limit = 24) => {
+  const q = useDebouncedValue(query.trim(), 250);
+  const cache = useRef(new Map<string, any>());
+  const [result, setResult] = useState<any>(null);
+  const [loading, setLoading] = useState(false);
+
+  useEffect(() => {
+    if (!storeSlug || !q) {
+      setResult(null);
+      setLoading(false);
+      return;
+    }
+    const key = `${limit}:${q.toLowerCase()}`;
+    const cached = cache.current.get(key);
+    if (cached) {
+      setResult(cached);
+      setLoading(false);
+      return;
+    }
+
+    const controller = new AbortController();
+    setLoading(true);
+    CustomerService.searchProducts(storeSlug, { q, limit }, controller.signal)
+      .then((res: any) => {
+        if (!res?.success) return;
+        if (cache.current.size >= MAX_CACHED_SEARCHES) {
+          cache.current.delete(cache.current.keys().next().value as string);
+        }
+        cache.current.set(key, res.data);
+        setResult(res.data);
+      })
+      .catch((err) => {
+        if (!axios.isCancel(err)) console.error("Storefront search error:", err);
+      })
+      .finally(() => {
+        if (!controller.signal.aborted) setLoading(false);
+      });
+    return () => controller.abort();
+  }, [storeSlug, q, limit]);
+
+  return { result, loading, query: q };
+};
+
+export default useStorefrontSearch;
@@ -421,6 +421,11 @@ export async function createRzpOrder(payload: {
   planName: string;
   amount: number;
   currency?: string;
+  // Saved on the Razorpay order so the payment webhook can apply the
+  // subscription even if the browser never calls /verify
+  planId?: string;
+  storeId?: string;
+  billingCycle?: string;
 }) {
   const res = await api.post(`/payments/razorpay/order`, payload);
   return res.data;
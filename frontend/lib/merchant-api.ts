@@ -169,6 +169,8 @@ export const MerchantAPI = {
   products: {
     list: (params?: any) =>
       apiCall("get", "/store/products", undefined, params),
+    count: (params?: any) =>
+      apiCall("get", "/store/products/count", undefined, params),
     get: (id: string) => apiCall("get", `/store/products/${id}`),
     create: (data: any) => apiCall("post", "/store/products", data),
     update: (id: string, data: any) =>
@@ -189,9 +191,16 @@ export const MerchantAPI = {
     delete: (id: string) => apiCall("delete", `/store/categories/${id}`),
   },
 
+  // Brands
+  brands: {
+    list: (params?: any) => apiCall("get", "/store/brands", undefined, params),
+  },
+
   // Orders management
   orders: {
     list: (params?: any) => apiCall("get", "/store/orders", undefined, params),
+    count: (params?: any) =>
+      apiCall("get", "/store/orders/count", undefined, params),
     get: (id: string) => apiCall("get", `/store/orders/${id}`),
     update: (id: string, data: any) =>
       apiCall("put", `/store/orders/${id}`, data),